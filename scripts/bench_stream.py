@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+"""
+Benchmark the chat stream hot loop on one core.
+
+Each simulated stream has a producer publishing `agent.stream.delta` (and
+`chat.token`) events on the event bus and a consumer running the same steps as
+the server loop: EventQueue.drain -> NdjsonFrames.token -> one joined write per
+batch -> StreamThroughput.record. Producers run on the same event loop, so the
+whole benchmark is single-threaded and the results are per core.
+
+Reports:
+  1. sustained tokens/sec of a single unthrottled stream;
+  2. the maximum number of concurrent streams that each still receive at least
+     95% of --rate tokens/sec (doubling, then bisecting N).
+
+Usage: python scripts/bench_stream.py [--tokens 50000] [--rate 50] [--seconds 3]
+"""
+
+import argparse
+import asyncio
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from jarvis import events
+from jarvis.stream_frames import NdjsonFrames, StreamThroughput
+
+STREAM_EVENTS = ["agent.stream.delta", "agent.stream.final"]
+
+
+async def _consume(queue, stream_id: str) -> StreamThroughput:
+    frames = NdjsonFrames(stream_id, trace_id=stream_id, session_id=stream_id)
+    throughput = StreamThroughput()
+    while True:
+        batch = await queue.drain(timeout=0.25)
+        out = []
+        tokens = 0
+        final = False
+        for event_type, payload in batch:
+            if event_type == "agent.stream.delta":
+                out.append(frames.token(payload["token"]))
+                tokens += 1
+            else:
+                final = True
+                break
+        if out:
+            chunk = "".join(out)
+            throughput.record(tokens, len(chunk))
+        if final:
+            return throughput
+
+
+async def _produce(stream_id: str, tokens: int | None, rate: float | None, until: float | None) -> None:
+    interval = 1.0 / rate if rate else 0.0
+    next_at = time.monotonic()
+    sent = 0
+    while (tokens is None or sent < tokens) and (until is None or time.monotonic() < until):
+        payload = {"session_id": stream_id, "request_id": stream_id, "trace_id": stream_id, "token": "tok ", "sequence": sent}
+        events.publish("agent.stream.delta", payload)
+        events.publish("chat.token", payload)
+        sent += 1
+        if interval:
+            next_at += interval
+            delay = next_at - time.monotonic()
+            await asyncio.sleep(max(0.0, delay))
+        elif sent % 64 == 0:
+            await asyncio.sleep(0)  # let the consumer drain, as a real producer would
+    events.publish("agent.stream.final", {"session_id": stream_id, "request_id": stream_id})
+    events.publish("chat.end", {"session_id": stream_id, "request_id": stream_id})
+
+
+async def _run(streams: int, tokens: int | None, rate: float | None, seconds: float | None) -> list:
+    until = time.monotonic() + seconds if seconds else None
+    queues = [await events.subscribe_async(STREAM_EVENTS, session_filter=f"s{i}") for i in range(streams)]
+    try:
+        consumers = [asyncio.create_task(_consume(q, f"s{i}")) for i, q in enumerate(queues)]
+        await asyncio.gather(*(_produce(f"s{i}", tokens, rate, until) for i in range(streams)))
+        return await asyncio.gather(*consumers)
+    finally:
+        for q in queues:
+            q.cleanup()
+
+
+def _per_stream_rates(results: list, seconds: float) -> list:
+    return [r.tokens / seconds for r in results]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--tokens", type=int, default=50000, help="tokens for the single-stream throughput run")
+    parser.add_argument("--rate", type=float, default=50.0, help="target tokens/sec per stream for the concurrency run")
+    parser.add_argument("--seconds", type=float, default=3.0, help="duration of each concurrency step")
+    parser.add_argument("--max-streams", type=int, default=20000)
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    (single,) = asyncio.run(_run(1, args.tokens, None, None))
+    elapsed = time.perf_counter() - started
+    print(f"single stream: {single.tokens} tokens in {elapsed:.2f}s = {single.tokens / elapsed:,.0f} tok/s "
+          f"({single.writes} writes, {single.tokens / max(single.writes, 1):.1f} tokens/write)")
+
+    def sustains(n: int) -> bool:
+        results = asyncio.run(_run(n, None, args.rate, args.seconds))
+        rates = _per_stream_rates(results, args.seconds)
+        worst = min(rates)
+        ok = worst >= 0.95 * args.rate
+        print(f"  {n:6d} streams @ {args.rate:g} tok/s: worst {worst:6.1f} tok/s, "
+              f"total {sum(r.tokens for r in results) / args.seconds:,.0f} tok/s {'ok' if ok else 'FALLS BEHIND'}")
+        return ok
+
+    low, high = 0, 1
+    while high <= args.max_streams and sustains(high):
+        low, high = high, high * 2
+    high = min(high, args.max_streams + 1)
+    while high - low > max(1, low // 20):
+        mid = (low + high) // 2
+        if sustains(mid):
+            low = mid
+        else:
+            high = mid
+    print(f"max concurrent streams per core at {args.rate:g} tok/s: ~{low}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1 +1,6 @@
 """Jarvis package."""
+
+from jarvis.lazy import install_import_timer
+
+# Record per-module import cost for the startup report (JARVIS_IMPORT_TIMING=0 disables).
+install_import_timer()
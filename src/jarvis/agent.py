@@ -72,9 +72,9 @@ from jarvis.notes import (
     update_note_content,
     add_reminder,
     list_reminders,
-    get_due_reminders,
     mark_reminded,
 )
+from jarvis.reminder_scheduler import due_reminders
 from jarvis.tickets import create_ticket, get_ticket_admin, add_ticket_message
 from jarvis.prompt_manager import get_prompt_manager
 from jarvis.db import get_conn
@@ -334,6 +334,7 @@ def _tool_label(tool: str) -> str:
 def call_ollama(messages, model_profile: str = "balanced"):
     import time
     from jarvis.agent_core.orchestrator import set_last_metric
+    from jarvis.metrics import STAGE_ERRORS, observe_stage
     from jarvis.performance_metrics import get_model_profile_params
     import uuid
     start = time.time()
@@ -358,12 +359,13 @@ def call_ollama(messages, model_profile: str = "balanced"):
         trace_id=trace_id,
         is_streaming=False,
     )
+    elapsed = time.time() - start
+    observe_stage("llm", elapsed)
+    set_last_metric("llm_ms", elapsed * 1000)
     if resp.get("ok"):
-        data = resp.get("data") or {}
-        set_last_metric("llm_ms", (time.time() - start) * 1000)
-        return data
+        return resp.get("data") or {}
     error = resp.get("error") or {}
-    set_last_metric("llm_ms", (time.time() - start) * 1000)
+    STAGE_ERRORS.inc(stage="llm")
     return {"error": error.get("message") or "OLLAMA_REQUEST_FAILED", "trace_id": error.get("trace_id", trace_id)}
 
 def _format_history(messages: list[dict]) -> list[dict]:
@@ -780,7 +782,7 @@ def _handle_perf_status(user_id: str, session_id: Optional[str], ui_lang: str) -
         # Get recent performance metrics
         metrics = get_recent_performance(user_id, session_id, limit=1)
         from jarvis.agent_core.orchestrator import get_last_metrics
-        last_turn = get_last_metrics() or {}
+        last_turn = get_last_metrics(user_id) or {}
         status = format_performance_status(metrics, ui_lang)
         timings = (last_turn.get("timings") or {}) if last_turn else {}
         if timings:
@@ -1647,8 +1649,8 @@ def _run_agent_core_fallback(
             session_state.is_admin_user = is_admin_user
             session_state._admin_checked = True
 
-        # Load reminders (computed per request)
-        reminders_due = get_due_reminders(user_id_int) if session_id and user_id_int else []
+        # Fired reminders are held in memory by the reminder scheduler (no per-turn query)
+        reminders_due = due_reminders(user_id_int) if session_id and user_id_int else []
 
         # Load pending states from session state
         pending_weather = session_state.pending_weather
@@ -1969,7 +1971,7 @@ def _run_agent_core_fallback(
 
     # Performance status command
     if _perf_status_intent(prompt):
-        metrics = get_last_metrics()
+        metrics = get_last_metrics(user_id)
         if not metrics:
             reply = "Ingen performance data." if not (ui_lang or "").startswith("en") else "No performance data."
         else:
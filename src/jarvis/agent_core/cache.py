@@ -7,17 +7,54 @@ from __future__ import annotations
 import copy
 import threading
 import time
-from typing import Any, Dict, Hashable
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable
 
 
 class TTLCache:
-    """A minimal thread-safe TTL cache."""
-
-    def __init__(self, default_ttl: float = 60.0):
+    """A minimal thread-safe TTL cache.
+
+    Optionally bounded: past `max_entries` or `max_bytes` (measured with `sizeof`)
+    the least recently used entries are dropped, expired ones first.
+    """
+
+    def __init__(
+        self,
+        default_ttl: float = 60.0,
+        max_entries: int = 0,
+        max_bytes: int = 0,
+        sizeof: Callable[[Any], int] | None = None,
+    ):
         self.default_ttl = default_ttl
-        self._store: Dict[Hashable, tuple[float, Any]] = {}
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._sizeof = sizeof or (lambda value: len(value) if isinstance(value, (str, bytes)) else 0)
+        self._store: OrderedDict[Hashable, tuple[float, Any]] = OrderedDict()
+        self._sizes: Dict[Hashable, int] = {}
+        self._bytes = 0
         self._lock = threading.Lock()
 
+    def _drop(self, key: Hashable) -> None:
+        self._store.pop(key, None)
+        self._bytes -= self._sizes.pop(key, 0)
+
+    def _over(self) -> bool:
+        return (self.max_entries > 0 and len(self._store) > self.max_entries) or (
+            self.max_bytes > 0 and self._bytes > self.max_bytes
+        )
+
+    def _trim(self, now: float) -> None:
+        if not self._over():
+            return
+        for key, (expires_at, _) in list(self._store.items()):
+            if expires_at and expires_at < now:
+                self._drop(key)
+        while self._store and self._over():
+            self._drop(next(iter(self._store)))
+
+    def __len__(self) -> int:
+        return len(self._store)
+
     def get(self, key: Hashable) -> Any | None:
         """Return cached value if not expired; otherwise None."""
         now = time.time()
@@ -27,8 +64,9 @@ class TTLCache:
                 return None
             expires_at, value = entry
             if expires_at and expires_at < now:
-                self._store.pop(key, None)
+                self._drop(key)
                 return None
+            self._store.move_to_end(key)
             return copy.deepcopy(value)
 
     def set(self, key: Hashable, value: Any, ttl: float | None = None) -> None:
@@ -36,17 +74,24 @@ class TTLCache:
         ttl_seconds = self.default_ttl if ttl is None else ttl
         expires_at = 0.0 if ttl_seconds <= 0 else time.time() + ttl_seconds
         with self._lock:
+            self._drop(key)
             self._store[key] = (expires_at, copy.deepcopy(value))
+            if self.max_bytes > 0:
+                self._sizes[key] = self._sizeof(value)
+                self._bytes += self._sizes[key]
+            self._trim(time.time())
 
     def clear(self) -> None:
         """Clear all entries."""
         with self._lock:
             self._store.clear()
+            self._sizes.clear()
+            self._bytes = 0
 
     def invalidate(self, key: Hashable) -> None:
         """Remove a single key if present."""
         with self._lock:
-            self._store.pop(key, None)
+            self._drop(key)
 
 
 _code_index_stale = False
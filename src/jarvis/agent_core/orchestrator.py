@@ -2,20 +2,35 @@
 Agent orchestrator - coordinates agent execution.
 """
 
+from collections import OrderedDict
+from contextlib import nullcontext
+from contextvars import ContextVar
 from dataclasses import dataclass
 from typing import Dict, Any, Optional
 import logging
 import os
+import threading
 
+from jarvis import cancellation
 from jarvis.agent_core.state_service import AgentStateService
 from jarvis.notifications import add_notification
 import time
 import hashlib
 from jarvis.agent_core.rag_async import retrieve_code_rag_async, get_code_rag_results
+from jarvis.metrics import observe_stage
+from jarvis.tracing import span, start_trace
 
 logger = logging.getLogger(__name__)
 
+# Most recently completed turn in this process (legacy; prefer get_last_metrics(user_id)).
 last_turn_metrics: Dict[str, Any] | None = None
+# Metrics of the turn running in the current context (thread / to_thread hop).
+_current_turn_metrics: ContextVar[Dict[str, Any] | None] = ContextVar("jarvis_turn_metrics", default=None)
+# Last completed turn per user, bounded so the map can't grow with every user ever seen.
+_MAX_USERS_TRACKED = 1024
+_last_metrics_by_user: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+_last_metrics_lock = threading.Lock()
+
 @dataclass
 class TurnResult:
     reply_text: str
@@ -29,15 +44,51 @@ class TurnResult:
 
 
 def set_last_metric(key: str, value: Any) -> None:
+    """Record a metric for the turn running in this context (falls back to the process-global dict)."""
     global last_turn_metrics
+    current = _current_turn_metrics.get()
+    if current is not None:
+        current[key] = value
+        return
     if last_turn_metrics is None:
         last_turn_metrics = {}
     last_turn_metrics[key] = value
 
 
-def get_last_metrics() -> Dict[str, Any] | None:
+def get_last_metrics(user_id: str | None = None) -> Dict[str, Any] | None:
+    """Return metrics of the user's last completed turn (or the latest turn in this process)."""
+    if user_id is not None:
+        with _last_metrics_lock:
+            metrics = _last_metrics_by_user.get(user_id)
+            return dict(metrics) if metrics else None
     return last_turn_metrics.copy() if last_turn_metrics else None
 
+
+def _begin_turn_metrics():
+    return _current_turn_metrics.set({})
+
+
+def _end_turn_metrics(user_id: str, token, elapsed_s: float) -> None:
+    global last_turn_metrics
+    metrics = _current_turn_metrics.get() or {}
+    _current_turn_metrics.reset(token)
+    observe_stage("turn_total", elapsed_s)
+    timings = metrics.get("timings")
+    if isinstance(timings, dict):
+        # Not every dispatch path stamps total_ms; fill it in from the wrapper.
+        timings.setdefault("total_ms", elapsed_s * 1000)
+        for key, stage in (("memory_ms", "memory_search"), ("memory_retrieve_ms", "memory_retrieve")):
+            if isinstance(timings.get(key), (int, float)):
+                observe_stage(stage, timings[key] / 1000.0)
+    if not metrics:
+        return
+    with _last_metrics_lock:
+        _last_metrics_by_user[user_id] = metrics
+        _last_metrics_by_user.move_to_end(user_id)
+        while len(_last_metrics_by_user) > _MAX_USERS_TRACKED:
+            _last_metrics_by_user.popitem(last=False)
+    last_turn_metrics = metrics
+
 def coerce_to_turn_result(result: Dict[str, Any]) -> TurnResult:
     """Convert a legacy result dict to TurnResult."""
     return TurnResult(
@@ -128,9 +179,29 @@ def handle_turn(
     Handle a single turn of agent interaction.
     Performs initial setup and calls the internal agent implementation.
     """
+    token = _begin_turn_metrics()
+    started = time.perf_counter()
+    try:
+        # The trace's cancellation token follows the turn into tool threads and provider calls.
+        cancel_scope = cancellation.use_token(cancellation.get_token(trace_id)) if trace_id else nullcontext()
+        with start_trace(trace_id), cancel_scope, span("agent.turn", "agent", user_id=user_id, session_id=session_id):
+            return _handle_turn(user_id, prompt, session_id, allowed_tools, ui_city, ui_lang, trace_id)
+    finally:
+        _end_turn_metrics(user_id, token, time.perf_counter() - started)
+
+
+def _handle_turn(
+    user_id: str,
+    prompt: str,
+    session_id: str | None,
+    allowed_tools: list[str] | None,
+    ui_city: str | None,
+    ui_lang: str | None,
+    trace_id: str | None,
+):
     from jarvis.agent import (
         search_memory, get_recent_messages, _debug, _session_prompt_intent,
-        get_user_profile, _first_name, get_due_reminders, _load_state,
+        get_user_profile, _first_name, due_reminders, _load_state,
         get_pending_weather, get_pending_note, get_pending_reminder,
         get_pending_file, get_pending_image_preview, _detect_response_mode
     )
@@ -139,6 +210,7 @@ def handle_turn(
     import time
 
     timings = {}
+    set_last_metric("timings", timings)
     start_total = time.time()
     t0 = start_total
 
@@ -210,7 +282,7 @@ def handle_turn(
     user_id_int = (profile or {}).get("id")
     user_key = user_id
     is_admin_user = bool((profile or {}).get("is_admin"))
-    reminders_due = get_due_reminders(user_id_int) if session_id and user_id_int else []
+    reminders_due = due_reminders(user_id_int) if session_id and user_id_int else []
     pending_weather = _load_state(get_pending_weather(session_id)) if session_id else {}
     pending_note = _load_state(get_pending_note(session_id)) if session_id else {}
     pending_reminder = _load_state(get_pending_reminder(session_id)) if session_id else {}
@@ -1,35 +1,93 @@
-"""Non-blocking RAG retrieval for streaming responses."""
+"""Non-blocking RAG retrieval for streaming responses.
 
+Retrievals run on a bounded shared thread pool and are tracked as futures keyed by
+the request hash, so concurrent identical requests share one execution. Sync callers
+wait with a timeout; async callers await the same future.
+"""
+
+import asyncio
+import concurrent.futures
 import os
 import logging
 import threading
 import time
 from pathlib import Path
-from typing import Optional
+from typing import Dict, List, Optional, Tuple
+
+from jarvis.metrics import STAGE_ERRORS, observe_stage
+from jarvis.tracing import bind_context, span
 
 logger = logging.getLogger(__name__)
 
+# Cancellation is re-checked at this interval while a sync caller waits with a trace_id.
+_CANCEL_CHECK_INTERVAL = 0.05
+
+
+def _env_float(name: str, default: float) -> float:
+    try:
+        return float(os.getenv(name, "") or default)
+    except ValueError:
+        return default
+
+
+class RAGFutures:
+    """Thread-safe registry of in-flight and recently finished retrievals, keyed by request hash."""
 
-class NonBlockingRAGCache:
-    """Simple thread-safe cache for RAG results."""
     def __init__(self):
-        self.results = {}
+        self._futures: Dict[str, Tuple[concurrent.futures.Future, float]] = {}
         self.lock = threading.Lock()
-    
-    def get(self, key: str):
+
+    def get(self, key: str) -> Optional[concurrent.futures.Future]:
         with self.lock:
-            return self.results.get(key)
-    
-    def set(self, key: str, value):
+            entry = self._futures.get(key)
+            return entry[0] if entry else None
+
+    def get_or_submit(self, key: str, submit) -> Tuple[concurrent.futures.Future, bool]:
+        """Existing future for `key`, or the one `submit()` creates (second item: created)."""
         with self.lock:
-            self.results[key] = value
-    
+            self._prune_locked()
+            entry = self._futures.get(key)
+            if entry is not None and not entry[0].cancelled():
+                return entry[0], False
+            future = submit()
+            self._futures[key] = (future, time.monotonic())
+            return future, True
+
     def clear(self, key: str) -> None:
         with self.lock:
-            self.results.pop(key, None)
+            self._futures.pop(key, None)
+
+    def __len__(self) -> int:
+        with self.lock:
+            return len(self._futures)
+
+    def _prune_locked(self) -> None:
+        # Finished results are kept briefly for late readers and duplicate requests.
+        ttl = _env_float("JARVIS_RAG_RESULT_TTL", 30.0)
+        now = time.monotonic()
+        for key, (future, started) in list(self._futures.items()):
+            if future.done() and now - started > ttl:
+                del self._futures[key]
+
+
+_rag_futures = RAGFutures()
+_pool: Optional[concurrent.futures.ThreadPoolExecutor] = None
+_pool_lock = threading.Lock()
 
 
-_rag_cache = NonBlockingRAGCache()
+def _get_pool() -> concurrent.futures.ThreadPoolExecutor:
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            workers = max(1, int(_env_float("JARVIS_RAG_WORKERS", 4)))
+            _pool = concurrent.futures.ThreadPoolExecutor(max_workers=workers, thread_name_prefix="code-rag")
+        return _pool
+
+
+def _completed(value) -> concurrent.futures.Future:
+    future: concurrent.futures.Future = concurrent.futures.Future()
+    future.set_result(value)
+    return future
 
 
 def retrieve_code_rag_async(
@@ -39,46 +97,61 @@ def retrieve_code_rag_async(
     repo_root: Optional[Path] = None,
     index_dir: Optional[Path] = None,
     trace_id: str | None = None,
-) -> None:
+) -> concurrent.futures.Future:
     """
-    Retrieve code RAG results in background thread with timeout.
-    Results are stored in cache keyed by prompt_hash.
-    
+    Start code RAG retrieval on the shared pool and return its future (result: list of hits).
+    Requests with the same prompt_hash share one execution. The future never raises;
+    failures resolve to [].
+
     RAG is DISABLED by default. Enable via JARVIS_ENABLE_RAG=1 environment variable.
-    
+
     Args:
         trace_id: optional trace ID for cancellation-aware embeddings
     """
     # RAG is opt-in - disabled by default
     if os.getenv("JARVIS_ENABLE_RAG") != "1":
         logger.debug(f"Skipping RAG (JARVIS_ENABLE_RAG not set) for prompt_hash={prompt_hash}")
-        _rag_cache.set(prompt_hash, [])
-        return
+        future, _ = _rag_futures.get_or_submit(prompt_hash, lambda: _completed([]))
+        return future
 
-    def _retrieve():
+    def _retrieve() -> List:
         try:
             from jarvis.code_rag.search import search_code
 
             logger.debug(f"RAG retrieval starting for prompt_hash={prompt_hash}")
             start = time.time()
 
-            hits = search_code(
-                prompt,
-                repo_root=repo_root,
-                index_dir=index_dir,
-                k=5,
-                trace_id=trace_id,
-            )
-            
-            _rag_cache.set(prompt_hash, hits)
+            with span("code_rag.search", "rag"):
+                hits = search_code(
+                    prompt,
+                    repo_root=repo_root,
+                    index_dir=index_dir,
+                    k=5,
+                    trace_id=trace_id,
+                )
+            observe_stage("code_rag", time.time() - start)
+            return hits
         except Exception as e:
+            STAGE_ERRORS.inc(stage="code_rag")
             logger.warning(
                 f"RAG retrieval failed for prompt_hash={prompt_hash}: {type(e).__name__}: {e}"
             )
-            _rag_cache.set(prompt_hash, [])
-    
-    thread = threading.Thread(target=_retrieve, daemon=True)
-    thread.start()
+            return []
+
+    future, created = _rag_futures.get_or_submit(prompt_hash, lambda: _get_pool().submit(bind_context(_retrieve)))
+    if not created:
+        logger.debug(f"RAG retrieval deduplicated for prompt_hash={prompt_hash}")
+    return future
+
+
+def _is_cancelled(trace_id: str | None) -> bool:
+    if not trace_id:
+        return False
+    try:
+        from jarvis.server import check_stream_cancelled_sync
+        return check_stream_cancelled_sync(trace_id)
+    except Exception:
+        return False
 
 
 def get_code_rag_results(
@@ -86,30 +159,27 @@ def get_code_rag_results(
     max_wait: float = 0.1,
     trace_id: str | None = None,
 ):
-    """Get RAG results if available (non-blocking)."""
-    start = time.time()
-    
-    while time.time() - start < max_wait:
-        # Check if stream has been cancelled
-        if trace_id:
-            try:
-                from jarvis.server import check_stream_cancelled_sync
-                if check_stream_cancelled_sync(trace_id):
-                    logger.debug(f"RAG cancelled: trace={trace_id}")
-                    _rag_cache.clear(prompt_hash)
-                    return []
-            except Exception:
-                pass
-        
-        results = _rag_cache.get(prompt_hash)
-        if results is not None:
-            _rag_cache.clear(prompt_hash)  # Clean up
-            return results
-        time.sleep(0.01)
-    
-    logger.debug(f"RAG timeout for prompt_hash={prompt_hash} (waited {max_wait:.2f}s)")
-    _rag_cache.clear(prompt_hash)
-    return []
+    """Get RAG results, waiting up to max_wait seconds; [] on timeout, cancellation or unknown hash."""
+    future = _rag_futures.get(prompt_hash)
+    if future is None:
+        return []
+    deadline = time.monotonic() + max_wait
+    while True:
+        if _is_cancelled(trace_id):
+            logger.debug(f"RAG cancelled: trace={trace_id}")
+            return []
+        remaining = deadline - time.monotonic()
+        if remaining <= 0 and not future.done():
+            logger.debug(f"RAG timeout for prompt_hash={prompt_hash} (waited {max_wait:.2f}s)")
+            return []
+        # Wakes as soon as the result is set; the slice only bounds cancellation latency.
+        step = min(remaining, _CANCEL_CHECK_INTERVAL) if trace_id else remaining
+        try:
+            return future.result(timeout=max(step, 0))
+        except concurrent.futures.TimeoutError:
+            continue
+        except Exception:
+            return []
 
 
 def wait_for_code_rag_results(
@@ -117,15 +187,22 @@ def wait_for_code_rag_results(
     timeout: float = 1.0,
 ):
     """Wait for RAG results with timeout."""
-    start = time.time()
-    
-    while time.time() - start < timeout:
-        results = _rag_cache.get(prompt_hash)
-        if results is not None:
-            _rag_cache.clear(prompt_hash)
-            return results
-        time.sleep(0.05)
-    
-    logger.debug(f"RAG timeout for prompt_hash={prompt_hash} (waited {timeout:.2f}s)")
-    _rag_cache.clear(prompt_hash)
-    return []
+    return get_code_rag_results(prompt_hash, max_wait=timeout)
+
+
+async def await_code_rag_results(
+    prompt_hash: str,
+    timeout: float = 1.0,
+):
+    """Await RAG results from async code without blocking the event loop; [] on timeout."""
+    future = _rag_futures.get(prompt_hash)
+    if future is None:
+        return []
+    try:
+        # shield: a timeout here must not cancel the retrieval shared with other waiters
+        return await asyncio.wait_for(asyncio.shield(asyncio.wrap_future(future)), timeout)
+    except asyncio.TimeoutError:
+        logger.debug(f"RAG timeout for prompt_hash={prompt_hash} (waited {timeout:.2f}s)")
+        return []
+    except Exception:
+        return []
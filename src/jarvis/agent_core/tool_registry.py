@@ -10,9 +10,13 @@ from dataclasses import dataclass
 from typing import Any, Dict, Callable, Optional
 from datetime import datetime, timezone
 
+from jarvis import cancellation
 from jarvis.db import get_conn
 from jarvis.agent_core.cache import TTLCache
 from jarvis.events import publish as publish_event
+from jarvis.metrics import TOOL_CALLS, TOOL_SECONDS
+from jarvis.startup import register_startup_step
+from jarvis.tracing import bind_context, span
 import traceback
 import uuid
 import logging
@@ -144,8 +148,25 @@ class ToolRunner:
         return None
 
     def _run_once(self, fn: Callable, args: Dict[str, Any], timeout: float) -> Any:
-        future = self._executor.submit(fn, **args)
-        return future.result(timeout=timeout)
+        token = cancellation.current_token()
+        if token is None:
+            future = self._executor.submit(bind_context(fn), **args)
+            return future.result(timeout=timeout)
+        token.raise_if_cancelled()
+        future = self._executor.submit(bind_context(fn), **args)
+        # Wake on whichever comes first: the tool result, the stop request, or the timeout.
+        done, _ = concurrent.futures.wait(
+            [future, token.as_future()], timeout=timeout, return_when=concurrent.futures.FIRST_COMPLETED
+        )
+        if future in done:
+            return future.result()
+        if token.cancelled:
+            # A worker already running can't be interrupted; it is abandoned and its
+            # result discarded. Its own Ollama calls see the same token and abort.
+            future.cancel()
+            token.mark_released("tool")
+            raise cancellation.OperationCancelled(token.reason or "cancelled")
+        raise concurrent.futures.TimeoutError()
 
     def run(
         self,
@@ -155,10 +176,26 @@ class ToolRunner:
         session_id: Optional[str] = None,
         timeout: Optional[float] = None,
         retries: Optional[int] = None,
+    ) -> ToolResult:
+        with span(f"tool.{name}", "tool", tool=name) as tool_span:
+            result = self._run(name, args, user_id, session_id, timeout, retries)
+            if tool_span is not None:
+                tool_span.set(ok=result.ok, tool_trace_id=result.trace_id)
+            return result
+
+    def _run(
+        self,
+        name: str,
+        args: Dict[str, Any],
+        user_id: int,
+        session_id: Optional[str],
+        timeout: Optional[float],
+        retries: Optional[int],
     ) -> ToolResult:
         trace_id = uuid.uuid4().hex[:8]
         allowlist_res = self._enforce_allowlist(name, trace_id)
         if allowlist_res:
+            TOOL_CALLS.inc(tool=name, outcome="denied")
             return allowlist_res
 
         spec, fn = _tool_registry[name]
@@ -169,6 +206,7 @@ class ToolRunner:
             cached = _tool_cache.get(cache_key)
             if cached is not None:
                 _record_cache_metric({"tool": name, "cache": "hit"})
+                TOOL_CALLS.inc(tool=name, outcome="cache_hit")
                 return cached
         _record_cache_metric({"tool": name, "cache": "miss"})
 
@@ -196,12 +234,22 @@ class ToolRunner:
             pass
 
         attempt = 0
+        cancelled = False
         while attempt <= retries_val:
             attempt_start = time.time()
             try:
                 result = self._run_once(fn, args or {}, timeout=timeout_val)
                 success = True
                 break
+            except cancellation.OperationCancelled as e:
+                cancelled = True
+                error_obj = {
+                    "type": "ClientCancelled",
+                    "message": f"Tool '{name}' cancelled: {e}",
+                    "trace_id": trace_id,
+                    "where": name,
+                }
+                log.info("Tool %s cancelled (trace_id=%s)", name, trace_id)
             except concurrent.futures.TimeoutError:
                 error_obj = {
                     "type": "TimeoutError",
@@ -221,7 +269,7 @@ class ToolRunner:
             finally:
                 latency_ms = (time.time() - attempt_start) * 1000
                 _audit_tool_call(user_id, session_id, name, args or {}, success, latency_ms)
-            if success:
+            if success or cancelled:
                 break
             attempt += 1
             if attempt <= retries_val:
@@ -243,6 +291,16 @@ class ToolRunner:
 
         ended_at = time.time()
         duration_ms = (ended_at - t_start) * 1000
+        if success:
+            outcome = "ok"
+        elif error_obj and error_obj.get("type") == "TimeoutError":
+            outcome = "timeout"
+        elif cancelled:
+            outcome = "cancelled"
+        else:
+            outcome = "error"
+        TOOL_SECONDS.observe(duration_ms / 1000.0, tool=name, outcome=outcome)
+        TOOL_CALLS.inc(tool=name, outcome=outcome)
         input_summary = _redact_args(args or {})
         tool_result = ToolResult(
             tool_name=name,
@@ -483,8 +541,8 @@ def _reset_registry_for_tests() -> None:
         pass
 
 
-# Initialize allowlist on import
-_load_allowlist()
+# Load the allowlist during server startup rather than on import; calls load it lazily too.
+register_startup_step(_load_allowlist)
 
 # Import adapters to register tools
 try:
@@ -2,13 +2,37 @@
 
 from __future__ import annotations
 
+import base64
+import binascii
+import hashlib
+import io
 import os
 import re
 import requests
 from typing import Callable
 
+from jarvis.agent_core.cache import TTLCache
+from jarvis.lazy import is_installed, lazy_import
 from jarvis.agent_policy.language import _should_translate_vision_response
 
+# Pillow is optional (images are sent as-is without it) and only imported on first use.
+Image = lazy_import("PIL.Image") if is_installed("PIL") else None
+
+# Bump whenever the vision prompts or validation rules change so cached
+# descriptions produced by older prompts are not reused.
+VISION_PROMPT_VERSION = "1"
+
+# Prepared payloads are full base64 images, so that cache is LRU-bounded by bytes as well as count.
+_prepared_image_cache = TTLCache(
+    default_ttl=float(os.getenv("OLLAMA_VISION_CACHE_TTL", "3600") or 3600),
+    max_entries=int(os.getenv("OLLAMA_VISION_CACHE_MAX_ITEMS", "32") or 32),
+    max_bytes=int(float(os.getenv("OLLAMA_VISION_CACHE_MB", "64") or 64) * 1024 * 1024),
+)
+_description_cache = TTLCache(
+    default_ttl=float(os.getenv("OLLAMA_VISION_CACHE_TTL", "3600") or 3600),
+    max_entries=1024,
+)
+
 
 def _get_debug() -> Callable[[str], None]:
     """Lazy importer to avoid circular imports when debug logging is needed."""
@@ -31,6 +55,74 @@ def _ollama_base_url() -> str:
     return "http://127.0.0.1:11434"
 
 
+def _vision_max_side() -> int:
+    try:
+        return max(64, int(os.getenv("OLLAMA_VISION_MAX_SIDE", "1024")))
+    except ValueError:
+        return 1024
+
+
+def _vision_jpeg_quality() -> int:
+    try:
+        return min(95, max(30, int(os.getenv("OLLAMA_VISION_JPEG_QUALITY", "85"))))
+    except ValueError:
+        return 85
+
+
+def _prepare_vision_image(b64: str) -> tuple[str, str]:
+    """
+    Downscale and recompress an image for the vision model.
+    Returns (payload_b64, image_hash). The hash is taken from the original bytes
+    so the same upload always maps to the same cache entries. Falls back to the
+    original payload when Pillow is missing or the image cannot be decoded (e.g. SVG).
+    """
+    try:
+        raw = base64.b64decode(b64, validate=False)
+    except (binascii.Error, ValueError):
+        raw = b64.encode("utf-8")
+    image_hash = hashlib.sha256(raw).hexdigest()
+    max_side = _vision_max_side()
+    quality = _vision_jpeg_quality()
+    cache_key = (image_hash, max_side, quality)
+    cached = _prepared_image_cache.get(cache_key)
+    if cached is not None:
+        return cached, image_hash
+
+    prepared = b64
+    if Image is not None:
+        try:
+            with Image.open(io.BytesIO(raw)) as img:
+                img.load()
+                resized = max(img.size) > max_side
+                if resized:
+                    img.thumbnail((max_side, max_side), Image.LANCZOS)
+                if img.mode in ("RGBA", "LA", "P"):
+                    rgba = img.convert("RGBA")
+                    flat = Image.new("RGB", rgba.size, (255, 255, 255))
+                    flat.paste(rgba, mask=rgba.split()[-1])
+                    img = flat
+                elif img.mode != "RGB":
+                    img = img.convert("RGB")
+                buf = io.BytesIO()
+                img.save(buf, format="JPEG", quality=quality, optimize=True)
+                encoded = buf.getvalue()
+            # Only keep the recompressed version when it actually saves bytes
+            # or the image had to be shrunk to fit the model.
+            if resized or len(encoded) < len(raw):
+                prepared = base64.b64encode(encoded).decode("ascii")
+        except Exception as exc:
+            if os.getenv("JARVIS_DEBUG_IMAGE", "0") == "1":
+                _get_debug()(f"🖼️ Image preprocessing skipped: {exc}")
+    _prepared_image_cache.set(cache_key, prepared)
+    return prepared, image_hash
+
+
+def clear_vision_caches() -> None:
+    """Drop prepared payloads and cached descriptions."""
+    _prepared_image_cache.clear()
+    _description_cache.clear()
+
+
 def _translate_to_danish_if_needed(text: str) -> str:
     messages = [
         {"role": "system", "content": "Oversæt til dansk. Bevar fakta og betydning. Svar kun med oversættelsen."},
@@ -752,8 +844,26 @@ def _describe_image_ollama(b64: str, is_admin: bool, ui_lang: str | None) -> tup
     url = _ollama_base_url() + "/api/generate"
     debug = _get_debug()
 
+    image_b64, image_hash = _prepare_vision_image(b64)
+    cache_key = (image_hash, model, VISION_PROMPT_VERSION, "da" if lang.startswith("da") else "en")
+    cached = _description_cache.get(cache_key)
+    if cached is not None:
+        if os.getenv("JARVIS_DEBUG_IMAGE", "0") == "1":
+            debug(f"🖼️ Image description cache hit: hash={image_hash[:12]}")
+        return cached, None
+
     if os.getenv("JARVIS_DEBUG_IMAGE", "0") == "1":
-        debug(f"🖼️ Image analysis request: model={model}, lang={lang}")
+        debug(
+            f"🖼️ Image analysis request: model={model}, lang={lang}, "
+            f"bytes_in={len(b64)}, bytes_sent={len(image_b64)}"
+        )
+
+    options = {"num_ctx": ctx, "num_predict": 200}
+    if num_gpu is not None:
+        try:
+            options["num_gpu"] = int(num_gpu)
+        except ValueError:
+            pass
 
     for attempt in range(3):
         if attempt == 0:
@@ -763,18 +873,14 @@ def _describe_image_ollama(b64: str, is_admin: bool, ui_lang: str | None) -> tup
         else:
             current_prompt = ultra_strict_prompt
 
+        # Retries only swap the prompt; the prepared image payload is reused.
         payload = {
             "model": model,
             "prompt": current_prompt,
-            "images": [b64],
+            "images": [image_b64],
             "stream": False,
-            "options": {"num_ctx": ctx, "num_predict": 200},
+            "options": dict(options),
         }
-        if num_gpu is not None:
-            try:
-                payload["options"]["num_gpu"] = int(num_gpu)
-            except ValueError:
-                pass
 
         text, err = _try_generate(payload, 30)
         if err:
@@ -805,12 +911,16 @@ def _describe_image_ollama(b64: str, is_admin: bool, ui_lang: str | None) -> tup
 
         if lang.startswith("da") and _should_translate_vision_response(text, lang):
             text = _translate_to_danish_if_needed(text)
+        _description_cache.set(cache_key, text)
         return text, None
 
     return None, "Alle forsøg fejlede"
 
 
 __all__ = [
+    "VISION_PROMPT_VERSION",
+    "clear_vision_caches",
+    "_prepare_vision_image",
     "_ollama_base_url",
     "_translate_to_danish_if_needed",
     "_looks_like_refusal",
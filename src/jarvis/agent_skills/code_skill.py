@@ -81,6 +81,35 @@ def _symbol_usage_intent(prompt: str) -> str | None:
     return None
 
 
+def _definition_intent(prompt: str) -> str | None:
+    match = re.search(r"where\s+is\s+`?([a-zA-Z0-9_.]+)`?\s+defined", prompt, flags=re.I)
+    if match:
+        return match.group(1).strip()
+    match = re.search(r"hvor\s+er\s+`?([a-zA-Z0-9_.]+)`?\s+defineret", prompt, flags=re.I)
+    if match:
+        return match.group(1).strip()
+    match = re.search(r"(?:definition(?:en)?\s+(?:of|af)|go\s+to\s+definition)\s+`?([a-zA-Z0-9_.]+)", prompt, flags=re.I)
+    if match:
+        return match.group(1).strip()
+    return None
+
+
+def _callers_intent(prompt: str) -> str | None:
+    match = re.search(r"(?:who|what)\s+calls\s+`?([a-zA-Z0-9_.]+)", prompt, flags=re.I)
+    if match:
+        return match.group(1).strip()
+    match = re.search(r"hvem\s+kalder\s+`?([a-zA-Z0-9_.]+)", prompt, flags=re.I)
+    if match:
+        return match.group(1).strip()
+    match = re.search(r"callers\s+of\s+`?([a-zA-Z0-9_.]+)", prompt, flags=re.I)
+    if match:
+        return match.group(1).strip()
+    match = re.search(r"where\s+is\s+`?([a-zA-Z0-9_.]+)`?\s+called", prompt, flags=re.I)
+    if match:
+        return match.group(1).strip()
+    return None
+
+
 def _test_fail_intent(prompt: str) -> str | None:
     match = re.search(r"test\s+([a-zA-Z0-9_/.:-]+)", prompt, flags=re.I)
     if match and ("fejl" in prompt.lower() or "fail" in prompt.lower()):
@@ -146,6 +175,68 @@ def _next_step_suggestion(ui_lang: str | None = None) -> str:
     return "Næste skridt: Bed mig vise hele kodeudsnittet eller forklare en bestemt del."
 
 
+def _symbol_reply(
+    definition: str | None,
+    usage: str | None,
+    repo_root: Path | None,
+    index_dir: Path | None,
+    ui_lang: str | None = None,
+    limit: int = 10,
+) -> tuple[str, dict] | None:
+    """Answer definition / call-site questions from the AST symbol index; None if it has no answer."""
+    from jarvis.code_rag.symbols import ensure_symbol_index
+
+    symbol = definition or usage
+    if not symbol:
+        return None
+    try:
+        index = ensure_symbol_index(repo_root, index_dir)
+    except Exception:
+        return None
+    en = bool(ui_lang and ui_lang.lower().startswith("en"))
+    defs = index.definitions(symbol)
+    calls = index.callers(symbol) if usage else []
+    imports = index.imports(symbol) if usage else []
+    if not defs and not calls:
+        return None
+
+    lines = []
+    if usage:
+        lines.append(
+            f"Short answer: `{symbol}` is called from {len(calls)} place(s)."
+            if en
+            else f"Kort svar: `{symbol}` kaldes fra {len(calls)} sted(er)."
+        )
+    else:
+        lines.append(
+            f"Short answer: `{symbol}` is defined in {len(defs)} place(s)."
+            if en
+            else f"Kort svar: `{symbol}` er defineret {len(defs)} sted(er)."
+        )
+    if defs:
+        lines.append("Definitions:" if en else "Definitioner:")
+        lines.extend(f"- {d.path}:{d.start_line}-{d.end_line} ({d.kind} {d.qualname})" for d in defs[:limit])
+    if calls:
+        lines.append("Call sites:" if en else "Kaldes fra:")
+        for c in calls[:limit]:
+            where = c.scope or ("module level" if en else "modulniveau")
+            lines.append(f"- {c.path}:{c.line} in {where}" if en else f"- {c.path}:{c.line} i {where}")
+    if imports:
+        lines.append("Imported in:" if en else "Importeres i:")
+        lines.extend(f"- {i.path}:{i.line}" for i in imports[:limit])
+    hidden = max(0, len(defs) - limit) + max(0, len(calls) - limit) + max(0, len(imports) - limit)
+    if hidden:
+        lines.append(f"(+{hidden} more)" if en else f"(+{hidden} flere)")
+
+    payload = {
+        "tool": "code_symbols",
+        "symbol": symbol,
+        "definitions": [{"path": d.path, "start_line": d.start_line, "end_line": d.end_line, "kind": d.kind} for d in defs[:limit]],
+        "call_sites": [{"path": c.path, "line": c.line, "scope": c.scope} for c in calls[:limit]],
+    }
+    return "\n".join(lines), payload
+
+
 def _no_hits_reply(ui_lang: str | None = None) -> str:
     if ui_lang and ui_lang.lower().startswith("en"):
         return "I could not find anything relevant in the codebase right now."
@@ -240,6 +331,21 @@ def handle_code_question(
         add_memory("assistant", reply, user_id=user_id)
         return {"text": reply, "meta": {"tool": "pytest_triage", "tool_used": True}}
 
+    # Exact answers for "where is X defined" / "who calls X" come from the symbol index, no RAG needed.
+    definition_intent = _definition_intent(prompt) or _function_intent(prompt)
+    usage_intent = _callers_intent(prompt) or _symbol_usage_intent(prompt)
+    if (definition_intent or usage_intent) and not _file_explain_intent(prompt):
+        symbol_answer = _symbol_reply(definition_intent if not usage_intent else None, usage_intent, repo_root, index_dir, ui_lang)
+        if symbol_answer:
+            reply, payload = symbol_answer
+            if reminders_due and should_attach_reminders and should_attach_reminders(prompt):
+                reply = prepend_reminders(reply, reminders_due, user_id_int)  # type: ignore[arg-type]
+            if session_id and state:
+                state.set_last_tool(json.dumps(payload, ensure_ascii=False))
+                state.add_message("assistant", reply)
+            add_memory("assistant", reply, user_id=user_id)
+            return {"text": reply, "meta": {"tool": "code_symbols", "tool_used": True}}
+
     query = prompt
     short_answer = None
 
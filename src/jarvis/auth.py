@@ -1,6 +1,9 @@
+import asyncio
+import concurrent.futures
 import hashlib
 import hmac
 import os
+import threading
 import uuid
 from datetime import datetime, timezone, timedelta
 from dataclasses import dataclass
@@ -21,37 +24,143 @@ def _cfg():
     return _config
 
 
-def _hash_password(password: str, salt: bytes | None = None) -> str:
+# Stored format: "pbkdf2_sha256$<iterations>$<salt hex>$<digest hex>". Hashes from
+# before the cost became tunable are "<salt hex>:<digest hex>" at 120k iterations.
+_HASH_SCHEME = "pbkdf2_sha256"
+_LEGACY_ITERATIONS = 120_000
+
+
+def _password_iterations() -> int:
+    try:
+        return max(10_000, int(os.getenv("JARVIS_PASSWORD_ITERATIONS", str(_LEGACY_ITERATIONS))))
+    except ValueError:
+        return _LEGACY_ITERATIONS
+
+
+def _pbkdf2(password: str, salt: bytes, iterations: int) -> bytes:
+    return hashlib.pbkdf2_hmac("sha256", password.encode("utf-8"), salt, iterations)
+
+
+def _hash_password(password: str, salt: bytes | None = None, iterations: int | None = None) -> str:
     if salt is None:
         salt = os.urandom(16)
-    digest = hashlib.pbkdf2_hmac("sha256", password.encode("utf-8"), salt, 120_000)
-    return salt.hex() + ":" + digest.hex()
+    iterations = iterations or _password_iterations()
+    digest = _pbkdf2(password, salt, iterations)
+    return f"{_HASH_SCHEME}${iterations}${salt.hex()}${digest.hex()}"
+
+
+def _parse_password_hash(stored: str) -> tuple[int, bytes, bytes]:
+    if stored.startswith(_HASH_SCHEME + "$"):
+        _, iterations, salt_hex, digest_hex = stored.split("$", 3)
+        return int(iterations), bytes.fromhex(salt_hex), bytes.fromhex(digest_hex)
+    salt_hex, digest_hex = stored.split(":", 1)
+    return _LEGACY_ITERATIONS, bytes.fromhex(salt_hex), bytes.fromhex(digest_hex)
 
 
 def _verify_password(password: str, stored: str) -> bool:
     try:
-        salt_hex, digest_hex = stored.split(":", 1)
-        salt = bytes.fromhex(salt_hex)
-        candidate = _hash_password(password, salt)
-        return hmac.compare_digest(candidate, stored)
+        iterations, salt, digest = _parse_password_hash(stored)
+        return hmac.compare_digest(_pbkdf2(password, salt, iterations), digest)
     except Exception:
         return False
 
 
-def verify_user_password(user_id: int, password: str) -> bool:
+def _needs_rehash(stored: str) -> bool:
+    """True when the hash predates the current format or iteration count."""
+    try:
+        iterations, _, _ = _parse_password_hash(stored)
+    except Exception:
+        return False
+    return not stored.startswith(_HASH_SCHEME + "$") or iterations != _password_iterations()
+
+
+# PBKDF2 is pure CPU (and releases the GIL), so it runs on a small dedicated pool
+# instead of the event loop or the default to_thread pool shared with I/O work.
+class PasswordHashBusy(RuntimeError):
+    """Raised when too many hash/verify jobs are already queued."""
+
+
+_hash_pool: concurrent.futures.ThreadPoolExecutor | None = None
+_hash_pool_lock = threading.Lock()
+_hash_pending = 0
+
+
+def _hash_workers() -> int:
+    try:
+        return max(1, int(os.getenv("JARVIS_PASSWORD_WORKERS", str(min(2, os.cpu_count() or 1)))))
+    except ValueError:
+        return 1
+
+
+def _hash_queue_max() -> int:
+    try:
+        return max(1, int(os.getenv("JARVIS_PASSWORD_QUEUE_MAX", "64")))
+    except ValueError:
+        return 64
+
+
+def _get_hash_pool() -> concurrent.futures.ThreadPoolExecutor:
+    global _hash_pool
+    with _hash_pool_lock:
+        if _hash_pool is None:
+            _hash_pool = concurrent.futures.ThreadPoolExecutor(
+                max_workers=_hash_workers(), thread_name_prefix="password-hash"
+            )
+        return _hash_pool
+
+
+async def _run_on_hash_pool(fn, *args):
+    global _hash_pending
+    with _hash_pool_lock:
+        if _hash_pending >= _hash_queue_max():
+            raise PasswordHashBusy("password hashing queue is full")
+        _hash_pending += 1
+    try:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(_get_hash_pool(), fn, *args)
+    finally:
+        with _hash_pool_lock:
+            _hash_pending -= 1
+
+
+async def hash_password_async(password: str) -> str:
+    return await _run_on_hash_pool(_hash_password, password)
+
+
+async def verify_password_async(password: str, stored: str) -> bool:
+    return await _run_on_hash_pool(_verify_password, password, stored)
+
+
+def shutdown_hash_pool() -> None:
+    global _hash_pool
+    with _hash_pool_lock:
+        pool, _hash_pool = _hash_pool, None
+    if pool is not None:
+        pool.shutdown(wait=False)
+
+
+def _get_password_hash(user_id: int) -> str | None:
     with get_conn() as conn:
         row = conn.execute(
             "SELECT password_hash FROM users WHERE id = ?",
             (user_id,),
         ).fetchone()
-        if not row:
-            return False
-        return _verify_password(password, row["password_hash"])
+    return row["password_hash"] if row else None
 
 
-def register_user(
+def verify_user_password(user_id: int, password: str) -> bool:
+    stored = _get_password_hash(user_id)
+    return bool(stored) and _verify_password(password, stored)
+
+
+async def verify_user_password_async(user_id: int, password: str) -> bool:
+    stored = _get_password_hash(user_id)
+    return bool(stored) and await verify_password_async(password, stored)
+
+
+def _create_user(
     username: str,
-    password: str,
+    password_hash: str,
     is_admin: int = 0,
     email: str | None = None,
     full_name: str | None = None,
@@ -61,7 +170,6 @@ def register_user(
     note: str | None = None,
 ) -> dict:
     now = datetime.now(timezone.utc).isoformat()
-    password_hash = _hash_password(password)
     with get_conn() as conn:
         conn.execute(
             "INSERT INTO users (username, password_hash, email, full_name, last_name, city, phone, note, is_admin, is_disabled, created_at, last_seen) "
@@ -81,26 +189,87 @@ def register_user(
     }
 
 
-def login_user(username: str, password: str) -> dict | None:
+def register_user(
+    username: str,
+    password: str,
+    is_admin: int = 0,
+    email: str | None = None,
+    full_name: str | None = None,
+    last_name: str | None = None,
+    city: str | None = None,
+    phone: str | None = None,
+    note: str | None = None,
+) -> dict:
+    return _create_user(
+        username,
+        _hash_password(password),
+        is_admin,
+        email=email,
+        full_name=full_name,
+        last_name=last_name,
+        city=city,
+        phone=phone,
+        note=note,
+    )
+
+
+async def register_user_async(username: str, password: str, is_admin: int = 0, **profile) -> dict:
+    """register_user with the hash computed on the password pool; profile kwargs as register_user."""
+    return _create_user(username, await hash_password_async(password), is_admin, **profile)
+
+
+def _get_login_row(username: str):
     with get_conn() as conn:
-        row = conn.execute(
+        return conn.execute(
             "SELECT id, password_hash, is_disabled FROM users WHERE username = ?",
             (username,),
         ).fetchone()
-        if not row or not _verify_password(password, row["password_hash"]):
-            return None
-        if row["is_disabled"]:
-            return {"disabled": True}
 
-        token = uuid.uuid4().hex
-        now = datetime.now(timezone.utc)
-        expires_at = now + timedelta(hours=_cfg().cookie_ttl_seconds / 3600)
+
+def _store_rehash(user_id: int, old_hash: str, new_hash: str) -> None:
+    # Compare-and-set so a password change racing with the login isn't overwritten.
+    with get_conn() as conn:
+        conn.execute(
+            "UPDATE users SET password_hash = ? WHERE id = ? AND password_hash = ?",
+            (new_hash, user_id, old_hash),
+        )
+        conn.commit()
+
+
+def _issue_login_token(user_id: int) -> dict:
+    token = uuid.uuid4().hex
+    now = datetime.now(timezone.utc)
+    expires_at = now + timedelta(hours=_cfg().cookie_ttl_seconds / 3600)
+    with get_conn() as conn:
         conn.execute(
             "UPDATE users SET token = ?, token_expires_at = ?, last_seen = ? WHERE id = ?",
-            (token, expires_at.isoformat(), now.isoformat(), row["id"]),
+            (token, expires_at.isoformat(), now.isoformat(), user_id),
         )
         conn.commit()
-        return {"token": token, "expires_at": expires_at.isoformat()}
+    return {"token": token, "expires_at": expires_at.isoformat()}
+
+
+def login_user(username: str, password: str) -> dict | None:
+    row = _get_login_row(username)
+    if not row or not _verify_password(password, row["password_hash"]):
+        return None
+    if row["is_disabled"]:
+        return {"disabled": True}
+    if _needs_rehash(row["password_hash"]):
+        _store_rehash(row["id"], row["password_hash"], _hash_password(password))
+    return _issue_login_token(row["id"])
+
+
+async def login_user_async(username: str, password: str) -> dict | None:
+    """Same as login_user, with hashing on the password pool instead of the caller's thread."""
+    row = _get_login_row(username)
+    if not row or not await verify_password_async(password, row["password_hash"]):
+        return None
+    if row["is_disabled"]:
+        return {"disabled": True}
+    if _needs_rehash(row["password_hash"]):
+        _store_rehash(row["id"], row["password_hash"], await hash_password_async(password))
+    return _issue_login_token(row["id"])
 
 
 def get_user_by_token(token: str | None) -> dict | None:
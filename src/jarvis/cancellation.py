@@ -0,0 +1,244 @@
+"""
+Per-trace cancellation tokens that abort in-flight I/O.
+
+A stop request cancels the token for its trace_id. Cancelling runs the registered
+callbacks immediately, from the stopping thread: HTTP sockets opened through
+`cancellable_session()` are shut down, so a blocking `requests.post` to Ollama
+returns at once instead of after the generation finishes, and waiters such as
+ToolRunner stop waiting. Work that notices the cancellation calls
+`token.mark_released(resource)`, which records stop -> released latency in
+`jarvis_cancel_release_seconds`.
+"""
+
+from __future__ import annotations
+
+import concurrent.futures
+import contextvars
+import logging
+import socket
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, List, Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.connection import HTTPConnection, HTTPSConnection
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+
+from jarvis.metrics import REGISTRY
+
+logger = logging.getLogger(__name__)
+
+CANCEL_RELEASE_SECONDS = REGISTRY.histogram(
+    "jarvis_cancel_release_seconds",
+    "Time from a stop request until the backend resource (ollama, tool, embedding) was released.",
+    ("resource",),
+    buckets=(0.001, 0.005, 0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0),
+)
+
+MAX_TOKENS = 2048
+
+
+class OperationCancelled(RuntimeError):
+    """Raised by `raise_if_cancelled` and cancellable waits once the token is cancelled."""
+
+
+class CancellationToken:
+    def __init__(self, trace_id: str) -> None:
+        self.trace_id = trace_id
+        self.reason: str | None = None
+        self.cancelled_at: float | None = None
+        self.released: Dict[str, float] = {}
+        self._event = threading.Event()
+        self._future: concurrent.futures.Future = concurrent.futures.Future()
+        self._callbacks: Dict[int, Callable[[], None]] = {}
+        self._next_id = 0
+        self._lock = threading.Lock()
+
+    @property
+    def cancelled(self) -> bool:
+        return self._event.is_set()
+
+    def cancel(self, reason: str | None = None) -> bool:
+        """Cancel and run callbacks once; False if it was already cancelled."""
+        with self._lock:
+            if self._event.is_set():
+                return False
+            self.reason = reason
+            self.cancelled_at = time.monotonic()
+            self._event.set()
+            callbacks = list(self._callbacks.values())
+            self._callbacks.clear()
+        self._future.set_result(reason)
+        for callback in callbacks:
+            try:
+                callback()
+            except Exception as exc:
+                logger.debug("cancel callback failed (trace_id=%s): %s", self.trace_id, exc)
+        return True
+
+    def on_cancel(self, callback: Callable[[], None]) -> Callable[[], None]:
+        """Run `callback` on cancellation (now, if already cancelled). Returns an unregister function."""
+        with self._lock:
+            if not self._event.is_set():
+                handle = self._next_id
+                self._next_id += 1
+                self._callbacks[handle] = callback
+                return lambda: self._callbacks.pop(handle, None)
+        callback()
+        return lambda: None
+
+    def raise_if_cancelled(self) -> None:
+        if self._event.is_set():
+            raise OperationCancelled(self.reason or "cancelled")
+
+    def wait(self, timeout: float | None = None) -> bool:
+        return self._event.wait(timeout)
+
+    def as_future(self) -> concurrent.futures.Future:
+        """Future resolved on cancellation, for `concurrent.futures.wait(..., FIRST_COMPLETED)`."""
+        return self._future
+
+    def mark_released(self, resource: str) -> float | None:
+        """Record that `resource` was freed after the stop; returns the latency in seconds."""
+        if self.cancelled_at is None or resource in self.released:
+            return None
+        latency = time.monotonic() - self.cancelled_at
+        self.released[resource] = latency
+        CANCEL_RELEASE_SECONDS.observe(latency, resource=resource)
+        logger.info("cancel trace=%s released %s after %.1fms", self.trace_id, resource, latency * 1000)
+        return latency
+
+
+_tokens: "OrderedDict[str, CancellationToken]" = OrderedDict()
+_tokens_lock = threading.Lock()
+_current: contextvars.ContextVar[Optional[CancellationToken]] = contextvars.ContextVar("jarvis_cancel_token", default=None)
+
+
+def get_token(trace_id: str) -> CancellationToken:
+    """Token for `trace_id`, created on first use (a stop may arrive before the work starts)."""
+    with _tokens_lock:
+        token = _tokens.get(trace_id)
+        if token is None:
+            token = _tokens[trace_id] = CancellationToken(trace_id)
+            while len(_tokens) > MAX_TOKENS:
+                _tokens.popitem(last=False)
+        return token
+
+
+def peek_token(trace_id: str) -> CancellationToken | None:
+    with _tokens_lock:
+        return _tokens.get(trace_id)
+
+
+def cancel(trace_id: str, reason: str | None = None) -> bool:
+    return get_token(trace_id).cancel(reason)
+
+
+def is_cancelled(trace_id: str | None) -> bool:
+    if not trace_id:
+        return False
+    token = peek_token(trace_id)
+    return bool(token and token.cancelled)
+
+
+def release(trace_id: str) -> None:
+    """Forget a finished trace's token."""
+    with _tokens_lock:
+        _tokens.pop(trace_id, None)
+
+
+def current_token() -> CancellationToken | None:
+    return _current.get()
+
+
+@contextmanager
+def use_token(token: CancellationToken | None) -> Iterator[CancellationToken | None]:
+    """Make `token` current for this context (inherited by bind_context'd threads)."""
+    reset = _current.set(token)
+    try:
+        yield token
+    finally:
+        try:
+            _current.reset(reset)
+        except ValueError:
+            pass
+
+
+def token_for(trace_id: str | None) -> CancellationToken | None:
+    """Token for an explicit trace_id, else the context's current token."""
+    return get_token(trace_id) if trace_id else current_token()
+
+
+# ---- abortable HTTP ------------------------------------------------------------------
+
+
+def _abort_socket(sock: socket.socket) -> None:
+    # shutdown() wakes a recv() blocked in another thread; close() alone would not.
+    try:
+        sock.shutdown(socket.SHUT_RDWR)
+    except OSError:
+        pass
+
+
+def _track(sock: Optional[socket.socket]) -> None:
+    token = current_token()
+    if token is not None and sock is not None:
+        token.on_cancel(lambda: _abort_socket(sock))
+
+
+class _TrackedHTTPConnection(HTTPConnection):
+    def connect(self) -> None:
+        super().connect()
+        _track(self.sock)
+
+
+class _TrackedHTTPSConnection(HTTPSConnection):
+    def connect(self) -> None:
+        super().connect()
+        _track(self.sock)
+
+
+class _TrackedHTTPConnectionPool(HTTPConnectionPool):
+    ConnectionCls = _TrackedHTTPConnection
+
+
+class _TrackedHTTPSConnectionPool(HTTPSConnectionPool):
+    ConnectionCls = _TrackedHTTPSConnection
+
+
+class _CancellableAdapter(HTTPAdapter):
+    def init_poolmanager(self, *args, **kwargs) -> None:
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {
+            "http": _TrackedHTTPConnectionPool,
+            "https": _TrackedHTTPSConnectionPool,
+        }
+
+
+def cancellable_session() -> requests.Session:
+    """requests.Session whose sockets are shut down when the current token is cancelled.
+
+    Use it inside `use_token(...)`; sockets opened outside a token behave normally.
+    """
+    session = requests.Session()
+    adapter = _CancellableAdapter()
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
+def stats() -> Dict[str, object]:
+    with _tokens_lock:
+        tokens: List[CancellationToken] = list(_tokens.values())
+    return {
+        "tokens": len(tokens),
+        "cancelled": sum(1 for t in tokens if t.cancelled),
+        "recent": [
+            {"trace_id": t.trace_id, "reason": t.reason, "released_ms": {k: round(v * 1000, 1) for k, v in t.released.items()}}
+            for t in tokens[-20:]
+            if t.cancelled
+        ],
+    }
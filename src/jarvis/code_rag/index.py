@@ -11,11 +11,14 @@ from pathlib import Path
 from typing import Iterable, List
 from datetime import datetime
 
-import faiss
-import numpy as np
-
+from jarvis import cancellation
+from jarvis.code_rag.lexical import LexicalIndex, save_lexical
+from jarvis.lazy import lazy_import
 from jarvis.memory import DIM, _encode
 
+faiss = lazy_import("faiss")
+np = lazy_import("numpy")
+
 logger = logging.getLogger(__name__)
 
 DEFAULT_REPO_ROOT = Path(os.getenv("CODE_RAG_REPO_ROOT") or Path(__file__).resolve().parents[2])
@@ -213,7 +216,10 @@ def build_index(
     index: faiss.Index | None = None
     embedding_dim: int | None = None
 
+    cancel_token = cancellation.current_token()
     for path in files:
+        if cancel_token is not None:
+            cancel_token.raise_if_cancelled()
         try:
             text = path.read_text(encoding="utf-8", errors="ignore")
         except Exception:
@@ -258,7 +264,16 @@ def build_index(
         index = faiss.IndexFlatL2(embedding_dim)
 
     faiss.write_index(index, str(target / "index.faiss"))
+    # Lexical ids follow manifest order, matching the vector ids.
+    save_lexical(target, LexicalIndex.build(f"{c.path}\n{c.content}" for c in chunks))
     _save_manifest(target, chunks, root, embedding_dim)
+    try:
+        from jarvis.code_rag.symbols import update_symbol_index
+
+        # Symbols don't depend on the embedding model, so they live in the base dir.
+        update_symbol_index(root, base_target)
+    except Exception as exc:
+        logger.warning(f"Symbol index update failed: {exc}")
     return index, chunks
 
 
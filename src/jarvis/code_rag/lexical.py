@@ -0,0 +1,144 @@
+"""BM25 inverted index over code chunks, built alongside the FAISS index.
+
+Tokens are identifiers, kept whole (`get_user_by_id`) and split into their
+snake_case / camelCase parts, so exact identifier lookups and partial-word
+queries both hit. The index is stored as `lexical.json` next to `index.faiss`
+and shares its chunk ids (manifest order).
+"""
+
+from __future__ import annotations
+
+import json
+import math
+import os
+import re
+import threading
+from collections import Counter
+from pathlib import Path
+from typing import Iterable
+
+LEXICAL_FILE = "lexical.json"
+FORMAT_VERSION = 1
+
+_IDENT_RE = re.compile(r"[A-Za-z_][A-Za-z0-9_]*")
+_CAMEL_RE = re.compile(r"[A-Z]+(?=[A-Z][a-z]|\d|\b)|[A-Z]?[a-z]+|[A-Z]+|\d+")
+
+
+def tokenize(text: str) -> list[str]:
+    """Identifier tokens (lowercased), whole plus snake/camel sub-parts."""
+    tokens: list[str] = []
+    for ident in _IDENT_RE.findall(text or ""):
+        whole = ident.lower()
+        if len(whole) >= 2:
+            tokens.append(whole)
+        parts = [p.lower() for piece in ident.split("_") for p in _CAMEL_RE.findall(piece)]
+        if len(parts) > 1:
+            tokens.extend(p for p in parts if len(p) >= 2 and p != whole)
+    return tokens
+
+
+def is_identifier_query(query: str) -> bool:
+    """True for a bare identifier like `search_code` or `CodeHit` (dotted paths allowed)."""
+    q = (query or "").strip()
+    if not q or " " in q:
+        return False
+    names = q.split(".")
+    if not all(_IDENT_RE.fullmatch(n) for n in names):
+        return False
+    return len(names) > 1 or "_" in q or any(c.isupper() for c in q[1:]) or q.isupper()
+
+
+class LexicalIndex:
+    """In-memory BM25 postings: term -> [(chunk_id, term_frequency), ...]."""
+
+    def __init__(self, k1: float = 1.2, b: float = 0.75) -> None:
+        self.k1 = k1
+        self.b = b
+        self.doc_len: list[int] = []
+        self.postings: dict[str, list[list[int]]] = {}
+
+    @classmethod
+    def build(cls, texts: Iterable[str]) -> "LexicalIndex":
+        index = cls()
+        for text in texts:
+            index.add(text)
+        return index
+
+    def add(self, text: str) -> int:
+        doc_id = len(self.doc_len)
+        counts = Counter(tokenize(text))
+        self.doc_len.append(sum(counts.values()))
+        for term, tf in counts.items():
+            self.postings.setdefault(term, []).append([doc_id, tf])
+        return doc_id
+
+    def __len__(self) -> int:
+        return len(self.doc_len)
+
+    def search(self, query: str, k: int = 8) -> list[tuple[int, float]]:
+        """Top-k (chunk_id, bm25 score), best first."""
+        n = len(self.doc_len)
+        terms = set(tokenize(query))
+        if not n or not terms:
+            return []
+        avgdl = (sum(self.doc_len) / n) or 1.0
+        scores: dict[int, float] = {}
+        for term in terms:
+            posting = self.postings.get(term)
+            if not posting:
+                continue
+            idf = math.log(1 + (n - len(posting) + 0.5) / (len(posting) + 0.5))
+            for doc_id, tf in posting:
+                norm = tf + self.k1 * (1 - self.b + self.b * self.doc_len[doc_id] / avgdl)
+                scores[doc_id] = scores.get(doc_id, 0.0) + idf * tf * (self.k1 + 1) / norm
+        ranked = sorted(scores.items(), key=lambda item: (-item[1], item[0]))
+        return ranked[:k]
+
+    def to_dict(self) -> dict:
+        return {"version": FORMAT_VERSION, "k1": self.k1, "b": self.b, "doc_len": self.doc_len, "postings": self.postings}
+
+    @classmethod
+    def from_dict(cls, payload: dict) -> "LexicalIndex":
+        index = cls(k1=float(payload.get("k1", 1.2)), b=float(payload.get("b", 0.75)))
+        index.doc_len = list(payload.get("doc_len", []))
+        index.postings = dict(payload.get("postings", {}))
+        return index
+
+
+def save_lexical(index_dir: Path, index: LexicalIndex) -> None:
+    path = Path(index_dir) / LEXICAL_FILE
+    tmp = path.with_suffix(".json.tmp")
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(index.to_dict(), f, separators=(",", ":"))
+    os.replace(tmp, path)
+    with _cache_lock:
+        _cache.pop(str(path), None)
+
+
+_cache: dict[str, tuple[tuple[int, int], LexicalIndex]] = {}
+_cache_lock = threading.Lock()
+
+
+def load_lexical(index_dir: Path) -> LexicalIndex | None:
+    """Load `lexical.json`, reusing the parsed index until the file changes."""
+    path = Path(index_dir) / LEXICAL_FILE
+    try:
+        st = path.stat()
+    except OSError:
+        return None
+    key, stamp = str(path), (st.st_mtime_ns, st.st_size)
+    with _cache_lock:
+        cached = _cache.get(key)
+        if cached and cached[0] == stamp:
+            return cached[1]
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            payload = json.load(f)
+    except Exception:
+        return None
+    if payload.get("version") != FORMAT_VERSION:
+        return None
+    index = LexicalIndex.from_dict(payload)
+    with _cache_lock:
+        _cache[key] = (stamp, index)
+    return index
@@ -2,18 +2,22 @@
 
 from __future__ import annotations
 
+import json
 import logging
 import os
+import threading
 from dataclasses import dataclass
 from pathlib import Path
 from typing import List
 
-import faiss
-import numpy as np
-
-from jarvis.code_rag.index import DEFAULT_INDEX_DIR, DEFAULT_REPO_ROOT, ensure_index, load_index
+from jarvis.code_rag.index import DEFAULT_INDEX_DIR, DEFAULT_REPO_ROOT, _index_dir_for_model, ensure_index, load_index
+from jarvis.code_rag.lexical import LexicalIndex, is_identifier_query, load_lexical
+from jarvis.lazy import lazy_import
 from jarvis.memory import _encode
 
+faiss = lazy_import("faiss")
+np = lazy_import("numpy")
+
 logger = logging.getLogger(__name__)
 
 
@@ -26,40 +30,88 @@ class CodeHit:
   content: str
 
 
+_chunks_cache: dict[str, tuple[tuple[int, int], List[dict], LexicalIndex | None]] = {}
+_chunks_lock = threading.Lock()
+
+
 def _load_chunks(index_dir: Path) -> List[dict]:
+  return _load_manifest_index(index_dir)[0]
+
+
+def _load_manifest_index(index_dir: Path) -> tuple[List[dict], LexicalIndex | None]:
+  """Manifest chunks plus their lexical index, parsed once per manifest version."""
   manifest_path = index_dir / "manifest.json"
-  if not manifest_path.exists():
-    return []
   try:
-    import json
-
-    with open(manifest_path, "r", encoding="utf-8") as f:
-      manifest = json.load(f)
-    return manifest.get("chunks", [])
+    st = manifest_path.stat()
+  except OSError:
+    return [], None
+  key, stamp = str(manifest_path), (st.st_mtime_ns, st.st_size)
+  with _chunks_lock:
+    cached = _chunks_cache.get(key)
+  if cached and cached[0] == stamp:
+    chunks, lexical = cached[1], cached[2]
+  else:
+    try:
+      with open(manifest_path, "r", encoding="utf-8") as f:
+        chunks = json.load(f).get("chunks", [])
+    except Exception:
+      return [], None
+    lexical = None
+  persisted = load_lexical(index_dir)
+  if persisted is not None and len(persisted) == len(chunks):
+    lexical = persisted
+  elif lexical is None:
+    # Index built before lexical.json existed: index the manifest excerpts once in memory.
+    lexical = LexicalIndex.build(f"{c.get('path', '')}\n{c.get('excerpt') or ''}" for c in chunks)
+  with _chunks_lock:
+    _chunks_cache[key] = (stamp, chunks, lexical)
+  return chunks, lexical
+
+
+def _resolve_index_dir(index_dir: Path) -> Path:
+  """Model-scoped index dir (where build_index writes), else the given dir."""
+  try:
+    scoped = _index_dir_for_model(index_dir)
+    if (scoped / "manifest.json").exists():
+      return scoped
   except Exception:
+    pass
+  return index_dir
+
+
+def _chunk_hit(chunk, score: float) -> CodeHit:
+  return CodeHit(
+    path=chunk.path if hasattr(chunk, "path") else chunk.get("path", ""),
+    start_line=chunk.start_line if hasattr(chunk, "start_line") else chunk.get("start_line", 0),
+    end_line=chunk.end_line if hasattr(chunk, "end_line") else chunk.get("end_line", 0),
+    score=float(score),
+    content=chunk.content if hasattr(chunk, "content") else chunk.get("excerpt", "") or "",
+  )
+
+
+def _search_lexical(query: str, index_dir: Path, k: int = 8) -> list[tuple[int, float]]:
+  _, lexical = _load_manifest_index(index_dir)
+  if lexical is None:
     return []
+  return lexical.search(query, k)
 
 
-def _search_fallback(query: str, index_dir: Path) -> list[CodeHit]:
-  """Simple substring search used when embeddings are disabled."""
-  hits: list[CodeHit] = []
-  chunks = _load_chunks(index_dir)
-  q = (query or "").lower()
-  if not q:
-    return hits
-  for entry in chunks:
-    content = (entry.get("excerpt") or "").lower()
-    if q in content:
-      hits.append(
-        CodeHit(
-          path=entry.get("path", ""),
-          start_line=entry.get("start_line", 0),
-          end_line=entry.get("end_line", 0),
-          score=0.0,
-          content=entry.get("excerpt", "") or "",
-        )
-      )
-  return hits
+def _search_fallback(query: str, index_dir: Path, k: int = 8) -> list[CodeHit]:
+  """BM25 lookup in the lexical index; used when embeddings are disabled or fail."""
+  if not (query or "").strip():
+    return []
+  target = _resolve_index_dir(index_dir)
+  chunks, _ = _load_manifest_index(target)
+  return [_chunk_hit(chunks[i], score) for i, score in _search_lexical(query, target, k) if i < len(chunks)]
+
+
+def _rrf_fuse(rankings: list[list[int]], k: int, rrf_k: int = 60) -> list[tuple[int, float]]:
+  """Reciprocal rank fusion: sum of 1 / (rrf_k + rank) over the rankings a chunk appears in."""
+  fused: dict[int, float] = {}
+  for ranking in rankings:
+    for rank, chunk_id in enumerate(ranking):
+      fused[chunk_id] = fused.get(chunk_id, 0.0) + 1.0 / (rrf_k + rank + 1)
+  return sorted(fused.items(), key=lambda item: (-item[1], item[0]))[:k]
 
 
 def search_code(
@@ -84,7 +136,7 @@ def search_code(
   # Check if embeddings are disabled or if we should use fallback
   if os.getenv("JARVIS_DISABLE_EMBEDDINGS") == "1" or os.getenv("DISABLE_EMBEDDINGS") == "1":
     logger.debug("[RAG] Embeddings disabled, using fallback")
-    return _search_fallback(query, target)
+    return _search_fallback(query, target, k)
 
   # Wrap entire RAG operation in try/except - NEVER let RAG failures stop the stream
   try:
@@ -93,9 +145,16 @@ def search_code(
       existing = ensure_index(repo_root=root, index_dir=target)
     if not existing:
       logger.debug("[RAG] No index found, using fallback")
-      return _search_fallback(query, target)
+      return _search_fallback(query, target, k)
     idx, chunks = existing
 
+    # LEXICAL PHASE - bare identifiers are answered from the inverted index without embedding
+    hybrid = os.getenv("JARVIS_CODE_RAG_HYBRID", "1") != "0"
+    lexical_dir = _resolve_index_dir(target)
+    lexical_ranked = _search_lexical(query, lexical_dir, max(k * 2, k)) if hybrid else []
+    if lexical_ranked and is_identifier_query(query):
+      return [_chunk_hit(chunks[i], score) for i, score in lexical_ranked[:k] if i < len(chunks)]
+
     # ENCODING PHASE - May fail or be cancelled
     try:
       from jarvis.memory import EmbeddingDimMismatch
@@ -107,48 +166,41 @@ def search_code(
         logger.info(f"[RAG] Encoding cancelled (trace_id={trace_id})")
       else:
         logger.warning(f"[RAG] Encoding failed (reason: {e}), using fallback")
-      return _search_fallback(query, target)
+      return _search_fallback(query, target, k)
     except EmbeddingDimMismatch as exc:
       logger.warning(
         f"[RAG] Embedding dimension mismatch (actual={exc.actual}, expected={exc.expected}, model={exc.model}), using fallback"
       )
-      return _search_fallback(query, target)
+      return _search_fallback(query, target, k)
     except Exception as e:
       logger.warning(f"[RAG] Failed to encode query (reason: {e.__class__.__name__}: {e}), using fallback")
-      return _search_fallback(query, target)
+      return _search_fallback(query, target, k)
 
     # FAISS SEARCH PHASE - May fail or be cancelled
     try:
-      scores, ids = idx.search(vec, min(k, len(chunks)))
+      scores, ids = idx.search(vec, min(max(k * 2, k) if lexical_ranked else k, len(chunks)))
     except RuntimeError as e:
       # Includes cancellation
       if "cancelled" in str(e).lower():
         logger.info(f"[RAG] FAISS search cancelled (trace_id={trace_id})")
       else:
         logger.warning(f"[RAG] FAISS search failed (reason: {e}), using fallback")
-      return _search_fallback(query, target)
+      return _search_fallback(query, target, k)
     except Exception as e:
       logger.warning(f"[RAG] FAISS search failed (reason: {e.__class__.__name__}: {e}), using fallback")
-      return _search_fallback(query, target)
-
-    # Build results from FAISS output
-    hits: list[CodeHit] = []
-    for score, chunk_idx in zip(scores[0], ids[0]):
-      if chunk_idx < 0 or chunk_idx >= len(chunks):
-        continue
-      chunk = chunks[chunk_idx]
-      hits.append(
-        CodeHit(
-          path=chunk.path if hasattr(chunk, "path") else chunk.get("path", ""),
-          start_line=chunk.start_line if hasattr(chunk, "start_line") else chunk.get("start_line", 0),
-          end_line=chunk.end_line if hasattr(chunk, "end_line") else chunk.get("end_line", 0),
-          score=float(score),
-          content=chunk.content if hasattr(chunk, "content") else chunk.get("excerpt", "") or "",
-        )
-      )
-    return hits
+      return _search_fallback(query, target, k)
+
+    vector_ranked = [int(i) for i in ids[0] if 0 <= i < len(chunks)]
+    if lexical_ranked:
+      # Hybrid: fuse lexical and vector rankings; score is the fused RRF score (higher is better).
+      rrf_k = int(os.getenv("JARVIS_CODE_RAG_RRF_K", "60") or 60)
+      fused = _rrf_fuse([vector_ranked, [i for i, _ in lexical_ranked if i < len(chunks)]], k, rrf_k)
+      return [_chunk_hit(chunks[i], score) for i, score in fused]
+
+    # Vector only: score is the L2 distance (lower is better)
+    return [_chunk_hit(chunks[i], score) for score, i in zip(scores[0], ids[0]) if 0 <= i < len(chunks)]
   
   except Exception as e:
     # OUTER CATCH: Any unexpected error in entire RAG operation -> fallback
     logger.exception(f"[RAG] Unexpected error (reason: {e.__class__.__name__}: {e}), using fallback")
-    return _search_fallback(query, target)
+    return _search_fallback(query, target, k)
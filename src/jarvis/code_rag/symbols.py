@@ -0,0 +1,328 @@
+"""Python symbol table (definitions, imports, call sites) built from the AST.
+
+Stored as `symbols.json` in the code index dir, one compact row list per file
+keyed by path with the file's mtime/size, so updates only re-parse files that
+changed. Lookups ("where is X defined", "who calls X") are plain dict hits.
+"""
+
+from __future__ import annotations
+
+import ast
+import json
+import logging
+import os
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Iterable
+
+from jarvis.code_rag.index import DEFAULT_INDEX_DIR, DEFAULT_REPO_ROOT, _iter_files
+
+logger = logging.getLogger(__name__)
+
+SYMBOLS_FILE = "symbols.json"
+FORMAT_VERSION = 1
+
+
+@dataclass
+class Definition:
+    path: str
+    name: str
+    qualname: str
+    kind: str  # function | method | class
+    start_line: int
+    end_line: int
+
+
+@dataclass
+class CallSite:
+    path: str
+    callee: str
+    expr: str  # dotted call target as written, e.g. "memory.add_memory"
+    line: int
+    scope: str  # enclosing qualname, "" at module level
+
+
+@dataclass
+class ImportRef:
+    path: str
+    module: str
+    name: str
+    alias: str
+    line: int
+
+
+def _dotted(node: ast.AST) -> str:
+    parts = []
+    while isinstance(node, ast.Attribute):
+        parts.append(node.attr)
+        node = node.value
+    if isinstance(node, ast.Name):
+        parts.append(node.id)
+    elif isinstance(node, ast.Call):
+        parts.append(_dotted(node.func) + "()")
+    return ".".join(reversed(parts))
+
+
+class _Collector(ast.NodeVisitor):
+    def __init__(self) -> None:
+        self.defs: list[list] = []
+        self.imports: list[list] = []
+        self.calls: list[list] = []
+        self._scope: list[tuple[str, str]] = []  # (name, kind)
+
+    def _qual(self, name: str) -> str:
+        return ".".join([s for s, _ in self._scope] + [name])
+
+    def _visit_def(self, node, kind: str) -> None:
+        if kind == "function" and self._scope and self._scope[-1][1] == "class":
+            kind = "method"
+        end = getattr(node, "end_lineno", None) or node.lineno
+        start = min([node.lineno] + [d.lineno for d in node.decorator_list])
+        self.defs.append([node.name, self._qual(node.name), kind, start, end])
+        self._scope.append((node.name, "class" if kind == "class" else "function"))
+        self.generic_visit(node)
+        self._scope.pop()
+
+    def visit_FunctionDef(self, node: ast.FunctionDef) -> None:
+        self._visit_def(node, "function")
+
+    def visit_AsyncFunctionDef(self, node: ast.AsyncFunctionDef) -> None:
+        self._visit_def(node, "function")
+
+    def visit_ClassDef(self, node: ast.ClassDef) -> None:
+        self._visit_def(node, "class")
+
+    def visit_Import(self, node: ast.Import) -> None:
+        for alias in node.names:
+            self.imports.append([alias.name, "", alias.asname or "", node.lineno])
+
+    def visit_ImportFrom(self, node: ast.ImportFrom) -> None:
+        module = "." * (node.level or 0) + (node.module or "")
+        for alias in node.names:
+            self.imports.append([module, alias.name, alias.asname or "", node.lineno])
+
+    def visit_Call(self, node: ast.Call) -> None:
+        expr = _dotted(node.func)
+        callee = expr.rsplit(".", 1)[-1] if expr else ""
+        if callee and not callee.endswith(")"):
+            self.calls.append([callee, expr, node.lineno, ".".join(s for s, _ in self._scope)])
+        self.generic_visit(node)
+
+
+def extract_symbols(source: str) -> dict:
+    """Compact symbol rows for one module: defs, imports and calls (lists of lists)."""
+    tree = ast.parse(source)
+    collector = _Collector()
+    collector.visit(tree)
+    return {"defs": collector.defs, "imports": collector.imports, "calls": collector.calls}
+
+
+class SymbolIndex:
+    """Symbol rows per file plus name -> rows lookup tables."""
+
+    def __init__(self, files: dict | None = None, built_at: float = 0.0, repo_root: str = "") -> None:
+        self.files: dict[str, dict] = files or {}
+        self.built_at = built_at
+        self.repo_root = repo_root
+        self._by_name: dict[str, list[Definition]] | None = None
+        self._callers: dict[str, list[CallSite]] | None = None
+
+    def _build_lookups(self) -> None:
+        by_name: dict[str, list[Definition]] = {}
+        callers: dict[str, list[CallSite]] = {}
+        for path, entry in sorted(self.files.items()):
+            for name, qualname, kind, start, end in entry.get("defs", []):
+                by_name.setdefault(name, []).append(Definition(path, name, qualname, kind, start, end))
+            for callee, expr, line, scope in entry.get("calls", []):
+                callers.setdefault(callee, []).append(CallSite(path, callee, expr, line, scope))
+        self._by_name, self._callers = by_name, callers
+
+    def definitions(self, symbol: str) -> list[Definition]:
+        """Definitions of `symbol`: a bare name, `Class.method`, or `package.module.name`."""
+        if self._by_name is None:
+            self._build_lookups()
+        parts = symbol.strip().split(".")
+        found = self._by_name.get(parts[-1], [])  # type: ignore[union-attr]
+        if len(parts) == 1:
+            return list(found)
+        dotted = ".".join(parts)
+        exact = [d for d in found if d.qualname == dotted or d.qualname.endswith("." + dotted)]
+        if exact:
+            return exact
+        # Module-qualified: jarvis.memory.add_memory -> */jarvis/memory.py
+        module_path = "/".join(parts[:-1])
+        return [d for d in found if d.path[:-3].endswith(module_path) or d.path.endswith(module_path + "/__init__.py")]
+
+    def callers(self, symbol: str) -> list[CallSite]:
+        if self._callers is None:
+            self._build_lookups()
+        parts = symbol.strip().split(".")
+        sites = self._callers.get(parts[-1], [])  # type: ignore[union-attr]
+        if len(parts) > 1 and parts[-2]:
+            qualified = [s for s in sites if s.expr.endswith(".".join(parts[-2:]))]
+            return qualified or list(sites)
+        return list(sites)
+
+    def imports(self, symbol: str) -> list[ImportRef]:
+        name = symbol.strip().split(".")[-1]
+        refs = []
+        for path, entry in sorted(self.files.items()):
+            for module, imported, alias, line in entry.get("imports", []):
+                if imported == name or module == symbol or module.endswith("." + name):
+                    refs.append(ImportRef(path, module, imported, alias, line))
+        return refs
+
+    def to_dict(self) -> dict:
+        return {"version": FORMAT_VERSION, "repo_root": self.repo_root, "built_at": self.built_at, "files": self.files}
+
+
+def _python_files(repo_root: Path) -> dict[str, Path]:
+    return {p.relative_to(repo_root).as_posix(): p for p in _iter_files(repo_root) if p.suffix == ".py"}
+
+
+def _parse_file(path: Path) -> dict | None:
+    try:
+        st = path.stat()
+        source = path.read_text(encoding="utf-8", errors="ignore")
+        entry = extract_symbols(source)
+    except (OSError, SyntaxError, ValueError) as exc:
+        logger.debug("symbol index skipped %s: %s", path, exc)
+        return None
+    entry["mtime_ns"], entry["size"] = st.st_mtime_ns, st.st_size
+    return entry
+
+
+def _unchanged(entry: dict | None, path: Path) -> bool:
+    if not entry:
+        return False
+    try:
+        st = path.stat()
+    except OSError:
+        return False
+    return entry.get("mtime_ns") == st.st_mtime_ns and entry.get("size") == st.st_size
+
+
+_cache: dict[str, tuple[tuple[int, int], SymbolIndex]] = {}
+_checked: dict[str, float] = {}  # symbols.json path -> last scan that found nothing to rewrite
+_lock = threading.Lock()
+_update_lock = threading.Lock()
+
+
+def _symbols_path(index_dir: Path | str | None) -> Path:
+    return Path(index_dir or DEFAULT_INDEX_DIR) / SYMBOLS_FILE
+
+
+def load_symbol_index(index_dir: Path | str | None = None) -> SymbolIndex | None:
+    path = _symbols_path(index_dir)
+    try:
+        st = path.stat()
+    except OSError:
+        return None
+    key, stamp = str(path), (st.st_mtime_ns, st.st_size)
+    with _lock:
+        cached = _cache.get(key)
+        if cached and cached[0] == stamp:
+            return cached[1]
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            payload = json.load(f)
+    except Exception:
+        return None
+    if payload.get("version") != FORMAT_VERSION:
+        return None
+    index = SymbolIndex(payload.get("files", {}), float(payload.get("built_at", 0.0)), payload.get("repo_root", ""))
+    with _lock:
+        _cache[key] = (stamp, index)
+    return index
+
+
+def _save(index_dir: Path | str | None, index: SymbolIndex) -> None:
+    path = _symbols_path(index_dir)
+    os.makedirs(path.parent, exist_ok=True)
+    tmp = path.with_suffix(".json.tmp")
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(index.to_dict(), f, separators=(",", ":"))
+    os.replace(tmp, path)
+
+
+def update_symbol_index(
+    repo_root: Path | str | None = None,
+    index_dir: Path | str | None = None,
+    paths: Iterable[Path | str] | None = None,
+) -> SymbolIndex:
+    """Re-parse changed Python files and drop deleted ones.
+
+    With `paths` (e.g. from the repo watcher) only those files are checked;
+    otherwise every indexable .py file is compared against its stored mtime/size.
+    An index recorded for a different repo root is rebuilt from scratch.
+    """
+    with _update_lock:
+        return _update(Path(repo_root or DEFAULT_REPO_ROOT), index_dir, paths)
+
+
+def _update(root: Path, index_dir: Path | str | None, paths: Iterable[Path | str] | None) -> SymbolIndex:
+    root_key = str(root.resolve())
+    existing = load_symbol_index(index_dir)
+    if existing is None or existing.repo_root != root_key:
+        existing, paths = None, None
+    files = dict(existing.files) if existing else {}
+    if paths is None:
+        candidates = _python_files(root)
+        for rel in set(files) - set(candidates):
+            files.pop(rel)
+    else:
+        candidates = {}
+        for p in paths:
+            p = Path(p)
+            p = p if p.is_absolute() else root / p
+            if p.suffix != ".py":
+                continue
+            try:
+                rel = p.resolve().relative_to(root.resolve()).as_posix()
+            except ValueError:
+                continue
+            if p.exists():
+                candidates[rel] = p
+            else:
+                files.pop(rel, None)
+    parsed = 0
+    path_key = str(_symbols_path(index_dir))
+    for rel, path in candidates.items():
+        if _unchanged(files.get(rel), path):
+            continue
+        entry = _parse_file(path)
+        if entry is None:
+            files.pop(rel, None)
+        else:
+            files[rel] = entry
+            parsed += 1
+    if existing is not None and files == existing.files:
+        if paths is None:
+            _checked[path_key] = time.time()
+        return existing  # up to date: skip rewriting symbols.json
+    _checked.pop(path_key, None)
+    index = SymbolIndex(files, time.time(), root_key)
+    _save(index_dir, index)
+    logger.debug("symbol index updated: %d files parsed, %d total", parsed, len(files))
+    return load_symbol_index(index_dir) or index
+
+
+def ensure_symbol_index(
+    repo_root: Path | str | None = None,
+    index_dir: Path | str | None = None,
+    max_age: float | None = None,
+) -> SymbolIndex:
+    """Load the symbol index, building it if missing or re-checking it once older than `max_age` seconds.
+
+    The re-check stats every file and only rewrites symbols.json when something changed.
+    """
+    if max_age is None:
+        max_age = float(os.getenv("JARVIS_SYMBOL_INDEX_MAX_AGE", "30") or 30)
+    index = load_symbol_index(index_dir)
+    root_key = str(Path(repo_root or DEFAULT_REPO_ROOT).resolve())
+    checked = max(index.built_at, _checked.get(str(_symbols_path(index_dir)), 0.0)) if index else 0.0
+    if index is None or index.repo_root != root_key or time.time() - checked > max_age:
+        index = update_symbol_index(repo_root, index_dir)
+    return index
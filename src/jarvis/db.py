@@ -1,11 +1,14 @@
 import json
 import os
 import sqlite3
+import time
 import uuid
 from datetime import datetime, timezone
 from contextlib import contextmanager
 
+from jarvis.metrics import DB_SECONDS
 from jarvis.personality import SYSTEM_PROMPT
+from jarvis.tracing import span
 
 DEFAULT_DATA_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), "..", "data")
 DATA_DIR = os.path.abspath(os.getenv("JARVIS_DATA_DIR", DEFAULT_DATA_DIR))
@@ -143,6 +146,7 @@ def _ensure_db():
                 warned_at TEXT,
                 remind_enabled INTEGER DEFAULT 0,
                 remind_stage INTEGER DEFAULT 0,
+                shown_stage INTEGER DEFAULT 0,
                 updated_at TEXT,
                 created_at TEXT NOT NULL,
                 FOREIGN KEY(user_id) REFERENCES users(id)
@@ -155,7 +159,11 @@ def _ensure_db():
         _ensure_column(conn, "notes", "warned_at", "TEXT")
         _ensure_column(conn, "notes", "remind_enabled", "INTEGER DEFAULT 0")
         _ensure_column(conn, "notes", "remind_stage", "INTEGER DEFAULT 0")
+        if _ensure_column(conn, "notes", "shown_stage", "INTEGER DEFAULT 0"):
+            # Stages reached before the column existed were already shown.
+            conn.execute("UPDATE notes SET shown_stage = remind_stage WHERE remind_stage > 0")
         _ensure_column(conn, "notes", "updated_at", "TEXT")
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_notes_remind_enabled ON notes(expires_at) WHERE remind_enabled = 1")
         conn.execute(
             """
             CREATE TABLE IF NOT EXISTS user_files (
@@ -174,6 +182,8 @@ def _ensure_db():
             )
             """
         )
+        _ensure_column(conn, "user_files", "sha256", "TEXT")
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_user_files_sha256 ON user_files(sha256)")
         conn.execute(
             """
             CREATE TABLE IF NOT EXISTS reminders (
@@ -183,10 +193,20 @@ def _ensure_db():
                 remind_at TEXT NOT NULL,
                 created_at TEXT NOT NULL,
                 reminded_at TEXT,
+                shown_at TEXT,
                 FOREIGN KEY(user_id) REFERENCES users(id)
             )
             """
         )
+        conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_reminders_pending ON reminders(remind_at) WHERE reminded_at IS NULL"
+        )
+        if _ensure_column(conn, "reminders", "shown_at", "TEXT"):
+            conn.execute("UPDATE reminders SET shown_at = reminded_at WHERE reminded_at IS NOT NULL")
+        conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_reminders_unshown ON reminders(user_id) "
+            "WHERE reminded_at IS NOT NULL AND shown_at IS NULL"
+        )
         conn.execute(
             """
             CREATE TABLE IF NOT EXISTS tickets (
@@ -249,6 +269,29 @@ def _ensure_db():
             )
             """
         )
+        conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS metric_rollups (
+                resolution TEXT NOT NULL,  -- 'minute' | 'hour'
+                source TEXT NOT NULL,      -- 'perf' | 'tool'
+                series TEXT NOT NULL,      -- metric column or tool name
+                bucket_start INTEGER NOT NULL,  -- unix seconds, UTC
+                count INTEGER NOT NULL,
+                sum REAL NOT NULL,
+                errors INTEGER NOT NULL DEFAULT 0,
+                sketch TEXT NOT NULL,      -- JSON, see jarvis.perf_rollups.LatencySketch
+                PRIMARY KEY (resolution, source, series, bucket_start)
+            )
+            """
+        )
+        conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS rollup_state (
+                source TEXT PRIMARY KEY,
+                last_id INTEGER NOT NULL DEFAULT 0
+            )
+            """
+        )
         conn.execute(
             """
             CREATE TABLE IF NOT EXISTS download_tokens (
@@ -324,6 +367,11 @@ def _ensure_db():
             )
             """
         )
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_tool_audit_timestamp ON tool_audit(timestamp)")
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_performance_metrics_timestamp ON performance_metrics(timestamp)")
+        conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_metric_rollups_window ON metric_rollups(resolution, source, bucket_start)"
+        )
         _ensure_setting(conn, "footer_text", "Jarvis v.1 - 2026")
         _ensure_setting(conn, "footer_support_url", "#")
         _ensure_setting(conn, "footer_contact_url", "#")
@@ -345,11 +393,13 @@ def _ensure_db():
         _ensure_bs_admin(conn)
 
 
-def _ensure_column(conn: sqlite3.Connection, table: str, column: str, col_type: str) -> None:
+def _ensure_column(conn: sqlite3.Connection, table: str, column: str, col_type: str) -> bool:
+    """Add the column if missing; True when it was added."""
     cols = conn.execute(f"PRAGMA table_info({table})").fetchall()
     if any(c[1] == column for c in cols):
-        return
+        return False
     conn.execute(f"ALTER TABLE {table} ADD COLUMN {column} {col_type}")
+    return True
 
 
 def _ensure_bs_admin(conn: sqlite3.Connection) -> None:
@@ -384,12 +434,15 @@ def _connect():
 
 @contextmanager
 def get_conn():
-    _ensure_db()
-    conn = _connect()
-    try:
-        yield conn
-    finally:
-        conn.close()
+    started = time.perf_counter()
+    with span("db.connection", "db"):
+        _ensure_db()
+        conn = _connect()
+        try:
+            yield conn
+        finally:
+            conn.close()
+            DB_SECONDS.observe(time.perf_counter() - started)
 
 
 def log_login_session(
@@ -6,11 +6,16 @@ This abstraction is intentionally small and does not alter existing streaming be
 
 from __future__ import annotations
 
-from collections import defaultdict
+from collections import defaultdict, deque
 from typing import Callable, Dict, List, Any
 import asyncio
 import logging
 import inspect
+import threading
+import time
+
+from jarvis.metrics import EVENT_PUBLISH_SECONDS, EVENTS_PUBLISHED
+from jarvis.tracing import span
 
 _logger = logging.getLogger(__name__)
 
@@ -18,6 +23,9 @@ _logger = logging.getLogger(__name__)
 _subs: Dict[str, List[Callable[[Any], None]]] = defaultdict(list)
 # Wildcard subscribers receive (event_type, payload)
 _wildcard_subs: List[Callable[[str, Any], None]] = []
+# Session-filtered subscribers: event_type -> session_id -> callbacks. Looked up by the
+# payload's session_id, so a publish costs O(1) in the number of concurrent streams.
+_session_subs: Dict[str, Dict[str, List[Callable[[str, Any], None]]]] = defaultdict(dict)
 _closed = False
 
 # Async chat token batching state (NO LOCKS, NO BLOCKING)
@@ -26,6 +34,7 @@ _flush_tasks: Dict[str, asyncio.Task] = {}  # request_id -> flush task
 _callback_tasks: Dict[str, List[asyncio.Task]] = {}  # request_id -> list of callback tasks
 _MAX_BATCH_TIME_MS = 75  # Flush every 75ms (debounce)
 _MAX_BATCH_SIZE_BYTES = 1024  # Flush when buffer exceeds 1KB
+_FLUSHER_IDLE_S = 30.0  # A request's flusher exits after this long without tokens
 
 # Status/thinking event rate-limiting (separate from content tokens)
 _status_rate_limit: Dict[str, List[float]] = {}  # request_id -> list of timestamps
@@ -76,62 +85,84 @@ def _run_callback(cb: Callable[[Any], None], event_type: str, payload: Any) -> N
 
 def _publish_direct(event_type: str, payload: Any) -> None:
     """Publish an event directly without batching logic."""
-    callbacks = list(_subs.get(event_type, []))
-    # Also notify wildcard subscribers
-    if "*" in _subs:
-        callbacks.extend(_subs["*"])
-    for cb in callbacks:
-        _run_callback(cb, event_type, payload)
-    for cb in list(_wildcard_subs):
-        _run_callback(cb, event_type, payload)
-
-
-async def _flush_chat_token_buffer_async(request_id: str) -> None:
-    """Async flush accumulated chat tokens for a request_id (debounced)."""
+    started = time.perf_counter()
+    with span("event.publish", "events", event_type=event_type):
+        callbacks = list(_subs.get(event_type, []))
+        # Also notify wildcard subscribers
+        if "*" in _subs:
+            callbacks.extend(_subs["*"])
+        for cb in callbacks:
+            _run_callback(cb, event_type, payload)
+        for cb in list(_wildcard_subs):
+            _run_callback(cb, event_type, payload)
+        by_session = _session_subs.get(event_type)
+        if by_session and isinstance(payload, dict):
+            for cb in list(by_session.get(payload.get("session_id"), ())):
+                _run_callback(cb, event_type, payload)
+    EVENT_PUBLISH_SECONDS.observe(time.perf_counter() - started, event_type=event_type)
+    EVENTS_PUBLISHED.inc(event_type=event_type)
+
+
+def _flush_chat_token_buffer(request_id: str, buffer: Dict[str, Any]) -> None:
+    """Publish the accumulated text of a buffer (if any) and reset it."""
+    accumulated = buffer["accumulated_text"]
+    if not accumulated:
+        return
+    buffer["accumulated_text"] = ""
+    buffer["first_at"] = None
+    _publish_direct("chat.token", {
+        "session_id": buffer["session_id"],
+        "trace_id": buffer["trace_id"],
+        "request_id": request_id,
+        "token": accumulated,
+        "sequence": buffer["sequence"],
+        "batched": True,
+    })
+    _logger.debug(f"flush_done request_id={request_id} size={len(accumulated)}")
+
+
+async def _chat_token_flusher(request_id: str, buffer: Dict[str, Any]) -> None:
+    """Long-lived debounced flusher for one request's chat tokens.
+
+    Parks on the buffer's wake event while idle and flushes once no token has
+    arrived for the batch window. Exits (dropping the buffer) after a stream has
+    been quiet for _FLUSHER_IDLE_S; the next token starts a new flusher.
+    """
+    loop = asyncio.get_running_loop()
+    window = _MAX_BATCH_TIME_MS / 1000.0
     try:
-        # Wait for debounce period (NON-BLOCKING async sleep)
-        await asyncio.sleep(_MAX_BATCH_TIME_MS / 1000.0)
-        
-        if request_id not in _chat_token_buffers:
-            return
-        
-        buffer = _chat_token_buffers[request_id]
-        accumulated_text = buffer["accumulated_text"]
-        
-        _logger.debug(f"flush_start request_id={request_id} size={len(accumulated_text)}")
-        
-        if accumulated_text:
-            # Publish the batched event directly (avoid recursion)
-            _publish_direct("chat.token", {
-                "session_id": buffer["session_id"],
-                "trace_id": buffer["trace_id"],
-                "request_id": request_id,
-                "token": accumulated_text,
-                "sequence": buffer["sequence"],
-                "batched": True,
-            })
-            _logger.debug(f"flush_done request_id={request_id} tokens_sent={len(accumulated_text)}")
-        
-        # Remove the buffer and flush task
-        _chat_token_buffers.pop(request_id, None)
-        _flush_tasks.pop(request_id, None)
-        
+        while _chat_token_buffers.get(request_id) is buffer:
+            if not buffer["accumulated_text"]:
+                buffer["wake"].clear()
+                try:
+                    await asyncio.wait_for(buffer["wake"].wait(), _FLUSHER_IDLE_S)
+                except asyncio.TimeoutError:
+                    return
+                continue
+            delay = buffer["last_at"] + window - loop.time()
+            if delay > 0:
+                await asyncio.sleep(delay)
+                continue
+            _flush_chat_token_buffer(request_id, buffer)
     except asyncio.CancelledError:
         _logger.debug(f"flush_cancelled request_id={request_id}")
-        # Clean up on cancellation
-        _chat_token_buffers.pop(request_id, None)
-        _flush_tasks.pop(request_id, None)
         raise
     except Exception as e:
         _logger.warning(f"flush_error request_id={request_id} err={e}")
-        _chat_token_buffers.pop(request_id, None)
-        _flush_tasks.pop(request_id, None)
+    finally:
+        if _chat_token_buffers.get(request_id) is buffer:
+            _chat_token_buffers.pop(request_id, None)
+        if _flush_tasks.get(request_id) is asyncio.current_task():
+            _flush_tasks.pop(request_id, None)
 
 
 def _should_flush_immediately(buffer: Dict[str, Any]) -> bool:
     """Check if buffer should be flushed immediately (size limit reached)."""
-    size_bytes = len(buffer["accumulated_text"].encode('utf-8'))
-    return size_bytes >= _MAX_BATCH_SIZE_BYTES
+    # Characters are a lower bound on UTF-8 bytes; only encode once that bound is close.
+    text = buffer["accumulated_text"]
+    if len(text) * 4 < _MAX_BATCH_SIZE_BYTES:
+        return False
+    return len(text.encode('utf-8')) >= _MAX_BATCH_SIZE_BYTES
 
 
 def _check_status_rate_limit(request_id: str) -> bool:
@@ -196,62 +227,55 @@ def _handle_chat_token_event(payload: Dict[str, Any]) -> None:
         _publish_direct("chat.token", payload)
         return
     
+    try:
+        loop = asyncio.get_running_loop()
+    except RuntimeError:
+        loop = None
+
     # NO LOCK - async-safe because we're only modifying dict in event loop
-    if request_id not in _chat_token_buffers:
-        _chat_token_buffers[request_id] = {
+    buffer = _chat_token_buffers.get(request_id)
+    if buffer is None:
+        buffer = _chat_token_buffers[request_id] = {
             "accumulated_text": "",
             "session_id": payload.get("session_id"),
             "trace_id": payload.get("trace_id"),
             "sequence": payload.get("sequence", 0),
+            "first_at": None,
+            "last_at": 0.0,
+            "wake": None,
         }
-    
-    buffer = _chat_token_buffers[request_id]
+
     buffer["accumulated_text"] += token
-    
+    now = loop.time() if loop is not None else time.monotonic()
+    buffer["last_at"] = now
+    if buffer["first_at"] is None:
+        buffer["first_at"] = now
+
     # Update sequence if provided
     if "sequence" in payload:
         buffer["sequence"] = payload["sequence"]
-    
-    # If buffer too large, cancel existing flush and flush immediately
+
+    # If buffer too large, flush immediately; the flusher (if any) goes back to idle
     if _should_flush_immediately(buffer):
-        # Cancel existing debounce task
-        if request_id in _flush_tasks:
-            _flush_tasks[request_id].cancel()
-        
-        # Flush immediately (no debounce)
-        accumulated = buffer["accumulated_text"]
-        _publish_direct("chat.token", {
-            "session_id": buffer["session_id"],
-            "trace_id": buffer["trace_id"],
-            "request_id": request_id,
-            "token": accumulated,
-            "sequence": buffer["sequence"],
-            "batched": True,
-        })
-        _logger.debug(f"flush_immediate request_id={request_id} size={len(accumulated)}")
-        _chat_token_buffers.pop(request_id, None)
-        _flush_tasks.pop(request_id, None)
-    else:
-        # Schedule/reschedule debounced flush
-        if request_id in _flush_tasks:
-            # Cancel existing flush task (reset debounce timer)
-            _flush_tasks[request_id].cancel()
-        
-        # Schedule new flush task (debounced)
-        try:
-            task = asyncio.create_task(_flush_chat_token_buffer_async(request_id))
-            _flush_tasks[request_id] = task
-            _logger.debug(f"flush_scheduled request_id={request_id}")
-        except RuntimeError:
-            # No event loop - fallback to immediate direct publish (no buffering)
-            _publish_direct("chat.token", {
-                "session_id": payload.get("session_id"),
-                "trace_id": payload.get("trace_id"),
-                "request_id": request_id,
-                "token": token,
-                "sequence": payload.get("sequence", 0),
-                "batched": False,
-            })
+        _flush_chat_token_buffer(request_id, buffer)
+        _logger.debug(f"flush_immediate request_id={request_id}")
+        return
+
+    if loop is None:
+        # No event loop (publisher thread): no timer to debounce with, so flush
+        # once the oldest pending token is a batch window old; chat.end flushes the rest.
+        if now - buffer["first_at"] >= _MAX_BATCH_TIME_MS / 1000.0:
+            _flush_chat_token_buffer(request_id, buffer)
+        return
+
+    # One flusher per request, woken per token instead of re-created per token.
+    if buffer["wake"] is None:
+        buffer["wake"] = asyncio.Event()
+    buffer["wake"].set()
+    task = _flush_tasks.get(request_id)
+    if task is None or task.done():
+        _flush_tasks[request_id] = loop.create_task(_chat_token_flusher(request_id, buffer))
+        _logger.debug(f"flush_scheduled request_id={request_id}")
 
 
 def _handle_status_event(payload: Dict[str, Any]) -> None:
@@ -280,26 +304,12 @@ def _handle_chat_end_error(event_type: str, payload: Dict[str, Any]) -> None:
     
     # Cancel flush task and flush immediately
     if request_id in _flush_tasks:
-        _flush_tasks[request_id].cancel()
-        _flush_tasks.pop(request_id, None)
+        _flush_tasks.pop(request_id).cancel()
     
     # Flush buffer immediately (synchronously)
-    if request_id in _chat_token_buffers:
-        buffer = _chat_token_buffers[request_id]
-        accumulated = buffer["accumulated_text"]
-        
-        if accumulated:
-            _publish_direct("chat.token", {
-                "session_id": buffer["session_id"],
-                "trace_id": buffer["trace_id"],
-                "request_id": request_id,
-                "token": accumulated,
-                "sequence": buffer["sequence"],
-                "batched": True,
-            })
-            _logger.debug(f"flush_on_end request_id={request_id} size={len(accumulated)}")
-        
-        _chat_token_buffers.pop(request_id, None)
+    buffer = _chat_token_buffers.pop(request_id, None)
+    if buffer is not None:
+        _flush_chat_token_buffer(request_id, buffer)
     
     # Clean up status rate limiting state
     _status_rate_limit.pop(request_id, None)
@@ -325,6 +335,25 @@ def subscribe(event_type: str, callback: Callable[[str, Any], None]) -> Callable
     return unsubscribe
 
 
+def _subscribe_session(event_type: str, session_id: str, callback: Callable[[str, Any], None]) -> Callable[[], None]:
+    """Subscribe to `event_type` payloads whose session_id matches."""
+    if _closed:
+        return lambda: None
+    _session_subs[event_type].setdefault(session_id, []).append(callback)
+
+    def unsubscribe() -> None:
+        by_session = _session_subs.get(event_type, {})
+        callbacks = by_session.get(session_id, [])
+        try:
+            callbacks.remove(callback)
+        except ValueError:
+            pass
+        if not callbacks:
+            by_session.pop(session_id, None)
+
+    return unsubscribe
+
+
 def subscribe_all(callback: Callable[[str, Any], None]) -> Callable[[], None]:
     """
     Subscribe to all events. Callback receives (event_type, payload).
@@ -342,23 +371,108 @@ def subscribe_all(callback: Callable[[str, Any], None]) -> Callable[[], None]:
     return unsubscribe
 
 
-async def subscribe_async(event_types: List[str], session_filter: str | None = None) -> asyncio.Queue:
+class EventQueue:
+    """Subscriber queue for one async consumer, fed from any thread.
+
+    Producers append to a deque; the consumer's loop is only woken when it is
+    actually parked in `get`/`drain`, so a burst of events costs one wakeup
+    instead of one per event (and publishing from a worker thread is safe,
+    which asyncio.Queue is not).
+    """
+
+    def __init__(self, loop: asyncio.AbstractEventLoop) -> None:
+        self._loop = loop
+        self._items: deque = deque()
+        self._waiter: asyncio.Future | None = None
+        self._lock = threading.Lock()
+        self.cleanup: Callable[[], None] = lambda: None
+
+    def put_nowait(self, item: Any) -> None:
+        with self._lock:
+            self._items.append(item)
+            waiter, self._waiter = self._waiter, None
+        if waiter is None:
+            return
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+        if running is self._loop:
+            _wake(waiter)
+        else:
+            try:
+                self._loop.call_soon_threadsafe(_wake, waiter)
+            except RuntimeError:
+                pass  # consumer loop closed
+
+    def qsize(self) -> int:
+        return len(self._items)
+
+    def empty(self) -> bool:
+        return not self._items
+
+    def get_nowait(self) -> Any:
+        try:
+            return self._items.popleft()
+        except IndexError:
+            raise asyncio.QueueEmpty() from None
+
+    async def _wait(self, timeout: float | None) -> bool:
+        with self._lock:
+            if self._items:
+                return True
+            waiter = self._waiter = self._loop.create_future()
+        try:
+            if timeout is None:
+                await waiter
+            else:
+                await asyncio.wait_for(waiter, timeout)
+        except asyncio.TimeoutError:
+            pass
+        finally:
+            with self._lock:
+                if self._waiter is waiter:
+                    self._waiter = None
+        return bool(self._items)
+
+    async def get(self) -> Any:
+        while not self._items:
+            await self._wait(None)
+        return self._items.popleft()
+
+    async def drain(self, timeout: float | None = None, limit: int = 256) -> List[Any]:
+        """Everything queued (up to `limit`), waiting up to `timeout` for the first item; [] on timeout."""
+        if not self._items and not await self._wait(timeout):
+            return []
+        items = []
+        while self._items and len(items) < limit:
+            items.append(self._items.popleft())
+        return items
+
+
+def _wake(waiter: asyncio.Future) -> None:
+    if not waiter.done():
+        waiter.set_result(None)
+
+
+async def subscribe_async(event_types: List[str], session_filter: str | None = None) -> EventQueue:
     """
     Subscribe to multiple event types and return an async queue.
     Events are filtered by session_id if provided.
     
     Returns a queue that will receive (event_type, payload) tuples.
     """
-    queue = asyncio.Queue()
+    queue = EventQueue(asyncio.get_running_loop())
     
     def handler(event_type, payload):
-        if session_filter and payload.get("session_id") != session_filter:
-            return
         queue.put_nowait((event_type, payload))
     
     unsubscribers = []
     for event_type in event_types:
-        unsubscribers.append(subscribe(event_type, handler))
+        if session_filter:
+            unsubscribers.append(_subscribe_session(event_type, session_filter, handler))
+        else:
+            unsubscribers.append(subscribe(event_type, handler))
     
     # Return queue and cleanup function
     def cleanup():
@@ -368,7 +482,7 @@ async def subscribe_async(event_types: List[str], session_filter: str | None = N
             except Exception:
                 pass
     
-    queue.cleanup = cleanup  # type: ignore
+    queue.cleanup = cleanup
     return queue
 
 
@@ -388,14 +502,7 @@ def publish(event_type: str, payload: Any) -> None:
         _handle_chat_end_error(event_type, payload)
     
     # Normal publishing
-    callbacks = list(_subs.get(event_type, []))
-    # Also notify wildcard subscribers
-    if "*" in _subs:
-        callbacks.extend(_subs["*"])
-    for cb in callbacks:
-        _run_callback(cb, event_type, payload)
-    for cb in list(_wildcard_subs):
-        _run_callback(cb, event_type, payload)
+    _publish_direct(event_type, payload)
 
 
 def close() -> None:
@@ -404,6 +511,7 @@ def close() -> None:
     _closed = True
     _subs.clear()
     _wildcard_subs.clear()
+    _session_subs.clear()
     
     # Cancel all flush tasks
     for task in list(_flush_tasks.values()):
@@ -419,16 +527,7 @@ def close() -> None:
     
     # Flush any remaining buffers synchronously
     for request_id, buffer in list(_chat_token_buffers.items()):
-        accumulated = buffer["accumulated_text"]
-        if accumulated:
-            _publish_direct("chat.token", {
-                "session_id": buffer["session_id"],
-                "trace_id": buffer["trace_id"],
-                "request_id": request_id,
-                "token": accumulated,
-                "sequence": buffer["sequence"],
-                "batched": True,
-            })
+        _flush_chat_token_buffer(request_id, buffer)
     _chat_token_buffers.clear()
     
     # Clear status rate limiting state
@@ -443,6 +542,7 @@ def reset_for_tests() -> None:
     _closed = False
     _subs.clear()
     _wildcard_subs.clear()
+    _session_subs.clear()
     
     # Cancel all flush tasks
     for task in list(_flush_tasks.values()):
@@ -484,24 +584,10 @@ def cleanup_request_buffers(request_id: str) -> None:
         _callback_tasks.pop(request_id, None)
         _logger.debug(f"cleanup_callback_tasks request_id={request_id} count={len(tasks)}")
     
-    # Flush remaining tokens
-    if request_id in _chat_token_buffers:
-        buffer = _chat_token_buffers[request_id]
-        accumulated = buffer["accumulated_text"]
-        
-        # Flush any remaining tokens before cleanup
-        if accumulated:
-            _publish_direct("chat.token", {
-                "session_id": buffer["session_id"],
-                "trace_id": buffer["trace_id"],
-                "request_id": request_id,
-                "token": accumulated,
-                "sequence": buffer["sequence"],
-                "batched": True,
-            })
-            _logger.debug(f"flush_on_cleanup request_id={request_id} size={len(accumulated)}")
-        
-        _chat_token_buffers.pop(request_id, None)
+    # Flush remaining tokens before cleanup
+    buffer = _chat_token_buffers.pop(request_id, None)
+    if buffer is not None:
+        _flush_chat_token_buffer(request_id, buffer)
         _logger.debug(f"cleanup_buffer request_id={request_id}")
     
     # Clean up status rate limiting state
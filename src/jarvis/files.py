@@ -1,4 +1,7 @@
+import hashlib
 import os
+import shutil
+import tempfile
 import uuid
 from datetime import datetime, timedelta, timezone
 from pathlib import Path
@@ -8,6 +11,9 @@ from jarvis.db import get_conn
 BASE_DIR = Path(__file__).resolve().parent.parent
 WORKSPACE_ROOT = (BASE_DIR / "data" / "workspaces").resolve()
 UPLOAD_DIR_NAME = "uploads"
+# Content-addressed upload storage; the leading dot keeps it clear of user dirs (see _safe_user_dir).
+BLOB_DIR_NAME = ".blobs"
+UPLOAD_CHUNK_SIZE = 1024 * 1024
 
 EXPIRY_DAYS = 30
 WARN_HOURS = 24
@@ -36,6 +42,8 @@ def safe_path(user_id: str, rel_path: str) -> Path:
 def write_file(user_id: str, rel_path: str, content: str) -> Path:
     full = safe_path(user_id, rel_path)
     full.parent.mkdir(parents=True, exist_ok=True)
+    if full.exists() and full.stat().st_nlink > 1:
+        full.unlink()  # shared upload blob: write a private copy instead
     with open(full, "w", encoding="utf-8") as f:
         f.write(content)
     return full
@@ -69,7 +77,120 @@ def _sanitize_filename(name: str) -> str:
     return safe or "upload"
 
 
-def save_upload(user_id: int, user_key: str, original_name: str, content_type: str | None, data: bytes) -> dict:
+class UploadTooLarge(Exception):
+    pass
+
+
+def _blob_root() -> Path:
+    return WORKSPACE_ROOT / BLOB_DIR_NAME
+
+
+def _blob_path(sha256: str) -> Path:
+    return _blob_root() / sha256[:2] / sha256
+
+
+class UploadWriter:
+    """Streams an upload to a temp file in bounded chunks, hashing it as it goes.
+
+    `write` raises UploadTooLarge as soon as `max_bytes` is exceeded; `commit` then
+    moves the content into the blob store (or drops it when the blob already exists)
+    and hard-links it into the user's uploads dir.
+    """
+
+    def __init__(self, max_bytes: int | None = None) -> None:
+        self.max_bytes = max_bytes
+        self.size = 0
+        self._hash = hashlib.sha256()
+        tmp_dir = _blob_root() / "tmp"
+        tmp_dir.mkdir(parents=True, exist_ok=True)
+        fd, name = tempfile.mkstemp(dir=tmp_dir, prefix="upload-")
+        self._tmp = Path(name)
+        self._fh = os.fdopen(fd, "wb")
+
+    @property
+    def sha256(self) -> str:
+        return self._hash.hexdigest()
+
+    def write(self, chunk: bytes) -> None:
+        self.size += len(chunk)
+        if self.max_bytes is not None and self.size > self.max_bytes:
+            self.abort()
+            raise UploadTooLarge(f"upload exceeds {self.max_bytes} bytes")
+        self._hash.update(chunk)
+        self._fh.write(chunk)
+
+    def abort(self) -> None:
+        self._fh.close()
+        self._tmp.unlink(missing_ok=True)
+
+    def commit(self, dest: Path) -> bool:
+        """Store the content at `dest`; True when an identical blob was already stored."""
+        self._fh.close()
+        blob = _blob_path(self.sha256)
+        blob.parent.mkdir(parents=True, exist_ok=True)
+        if blob.exists():
+            try:
+                _link_or_copy(blob, dest)
+                self._tmp.unlink(missing_ok=True)
+                return True
+            except FileNotFoundError:
+                pass  # collected in the meantime; store ours below
+        os.chmod(self._tmp, 0o444)
+        # Link the upload first so purge_orphan_blobs never sees the new blob with a single link.
+        _link_or_copy(self._tmp, dest)
+        os.replace(self._tmp, blob)
+        return False
+
+
+def _link_or_copy(blob: Path, dest: Path) -> None:
+    try:
+        os.link(blob, dest)
+    except FileNotFoundError:
+        raise
+    except OSError:
+        shutil.copyfile(blob, dest)  # no hard links on this filesystem
+
+
+def _discard_upload_file(user_key: str, stored_name: str, sha256: str | None) -> None:
+    """Remove a user's reference to an upload and its blob once nothing else links to it."""
+    try:
+        path = safe_path(user_key, f"{UPLOAD_DIR_NAME}/{stored_name}")
+        if path.exists():
+            path.unlink()
+    except Exception:
+        pass
+    if not sha256:
+        return
+    try:
+        blob = _blob_path(sha256)
+        if blob.exists() and blob.stat().st_nlink <= 1:
+            blob.unlink()
+    except OSError:
+        pass
+
+
+def purge_orphan_blobs() -> int:
+    """Delete blobs no upload links to any more (and stale temp files); returns the count."""
+    root = _blob_root()
+    if not root.exists():
+        return 0
+    removed = 0
+    for path in root.glob("*/*"):
+        try:
+            if path.parent.name == "tmp":
+                stale = path.stat().st_mtime < datetime.now().timestamp() - 24 * 3600
+                if not stale:
+                    continue
+            elif path.stat().st_nlink > 1:
+                continue
+            path.unlink()
+            removed += 1
+        except OSError:
+            pass
+    return removed
+
+
+def store_upload(user_id: int, user_key: str, original_name: str, content_type: str | None, writer: UploadWriter) -> dict:
     user_dir = ensure_user_dir(user_key)
     uploads_dir = (user_dir / UPLOAD_DIR_NAME).resolve()
     uploads_dir.mkdir(parents=True, exist_ok=True)
@@ -77,22 +198,24 @@ def save_upload(user_id: int, user_key: str, original_name: str, content_type: s
     stored_name = f"{uuid.uuid4().hex}_{safe_name}"
     path = (uploads_dir / stored_name).resolve()
     if not str(path).startswith(str(uploads_dir)):
+        writer.abort()
         raise ValueError("Unsafe upload path")
-    with open(path, "wb") as f:
-        f.write(data)
+    deduplicated = writer.commit(path)
+    sha256 = writer.sha256
     now = datetime.now(timezone.utc)
     expires_at, remind_at = _compute_expiry(now)
-    size_bytes = len(data)
+    size_bytes = writer.size
     with get_conn() as conn:
         conn.execute(
-            "INSERT INTO user_files (user_id, original_name, stored_name, content_type, size_bytes, expires_at, remind_at, warned_at, updated_at, created_at) "
-            "VALUES (?,?,?,?,?,?,?,?,?,?)",
+            "INSERT INTO user_files (user_id, original_name, stored_name, content_type, size_bytes, sha256, expires_at, remind_at, warned_at, updated_at, created_at) "
+            "VALUES (?,?,?,?,?,?,?,?,?,?,?)",
             (
                 user_id,
                 original_name,
                 stored_name,
                 content_type,
                 size_bytes,
+                sha256,
                 expires_at,
                 remind_at,
                 None,
@@ -108,11 +231,19 @@ def save_upload(user_id: int, user_key: str, original_name: str, content_type: s
         "stored_name": stored_name,
         "content_type": content_type,
         "size_bytes": size_bytes,
+        "sha256": sha256,
+        "deduplicated": deduplicated,
         "created_at": now.isoformat(),
         "expires_at": expires_at,
     }
 
 
+def save_upload(user_id: int, user_key: str, original_name: str, content_type: str | None, data: bytes) -> dict:
+    writer = UploadWriter()
+    writer.write(data)
+    return store_upload(user_id, user_key, original_name, content_type, writer)
+
+
 def list_uploads(user_id: int, limit: int = 50) -> list[dict]:
     with get_conn() as conn:
         rows = conn.execute(
@@ -136,7 +267,7 @@ def find_upload_by_name(user_id: int, original_name: str) -> dict | None:
 def delete_uploads_by_name(user_id: int, user_key: str, original_name: str) -> int:
     with get_conn() as conn:
         rows = conn.execute(
-            "SELECT id, stored_name FROM user_files WHERE user_id = ? AND original_name = ?",
+            "SELECT id, stored_name, sha256 FROM user_files WHERE user_id = ? AND original_name = ?",
             (user_id, original_name),
         ).fetchall()
         if not rows:
@@ -148,12 +279,7 @@ def delete_uploads_by_name(user_id: int, user_key: str, original_name: str) -> i
         conn.commit()
     removed = 0
     for r in rows:
-        try:
-            path = safe_path(user_key, f"{UPLOAD_DIR_NAME}/{r['stored_name']}")
-            if path.exists():
-                path.unlink()
-        except Exception:
-            pass
+        _discard_upload_file(user_key, r["stored_name"], r["sha256"])
         removed += 1
     return removed
 
@@ -164,7 +290,7 @@ def delete_uploads_by_ext(user_id: int, user_key: str, ext: str) -> int:
         return 0
     with get_conn() as conn:
         rows = conn.execute(
-            "SELECT id, stored_name, original_name FROM user_files WHERE user_id = ?",
+            "SELECT id, stored_name, sha256, original_name FROM user_files WHERE user_id = ?",
             (user_id,),
         ).fetchall()
         if not rows:
@@ -178,12 +304,7 @@ def delete_uploads_by_ext(user_id: int, user_key: str, ext: str) -> int:
         conn.commit()
     removed = 0
     for r in targets:
-        try:
-            path = safe_path(user_key, f"{UPLOAD_DIR_NAME}/{r['stored_name']}")
-            if path.exists():
-                path.unlink()
-        except Exception:
-            pass
+        _discard_upload_file(user_key, r["stored_name"], r["sha256"])
         removed += 1
     return removed
 
@@ -201,19 +322,14 @@ def get_upload(user_id: int, file_id: int) -> dict | None:
 def delete_upload(user_id: int, user_key: str, file_id: int) -> bool:
     with get_conn() as conn:
         row = conn.execute(
-            "SELECT stored_name FROM user_files WHERE user_id = ? AND id = ?",
+            "SELECT stored_name, sha256 FROM user_files WHERE user_id = ? AND id = ?",
             (user_id, file_id),
         ).fetchone()
         if not row:
             return False
         conn.execute("DELETE FROM user_files WHERE user_id = ? AND id = ?", (user_id, file_id))
         conn.commit()
-    try:
-        path = safe_path(user_key, f"{UPLOAD_DIR_NAME}/{row['stored_name']}")
-        if path.exists():
-            path.unlink()
-    except Exception:
-        pass
+    _discard_upload_file(user_key, row["stored_name"], row["sha256"])
     return True
 
 
@@ -258,7 +374,7 @@ def purge_expired_uploads(user_id: int, user_key: str) -> int:
                 (expires_at, remind_at, now, r["id"], user_id),
             )
         rows = conn.execute(
-            "SELECT id, stored_name FROM user_files WHERE user_id = ? AND expires_at IS NOT NULL AND expires_at <= ?",
+            "SELECT id, stored_name, sha256 FROM user_files WHERE user_id = ? AND expires_at IS NOT NULL AND expires_at <= ?",
             (user_id, now),
         ).fetchall()
         conn.execute(
@@ -268,12 +384,7 @@ def purge_expired_uploads(user_id: int, user_key: str) -> int:
         conn.commit()
     removed = 0
     for r in rows:
-        try:
-            path = safe_path(user_key, f"{UPLOAD_DIR_NAME}/{r['stored_name']}")
-            if path.exists():
-                path.unlink()
-        except Exception:
-            pass
+        _discard_upload_file(user_key, r["stored_name"], r["sha256"])
         removed += 1
     return removed
 
@@ -349,12 +460,8 @@ def get_download_token(token: str) -> dict | None:
         return None
     entry = dict(row)
     try:
-        expires_at = datetime.fromisoformat(entry.get("expires_at", ""))
-        if expires_at <= datetime.now(timezone.utc):
-            with get_conn() as conn:
-                conn.execute("DELETE FROM download_tokens WHERE token = ?", (token,))
-                conn.commit()
-            return None
+        if datetime.fromisoformat(entry.get("expires_at", "")) <= datetime.now(timezone.utc):
+            return None  # deleted by purge_expired_download_tokens
     except Exception:
         pass
     return entry
@@ -423,11 +530,7 @@ def list_download_tokens(user_id: int) -> list[dict]:
     for r in rows:
         entry = dict(r)
         try:
-            expires_at = datetime.fromisoformat(entry.get("expires_at", ""))
-            if expires_at <= now:
-                with get_conn() as conn:
-                    conn.execute("DELETE FROM download_tokens WHERE token = ?", (entry["token"],))
-                    conn.commit()
+            if datetime.fromisoformat(entry.get("expires_at", "")) <= now:
                 continue
         except Exception:
             pass
@@ -435,6 +538,14 @@ def list_download_tokens(user_id: int) -> list[dict]:
     return items
 
 
+def purge_expired_download_tokens() -> int:
+    now = datetime.now(timezone.utc).isoformat()
+    with get_conn() as conn:
+        cur = conn.execute("DELETE FROM download_tokens WHERE expires_at <= ?", (now,))
+        conn.commit()
+    return cur.rowcount
+
+
 def delete_download_token(user_id: int, token: str) -> bool:
     with get_conn() as conn:
         cur = conn.execute(
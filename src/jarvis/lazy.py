@@ -0,0 +1,216 @@
+"""
+Deferred imports for heavy dependencies and import timing for the startup report.
+
+`np = lazy_import("numpy")` binds a module proxy that imports numpy on first attribute
+access, so processes that never touch embeddings or TTS don't pay for them. Every
+lazy load and every `jarvis.*` module execution is timed (wall time and resident
+memory delta) and listed by `import_stats()`; see `jarvis.startup` for the report.
+"""
+
+from __future__ import annotations
+
+import importlib
+import importlib.abc
+import importlib.util
+import os
+import sys
+import threading
+import time
+import types
+from typing import Any, Callable, Dict, List, Optional
+
+_stats: Dict[str, Dict[str, Any]] = {}
+_stats_lock = threading.Lock()
+_load_lock = threading.RLock()
+
+
+def rss_bytes() -> int:
+    """Current resident set size; 0 when it can't be determined."""
+    try:
+        with open("/proc/self/statm", "rb") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except Exception:
+        pass
+    try:
+        import resource
+
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if sys.platform == "darwin" else peak * 1024  # peak, best available
+    except Exception:
+        return 0
+
+
+def _record(name: str, kind: str, seconds: float, rss_delta: int, ok: bool = True) -> None:
+    with _stats_lock:
+        if name in _stats:
+            return
+        _stats[name] = {
+            "module": name,
+            "kind": kind,
+            "seconds": round(seconds, 6),
+            "rss_delta_bytes": rss_delta,
+            "ok": ok,
+            "order": len(_stats),
+        }
+
+
+def _timed_import(name: str) -> types.ModuleType:
+    started, rss_before = time.perf_counter(), rss_bytes()
+    try:
+        module = importlib.import_module(name)
+    except ImportError:
+        _record(name, "lazy", time.perf_counter() - started, rss_bytes() - rss_before, ok=False)
+        raise
+    _record(name, "lazy", time.perf_counter() - started, rss_bytes() - rss_before)
+    return module
+
+
+class LazyModule(types.ModuleType):
+    """Module proxy that imports the real module on first attribute access.
+
+    With `fallback`, an ImportError is swallowed and attribute lookups go to
+    `fallback()` instead (for optional dependencies with a pure-Python stand-in).
+    """
+
+    def __init__(self, name: str, fallback: Optional[Callable[[], Any]] = None) -> None:
+        super().__init__(name)
+        self.__dict__["_lazy_name"] = name
+        self.__dict__["_lazy_fallback"] = fallback
+        self.__dict__["_lazy_target"] = None
+        self.__dict__["_lazy_is_fallback"] = False
+
+    def _lazy_load(self) -> Any:
+        target = self.__dict__["_lazy_target"]
+        if target is not None:
+            return target
+        with _load_lock:
+            target = self.__dict__["_lazy_target"]
+            if target is not None:
+                return target
+            try:
+                target = _timed_import(self.__dict__["_lazy_name"])
+            except ImportError:
+                fallback = self.__dict__["_lazy_fallback"]
+                if fallback is None:
+                    raise
+                target = fallback()
+                self.__dict__["_lazy_is_fallback"] = True
+            else:
+                # Copy the public namespace so later lookups skip __getattr__ entirely.
+                self.__dict__.update({k: v for k, v in vars(target).items() if not k.startswith("__")})
+            self.__dict__["_lazy_target"] = target
+            return target
+
+    def __getattr__(self, attr: str) -> Any:
+        if attr.startswith("__") and attr.endswith("__") and self.__dict__["_lazy_target"] is None:
+            # Introspection (copy, pickle, inspect, doctest) must not trigger the import.
+            if attr != "__version__":
+                raise AttributeError(attr)
+        return getattr(self._lazy_load(), attr)
+
+    def __dir__(self) -> List[str]:
+        return dir(self._lazy_load())
+
+    def __repr__(self) -> str:
+        state = "loaded" if self.__dict__["_lazy_target"] is not None else "not loaded"
+        return f"<lazy module {self.__dict__['_lazy_name']!r} ({state})>"
+
+
+def lazy_import(name: str, fallback: Optional[Callable[[], Any]] = None) -> Any:
+    """Return the module if already imported, else a proxy that imports it on first use."""
+    module = sys.modules.get(name)
+    if module is not None and fallback is None:
+        return module
+    return LazyModule(name, fallback)
+
+
+def is_loaded(module: Any) -> bool:
+    if isinstance(module, LazyModule):
+        return module.__dict__["_lazy_target"] is not None
+    return module is not None
+
+
+def uses_fallback(module: Any) -> bool:
+    """Load `module` if needed and report whether its fallback stand-in is in use."""
+    if not isinstance(module, LazyModule):
+        return False
+    module._lazy_load()
+    return bool(module.__dict__["_lazy_is_fallback"])
+
+
+def is_installed(name: str) -> bool:
+    """Whether `name` can be imported, without importing it."""
+    if name in sys.modules:
+        return True
+    try:
+        return importlib.util.find_spec(name) is not None
+    except (ImportError, ValueError):
+        return False
+
+
+# ---- import timing for jarvis.* modules -----------------------------------------
+
+
+class _TimingLoader(importlib.abc.Loader):
+    def __init__(self, loader: importlib.abc.Loader) -> None:
+        self._loader = loader
+
+    def create_module(self, spec):
+        return self._loader.create_module(spec)
+
+    def exec_module(self, module: types.ModuleType) -> None:
+        # Restore the real loader so reloads and introspection see a normal module.
+        module.__loader__ = self._loader
+        if module.__spec__ is not None:
+            module.__spec__.loader = self._loader
+        started, rss_before = time.perf_counter(), rss_bytes()
+        try:
+            self._loader.exec_module(module)
+        finally:
+            _record(module.__name__, "eager", time.perf_counter() - started, rss_bytes() - rss_before)
+
+    def __getattr__(self, attr: str) -> Any:
+        return getattr(self._loader, attr)
+
+
+class _TimingFinder(importlib.abc.MetaPathFinder):
+    """Times execution of `prefix.*` modules (cumulative, like -X importtime)."""
+
+    def __init__(self, prefix: str) -> None:
+        self.prefix = prefix
+        self._local = threading.local()
+
+    def find_spec(self, fullname, path, target=None):
+        if not (fullname == self.prefix or fullname.startswith(self.prefix + ".")):
+            return None
+        if getattr(self._local, "active", False):
+            return None
+        self._local.active = True
+        try:
+            spec = importlib.util.find_spec(fullname)
+        except (ImportError, ValueError):
+            return None
+        finally:
+            self._local.active = False
+        if spec is None or spec.loader is None or not hasattr(spec.loader, "exec_module"):
+            return spec
+        spec.loader = _TimingLoader(spec.loader)
+        return spec
+
+
+_finder: Optional[_TimingFinder] = None
+
+
+def install_import_timer(prefix: str = "jarvis") -> None:
+    """Start timing `prefix.*` imports; disabled with JARVIS_IMPORT_TIMING=0."""
+    global _finder
+    if _finder is not None or os.getenv("JARVIS_IMPORT_TIMING", "1") == "0":
+        return
+    _finder = _TimingFinder(prefix)
+    sys.meta_path.insert(0, _finder)
+
+
+def import_stats() -> List[Dict[str, Any]]:
+    """Recorded imports in load order (cumulative seconds and RSS delta)."""
+    with _stats_lock:
+        return sorted((dict(v) for v in _stats.values()), key=lambda r: r["order"])
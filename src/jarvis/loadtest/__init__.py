@@ -0,0 +1,17 @@
+"""
+Load testing: a deterministic fake Ollama and a driver that replays a request mix
+against the real app. Run with `python -m jarvis.loadtest --help`.
+"""
+
+from jarvis.loadtest.fake_ollama import FakeOllama, FakeOllamaConfig
+from jarvis.loadtest.harness import DEFAULT_MIX, LoadConfig, format_report, percentile, run_load
+
+__all__ = [
+    "DEFAULT_MIX",
+    "FakeOllama",
+    "FakeOllamaConfig",
+    "LoadConfig",
+    "format_report",
+    "percentile",
+    "run_load",
+]
@@ -0,0 +1,51 @@
+import argparse
+import json
+
+from jarvis.loadtest.fake_ollama import FakeOllamaConfig
+from jarvis.loadtest.harness import DEFAULT_MIX, LoadConfig, format_report, run_load
+
+
+def _parse_mix(value: str) -> dict:
+    mix = {}
+    for part in value.split(","):
+        name, _, weight = part.partition("=")
+        if name.strip() not in DEFAULT_MIX:
+            raise argparse.ArgumentTypeError(f"unknown mix entry {name!r}; choose from {', '.join(DEFAULT_MIX)}")
+        mix[name.strip()] = float(weight or 1)
+    return mix
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(prog="python -m jarvis.loadtest", description="Drive a request mix against Jarvis with a fake Ollama.")
+    parser.add_argument("--users", type=int, default=4)
+    parser.add_argument("--duration", type=float, default=10.0, help="seconds")
+    parser.add_argument("--mix", type=_parse_mix, default=dict(DEFAULT_MIX), help="e.g. chat_stream=5,sessions=2,notifications=2,upload=1")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--think-ms", type=float, default=0.0, help="pause between requests per user")
+    parser.add_argument("--transport", choices=["auto", "http", "asgi"], default="auto")
+    parser.add_argument("--latency-ms", type=float, default=50.0, help="fake Ollama time to first token")
+    parser.add_argument("--tokens-per-sec", type=float, default=200.0)
+    parser.add_argument("--reply-tokens", type=int, default=40)
+    parser.add_argument("--embed-dim", type=int, default=768)
+    parser.add_argument("--rag", action="store_true", help="enable RAG (exercises /api/embeddings)")
+    parser.add_argument("--workdir", help="data dir to use instead of a fresh temp dir")
+    parser.add_argument("--json", action="store_true", help="print the raw report as JSON")
+    args = parser.parse_args()
+
+    report = run_load(
+        LoadConfig(users=args.users, duration_s=args.duration, mix=args.mix, seed=args.seed, think_ms=args.think_ms),
+        FakeOllamaConfig(
+            latency_ms=args.latency_ms,
+            tokens_per_sec=args.tokens_per_sec,
+            reply_tokens=args.reply_tokens,
+            embed_dim=args.embed_dim,
+        ),
+        workdir=args.workdir,
+        transport=args.transport,
+        enable_rag=args.rag,
+    )
+    print(json.dumps(report, indent=2) if args.json else format_report(report))
+
+
+if __name__ == "__main__":
+    main()
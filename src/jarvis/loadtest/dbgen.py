@@ -0,0 +1,307 @@
+"""
+Synthetic database generator for storage-layer benchmarks.
+
+Builds a Jarvis SQLite database with the real schema (jarvis.db) and realistic
+volumes: users x sessions x messages, plus notes, uploads, notifications,
+tickets, tool audit rows and login sessions. Per-user counts vary around the
+configured means and a few "heavy" users get several times more data, as in a
+real install. Output is deterministic for a given seed.
+
+    python -m jarvis.loadtest.dbgen /tmp/big.db --users 2000 --messages 40
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import random
+import sqlite3
+import time
+import uuid
+from dataclasses import asdict, dataclass
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Iterator, List, Tuple
+
+from jarvis.auth import _hash_password
+
+BENCH_USERNAME = "bench-admin"
+BENCH_PASSWORD = "bench-password"
+BENCH_TOKEN = "bench-token-" + "0" * 20
+
+_DA = [
+    "Hvordan bliver vejret i morgen i Aarhus?",
+    "Kan du minde mig om at ringe til tandlægen på fredag?",
+    "Skriv en kort opsummering af mødet med salgsteamet.",
+    "Hvad er forskellen på en liste og en tuple i Python?",
+    "Jeg skal bruge en opskrift på boller til weekenden.",
+    "Det lyder godt, tak for hjælpen!",
+]
+_EN = [
+    "Summarise the latest news about renewable energy.",
+    "Why does my pytest run fail with a KeyError in the fixture?",
+    "Draft a polite email declining the meeting on Thursday.",
+    "Explain how SQLite chooses an index for a query.",
+    "Give me three ideas for a birthday present for my sister.",
+    "Perfect, that is exactly what I needed.",
+]
+_REPLY_TAIL = (
+    " Her er et par punkter at overveje, og sig endelig til hvis du vil have flere detaljer."
+    " Here are a few points to consider; let me know if you want more detail."
+)
+_TOOLS = ["weather", "news", "search", "currency", "time", "system", "ping", "process", "files", "notes"]
+
+
+@dataclass
+class Scale:
+    users: int = 200
+    sessions_per_user: int = 10
+    messages_per_session: int = 20
+    notes_per_user: int = 15
+    files_per_user: int = 8
+    events_per_user: int = 30
+    tickets_per_user: int = 1
+    tool_calls_per_user: int = 40
+    heavy_user_ratio: float = 0.02  # these users get `heavy_factor` times the mean
+    heavy_factor: int = 10
+    days: int = 120  # spread of timestamps into the past
+
+    def estimate(self) -> Dict[str, int]:
+        """Approximate row counts (the actual numbers vary with the seed)."""
+        weight = 1 + self.heavy_user_ratio * (self.heavy_factor - 1)
+        sessions = int(self.users * self.sessions_per_user * weight)
+        return {
+            "users": self.users,
+            "sessions": sessions,
+            "messages": sessions * self.messages_per_session,
+            "notes": int(self.users * self.notes_per_user * weight),
+            "user_files": int(self.users * self.files_per_user * weight),
+            "events": int(self.users * self.events_per_user * weight),
+            "tool_audit": int(self.users * self.tool_calls_per_user * weight),
+        }
+
+
+def _iso(dt: datetime) -> str:
+    return dt.isoformat()
+
+
+def _count(rng: random.Random, mean: int, heavy: bool, factor: int) -> int:
+    if mean <= 0:
+        return 0
+    base = rng.randint(max(1, mean // 2), max(1, mean * 3 // 2))
+    return base * factor if heavy else base
+
+
+def _chunks(rows: Iterator[Tuple], size: int) -> Iterator[List[Tuple]]:
+    batch: List[Tuple] = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def _ensure_schema(path: str) -> None:
+    from jarvis import db
+
+    previous = os.environ.get("JARVIS_DB_PATH")
+    os.environ["JARVIS_DB_PATH"] = path
+    try:
+        with db.get_conn():
+            pass
+    finally:
+        if previous is None:
+            os.environ.pop("JARVIS_DB_PATH", None)
+        else:
+            os.environ["JARVIS_DB_PATH"] = previous
+
+
+def generate(path: str, scale: Scale | None = None, seed: int = 1, batch_size: int = 5000) -> Dict[str, object]:
+    """Create (or extend) the database at `path`; returns row counts and the bench user's token."""
+    scale = scale or Scale()
+    rng = random.Random(seed)
+    path = os.path.abspath(path)
+    started = time.perf_counter()
+    _ensure_schema(path)
+
+    now = datetime.now(timezone.utc).replace(microsecond=0)
+    password_hash = _hash_password(BENCH_PASSWORD)  # one shared hash; PBKDF2 per user would dominate the run
+    counts = {name: 0 for name in ("users", "sessions", "messages", "notes", "user_files", "events", "tickets", "ticket_messages", "tool_audit", "login_sessions")}
+
+    conn = sqlite3.connect(path)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=OFF")
+    try:
+        run_tag = uuid.UUID(int=rng.getrandbits(128)).hex[:8]
+        for index in range(scale.users):
+            heavy = index == 0 or rng.random() < scale.heavy_user_ratio
+            username = BENCH_USERNAME if index == 0 else f"user-{run_tag}-{index}"
+            created = now - timedelta(days=scale.days, seconds=rng.randint(0, 86400))
+            token = BENCH_TOKEN if index == 0 else uuid.UUID(int=rng.getrandbits(128)).hex
+            expires = now + timedelta(days=30)
+            cur = conn.execute(
+                "INSERT OR IGNORE INTO users (username, password_hash, email, full_name, city, last_seen, token, "
+                "token_expires_at, is_admin, is_disabled, created_at) VALUES (?,?,?,?,?,?,?,?,?,?,?)",
+                (
+                    username,
+                    password_hash,
+                    f"{username}@example.invalid",
+                    f"Bruger {index}",
+                    rng.choice(["Aarhus", "København", "Odense", "Aalborg", "London"]),
+                    _iso(now - timedelta(minutes=rng.randint(0, 60 * 24 * 7))),
+                    token,
+                    _iso(expires),
+                    1 if index == 0 else 0,
+                    0,
+                    _iso(created),
+                ),
+            )
+            if not cur.rowcount:
+                continue  # bench user already present from an earlier run
+            user_id = cur.lastrowid
+            counts["users"] += 1
+            conn.execute(
+                "INSERT INTO login_sessions (user_id, token, created_at, expires_at, last_seen) VALUES (?,?,?,?,?)",
+                (user_id, token, _iso(created), _iso(expires), _iso(now)),
+            )
+            counts["login_sessions"] += 1
+            _fill_user(conn, rng, scale, user_id, heavy, now, counts, batch_size)
+        conn.commit()
+        conn.execute("ANALYZE")
+        conn.commit()
+    finally:
+        conn.close()
+    return {
+        "path": path,
+        "seed": seed,
+        "scale": asdict(scale),
+        "rows": counts,
+        "bench_user": BENCH_USERNAME,
+        "bench_token": BENCH_TOKEN,
+        "seconds": round(time.perf_counter() - started, 2),
+        "size_mb": round(os.path.getsize(path) / (1024 * 1024), 1),
+    }
+
+
+def _fill_user(conn, rng, scale: Scale, user_id: int, heavy: bool, now: datetime, counts: Dict[str, int], batch_size: int) -> None:
+    span = scale.days * 86400
+
+    def past() -> datetime:
+        return now - timedelta(seconds=rng.randint(0, span))
+
+    sessions = []
+    for _ in range(_count(rng, scale.sessions_per_user, heavy, scale.heavy_factor)):
+        created = past()
+        sessions.append((uuid.UUID(int=rng.getrandbits(128)).hex, user_id, rng.choice(_DA + _EN)[:40], _iso(created), _iso(created)))
+    conn.executemany("INSERT INTO sessions (id, user_id, name, created_at, updated_at) VALUES (?,?,?,?,?)", sessions)
+    counts["sessions"] += len(sessions)
+
+    def messages() -> Iterator[Tuple]:
+        for session_id, _uid, _name, created, _updated in sessions:
+            at = datetime.fromisoformat(created)
+            for n in range(_count(rng, scale.messages_per_session, False, 1)):
+                role = "user" if n % 2 == 0 else "assistant"
+                text = rng.choice(_DA if rng.random() < 0.6 else _EN)
+                if role == "assistant":
+                    text += _REPLY_TAIL[: rng.randint(40, len(_REPLY_TAIL))]
+                at += timedelta(seconds=rng.randint(5, 600))
+                yield (session_id, role, text, len(text.encode("utf-8")), _iso(min(at, now)))
+
+    for batch in _chunks(messages(), batch_size):
+        conn.executemany("INSERT INTO messages (session_id, role, content, content_bytes, created_at) VALUES (?,?,?,?,?)", batch)
+        counts["messages"] += len(batch)
+
+    notes = []
+    for _ in range(_count(rng, scale.notes_per_user, heavy, scale.heavy_factor)):
+        created = past()
+        expires = now + timedelta(days=rng.randint(1, 30))
+        notes.append((user_id, rng.choice(_DA + _EN)[:30], rng.choice(_DA + _EN) + _REPLY_TAIL, _iso(expires), _iso(expires - timedelta(days=1)), rng.randint(0, 1), _iso(created), _iso(created)))
+    conn.executemany(
+        "INSERT INTO notes (user_id, title, content, expires_at, remind_at, remind_enabled, updated_at, created_at) VALUES (?,?,?,?,?,?,?,?)",
+        notes,
+    )
+    counts["notes"] += len(notes)
+
+    files = []
+    for n in range(_count(rng, scale.files_per_user, heavy, scale.heavy_factor)):
+        created = past()
+        expires = now + timedelta(days=rng.randint(1, 30))
+        ext = rng.choice(["pdf", "txt", "png", "docx", "csv"])
+        files.append((user_id, f"dokument-{n}.{ext}", f"{uuid.UUID(int=rng.getrandbits(128)).hex}.{ext}", "application/octet-stream", rng.randint(1_000, 5_000_000), _iso(expires), _iso(expires - timedelta(days=1)), _iso(created), _iso(created)))
+    conn.executemany(
+        "INSERT INTO user_files (user_id, original_name, stored_name, content_type, size_bytes, expires_at, remind_at, updated_at, created_at) VALUES (?,?,?,?,?,?,?,?,?)",
+        files,
+    )
+    counts["user_files"] += len(files)
+
+    events = []
+    for _ in range(_count(rng, scale.events_per_user, heavy, scale.heavy_factor)):
+        at = past()
+        created = _iso(at)
+        kind = "notification" if rng.random() < 0.7 else rng.choice(["reminder", "system"])
+        body = rng.choice(_DA + _EN)
+        meta = json.dumps({"source": "dbgen"})
+        events.append((f"{int(at.timestamp() * 1000)}-{uuid.UUID(int=rng.getrandbits(128)).hex}", user_id, body, created, created, kind, rng.choice(["info", "warning"]), body[:30], body, meta, 1 if rng.random() < 0.8 else 0))
+    conn.executemany(
+        "INSERT INTO events (id, user_id, message, created_at, created_utc, type, severity, title, body, meta_json, read) VALUES (?,?,?,?,?,?,?,?,?,?,?)",
+        events,
+    )
+    counts["events"] += len(events)
+
+    for _ in range(_count(rng, scale.tickets_per_user, heavy, scale.heavy_factor) if rng.random() < 0.5 or heavy else 0):
+        created = _iso(past())
+        cur = conn.execute(
+            "INSERT INTO tickets (user_id, title, status, priority, created_at, updated_at) VALUES (?,?,?,?,?,?)",
+            (user_id, rng.choice(_DA + _EN)[:40], rng.choice(["open", "pending", "closed"]), rng.choice(["low", "moderate", "high"]), created, created),
+        )
+        thread = [(cur.lastrowid, user_id if n % 2 == 0 else None, "user" if n % 2 == 0 else "admin", rng.choice(_DA + _EN), created) for n in range(rng.randint(1, 6))]
+        conn.executemany("INSERT INTO ticket_messages (ticket_id, user_id, role, content, created_at) VALUES (?,?,?,?,?)", thread)
+        counts["tickets"] += 1
+        counts["ticket_messages"] += len(thread)
+
+    session_ids = [s[0] for s in sessions] or [None]
+    audit = (
+        (_iso(past()), user_id, rng.choice(session_ids), rng.choice(_TOOLS), "{}", 1 if rng.random() < 0.95 else 0, round(rng.lognormvariate(4.5, 0.8), 1))
+        for _ in range(_count(rng, scale.tool_calls_per_user, heavy, scale.heavy_factor))
+    )
+    for batch in _chunks(audit, batch_size):
+        conn.executemany(
+            "INSERT INTO tool_audit (timestamp, user_id, session_id, tool_name, args_redacted, success, latency_ms) VALUES (?,?,?,?,?,?,?)",
+            batch,
+        )
+        counts["tool_audit"] += len(batch)
+
+
+def main(argv: List[str] | None = None) -> None:
+    defaults = Scale()
+    parser = argparse.ArgumentParser(prog="python -m jarvis.loadtest.dbgen", description="Generate a large synthetic Jarvis database.")
+    parser.add_argument("path", help="SQLite file to create or extend")
+    parser.add_argument("--users", type=int, default=defaults.users)
+    parser.add_argument("--sessions", type=int, default=defaults.sessions_per_user, help="mean sessions per user")
+    parser.add_argument("--messages", type=int, default=defaults.messages_per_session, help="mean messages per session")
+    parser.add_argument("--notes", type=int, default=defaults.notes_per_user)
+    parser.add_argument("--files", type=int, default=defaults.files_per_user)
+    parser.add_argument("--events", type=int, default=defaults.events_per_user)
+    parser.add_argument("--tickets", type=int, default=defaults.tickets_per_user)
+    parser.add_argument("--tool-calls", type=int, default=defaults.tool_calls_per_user)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args(argv)
+
+    scale = Scale(
+        users=args.users,
+        sessions_per_user=args.sessions,
+        messages_per_session=args.messages,
+        notes_per_user=args.notes,
+        files_per_user=args.files,
+        events_per_user=args.events,
+        tickets_per_user=args.tickets,
+        tool_calls_per_user=args.tool_calls,
+    )
+    print(f"estimated rows: {scale.estimate()}")
+    print(json.dumps(generate(args.path, scale, seed=args.seed), indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,228 @@
+"""
+Deterministic local stand-in for the Ollama HTTP API.
+
+Serves /api/chat, /api/generate, /api/embeddings, /api/embed and the
+OpenAI-compatible /v1/chat/completions (what the agent calls) with a configurable time to first token, token rate and embedding dimension. Replies
+and vectors are derived from a hash of the prompt, so the same input always
+produces the same output.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import math
+import random
+import struct
+import threading
+import time
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict
+
+_WORDS = (
+    "the quick answer is that it depends on the context and the data you have "
+    "so start small measure first then change one thing at a time and keep notes"
+).split()
+
+
+@dataclass
+class FakeOllamaConfig:
+    latency_ms: float = 50.0  # time to first token
+    tokens_per_sec: float = 200.0  # 0 = emit all tokens at once
+    reply_tokens: int = 40
+    embed_dim: int = 768
+    embed_latency_ms: float = 5.0
+    model: str = "fake-llm"
+
+
+@dataclass
+class FakeOllamaStats:
+    requests: Dict[str, int] = field(default_factory=dict)
+    tokens: int = 0
+    active: int = 0
+    max_active: int = 0
+    lock: threading.Lock = field(default_factory=threading.Lock, repr=False)
+
+    def enter(self, path: str) -> None:
+        with self.lock:
+            self.requests[path] = self.requests.get(path, 0) + 1
+            self.active += 1
+            self.max_active = max(self.max_active, self.active)
+
+    def leave(self, tokens: int = 0) -> None:
+        with self.lock:
+            self.active -= 1
+            self.tokens += tokens
+
+    def snapshot(self) -> dict:
+        with self.lock:
+            return {"requests": dict(self.requests), "tokens": self.tokens, "max_active": self.max_active}
+
+
+def _seed(text: str) -> int:
+    return int.from_bytes(hashlib.sha256(text.encode("utf-8")).digest()[:8], "big")
+
+
+def reply_tokens(prompt: str, count: int) -> list[str]:
+    rng = random.Random(_seed(prompt))
+    return [rng.choice(_WORDS) + " " for _ in range(count)]
+
+
+def embedding(text: str, dim: int) -> list[float]:
+    """Unit-length pseudo-random vector for `text`."""
+    out: list[float] = []
+    counter = 0
+    while len(out) < dim:
+        block = hashlib.sha256(f"{counter}:{text}".encode("utf-8")).digest()
+        out.extend(v / 2**31 - 1.0 for v in struct.unpack(">8I", block))
+        counter += 1
+    vec = out[:dim]
+    norm = math.sqrt(sum(v * v for v in vec)) or 1.0
+    return [v / norm for v in vec]
+
+
+def _prompt_of(body: dict) -> str:
+    messages = body.get("messages")
+    if isinstance(messages, list) and messages:
+        return str(messages[-1].get("content", ""))
+    return str(body.get("prompt", ""))
+
+
+class _Handler(BaseHTTPRequestHandler):
+    server_version = "FakeOllama/1.0"
+    config: FakeOllamaConfig
+    stats: FakeOllamaStats
+
+    def log_message(self, *args) -> None:
+        pass
+
+    def _json(self, payload: dict, status: int = 200) -> None:
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self) -> None:
+        if self.path == "/api/tags":
+            self._json({"models": [{"name": self.config.model, "model": self.config.model}]})
+        elif self.path == "/api/version":
+            self._json({"version": "0.0.0-fake"})
+        else:
+            self._json({"error": "not found"}, 404)
+
+    def do_POST(self) -> None:
+        path = self.path.split("?", 1)[0]
+        try:
+            body = json.loads(self.rfile.read(int(self.headers.get("Content-Length") or 0)) or b"{}")
+        except ValueError:
+            self._json({"error": "invalid json"}, 400)
+            return
+        self.stats.enter(path)
+        tokens = 0
+        try:
+            if path in ("/api/chat", "/api/generate", "/v1/chat/completions"):
+                tokens = self._generate(path, body)
+            elif path == "/api/embeddings":
+                time.sleep(self.config.embed_latency_ms / 1000.0)
+                self._json({"embedding": embedding(str(body.get("prompt", "")), self.config.embed_dim)})
+            elif path == "/api/embed":
+                inputs = body.get("input")
+                inputs = inputs if isinstance(inputs, list) else [inputs or ""]
+                time.sleep(self.config.embed_latency_ms / 1000.0)
+                self._json({"model": body.get("model"), "embeddings": [embedding(str(t), self.config.embed_dim) for t in inputs]})
+            else:
+                self._json({"error": "not found"}, 404)
+        except (BrokenPipeError, ConnectionResetError):
+            pass  # client went away (e.g. a cancelled stream)
+        finally:
+            self.stats.leave(tokens)
+
+    def _generate(self, path: str, body: dict) -> int:
+        cfg = self.config
+        parts = reply_tokens(_prompt_of(body), cfg.reply_tokens)
+        interval = 1.0 / cfg.tokens_per_sec if cfg.tokens_per_sec > 0 else 0.0
+        chat = path == "/api/chat"
+        openai = path == "/v1/chat/completions"
+        model = body.get("model") or cfg.model
+        stream = bool(body.get("stream", not openai))
+
+        def frame(text: str, done: bool) -> dict:
+            if openai:
+                key = "message" if done and not stream else "delta"
+                choice = {"index": 0, key: {"role": "assistant", "content": text}, "finish_reason": "stop" if done else None}
+                return {"id": "chatcmpl-fake", "object": "chat.completion", "model": model, "choices": [choice]}
+            payload = {"model": model, "created_at": datetime.now(timezone.utc).isoformat(), "done": done}
+            if chat:
+                payload["message"] = {"role": "assistant", "content": text}
+            else:
+                payload["response"] = text
+            if done:
+                payload.update({"done_reason": "stop", "eval_count": len(parts)})
+            return payload
+
+        time.sleep(cfg.latency_ms / 1000.0)
+        if not stream:
+            time.sleep(interval * len(parts))
+            self._json(frame("".join(parts), True))
+            return len(parts)
+
+        # NDJSON (SSE for the OpenAI route) without Content-Length; the response
+        # ends when the connection closes.
+        def line(payload: dict) -> bytes:
+            data = json.dumps(payload).encode("utf-8")
+            return b"data: " + data + b"\n\n" if openai else data + b"\n"
+
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream" if openai else "application/x-ndjson")
+        self.send_header("Connection", "close")
+        self.end_headers()
+        self.close_connection = True
+        next_at = time.monotonic()
+        for part in parts:
+            self.wfile.write(line(frame(part, False)))
+            self.wfile.flush()
+            if interval:
+                next_at += interval
+                time.sleep(max(0.0, next_at - time.monotonic()))
+        self.wfile.write(line(frame("", True)))
+        if openai:
+            self.wfile.write(b"data: [DONE]\n\n")
+        return len(parts)
+
+
+class FakeOllama:
+    """Threaded fake Ollama server on 127.0.0.1; use as a context manager or start()/stop()."""
+
+    def __init__(self, config: FakeOllamaConfig | None = None, port: int = 0) -> None:
+        self.config = config or FakeOllamaConfig()
+        self.stats = FakeOllamaStats()
+        handler = type("FakeOllamaHandler", (_Handler,), {"config": self.config, "stats": self.stats})
+        self._server = ThreadingHTTPServer(("127.0.0.1", port), handler)
+        self._server.daemon_threads = True
+        self._thread: threading.Thread | None = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> "FakeOllama":
+        self._thread = threading.Thread(target=self._server.serve_forever, name="fake-ollama", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+
+    def __enter__(self) -> "FakeOllama":
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
@@ -0,0 +1,300 @@
+"""
+Load driver: replays a weighted mix of client requests against a real `server.app`.
+
+The app is pointed at a FakeOllama and an isolated temp data dir, then a number of
+virtual users each log in, open a session and loop over the mix until the duration
+runs out. Requests go over HTTP to uvicorn when it is installed, otherwise in-process
+through httpx.ASGITransport (there, streamed bodies arrive in one piece, so TTFT is
+only an upper bound).
+"""
+
+from __future__ import annotations
+
+import asyncio
+import os
+import random
+import socket
+import tempfile
+import threading
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, List
+
+import httpx
+
+from jarvis.loadtest.fake_ollama import FakeOllama, FakeOllamaConfig
+
+try:
+    import uvicorn
+except ImportError:  # pragma: no cover - optional
+    uvicorn = None
+
+DEFAULT_MIX: Dict[str, float] = {
+    "chat_stream": 0.5,
+    "sessions": 0.2,
+    "notifications": 0.25,
+    "upload": 0.05,
+}
+
+# Plain conversational prompts, so the agent answers from the model without tools.
+_PROMPTS = [
+    "Tell me a short story about a lighthouse keeper.",
+    "Explain recursion like I am five.",
+    "Write a haiku about autumn leaves.",
+    "Give me three tips for writing clear commit messages.",
+    "What makes a good cup of coffee?",
+]
+
+
+def percentile(values: List[float], pct: float) -> float | None:
+    """Nearest-rank percentile; None for an empty list."""
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = max(1, int(-(-pct * len(ordered) // 100)))
+    return ordered[min(rank, len(ordered)) - 1]
+
+
+@dataclass
+class EndpointStats:
+    latencies: List[float] = field(default_factory=list)
+    ttft: List[float] = field(default_factory=list)
+    errors: int = 0
+
+    def record(self, latency: float, ok: bool, ttft: float | None = None) -> None:
+        self.latencies.append(latency)
+        if ttft is not None:
+            self.ttft.append(ttft)
+        if not ok:
+            self.errors += 1
+
+    def summary(self, elapsed: float) -> dict:
+        count = len(self.latencies)
+        out = {
+            "count": count,
+            "errors": self.errors,
+            "error_rate": round(self.errors / count, 4) if count else 0.0,
+            "rps": round(count / elapsed, 2) if elapsed > 0 else 0.0,
+        }
+        for pct in (50, 95, 99):
+            value = percentile(self.latencies, pct)
+            out[f"p{pct}_ms"] = round(value * 1000, 1) if value is not None else None
+        if self.ttft:
+            for pct in (50, 95, 99):
+                out[f"ttft_p{pct}_ms"] = round(percentile(self.ttft, pct) * 1000, 1)
+        return out
+
+
+@dataclass
+class LoadConfig:
+    users: int = 4
+    duration_s: float = 10.0
+    mix: Dict[str, float] = field(default_factory=lambda: dict(DEFAULT_MIX))
+    seed: int = 1
+    think_ms: float = 0.0
+    upload_bytes: int = 16 * 1024
+    request_timeout_s: float = 60.0
+
+
+def prepare_environment(workdir: str, ollama_url: str, enable_rag: bool = False) -> None:
+    """Point Jarvis at `workdir` and the fake Ollama; call before importing jarvis.server."""
+    data = Path(workdir)
+    (data / "memory").mkdir(parents=True, exist_ok=True)
+    os.environ["JARVIS_DATA_DIR"] = str(data)
+    os.environ["JARVIS_DB_PATH"] = str(data / "jarvis.db")
+    os.environ["OLLAMA_URL"] = f"{ollama_url}/v1/chat/completions"
+    os.environ["OLLAMA_EMBED_URL"] = f"{ollama_url}/api/embeddings"
+    os.environ.setdefault("OLLAMA_MODEL", "fake-llm")
+    os.environ["JARVIS_ENABLE_RAG"] = "1" if enable_rag else "0"
+    os.environ["TTS"] = "false"
+
+    from jarvis import files, memory
+
+    files.WORKSPACE_ROOT = (data / "workspaces").resolve()
+    memory.DATA_DIR = str(data / "memory")
+
+
+def create_users(count: int, prefix: str = "load") -> List[str]:
+    """Register (or reuse) `count` users and return a login token for each."""
+    from jarvis.auth import login_user, register_user
+
+    tokens = []
+    for i in range(count):
+        username, password = f"{prefix}{i}", f"pw-{prefix}{i}-secret"
+        try:
+            register_user(username, password, email=f"{username}@example.invalid")
+        except Exception:
+            pass  # already exists from an earlier run against the same DB
+        login = login_user(username, password)
+        if not login or not login.get("token"):
+            raise RuntimeError(f"login failed for {username}")
+        tokens.append(login["token"])
+    return tokens
+
+
+class _Uvicorn:
+    def __init__(self, app) -> None:
+        with socket.socket() as sock:
+            sock.bind(("127.0.0.1", 0))
+            self.port = sock.getsockname()[1]
+        config = uvicorn.Config(app, host="127.0.0.1", port=self.port, log_level="warning", lifespan="off")
+        self.server = uvicorn.Server(config)
+        self.thread = threading.Thread(target=self.server.run, name="loadtest-uvicorn", daemon=True)
+
+    def __enter__(self) -> str:
+        self.thread.start()
+        deadline = time.monotonic() + 10
+        while not self.server.started and time.monotonic() < deadline:
+            time.sleep(0.02)
+        return f"http://127.0.0.1:{self.port}"
+
+    def __exit__(self, *exc) -> None:
+        self.server.should_exit = True
+        self.thread.join(timeout=10)
+
+
+class LoadRunner:
+    """Runs the virtual users against an httpx.AsyncClient and collects per-endpoint stats."""
+
+    def __init__(self, client: httpx.AsyncClient, tokens: List[str], config: LoadConfig) -> None:
+        self.client = client
+        self.tokens = tokens
+        self.config = config
+        self.stats: Dict[str, EndpointStats] = {name: EndpointStats() for name in config.mix}
+        self._upload_body = random.Random(config.seed).randbytes(config.upload_bytes)
+
+    async def _chat_stream(self, headers: dict, rng: random.Random) -> tuple[bool, float | None]:
+        body = {"model": "fake-llm", "prompt": rng.choice(_PROMPTS), "stream": True}
+        started = time.perf_counter()
+        ttft = None
+        ok = True
+        async with self.client.stream("POST", "/v1/chat/completions", json=body, headers=headers) as resp:
+            if resp.status_code != 200:
+                await resp.aread()
+                return False, None
+            async for line in resp.aiter_lines():
+                if ttft is None and '"type": "token"' in line:
+                    ttft = time.perf_counter() - started
+                elif '"type": "error"' in line:
+                    ok = False
+        return ok and ttft is not None, ttft
+
+    async def _simple(self, name: str, headers: dict) -> bool:
+        if name == "sessions":
+            resp = await self.client.get("/sessions", headers=headers)
+        elif name == "notifications":
+            resp = await self.client.get("/v1/notifications", headers=headers)
+        elif name == "upload":
+            files = {"file": (f"load-{time.monotonic_ns()}.bin", self._upload_body, "application/octet-stream")}
+            resp = await self.client.post("/files/upload", files=files, headers=headers)
+        else:
+            raise ValueError(f"unknown mix entry: {name}")
+        return resp.status_code < 400
+
+    async def _user(self, index: int, deadline: float) -> None:
+        rng = random.Random(self.config.seed * 1000 + index)
+        headers = {"X-User-Token": self.tokens[index % len(self.tokens)]}
+        resp = await self.client.post("/sessions", json={"name": f"load {index}"}, headers=headers)
+        if resp.status_code < 400:
+            session_id = (resp.json() or {}).get("session_id") or (resp.json() or {}).get("id")
+            if session_id:
+                headers["X-Session-Id"] = session_id
+        names = list(self.config.mix)
+        weights = [self.config.mix[n] for n in names]
+        while time.monotonic() < deadline:
+            name = rng.choices(names, weights)[0]
+            started = time.perf_counter()
+            ttft = None
+            try:
+                if name == "chat_stream":
+                    ok, ttft = await self._chat_stream(headers, rng)
+                else:
+                    ok = await self._simple(name, headers)
+            except (httpx.HTTPError, asyncio.TimeoutError):
+                ok = False
+            self.stats[name].record(time.perf_counter() - started, ok, ttft)
+            if self.config.think_ms:
+                await asyncio.sleep(self.config.think_ms / 1000.0)
+
+    async def run(self) -> dict:
+        started = time.monotonic()
+        deadline = started + self.config.duration_s
+        await asyncio.gather(*(self._user(i, deadline) for i in range(self.config.users)))
+        elapsed = time.monotonic() - started
+        endpoints = {name: s.summary(elapsed) for name, s in self.stats.items() if s.latencies}
+        total = sum(e["count"] for e in endpoints.values())
+        errors = sum(e["errors"] for e in endpoints.values())
+        return {
+            "elapsed_s": round(elapsed, 2),
+            "requests": total,
+            "rps": round(total / elapsed, 2) if elapsed > 0 else 0.0,
+            "error_rate": round(errors / total, 4) if total else 0.0,
+            "endpoints": endpoints,
+        }
+
+
+def run_load(
+    config: LoadConfig | None = None,
+    ollama: FakeOllamaConfig | None = None,
+    workdir: str | None = None,
+    transport: str = "auto",
+    enable_rag: bool = False,
+) -> dict:
+    """Start a FakeOllama, prepare an isolated Jarvis and drive `config` against it."""
+    config = config or LoadConfig()
+    if transport == "auto":
+        transport = "http" if uvicorn is not None else "asgi"
+    if transport == "http" and uvicorn is None:
+        raise RuntimeError("transport 'http' needs uvicorn installed")
+    tmp = None
+    if workdir is None:
+        tmp = tempfile.TemporaryDirectory(prefix="jarvis-load-")
+        workdir = tmp.name
+    try:
+        with FakeOllama(ollama) as fake:
+            prepare_environment(workdir, fake.url, enable_rag=enable_rag)
+            from jarvis import server
+
+            tokens = create_users(config.users)
+            timeout = httpx.Timeout(config.request_timeout_s)
+
+            async def drive(base_url: str, asgi) -> dict:
+                async with httpx.AsyncClient(base_url=base_url, transport=asgi, timeout=timeout) as client:
+                    return await LoadRunner(client, tokens, config).run()
+
+            if transport == "http":
+                with _Uvicorn(server.app) as base_url:
+                    report = asyncio.run(drive(base_url, None))
+            else:
+                report = asyncio.run(drive("http://loadtest", httpx.ASGITransport(app=server.app)))
+            report["transport"] = transport
+            if transport == "asgi":
+                report["note"] = "in-process ASGI: streams are buffered, TTFT is an upper bound"
+            report["ollama"] = fake.stats.snapshot()
+        return report
+    finally:
+        if tmp is not None:
+            tmp.cleanup()
+
+
+def format_report(report: dict) -> str:
+    header = f"{'endpoint':<14}{'count':>7}{'err%':>7}{'req/s':>8}{'p50':>9}{'p95':>9}{'p99':>9}{'ttft50':>9}{'ttft95':>9}{'ttft99':>9}"
+    lines = [header, "-" * len(header)]
+
+    def ms(value) -> str:
+        return "-" if value is None else f"{value:.0f}"
+
+    for name, e in sorted(report["endpoints"].items()):
+        lines.append(
+            f"{name:<14}{e['count']:>7}{e['error_rate'] * 100:>6.1f}%{e['rps']:>8.1f}"
+            f"{ms(e['p50_ms']):>9}{ms(e['p95_ms']):>9}{ms(e['p99_ms']):>9}"
+            f"{ms(e.get('ttft_p50_ms')):>9}{ms(e.get('ttft_p95_ms')):>9}{ms(e.get('ttft_p99_ms')):>9}"
+        )
+    lines.append(
+        f"total: {report['requests']} requests in {report['elapsed_s']}s = {report['rps']} req/s, "
+        f"error rate {report['error_rate'] * 100:.1f}% ({report['transport']}); latencies in ms"
+    )
+    if report.get("note"):
+        lines.append(f"note: {report['note']}")
+    return "\n".join(lines)
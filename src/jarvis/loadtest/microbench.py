@@ -0,0 +1,279 @@
+"""
+Micro-benchmarks for the pure-Python functions that run on every turn.
+
+Each case cycles through representative Danish and English inputs and reports
+ns/op (best of several timed repeats) and the peak bytes allocated by one call
+(tracemalloc). Results can be saved as a JSON baseline and compared later:
+
+    python -m jarvis.loadtest.microbench --save bench-baseline.json
+    python -m jarvis.loadtest.microbench --compare bench-baseline.json
+
+Runs offline: nothing here touches Ollama, the DB or the network.
+"""
+
+from __future__ import annotations
+
+import argparse
+import gc
+import json
+import os
+import platform
+import sys
+import time
+import tracemalloc
+from dataclasses import dataclass
+from typing import Callable, Dict, List
+
+os.environ.setdefault("JARVIS_DISABLE_EMBEDDINGS", "1")
+
+PROMPTS = [
+    "Hvordan bliver vejret i Aarhus i morgen?",
+    "What's the latest news about the Danish election?",
+    "Kan du vise cpu og ram forbrug på serveren?",
+    "Please ping example.com and tell me the latency",
+    "Omregn 100 eur til dkk",
+    "Skriv et kort digt om efterår og regn",
+    "Explain how Python generators work with a small example",
+    "Jeg hedder Mette og jeg kan godt lide kaffe uden mælk",
+    "My favourite editor is Neovim, please remember that",
+    "Hvad er klokken i Tokyo lige nu?",
+]
+
+REPLIES = [
+    "Det bliver overskyet med let regn om eftermiddagen og omkring 12 grader, så tag en jakke med.",
+    "Here is a short summary of the latest headlines. Nothing dramatic happened overnight, turnout looks high.",
+    "Noteret! Du kan godt lide kaffe uden mælk. Jeg husker det til næste gang vi taler om morgenmad.",
+    "Sure, I'll remember that your favourite editor is Neovim. My api_key=sk-abcdef1234567890 must never leak, "
+    "nor should mette@example.com or 12345678.",
+]
+
+REPEATED = [
+    "det det er er en en god god ide ide, ide.",
+    "the the quick quick brown fox fox jumps jumps over over the lazy dog dog",
+    "Hej hej! Hvordan går det det i dag dag?",
+]
+
+VISION = [
+    ("Farver: blå, hvid\nFormer: rektangler\nObjekter: båd, mast\nAntal: 2\nPlacering: centrum", "da"),
+    ("Colors: blue\nShapes: lines\nObjects: boat\nCount: 1\nPosition: center", "en"),
+    ("Farver: grøn\nFormer: bølger\nObjekter: hus ved fjord\nAntal: 1\nPlacering: venstre", "da"),
+    ("Colors: grey\nShapes: looks like rectangle\nObjects: house\nCount: 1\nPosition: left", "en"),
+]
+
+PYTEST_OUTPUT = (
+    "=================================== FAILURES ===================================\n"
+    "_______________________________ test_example _______________________________\n"
+    "tests/test_example.py::test_example FAILED\n"
+    "E   AssertionError: expected 1 == 2\n"
+    "E   assert 1 == 2\n"
+    "src/jarvis/agent.py:123: in run_agent\n"
+    "    assert False\n"
+    "_______________________________ test_dict_access _______________________________\n"
+    "tests/test_dict.py::test_dict_access FAILED\n"
+    "E   KeyError: 'missing_key'\n"
+    "src/jarvis/utils.py:45: in get_value\n"
+    "    return data[key]\n"
+    "========================= 2 failed, 40 passed in 1.23s =========================\n"
+)
+
+
+@dataclass
+class Case:
+    name: str
+    make: Callable[[], Callable[[int], object]]  # returns op(i); setup runs once, outside timing
+
+
+def _intent():
+    from jarvis.agent import analyze_intent
+
+    return lambda i: analyze_intent(PROMPTS[i % len(PROMPTS)])
+
+
+def _choose_tool():
+    from jarvis.agent import choose_tool
+
+    return lambda i: choose_tool(PROMPTS[i % len(PROMPTS)])
+
+
+def _should_write_memory():
+    from jarvis.agent_core.memory_manager import should_write_memory
+
+    return lambda i: should_write_memory(PROMPTS[i % len(PROMPTS)], REPLIES[i % len(REPLIES)], "da" if i % 2 else "en")
+
+
+def _redact():
+    from jarvis.agent_core.memory_manager import redact_sensitive
+
+    return lambda i: redact_sensitive(REPLIES[i % len(REPLIES)])
+
+
+def _context_budget():
+    from jarvis.performance_metrics import ContextBudget
+
+    budget = ContextBudget()
+    history = [{"role": "user" if n % 2 else "assistant", "content": PROMPTS[n % len(PROMPTS)]} for n in range(16)]
+    memory = [REPLIES[n % len(REPLIES)] * (1 + n % 6) for n in range(8)]
+    return lambda i: budget.enforce_budget(history, memory)
+
+
+def _vision_policy():
+    from jarvis.agent_policy.vision_guard import _violates_vision_policy
+
+    return lambda i: _violates_vision_policy(*VISION[i % len(VISION)])
+
+
+def _pytest_triage():
+    from jarvis.triage.pytest_triage import triage_pytest_output
+
+    return lambda i: triage_pytest_output(PYTEST_OUTPUT, "da" if i % 2 else "en")
+
+
+def _dedupe():
+    from jarvis.agent import _dedupe_repeated_words
+
+    return lambda i: _dedupe_repeated_words(REPEATED[i % len(REPEATED)])
+
+
+def _token_batching():
+    from jarvis import events
+
+    events.reset_for_tests()
+    events.subscribe("chat.token", lambda _t, _p: None)
+
+    def op(i: int) -> None:
+        events.publish("chat.token", {"request_id": "bench", "session_id": "bench", "token": "ord "})
+        if i % 64 == 63:
+            events.publish("chat.end", {"request_id": "bench", "session_id": "bench"})
+
+    return op
+
+
+def _ttl_cache():
+    from jarvis.agent_core.cache import TTLCache
+
+    cache = TTLCache(default_ttl=60)
+    value = {"results": [{"text": r, "score": 0.5} for r in REPLIES]}
+    keys = [f"user:{n}:{p}" for n, p in enumerate(PROMPTS)]
+    for key in keys:
+        cache.set(key, value)
+
+    def op(i: int) -> object:
+        key = keys[i % len(keys)]
+        if i % 4 == 0:
+            cache.set(key, value)
+        return cache.get(key)
+
+    return op
+
+
+CASES: List[Case] = [
+    Case("agent.analyze_intent", _intent),
+    Case("agent.choose_tool", _choose_tool),
+    Case("memory_manager.should_write_memory", _should_write_memory),
+    Case("memory_manager.redact_sensitive", _redact),
+    Case("context_budget.enforce_budget", _context_budget),
+    Case("vision_guard._violates_vision_policy", _vision_policy),
+    Case("triage.triage_pytest_output", _pytest_triage),
+    Case("agent._dedupe_repeated_words", _dedupe),
+    Case("events.chat_token_batching", _token_batching),
+    Case("cache.TTLCache.get_set", _ttl_cache),
+]
+
+
+def measure(op: Callable[[int], object], min_time: float = 0.2, repeats: int = 5) -> Dict[str, float]:
+    """ns/op (best of `repeats`) and peak bytes allocated by a single call."""
+    for i in range(32):
+        op(i)
+    loops = 1
+    while True:
+        started = time.perf_counter_ns()
+        for i in range(loops):
+            op(i)
+        if time.perf_counter_ns() - started >= min_time * 1e9 / repeats or loops >= 1 << 24:
+            break
+        loops *= 2
+    best = float("inf")
+    gc_was_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        for _ in range(repeats):
+            started = time.perf_counter_ns()
+            for i in range(loops):
+                op(i)
+            best = min(best, (time.perf_counter_ns() - started) / loops)
+    finally:
+        if gc_was_enabled:
+            gc.enable()
+
+    peak = 0
+    tracemalloc.start()
+    try:
+        for i in range(16):
+            tracemalloc.reset_peak()
+            base = tracemalloc.get_traced_memory()[0]
+            op(i)
+            peak = max(peak, tracemalloc.get_traced_memory()[1] - base)
+    finally:
+        tracemalloc.stop()
+    return {"ns_per_op": round(best, 1), "alloc_bytes": peak, "loops": loops}
+
+
+def run(names: List[str] | None = None, min_time: float = 0.2, repeats: int = 5) -> Dict[str, Dict[str, float]]:
+    results = {}
+    for case in CASES:
+        if names and not any(n in case.name for n in names):
+            continue
+        results[case.name] = measure(case.make(), min_time=min_time, repeats=repeats)
+    return results
+
+
+def compare(current: Dict[str, dict], baseline: Dict[str, dict], threshold: float) -> List[str]:
+    """Names whose ns/op regressed by more than `threshold` (0.25 = 25%) against the baseline."""
+    return [
+        name
+        for name, result in current.items()
+        if name in baseline and result["ns_per_op"] > baseline[name]["ns_per_op"] * (1 + threshold)
+    ]
+
+
+def _format(results: Dict[str, dict], baseline: Dict[str, dict] | None) -> str:
+    lines = [f"{'benchmark':<40}{'ns/op':>12}{'alloc B':>10}" + (f"{'base ns':>12}{'delta':>9}" if baseline else "")]
+    for name, r in results.items():
+        line = f"{name:<40}{r['ns_per_op']:>12,.0f}{r['alloc_bytes']:>10,}"
+        if baseline and name in baseline:
+            base = baseline[name]["ns_per_op"]
+            line += f"{base:>12,.0f}{(r['ns_per_op'] / base - 1) * 100:>+8.1f}%"
+        lines.append(line)
+    return "\n".join(lines)
+
+
+def main(argv: List[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m jarvis.loadtest.microbench", description="Per-turn hot function micro-benchmarks.")
+    parser.add_argument("names", nargs="*", help="only run benchmarks whose name contains one of these")
+    parser.add_argument("--min-time", type=float, default=0.2, help="seconds per benchmark")
+    parser.add_argument("--repeats", type=int, default=5)
+    parser.add_argument("--save", help="write results as a JSON baseline")
+    parser.add_argument("--compare", help="JSON baseline to compare against")
+    parser.add_argument("--threshold", type=float, default=0.25, help="allowed ns/op slowdown vs baseline (0.25 = 25%%)")
+    args = parser.parse_args(argv)
+
+    results = run(args.names, min_time=args.min_time, repeats=args.repeats)
+    baseline = None
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as fh:
+            baseline = json.load(fh)["results"]
+    print(_format(results, baseline))
+    if args.save:
+        meta = {"python": sys.version.split()[0], "machine": platform.machine(), "created": time.strftime("%Y-%m-%dT%H:%M:%S")}
+        with open(args.save, "w", encoding="utf-8") as fh:
+            json.dump({"meta": meta, "results": results}, fh, indent=2)
+    if baseline:
+        regressed = compare(results, baseline, args.threshold)
+        if regressed:
+            print(f"regressed by more than {args.threshold:.0%}: {', '.join(regressed)}")
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
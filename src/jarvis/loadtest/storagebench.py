@@ -0,0 +1,286 @@
+"""
+Storage-layer benchmarks against a (large) generated database.
+
+Calls every read endpoint in server.py that hits SQLite, plus the storage helpers
+the chat path and the reminder scheduler use directly, with SQL tracing switched on. Each distinct statement
+that runs is then re-executed on its own to time it and run through
+EXPLAIN QUERY PLAN; full table scans and temp B-tree sorts are flagged together
+with the size of the scanned table, so missing indexes show up as data grows.
+
+    python -m jarvis.loadtest.dbgen /tmp/big.db --users 5000
+    python -m jarvis.loadtest.storagebench /tmp/big.db --fail-on-scan
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import re
+import shutil
+import sqlite3
+import statistics
+import sys
+import tempfile
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Callable, Dict, Iterator, List
+
+from jarvis.loadtest.dbgen import BENCH_TOKEN, BENCH_USERNAME
+
+# (name, path); {session_id} and {ticket_id} are filled from the bench user's data.
+# /api/tickets* additionally require the API key (see _API_KEY_PATHS).
+ENDPOINTS = [
+    ("sessions.list", "/sessions"),
+    ("sessions.share", "/share/{session_id}"),
+    ("sessions.prompt", "/sessions/{session_id}/prompt"),
+    ("search", "/search?q=tandl%C3%A6gen"),
+    ("notes.list", "/notes"),
+    ("files.list", "/files"),
+    ("notifications.warnings", "/notifications"),
+    ("notifications.list", "/v1/notifications"),
+    ("notifications.unread_count", "/v1/notifications/unread_count"),
+    ("account.quota", "/account/quota"),
+    ("account.profile", "/account/profile"),
+    ("tickets.list", "/api/tickets"),
+    ("admin.sessions", f"/admin/sessions?username={BENCH_USERNAME}"),
+    ("admin.online_users", "/admin/online-users"),
+    ("admin.tickets", "/admin/tickets"),
+    ("admin.ticket", "/admin/tickets/{ticket_id}"),
+    ("admin.perf_summary", "/admin/perf/summary?source=tool&since_hours=2160"),
+]
+
+_API_KEY_PATHS = ("/api/tickets",)
+_LITERALS = re.compile(r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b")
+_SCAN = re.compile(r"^SCAN (\w+)$")
+_TABLE_REFS = re.compile(r"\b(?:FROM|JOIN|UPDATE|INTO)\s+(\w+)(?:\s+(?:AS\s+)?(\w+))?", re.IGNORECASE)
+_NOT_ALIAS = {"where", "join", "on", "left", "inner", "outer", "cross", "order", "group", "limit", "set", "using", "natural", "values"}
+_SKIP = ("PRAGMA", "CREATE", "BEGIN", "COMMIT", "ROLLBACK", "ANALYZE", "INSERT", "SAVEPOINT", "RELEASE")
+
+
+def normalize(sql: str) -> str:
+    """Statement shape with literals replaced by `?`, for grouping traced statements."""
+    return " ".join(_LITERALS.sub("?", sql).split())
+
+
+@contextmanager
+def capture_sql() -> Iterator[List[str]]:
+    """Record the expanded SQL of every statement run through jarvis.db.get_conn()."""
+    from jarvis import db
+
+    statements: List[str] = []
+    original = db._connect
+
+    def traced():
+        conn = original()
+        conn.set_trace_callback(statements.append)
+        return conn
+
+    db._connect = traced
+    try:
+        yield statements
+    finally:
+        db._connect = original
+
+
+@dataclass
+class Statement:
+    sql: str  # one expanded example
+    shape: str
+    calls: int = 0
+    endpoints: set = field(default_factory=set)
+
+
+def explain(conn: sqlite3.Connection, sql: str) -> List[str]:
+    return [row[3] for row in conn.execute("EXPLAIN QUERY PLAN " + sql).fetchall()]
+
+
+def table_aliases(sql: str) -> Dict[str, str]:
+    """Map aliases (and bare names) used in `sql` to table names; plans refer to tables by alias."""
+    aliases = {}
+    for table, alias in _TABLE_REFS.findall(sql):
+        aliases[table] = table
+        if alias and alias.lower() not in _NOT_ALIAS:
+            aliases[alias] = table
+    return aliases
+
+
+def plan_flags(plan: List[str], table_rows: Dict[str, int], min_rows: int, aliases: Dict[str, str] | None = None) -> List[str]:
+    """Full scans of tables with at least `min_rows` rows, automatic indexes and temp B-tree sorts."""
+    aliases = aliases or {}
+    flags = []
+    for detail in plan:
+        match = _SCAN.match(detail)
+        if match:
+            table = aliases.get(match.group(1), match.group(1))
+            if table_rows.get(table, 0) >= min_rows:
+                flags.append(f"full scan {table} ({table_rows[table]:,} rows)")
+        elif "AUTOMATIC" in detail and "INDEX" in detail:
+            flags.append("automatic index: " + detail.split(" USING ")[0].lower())
+        elif "USE TEMP B-TREE" in detail:
+            flags.append(detail.lower())
+    return list(dict.fromkeys(flags))
+
+
+def _time_statement(conn: sqlite3.Connection, sql: str, repeat: int) -> float:
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        conn.execute(sql).fetchall()
+        samples.append(time.perf_counter() - started)
+    return statistics.median(samples) * 1000
+
+
+def _table_rows(conn: sqlite3.Connection) -> Dict[str, int]:
+    names = [r[0] for r in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table' AND name NOT LIKE 'sqlite_%'")]
+    return {name: conn.execute(f'SELECT COUNT(*) FROM "{name}"').fetchone()[0] for name in names}
+
+
+def _direct_calls(session_id: str, user_id: int) -> List[tuple[str, Callable[[], object]]]:
+    from jarvis.reminder_scheduler import ReminderScheduler
+    from jarvis.session_store import get_recent_messages, session_belongs_to_user
+
+    return [
+        ("session_store.get_recent_messages", lambda: get_recent_messages(session_id, limit=16)),
+        ("session_store.session_belongs_to_user", lambda: session_belongs_to_user(session_id, user_id)),
+        ("reminder_scheduler.rebuild", lambda: ReminderScheduler().rebuild()),
+    ]
+
+
+def run(db_path: str, repeat: int = 5, min_scan_rows: int = 1000) -> dict:
+    """Benchmark every storage path against `db_path` (modified in place by write-on-read endpoints)."""
+    db_path = os.path.abspath(db_path)
+    from jarvis import files
+
+    previous_db, previous_workspace = os.environ.get("JARVIS_DB_PATH"), files.WORKSPACE_ROOT
+    workspace = Path(tempfile.mkdtemp(prefix="jarvis-storagebench-")).resolve()
+    os.environ["JARVIS_DB_PATH"] = db_path
+    files.WORKSPACE_ROOT = workspace
+    try:
+        return _measure(db_path, repeat, min_scan_rows)
+    finally:
+        files.WORKSPACE_ROOT = previous_workspace
+        if previous_db is None:
+            os.environ.pop("JARVIS_DB_PATH", None)
+        else:
+            os.environ["JARVIS_DB_PATH"] = previous_db
+        shutil.rmtree(workspace, ignore_errors=True)
+
+
+def _measure(db_path: str, repeat: int, min_scan_rows: int) -> dict:
+    from fastapi.testclient import TestClient
+
+    from jarvis import server
+    from jarvis.auth import DEFAULT_API_KEY
+
+    ro = sqlite3.connect(db_path)
+    user_id = ro.execute("SELECT id FROM users WHERE username = ?", (BENCH_USERNAME,)).fetchone()
+    if not user_id:
+        raise RuntimeError(f"{db_path} has no {BENCH_USERNAME!r}; generate it with jarvis.loadtest.dbgen")
+    user_id = user_id[0]
+    session_id = ro.execute(
+        "SELECT session_id FROM messages WHERE session_id IN (SELECT id FROM sessions WHERE user_id = ?) "
+        "GROUP BY session_id ORDER BY COUNT(*) DESC LIMIT 1",
+        (user_id,),
+    ).fetchone()[0]
+    ticket = ro.execute("SELECT id FROM tickets ORDER BY id LIMIT 1").fetchone()
+    params = {"session_id": session_id, "ticket_id": ticket[0] if ticket else 0}
+
+    client = TestClient(server.app)
+    headers = {"X-User-Token": BENCH_TOKEN}
+    targets: List[tuple[str, Callable[[], object]]] = []
+    for name, path in ENDPOINTS:
+        url = path.format(**params)
+
+        call_headers = dict(headers)
+        if path.startswith(_API_KEY_PATHS):
+            call_headers["Authorization"] = f"Bearer {DEFAULT_API_KEY}"
+
+        def call(url=url, name=name, call_headers=call_headers):
+            resp = client.get(url, headers=call_headers)
+            if resp.status_code >= 400:
+                raise RuntimeError(f"{name}: GET {url} -> {resp.status_code} {resp.text[:200]}")
+
+        targets.append((name, call))
+    targets.extend(_direct_calls(session_id, user_id))
+
+    statements: Dict[str, Statement] = {}
+    calls = {}
+    for name, call in targets:
+        call()  # warm-up
+        timings = []
+        traced_per_call = 0
+        for i in range(repeat):
+            with capture_sql() as traced:
+                started = time.perf_counter()
+                call()
+                timings.append(time.perf_counter() - started)
+            if i == 0:
+                traced_per_call = len(traced)
+                for sql in traced:
+                    if sql.lstrip().upper().startswith(_SKIP):
+                        continue
+                    shape = normalize(sql)
+                    entry = statements.setdefault(shape, Statement(sql=sql, shape=shape))
+                    entry.calls += 1
+                    entry.endpoints.add(name)
+        calls[name] = {"p50_ms": round(statistics.median(timings) * 1000, 2), "max_ms": round(max(timings) * 1000, 2), "statements": traced_per_call}
+
+    table_rows = _table_rows(ro)
+    analysed = []
+    for entry in statements.values():
+        plan = explain(ro, entry.sql)
+        row = {
+            "sql": entry.shape,
+            "endpoints": sorted(entry.endpoints),
+            "calls_per_request": entry.calls,
+            "plan": plan,
+            "flags": plan_flags(plan, table_rows, min_scan_rows, table_aliases(entry.sql)),
+        }
+        if entry.sql.lstrip().upper().startswith(("SELECT", "WITH")):
+            row["ms"] = round(_time_statement(ro, entry.sql, repeat), 3)
+        analysed.append(row)
+    ro.close()
+    analysed.sort(key=lambda r: r.get("ms", 0.0), reverse=True)
+    for name, info in calls.items():
+        info["flags"] = sorted({flag for row in analysed if name in row["endpoints"] for flag in row["flags"]})
+    return {"db": db_path, "table_rows": table_rows, "calls": calls, "statements": analysed}
+
+
+def format_report(report: dict) -> str:
+    lines = [f"database: {report['db']}", "rows: " + ", ".join(f"{k}={v:,}" for k, v in sorted(report["table_rows"].items()) if v)]
+    lines.append("")
+    lines.append(f"{'call':<40}{'p50 ms':>9}{'max ms':>9}{'stmts':>7}  flags")
+    for name, info in report["calls"].items():
+        lines.append(f"{name:<40}{info['p50_ms']:>9.2f}{info['max_ms']:>9.2f}{info['statements']:>7}  {'; '.join(info['flags'])}")
+    lines.append("")
+    lines.append(f"{'ms':>9}  statement / plan")
+    for row in report["statements"]:
+        ms = f"{row['ms']:.3f}" if "ms" in row else "-"
+        lines.append(f"{ms:>9}  {row['sql'][:150]}")
+        lines.append(f"{'':>9}    plan: {' | '.join(row['plan'])}")
+        if row["flags"]:
+            lines.append(f"{'':>9}    !! {'; '.join(row['flags'])}")
+    return "\n".join(lines)
+
+
+def main(argv: List[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m jarvis.loadtest.storagebench", description="Benchmark storage queries with query plans.")
+    parser.add_argument("db", help="database created by jarvis.loadtest.dbgen (write-on-read endpoints modify it)")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--min-scan-rows", type=int, default=1000, help="only flag full scans of tables at least this big")
+    parser.add_argument("--json", action="store_true")
+    parser.add_argument("--fail-on-scan", action="store_true", help="exit 1 if any statement full-scans a large table")
+    args = parser.parse_args(argv)
+
+    report = run(args.db, repeat=args.repeat, min_scan_rows=args.min_scan_rows)
+    print(json.dumps(report, indent=2) if args.json else format_report(report))
+    if args.fail_on_scan and any(f.startswith("full scan") for row in report["statements"] for f in row["flags"]):
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,308 @@
+"""
+Tail reading and indexed search for the rotated server logs in LOG_DIR.
+
+Plain log files are read backwards from the end in fixed-size blocks, so fetching
+the last N lines costs O(N) regardless of file size. Rotated `.gz` files cannot
+seek, so they are decompressed as a stream while keeping only the last N lines.
+
+Positions are byte offsets into the (decompressed) content. A page returns
+`cursor`, the offset where its first line starts; passing it back as `before`
+fetches the page that precedes it. `cursor` is None once the start is reached.
+
+Filtering by level / trace_id uses a sidecar index in LOG_DIR/.index: the file is
+cut into ~256 KiB line-aligned blocks and each block records which levels occur in
+it plus a small Bloom filter of its trace ids, so only candidate blocks are read.
+The index is extended as the active log grows and rebuilt after rotation;
+`prune_indexes()` removes sidecars whose log was deleted.
+"""
+
+from __future__ import annotations
+
+import base64
+import gzip
+import hashlib
+import json
+import os
+import re
+import zlib
+from collections import deque
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Iterable, Iterator, List, Optional, Tuple
+
+BLOCK_SIZE = 64 * 1024  # backward read size
+INDEX_BLOCK_SIZE = 256 * 1024
+INDEX_VERSION = 1
+BLOOM_BITS = 4096
+BLOOM_HASHES = 3
+LEVELS = ("DEBUG", "INFO", "WARNING", "ERROR", "CRITICAL")
+
+_LEVEL_RE = re.compile(rb"^\S+ \S+ (DEBUG|INFO|WARNING|ERROR|CRITICAL)\b")
+_TRACE_RE = re.compile(rb"\btrace(?:_id)?=([0-9A-Za-z_-]{4,64})")
+
+
+@dataclass
+class Page:
+    lines: List[str]
+    cursor: Optional[int]  # pass as `before` for the previous page; None at the start of the file
+
+
+def _decode(lines: Iterable[bytes]) -> List[str]:
+    return [line.decode("utf-8", errors="replace") for line in lines]
+
+
+def _is_gzip(path: Path) -> bool:
+    return path.suffix == ".gz"
+
+
+def _breaks(buf: bytes) -> int:
+    """Line breaks in `buf`, not counting a trailing one."""
+    return buf.count(b"\n") - (1 if buf.endswith(b"\n") else 0)
+
+
+def tail(path: Path, lines: int = 500, before: Optional[int] = None) -> Page:
+    """The last `lines` lines ending before offset `before` (default: end of file)."""
+    if lines <= 0:
+        return Page([], before)
+    if _is_gzip(path):
+        return _tail_gzip(path, lines, before)
+    with open(path, "rb") as fh:
+        end = fh.seek(0, os.SEEK_END)
+        if before is not None:
+            end = max(0, min(before, end))
+        pos = end
+        buf = b""
+        # `lines` complete lines need `lines` breaks before the end (the first piece may be partial).
+        while pos > 0 and _breaks(buf) < lines:
+            step = min(BLOCK_SIZE, pos)
+            pos -= step
+            fh.seek(pos)
+            buf = fh.read(step) + buf
+    body = buf[:-1] if buf.endswith(b"\n") else buf
+    if not body:
+        return Page([], None)
+    parts = body.split(b"\n")
+    if pos > 0:
+        parts = parts[1:]
+    parts = parts[-lines:]
+    first = pos + len(body) - len(b"\n".join(parts))
+    return Page(_decode(parts), first if first > 0 else None)
+
+
+def _iter_gzip_lines(path: Path) -> Iterator[Tuple[int, bytes]]:
+    """(offset, line without newline) for a gzip file, decompressed as a stream.
+
+    A truncated rotation ends the iteration instead of raising.
+    """
+    offset = 0
+    try:
+        with gzip.open(path, "rb") as fh:
+            for raw in fh:
+                yield offset, raw.rstrip(b"\n")
+                offset += len(raw)
+    except (EOFError, OSError, zlib.error):
+        return
+
+
+def _tail_gzip(path: Path, lines: int, before: Optional[int]) -> Page:
+    window: deque = deque(maxlen=lines + 1)
+    for offset, line in _iter_gzip_lines(path):
+        if before is not None and offset >= before:
+            break
+        window.append((offset, line))
+    return _page(window, lines)
+
+
+def _page(matched, limit: int) -> Page:
+    """Page from (offset, line) pairs, oldest first; one extra leading item means there is more."""
+    items = list(matched)
+    more = len(items) > limit
+    items = items[-limit:]
+    if not items:
+        return Page([], None)
+    return Page(_decode(line for _, line in items), items[0][0] if more else None)
+
+
+# --- sidecar index -----------------------------------------------------------------
+
+
+def _bloom_positions(value: bytes) -> List[int]:
+    digest = hashlib.blake2b(value, digest_size=4 * BLOOM_HASHES).digest()
+    return [int.from_bytes(digest[i * 4 : i * 4 + 4], "little") % BLOOM_BITS for i in range(BLOOM_HASHES)]
+
+
+class _Block:
+    __slots__ = ("start", "end", "levels", "bloom")
+
+    def __init__(self, start: int, end: int = 0, levels: int = 0, bloom: Optional[bytearray] = None) -> None:
+        self.start = start
+        self.end = end
+        self.levels = levels
+        self.bloom = bloom if bloom is not None else bytearray(BLOOM_BITS // 8)
+
+    def add(self, line: bytes) -> None:
+        match = _LEVEL_RE.match(line)
+        if match:
+            self.levels |= 1 << LEVELS.index(match.group(1).decode())
+        for trace in _TRACE_RE.findall(line):
+            for bit in _bloom_positions(trace.lower()):
+                self.bloom[bit >> 3] |= 1 << (bit & 7)
+
+    def may_match(self, level_bit: int, trace: Optional[bytes]) -> bool:
+        if level_bit and not self.levels & level_bit:
+            return False
+        if trace is not None:
+            return all(self.bloom[bit >> 3] & (1 << (bit & 7)) for bit in _bloom_positions(trace))
+        return True
+
+    def to_json(self) -> list:
+        return [self.start, self.end, self.levels, base64.b64encode(bytes(self.bloom)).decode("ascii")]
+
+    @classmethod
+    def from_json(cls, raw: list) -> "_Block":
+        return cls(raw[0], raw[1], raw[2], bytearray(base64.b64decode(raw[3])))
+
+
+def index_path(path: Path) -> Path:
+    return path.parent / ".index" / (path.name + ".idx")
+
+
+def _iter_complete_lines(path: Path, start: int) -> Iterator[Tuple[int, bytes]]:
+    if _is_gzip(path):
+        for offset, line in _iter_gzip_lines(path):
+            if offset >= start:
+                yield offset, line + b"\n"
+        return
+    with open(path, "rb") as fh:
+        fh.seek(start)
+        offset = start
+        for raw in fh:
+            if not raw.endswith(b"\n"):
+                return  # still being written; picked up on the next call
+            yield offset, raw
+            offset += len(raw)
+
+
+def load_index(path: Path) -> List[_Block]:
+    """Sidecar index blocks for `path`, extended or rebuilt (and persisted) as needed."""
+    idx_file = index_path(path)
+    st = path.stat()
+    blocks: List[_Block] = []
+    stored_size = None
+    try:
+        data = json.loads(idx_file.read_text(encoding="utf-8"))
+        if data.get("version") == INDEX_VERSION and data.get("ino") == st.st_ino:
+            stored_size = data.get("size")
+            if stored_size == st.st_size:
+                return [_Block.from_json(raw) for raw in data["blocks"]]
+            if not _is_gzip(path) and data.get("size", 0) < st.st_size:
+                blocks = [_Block.from_json(raw) for raw in data["blocks"]]
+    except (OSError, ValueError, KeyError, TypeError):
+        blocks = []
+    # The last block may be partly filled: re-index from its start.
+    current = _Block(blocks.pop().start if blocks else 0)
+    indexed = current.start
+    for offset, raw in _iter_complete_lines(path, current.start):
+        if offset - current.start >= INDEX_BLOCK_SIZE:
+            current.end = offset
+            blocks.append(current)
+            current = _Block(offset)
+        current.add(raw)
+        indexed = offset + len(raw)
+    current.end = indexed
+    if current.end > current.start:
+        blocks.append(current)
+    size = st.st_size if _is_gzip(path) else indexed  # a partial last line is re-read next time
+    if size == stored_size:
+        return blocks  # nothing new was indexed (e.g. only a partial line was appended)
+    try:
+        idx_file.parent.mkdir(parents=True, exist_ok=True)
+        tmp = idx_file.with_suffix(".tmp")
+        payload = {"version": INDEX_VERSION, "ino": st.st_ino, "size": size, "blocks": [b.to_json() for b in blocks]}
+        tmp.write_text(json.dumps(payload), encoding="utf-8")
+        os.replace(tmp, idx_file)
+    except OSError:
+        pass  # read-only log dir: the index just isn't persisted
+    return blocks
+
+
+def prune_indexes(log_dir: Path) -> int:
+    """Delete sidecar indexes whose log file is gone; returns the count."""
+    removed = 0
+    for idx_file in (Path(log_dir) / ".index").glob("*.idx"):
+        if (Path(log_dir) / idx_file.name[: -len(".idx")]).exists():
+            continue
+        try:
+            idx_file.unlink()
+            removed += 1
+        except OSError:
+            pass
+    return removed
+
+
+def _block_lines(fh, block: _Block) -> Iterator[Tuple[int, bytes]]:
+    fh.seek(block.start)
+    data = fh.read(block.end - block.start)
+    offset = block.start
+    for raw in data.split(b"\n")[:-1]:
+        yield offset, raw
+        offset += len(raw) + 1
+
+
+def _matcher(level_bit: int, trace: Optional[bytes], needle: Optional[bytes]):
+    def matches(line: bytes) -> bool:
+        if level_bit:
+            m = _LEVEL_RE.match(line)
+            if not m or not level_bit & (1 << LEVELS.index(m.group(1).decode())):
+                return False
+        if trace is not None and trace not in (t.lower() for t in _TRACE_RE.findall(line)):
+            return False
+        return needle is None or needle in line
+
+    return matches
+
+
+def search(
+    path: Path,
+    level: Optional[str] = None,
+    trace_id: Optional[str] = None,
+    contains: Optional[str] = None,
+    limit: int = 200,
+    before: Optional[int] = None,
+) -> Page:
+    """The newest `limit` lines before `before` matching every given filter, oldest first."""
+    level_bit = 0
+    if level:
+        if level.upper() not in LEVELS:
+            raise ValueError(f"unknown level {level!r}")
+        level_bit = 1 << LEVELS.index(level.upper())
+    trace = trace_id.lower().encode() if trace_id else None
+    matches = _matcher(level_bit, trace, contains.encode() if contains else None)
+    candidates = [
+        b for b in load_index(path) if (before is None or b.start < before) and b.may_match(level_bit, trace)
+    ]
+    if _is_gzip(path):
+        matched: deque = deque(maxlen=limit + 1)
+        # One streaming pass; lines outside candidate blocks are skipped without matching.
+        ranges = iter(candidates)
+        block = next(ranges, None)
+        for offset, line in _iter_gzip_lines(path):
+            if block is None or (before is not None and offset >= before):
+                break
+            while block is not None and offset >= block.end:
+                block = next(ranges, None)
+            if block is not None and offset >= block.start and matches(line):
+                matched.append((offset, line))
+        return _page(matched, limit)
+    found: List[Tuple[int, bytes]] = []
+    with open(path, "rb") as fh:
+        for block in reversed(candidates):
+            hits = [
+                (offset, line)
+                for offset, line in _block_lines(fh, block)
+                if (before is None or offset < before) and matches(line)
+            ]
+            found = hits + found
+            if len(found) > limit:
+                break
+    return _page(found[-(limit + 1) :], limit)
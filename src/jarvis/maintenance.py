@@ -0,0 +1,199 @@
+"""
+Background scheduler for housekeeping jobs (expiry purges, sweeps, cache refreshes).
+
+Jobs are registered with `register_job` and run by a single asyncio task per
+process (`start()` from the server lifespan), each in a worker thread so the event
+loop never blocks on them. Runs are spaced `interval_s` apart with random jitter so
+workers do not line up.
+
+Shared jobs (DB and filesystem sweeps) take a lease row in `maintenance_leases`
+first. The lease lasts a whole interval, so across workers a shared job runs at
+most once per interval; the others record a skip. Per-process jobs (in-memory
+caches) run everywhere without a lease. Every run is kept in `maintenance_runs`
+(last HISTORY_PER_JOB per job) and counted in the jarvis_maintenance_* metrics.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+import os
+import random
+import socket
+import threading
+import time
+import uuid
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional
+
+from jarvis.db import get_conn, get_db_path
+from jarvis.metrics import MAINTENANCE_RUNS, MAINTENANCE_SECONDS
+
+logger = logging.getLogger(__name__)
+
+HISTORY_PER_JOB = 50
+START_DELAY_S = 5.0  # first runs are spread over this window after startup
+
+HOLDER = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:6]}"
+
+
+@dataclass
+class Job:
+    name: str
+    func: Callable[[], Any]
+    interval_s: float
+    shared: bool = True
+    jitter: float = 0.1  # fraction of the interval
+    next_due: float = 0.0  # time.monotonic()
+    last: Dict[str, Any] = field(default_factory=dict)
+
+    def schedule_next(self, now: float) -> None:
+        spread = self.interval_s * self.jitter
+        self.next_due = now + self.interval_s + random.uniform(-spread, spread)
+
+
+_jobs: Dict[str, Job] = {}
+_ready_paths: set = set()
+_schema_lock = threading.Lock()
+_task: Optional[asyncio.Task] = None
+
+
+def register_job(name: str, func: Callable[[], Any], interval_s: float, *, shared: bool = True, jitter: float = 0.1) -> Job:
+    """Add (or replace) a periodic job; `shared` jobs run once per interval across all workers."""
+    job = Job(name=name, func=func, interval_s=max(1.0, float(interval_s)), shared=shared, jitter=jitter)
+    _jobs[name] = job
+    return job
+
+
+def jobs() -> List[Job]:
+    return list(_jobs.values())
+
+
+def _ensure_tables() -> None:
+    path = get_db_path()
+    if path in _ready_paths:
+        return
+    with _schema_lock, get_conn() as conn:
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS maintenance_leases (job TEXT PRIMARY KEY, holder TEXT NOT NULL, expires_at REAL NOT NULL)"
+        )
+        conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS maintenance_runs (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                job TEXT NOT NULL,
+                holder TEXT NOT NULL,
+                started_at REAL NOT NULL,
+                duration_ms REAL NOT NULL,
+                ok INTEGER NOT NULL,
+                result TEXT,
+                error TEXT
+            )
+            """
+        )
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_maintenance_runs_job ON maintenance_runs(job, id)")
+    _ready_paths.add(path)
+
+
+def acquire_lease(name: str, ttl_s: float, now: Optional[float] = None) -> bool:
+    """Take (or renew) the job's lease for `ttl_s` seconds unless another holder's lease is still live."""
+    _ensure_tables()
+    now = time.time() if now is None else now
+    with get_conn() as conn:
+        cur = conn.execute(
+            "INSERT INTO maintenance_leases (job, holder, expires_at) VALUES (?, ?, ?) "
+            "ON CONFLICT(job) DO UPDATE SET holder = excluded.holder, expires_at = excluded.expires_at "
+            "WHERE maintenance_leases.expires_at <= ? OR maintenance_leases.holder = excluded.holder",
+            (name, HOLDER, now + ttl_s, now),
+        )
+        return cur.rowcount > 0
+
+
+def _record_run(job: Job, started_at: float, duration_ms: float, ok: bool, result: Any, error: Optional[str]) -> None:
+    try:
+        result_json = json.dumps(result, default=str) if result is not None else None
+    except (TypeError, ValueError):
+        result_json = None
+    with get_conn() as conn:
+        conn.execute(
+            "INSERT INTO maintenance_runs (job, holder, started_at, duration_ms, ok, result, error) VALUES (?,?,?,?,?,?,?)",
+            (job.name, HOLDER, started_at, duration_ms, 1 if ok else 0, result_json, error),
+        )
+        conn.execute(
+            "DELETE FROM maintenance_runs WHERE job = ? AND id <= "
+            "(SELECT id FROM maintenance_runs WHERE job = ? ORDER BY id DESC LIMIT 1 OFFSET ?)",
+            (job.name, job.name, HISTORY_PER_JOB),
+        )
+
+
+def run_job(job: Job) -> Optional[Dict[str, Any]]:
+    """Run one job now (honouring the lease for shared jobs); None when skipped."""
+    if job.shared and not acquire_lease(job.name, job.interval_s):
+        MAINTENANCE_RUNS.inc(job=job.name, outcome="skipped")
+        return None
+    started_at = time.time()
+    started = time.perf_counter()
+    result: Any = None
+    error = None
+    try:
+        result = job.func()
+    except Exception as exc:
+        error = f"{type(exc).__name__}: {exc}"
+        logger.warning("maintenance job %s failed: %s", job.name, error)
+    seconds = time.perf_counter() - started
+    outcome = "ok" if error is None else "error"
+    MAINTENANCE_SECONDS.observe(seconds, job=job.name, outcome=outcome)
+    MAINTENANCE_RUNS.inc(job=job.name, outcome=outcome)
+    job.last = {"started_at": started_at, "duration_ms": round(seconds * 1000, 3), "ok": error is None, "error": error}
+    try:
+        _ensure_tables()
+        _record_run(job, started_at, seconds * 1000, error is None, result, error)
+    except Exception as exc:
+        logger.warning("maintenance history write failed for %s: %s", job.name, exc)
+    return job.last
+
+
+def history(job: Optional[str] = None, limit: int = 50) -> List[Dict[str, Any]]:
+    """Most recent runs, newest first (all workers)."""
+    _ensure_tables()
+    query = "SELECT job, holder, started_at, duration_ms, ok, result, error FROM maintenance_runs"
+    params: list = []
+    if job:
+        query += " WHERE job = ?"
+        params.append(job)
+    query += " ORDER BY id DESC LIMIT ?"
+    params.append(max(1, min(limit, 500)))
+    with get_conn() as conn:
+        rows = conn.execute(query, params).fetchall()
+    return [dict(r) | {"ok": bool(r["ok"])} for r in rows]
+
+
+async def run_forever() -> None:
+    """Run due jobs until cancelled."""
+    now = time.monotonic()
+    for job in _jobs.values():
+        job.next_due = now + random.uniform(0, min(START_DELAY_S, job.interval_s))
+    while True:
+        now = time.monotonic()
+        for job in sorted(_jobs.values(), key=lambda j: j.next_due):
+            if job.next_due > now:
+                break
+            await asyncio.to_thread(run_job, job)
+            job.schedule_next(time.monotonic())
+        wait = min((j.next_due for j in _jobs.values()), default=now + 60) - time.monotonic()
+        await asyncio.sleep(max(0.05, wait))
+
+
+def start() -> asyncio.Task:
+    global _task
+    if _task is None or _task.done():
+        _task = asyncio.create_task(run_forever())
+    return _task
+
+
+def stop() -> None:
+    global _task
+    if _task is not None:
+        _task.cancel()
+        _task = None
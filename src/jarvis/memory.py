@@ -1,13 +1,23 @@
+from __future__ import annotations
+
 import hashlib
 import json
 import logging
 import os
 import re
-from dataclasses import dataclass
-
-import numpy as np
+import threading
+from collections import OrderedDict
+from collections.abc import MutableMapping
+from contextlib import contextmanager
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any, Callable, Iterator
+
+from jarvis import cancellation, memory_index
+from jarvis.lazy import lazy_import
 from jarvis.provider.ollama_client import ollama_request
 from jarvis.agent_core.cache import TTLCache
+from jarvis.metrics import EMBEDDING_SECONDS
 
 logger = logging.getLogger(__name__)
 
@@ -22,54 +32,108 @@ class EmbeddingDimMismatch(Exception):
 # Ensure we only log embedding length once per trace
 _logged_embed_len_traces: set[str] = set()
 
-try:
-    import faiss  # type: ignore
-except ImportError:  # pragma: no cover - fallback for environments without faiss
-    class _DummyIndex:
-        def __init__(self, d: int):
-            self.d = d
-            self.vectors: list[np.ndarray] = []
-
-        @property
-        def ntotal(self) -> int:
-            return len(self.vectors)
-
-        def add(self, mat: np.ndarray) -> None:
-            for row in mat:
-                self.vectors.append(np.asarray(row, dtype=np.float32).reshape(-1))
-
-        def search(self, mat: np.ndarray, k: int):
-            if not self.vectors:
-                return np.array([[]], dtype=np.float32), np.array([[]], dtype=int)
-            data = np.stack(self.vectors)
-            query = np.asarray(mat, dtype=np.float32)
-            # Simple L2 distance
-            diffs = data[None, :, :] - query[:, None, :]
-            dists = np.sum(diffs ** 2, axis=2)
-            idx = np.argsort(dists, axis=1)[:, :k]
-            dist_sorted = np.take_along_axis(dists, idx, axis=1)
-            return dist_sorted, idx
-
-    class _DummyFaiss:
-        IndexFlatL2 = _DummyIndex
-        Index = _DummyIndex
-
-        @staticmethod
-        def write_index(index: _DummyIndex, path: str) -> None:
-            os.makedirs(os.path.dirname(path), exist_ok=True)
-            arr = np.stack(index.vectors) if index.vectors else np.zeros((0, index.d), dtype=np.float32)
-            np.save(path, arr)
-
-        @staticmethod
-        def read_index(path: str) -> _DummyIndex:
-            arr = np.load(path) if os.path.exists(path) else np.zeros((0, DIM), dtype=np.float32)
-            dim = arr.shape[1] if arr.size else DIM
-            idx = _DummyIndex(dim)
-            for row in arr:
-                idx.vectors.append(np.asarray(row, dtype=np.float32).reshape(-1))
-            return idx
-
-    faiss = _DummyFaiss()
+# Pure-numpy stand-in used when faiss isn't installed.
+class _DummyIndex:
+    """Exact L2 index over a growable contiguous float32 matrix.
+
+    Rows live in one preallocated buffer (doubling on growth) with cached squared
+    norms, so a search is one matrix product plus `argpartition` rather than a
+    restack per query. A buffer read with JARVIS_MEMORY_FALLBACK_MMAP=1 stays
+    memory-mapped until the first add copies it into RAM.
+    """
+
+    is_fallback = True
+    _QUERY_CHUNK = 256
+
+    def __init__(self, d: int, data: np.ndarray | None = None):
+        self.d = d
+        if data is None:
+            data = np.zeros((0, d), dtype=np.float32)
+        self._data = data
+        self.ntotal = int(data.shape[0])
+        self._norms = np.einsum("ij,ij->i", data, data, dtype=np.float32) if self.ntotal else np.zeros(0, dtype=np.float32)
+
+    @property
+    def vectors(self) -> np.ndarray:
+        return self._data[: self.ntotal]
+
+    def _reserve(self, rows: int) -> None:
+        capacity = self._data.shape[0]
+        writable = isinstance(self._data, np.ndarray) and not isinstance(self._data, np.memmap)
+        if rows <= capacity and writable:
+            return
+        new_capacity = max(rows, 64, capacity * 2)
+        data = np.empty((new_capacity, self.d), dtype=np.float32)
+        data[: self.ntotal] = self._data[: self.ntotal]
+        norms = np.empty(new_capacity, dtype=np.float32)
+        norms[: self.ntotal] = self._norms[: self.ntotal]
+        self._data, self._norms = data, norms
+
+    def add(self, mat: np.ndarray) -> None:
+        mat = np.asarray(mat, dtype=np.float32).reshape(-1, self.d)
+        n = mat.shape[0]
+        self._reserve(self.ntotal + n)
+        self._data[self.ntotal : self.ntotal + n] = mat
+        self._norms[self.ntotal : self.ntotal + n] = np.einsum("ij,ij->i", mat, mat)
+        self.ntotal += n
+
+    def reconstruct_n(self, start: int, n: int) -> np.ndarray:
+        return np.array(self._data[start : start + n], dtype=np.float32)
+
+    def search(self, mat: np.ndarray, k: int):
+        query = np.asarray(mat, dtype=np.float32).reshape(-1, self.d)
+        nq, n = query.shape[0], self.ntotal
+        dist_out = np.full((nq, k), np.inf, dtype=np.float32)
+        ids_out = np.full((nq, k), -1, dtype=np.int64)
+        if n == 0 or k <= 0:
+            return dist_out, ids_out
+        kk = min(k, n)
+        data, norms = self._data[:n], self._norms[:n]
+        for lo in range(0, nq, self._QUERY_CHUNK):
+            q = query[lo : lo + self._QUERY_CHUNK]
+            # ||x - q||^2 = ||x||^2 - 2 x.q + ||q||^2
+            dists = norms[None, :] - 2.0 * (q @ data.T) + np.einsum("ij,ij->i", q, q)[:, None]
+            np.maximum(dists, 0, out=dists)
+            if kk < n:
+                idx = np.argpartition(dists, kk - 1, axis=1)[:, :kk]
+            else:
+                idx = np.broadcast_to(np.arange(n), (q.shape[0], n))
+            part = np.take_along_axis(dists, idx, axis=1)
+            order = np.argsort(part, axis=1, kind="stable")
+            dist_out[lo : lo + q.shape[0], :kk] = np.take_along_axis(part, order, axis=1)
+            ids_out[lo : lo + q.shape[0], :kk] = np.take_along_axis(idx, order, axis=1)
+        return dist_out, ids_out
+
+
+class _DummyFaiss:
+    IndexFlatL2 = _DummyIndex
+    Index = _DummyIndex
+
+    @staticmethod
+    def write_index(index: _DummyIndex, path: str) -> None:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Write aside and rename: a reader may still have the old file memory-mapped.
+        tmp = f"{path}.tmp"
+        with open(tmp, "wb") as f:
+            np.save(f, np.ascontiguousarray(index.vectors, dtype=np.float32))
+        os.replace(tmp, path)
+
+    @staticmethod
+    def read_index(path: str) -> _DummyIndex:
+        if not os.path.exists(path):
+            return _DummyIndex(DIM)
+        mmap = "r" if os.getenv("JARVIS_MEMORY_FALLBACK_MMAP") == "1" else None
+        arr = np.load(path, mmap_mode=mmap)
+        if arr.ndim != 2 or arr.shape[0] == 0:
+            return _DummyIndex(arr.shape[1] if arr.ndim == 2 else DIM)
+        if mmap is None:
+            arr = np.ascontiguousarray(arr, dtype=np.float32)
+        return _DummyIndex(arr.shape[1], arr)
+
+
+# numpy/faiss are only imported when an index is first touched.
+np = lazy_import("numpy")
+faiss = lazy_import("faiss", fallback=_DummyFaiss)
 
 # Default embedding dimension - may be overridden by provider
 # This is just a fallback; the actual dimension comes from probing
@@ -92,6 +156,9 @@ class MemoryStore:
     memories: list[str]
     index_file: str
     data_file: str
+    lock: threading.RLock = field(default_factory=threading.RLock, repr=False, compare=False)
+    build_thread: threading.Thread | None = field(default=None, repr=False, compare=False)
+    build_status: dict[str, Any] = field(default_factory=dict, repr=False, compare=False)
 
     def save(self) -> None:
         os.makedirs(DATA_DIR, exist_ok=True)
@@ -99,8 +166,155 @@ class MemoryStore:
         with open(self.data_file, "w", encoding="utf-8") as f:
             json.dump(self.memories, f, ensure_ascii=False, indent=2)
 
+    def approx_bytes(self) -> int:
+        """Estimated resident size: index plus memory texts (sampled average length)."""
+        count = len(self.memories)
+        sample = self.memories[-32:]
+        avg_text = (sum(len(m) for m in sample) / len(sample)) if sample else 0
+        return memory_index.index_bytes(self.index) + int(count * (avg_text + 64))
+
+
+def _store_budget_bytes() -> int:
+    try:
+        return int(float(os.getenv("JARVIS_MEMORY_STORE_BUDGET_MB", "512") or 512) * 1024 * 1024)
+    except ValueError:
+        return 512 * 1024 * 1024
+
+
+def _store_max_count() -> int:
+    try:
+        return int(os.getenv("JARVIS_MEMORY_STORE_MAX", "0") or 0)
+    except ValueError:
+        return 0
+
+
+class StoreRegistry(MutableMapping):
+    """LRU of loaded MemoryStores, evicting cold ones past JARVIS_MEMORY_STORE_BUDGET_MB.
+
+    Sizes are re-estimated whenever a store is touched, so stores that grow are
+    accounted for. Stores that are pinned by a caller (`pin`/`unpin`), mid-rebuild
+    or in use (lock held) are skipped; everything is already on disk, so eviction
+    only drops the in-memory copy.
+    """
 
-_stores: dict[str, MemoryStore] = {}
+    def __init__(self) -> None:
+        self._data: OrderedDict[str, MemoryStore] = OrderedDict()
+        self._sizes: dict[str, int] = {}
+        self._total = 0
+        self._pins: dict[str, int] = {}
+        self._lock = threading.RLock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __getitem__(self, user_id: str) -> MemoryStore:
+        with self._lock:
+            store = self._data[user_id]
+            self._data.move_to_end(user_id)
+            self._resize(user_id, store)
+            self._evict(keep=user_id)
+            return store
+
+    def get(self, user_id: str, default: Any = None) -> Any:
+        with self._lock:
+            if user_id not in self._data:
+                self.misses += 1
+                return default
+            self.hits += 1
+            return self[user_id]
+
+    def __setitem__(self, user_id: str, store: MemoryStore) -> None:
+        with self._lock:
+            self._data[user_id] = store
+            self._data.move_to_end(user_id)
+            self._resize(user_id, store)
+            self._evict(keep=user_id)
+
+    def pin(self, user_id: str, store: MemoryStore | None = None) -> MemoryStore | None:
+        """Look up (or insert `store`) and pin it against eviction until `unpin`; None on a miss."""
+        with self._lock:
+            if store is not None:
+                self._pins[user_id] = self._pins.get(user_id, 0) + 1
+                self[user_id] = store
+                return store
+            if user_id not in self._data:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self._pins[user_id] = self._pins.get(user_id, 0) + 1
+            return self[user_id]
+
+    def unpin(self, user_id: str) -> None:
+        with self._lock:
+            count = self._pins.get(user_id, 0) - 1
+            if count > 0:
+                self._pins[user_id] = count
+            else:
+                self._pins.pop(user_id, None)
+
+    def __delitem__(self, user_id: str) -> None:
+        with self._lock:
+            del self._data[user_id]
+            self._total -= self._sizes.pop(user_id, 0)
+
+    def __iter__(self) -> Iterator[str]:
+        with self._lock:
+            return iter(list(self._data))
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def __contains__(self, user_id: object) -> bool:
+        return user_id in self._data
+
+    def _resize(self, user_id: str, store: MemoryStore) -> None:
+        try:
+            size = store.approx_bytes()
+        except Exception:
+            size = self._sizes.get(user_id, 0)
+        self._total += size - self._sizes.get(user_id, 0)
+        self._sizes[user_id] = size
+
+    def _evict(self, keep: str) -> None:
+        budget, max_count = _store_budget_bytes(), _store_max_count()
+        for user_id in list(self._data):
+            over_budget = self._total > budget
+            over_count = max_count > 0 and len(self._data) > max_count
+            if not (over_budget or over_count):
+                return
+            if user_id == keep or user_id in self._pins:
+                continue
+            store = self._data[user_id]
+            if store.build_thread is not None and store.build_thread.is_alive():
+                continue
+            if not store.lock.acquire(blocking=False):
+                continue
+            try:
+                del self[user_id]
+                self.evictions += 1
+            finally:
+                store.lock.release()
+            logger.debug("memory store evicted: %s", user_id)
+
+    def stats(self) -> dict[str, Any]:
+        with self._lock:
+            return {
+                "stores": len(self._data),
+                "bytes": self._total,
+                "budget_bytes": _store_budget_bytes(),
+                "max_stores": _store_max_count(),
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "users": {uid: self._sizes.get(uid, 0) for uid in reversed(self._data)},
+            }
+
+
+_stores: MutableMapping[str, MemoryStore] = StoreRegistry()
+_load_locks: dict[str, threading.Lock] = {}
+_load_locks_guard = threading.Lock()
+_preload_pool: ThreadPoolExecutor | None = None
+_preload_pool_lock = threading.Lock()
 _search_cache = TTLCache(default_ttl=float(os.getenv("MEMORY_CACHE_TTL", "60") or 60))
 _last_cache_status: str | None = None
 
@@ -173,6 +387,16 @@ def get_embedding_dim() -> int:
 
 
 def _encode(text: str, best_effort: bool = True, *, expected_dim: int | None = None, trace_id: str | None = None):
+    """Encode text to embedding, recording latency per backend (see _encode_uninstrumented)."""
+    if os.getenv("JARVIS_DISABLE_EMBEDDINGS") == "1" or os.getenv("DISABLE_EMBEDDINGS") == "1":
+        backend = "disabled"
+    else:
+        backend = os.getenv("EMBEDDINGS_BACKEND", "ollama")
+    with EMBEDDING_SECONDS.time(backend=backend):
+        return _encode_uninstrumented(text, best_effort, expected_dim=expected_dim, trace_id=trace_id)
+
+
+def _encode_uninstrumented(text: str, best_effort: bool = True, *, expected_dim: int | None = None, trace_id: str | None = None):
     """Encode text to embedding. Falls back to hash-embed on error if best_effort=True.
     
     Respects cancellation signal from streaming. If trace_id provided and stream is cancelled,
@@ -187,12 +411,16 @@ def _encode(text: str, best_effort: bool = True, *, expected_dim: int | None = N
         return _to_vec(_hash_embed(text))
 
     # Cancellation check BEFORE starting expensive operation
+    token = cancellation.token_for(trace_id)
+    if token is not None and token.cancelled:
+        logger.info(f"[EMBED] Cancelled before request (trace_id={token.trace_id})")
+        raise cancellation.OperationCancelled(f"Embedding cancelled by stream stop (trace_id={token.trace_id})")
     if trace_id:
         try:
             from jarvis.server import check_stream_cancelled_sync  # type: ignore
             if check_stream_cancelled_sync(trace_id):
                 logger.info(f"[EMBED] Cancelled before request (trace_id={trace_id})")
-                raise RuntimeError(f"Embedding cancelled by stream stop (trace_id={trace_id})")
+                raise cancellation.OperationCancelled(f"Embedding cancelled by stream stop (trace_id={trace_id})")
         except RuntimeError:
             raise  # Re-raise cancellation
         except Exception:
@@ -246,14 +474,14 @@ def _encode(text: str, best_effort: bool = True, *, expected_dim: int | None = N
                             from jarvis.server import check_stream_cancelled_sync  # type: ignore
                             if check_stream_cancelled_sync(trace_id):
                                 logger.info(f"[EMBED] Cancelled after response (trace_id={trace_id})")
-                                raise RuntimeError(f"Embedding cancelled after response (trace_id={trace_id})")
+                                raise cancellation.OperationCancelled(f"Embedding cancelled after response (trace_id={trace_id})")
                         except RuntimeError:
                             raise  # Re-raise cancellation
                         except Exception:
                             pass  # Server module not available, continue
                     
                     return arr
-                except EmbeddingDimMismatch:
+                except (EmbeddingDimMismatch, cancellation.OperationCancelled):
                     raise
                 except Exception as exc:
                     logger.warning("Invalid embedding shape (%s); using hash fallback", exc)
@@ -264,7 +492,7 @@ def _encode(text: str, best_effort: bool = True, *, expected_dim: int | None = N
             # If cancelled, short-circuit without retry loops
             if (error.get("type") or "").lower() == "clientcancelled".lower():
                 logger.info(f"[EMBED] Cancelled during request (trace_id={trace_id})")
-                raise RuntimeError(f"Embedding cancelled during request (trace_id={trace_id})")
+                raise cancellation.OperationCancelled(f"Embedding cancelled during request (trace_id={trace_id})")
             msg = f"Ollama embeddings failed ({error.get('type')}): {error.get('message')} [trace_id={error.get('trace_id')}]"
             logger.warning(msg)
             if best_effort:
@@ -277,6 +505,9 @@ def _encode(text: str, best_effort: bool = True, *, expected_dim: int | None = N
             if expected_dim is not None and int(arr.size) != int(expected_dim):
                 raise EmbeddingDimMismatch(int(arr.size), int(expected_dim), model)
             return arr
+    except cancellation.OperationCancelled:
+        # best_effort must not turn a stop into hash embeddings for the rest of a batch
+        raise
     except (TimeoutError, ConnectionError, OSError) as e:
         logger.warning(f"Embedding timeout/connection error (best-effort fallback): {type(e).__name__}: {e}")
         if best_effort:
@@ -319,7 +550,7 @@ def _load_store(user_id: str) -> MemoryStore:
     data_file = os.path.join(DATA_DIR, f"{safe_id}.json")
 
     if os.path.exists(index_file):
-        index = faiss.read_index(index_file)
+        index = memory_index.configure_search(faiss.read_index(index_file))
     else:
         index = faiss.IndexFlatL2(DIM)
 
@@ -329,13 +560,69 @@ def _load_store(user_id: str) -> MemoryStore:
     else:
         memories = []
 
-    return MemoryStore(index=index, memories=memories, index_file=index_file, data_file=data_file)
+    store = MemoryStore(index=index, memories=memories, index_file=index_file, data_file=data_file)
+    memory_index.maybe_promote(store)
+    return store
+
+
+def _get_store(user_id: str, pin: bool = False) -> MemoryStore:
+    """The user's store, loaded on first use; with `pin` it stays loaded until `_unpin_store`."""
+    registry = _stores if pin and isinstance(_stores, StoreRegistry) else None
+    store = registry.pin(user_id) if registry is not None else _stores.get(user_id)
+    if store is not None:
+        return store
+    # One loader per user: concurrent turns wait for the same load instead of racing.
+    with _load_locks_guard:
+        lock = _load_locks.setdefault(user_id, threading.Lock())
+    with lock:
+        store = registry.pin(user_id) if registry is not None else _stores.get(user_id)
+        if store is None:
+            store = _load_store(user_id)
+            if registry is not None:
+                registry.pin(user_id, store)
+            else:
+                _stores[user_id] = store
+    with _load_locks_guard:
+        _load_locks.pop(user_id, None)
+    return store
+
+
+def _unpin_store(user_id: str) -> None:
+    if isinstance(_stores, StoreRegistry):
+        _stores.unpin(user_id)
+
+
+@contextmanager
+def pinned_store(user_id: str) -> Iterator[MemoryStore]:
+    """A user's store that cannot be evicted (and reloaded as a second copy) while the block runs."""
+    store = _get_store(user_id, pin=True)
+    try:
+        yield store
+    finally:
+        _unpin_store(user_id)
+
+
+def with_store(user_id: str, func: Callable[..., Any], *args: Any) -> Any:
+    """Run `func(store, *args)` on the user's pinned store (for worker threads)."""
+    with pinned_store(user_id) as store:
+        return func(store, *args)
 
 
-def _get_store(user_id: str) -> MemoryStore:
-    if user_id not in _stores:
-        _stores[user_id] = _load_store(user_id)
-    return _stores[user_id]
+def preload_store(user_id: str) -> Future | None:
+    """Load a user's store on a background thread (e.g. at login) so the first turn doesn't pay for it."""
+    global _preload_pool
+    if os.getenv("JARVIS_ENABLE_RAG") != "1" or not user_id or user_id in _stores:
+        return None
+    with _preload_pool_lock:
+        if _preload_pool is None:
+            _preload_pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="memory-preload")
+    return _preload_pool.submit(_get_store, user_id)
+
+
+def store_registry_stats() -> dict[str, Any]:
+    if isinstance(_stores, StoreRegistry):
+        return _stores.stats()
+    return {"stores": len(_stores)}
 
 
 def purge_user_memory(user_id: str) -> None:
@@ -362,17 +649,19 @@ def add_memory(role: str, text: str, user_id: str = "default") -> None:
         logger.debug(f"Memory add skipped (JARVIS_ENABLE_RAG not set)")
         return
     
-    store = _get_store(user_id)
-    _search_cache.clear()
-    try:
-        vec = _encode(entry, best_effort=True)
-        _ensure_index_dim(store, vec.size)
-        store.index.add(vec.reshape(1, -1))
-    except Exception as exc:
-        logger.warning(f"Embedding add skipped: {exc!r}")
-        return
-    store.memories.append(entry)
-    store.save()
+    with pinned_store(user_id) as store:
+        _search_cache.clear()
+        try:
+            vec = _encode(entry, best_effort=True)
+            with store.lock:
+                _ensure_index_dim(store, vec.size)
+                store.index.add(vec.reshape(1, -1))
+                store.memories.append(entry)
+                store.save()
+        except Exception as exc:
+            logger.warning(f"Embedding add skipped: {exc!r}")
+            return
+        memory_index.maybe_promote(store)
 
 
 def search_memory(query: str, k: int = 3, user_id: str | None = None, trace_id: str | None = None) -> list[str]:
@@ -400,23 +689,24 @@ def search_memory(query: str, k: int = 3, user_id: str | None = None, trace_id:
         return cached
     _last_cache_status = "miss"
 
-    store = _get_store(user_id)
-    if store.index.ntotal == 0:
-        return []
-    try:
-        qvec = _encode(query, best_effort=True, expected_dim=store.index.d, trace_id=trace_id)
-        _ensure_index_dim(store, qvec.size)
-        qmat = qvec.reshape(1, -1)
-        limit = min(k, store.index.ntotal)
-        if limit <= 0:
+    with pinned_store(user_id) as store:
+        if store.index.ntotal == 0:
+            return []
+        try:
+            qvec = _encode(query, best_effort=True, expected_dim=store.index.d, trace_id=trace_id)
+            qmat = qvec.reshape(1, -1)
+            with store.lock:
+                _ensure_index_dim(store, qvec.size)
+                limit = min(k, store.index.ntotal)
+                if limit <= 0:
+                    return []
+                _, ids = store.index.search(qmat, limit)
+                hits = [store.memories[i] for i in ids[0] if 0 <= i < len(store.memories)]
+            _search_cache.set(cache_key, hits)
+            return hits
+        except Exception as exc:
+            logger.warning(f"Embedding search skipped: {exc!r}")
             return []
-        _, ids = store.index.search(qmat, limit)
-        hits = [store.memories[i] for i in ids[0] if i < len(store.memories)]
-        _search_cache.set(cache_key, hits)
-        return hits
-    except Exception as exc:
-        logger.warning(f"Embedding search skipped: {exc!r}")
-        return []
 
 
 def get_last_cache_status() -> str | None:
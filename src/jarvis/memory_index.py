@@ -0,0 +1,273 @@
+"""
+Index strategy for per-user memory stores.
+
+Stores start on an exact `IndexFlatL2`. Once a store holds JARVIS_MEMORY_ANN_THRESHOLD
+vectors it is promoted to an approximate index (HNSW by default, or IVF) built on a
+background thread; searches keep using the flat index until the new one is swapped in.
+`recall_report()` measures recall@k and per-query latency of the active index against
+exact flat search over the same vectors, sweeping efSearch / nprobe.
+"""
+
+from __future__ import annotations
+
+import logging
+import math
+import os
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+from jarvis.lazy import is_installed, lazy_import
+
+logger = logging.getLogger(__name__)
+
+np = lazy_import("numpy")
+faiss = lazy_import("faiss")
+
+KINDS = ("flat", "hnsw", "ivf")
+HNSW_EF_SWEEP = (16, 32, 64, 128, 256)
+IVF_NPROBE_SWEEP = (1, 4, 8, 16, 32, 64)
+
+
+def _env_int(name: str, default: int) -> int:
+    try:
+        return int(os.getenv(name, "") or default)
+    except ValueError:
+        return default
+
+
+def configured_kind() -> str:
+    """JARVIS_MEMORY_INDEX: auto (default, promote to hnsw), flat, hnsw or ivf."""
+    kind = (os.getenv("JARVIS_MEMORY_INDEX") or "auto").strip().lower()
+    if kind == "auto":
+        return "hnsw"
+    return kind if kind in KINDS else "flat"
+
+
+def ann_threshold() -> int:
+    return max(1, _env_int("JARVIS_MEMORY_ANN_THRESHOLD", 20000))
+
+
+def build_params(ntotal: int = 0) -> Dict[str, int]:
+    nlist = _env_int("JARVIS_MEMORY_IVF_NLIST", 0)
+    if nlist <= 0:
+        # ~4*sqrt(n) lists, keeping >= 39 training points per centroid (faiss' minimum).
+        nlist = max(1, min(int(4 * math.sqrt(max(ntotal, 1))), ntotal // 39 or 1))
+    return {
+        "hnsw_m": max(4, _env_int("JARVIS_MEMORY_HNSW_M", 32)),
+        "hnsw_ef_construction": max(8, _env_int("JARVIS_MEMORY_HNSW_EF_CONSTRUCTION", 80)),
+        "hnsw_ef_search": max(1, _env_int("JARVIS_MEMORY_HNSW_EF_SEARCH", 64)),
+        "ivf_nlist": nlist,
+        "ivf_nprobe": max(1, _env_int("JARVIS_MEMORY_IVF_NPROBE", 16)),
+    }
+
+
+def index_kind(index: Any) -> str:
+    if hasattr(index, "hnsw"):
+        return "hnsw"
+    if hasattr(index, "nprobe"):
+        return "ivf"
+    return "flat"
+
+
+def index_bytes(index: Any) -> int:
+    """Rough resident size of an index: vectors plus graph links / list ids."""
+    n, dim = int(index.ntotal), int(index.d)
+    size = n * dim * 4
+    kind = index_kind(index)
+    if kind == "hnsw":
+        size += n * index.hnsw.nb_neighbors(0) * 4 + n * 16
+    elif kind == "ivf":
+        size += n * 16 + index.nlist * dim * 4
+    return size
+
+
+def configure_search(index: Any, params: Optional[Dict[str, int]] = None) -> Any:
+    """Apply efSearch / nprobe to an index (e.g. one just read from disk)."""
+    params = params or build_params(int(getattr(index, "ntotal", 0)))
+    kind = index_kind(index)
+    if kind == "hnsw":
+        index.hnsw.efSearch = params["hnsw_ef_search"]
+    elif kind == "ivf":
+        index.nprobe = min(params["ivf_nprobe"], index.nlist)
+    return index
+
+
+def index_vectors(index: Any, start: int = 0) -> Any:
+    """Copy stored vectors [start:] out of any supported index as a float32 matrix."""
+    total = int(index.ntotal)
+    if total <= start:
+        return np.zeros((0, index.d), dtype=np.float32)
+    if index_kind(index) == "ivf":
+        faiss.extract_index_ivf(index).make_direct_map()
+    return np.asarray(index.reconstruct_n(start, total - start), dtype=np.float32)
+
+
+def build_index(vectors: Any, kind: str, params: Optional[Dict[str, int]] = None) -> Any:
+    """Build (and train, for IVF) an index of `kind` over `vectors`."""
+    vectors = np.ascontiguousarray(vectors, dtype=np.float32)
+    n, dim = vectors.shape
+    params = params or build_params(n)
+    if kind == "hnsw":
+        index = faiss.IndexHNSWFlat(dim, params["hnsw_m"])
+        index.hnsw.efConstruction = params["hnsw_ef_construction"]
+    elif kind == "ivf":
+        quantizer = faiss.IndexFlatL2(dim)
+        index = faiss.IndexIVFFlat(quantizer, dim, params["ivf_nlist"])
+        rng = np.random.default_rng(0)
+        sample = vectors if n <= params["ivf_nlist"] * 256 else vectors[rng.choice(n, params["ivf_nlist"] * 256, replace=False)]
+        index.train(sample)
+        index.make_direct_map()
+    else:
+        index = faiss.IndexFlatL2(dim)
+    if n:
+        index.add(vectors)
+    return configure_search(index, params)
+
+
+def wants_promotion(store: Any) -> Optional[str]:
+    """Target kind if `store` should be rebuilt, else None."""
+    target = configured_kind()
+    if target == "flat" or not is_installed("faiss") or getattr(store.index, "is_fallback", False):
+        return None
+    if index_kind(store.index) != "flat" or store.index.ntotal < ann_threshold():
+        return None
+    return target
+
+
+def maybe_promote(store: Any, *, force: Optional[str] = None) -> Optional[threading.Thread]:
+    """Start a background rebuild when the store crossed the threshold (or `force` names a kind)."""
+    target = force or wants_promotion(store)
+    if target is None:
+        return None
+    with store.lock:
+        if store.build_thread is not None and store.build_thread.is_alive():
+            return store.build_thread
+        thread = threading.Thread(target=_rebuild, args=(store, target), name="memory-index-build", daemon=True)
+        store.build_thread = thread
+        store.build_status = {"state": "building", "kind": target, "started_at": time.time()}
+    thread.start()
+    return thread
+
+
+def wait_for_build(store: Any, timeout: Optional[float] = None) -> bool:
+    thread = store.build_thread
+    if thread is not None:
+        thread.join(timeout)
+        return not thread.is_alive()
+    return True
+
+
+def _rebuild(store: Any, kind: str) -> None:
+    started = time.perf_counter()
+    try:
+        with store.lock:
+            source = store.index
+            vectors = index_vectors(source)
+        new_index = build_index(vectors, kind)
+        with store.lock:
+            if store.index is not source:
+                # Replaced meanwhile (e.g. re-embedded after a dim change); drop this build.
+                store.build_status = {"state": "discarded", "kind": kind}
+                return
+            tail = index_vectors(source, start=len(vectors))
+            if len(tail):
+                new_index.add(tail)
+            store.index = new_index
+            store.save()
+            store.build_status = {
+                "state": "ready",
+                "kind": kind,
+                "ntotal": int(new_index.ntotal),
+                "seconds": round(time.perf_counter() - started, 3),
+                "finished_at": time.time(),
+            }
+        logger.info("memory index %s promoted to %s (%d vectors, %.2fs)", store.index_file, kind, new_index.ntotal, time.perf_counter() - started)
+    except Exception as exc:
+        logger.warning("memory index rebuild failed: %s", exc)
+        store.build_status = {"state": "failed", "kind": kind, "error": str(exc)}
+
+
+def status(store: Any) -> Dict[str, Any]:
+    return {
+        "kind": index_kind(store.index),
+        "ntotal": int(store.index.ntotal),
+        "dim": int(store.index.d),
+        "target": configured_kind(),
+        "threshold": ann_threshold(),
+        "params": build_params(int(store.index.ntotal)),
+        "build": dict(store.build_status or {}),
+    }
+
+
+def _timed_search(index: Any, queries: Any, k: int):
+    latencies: List[float] = []
+    found = []
+    for q in queries:
+        t0 = time.perf_counter()
+        _, ids = index.search(q.reshape(1, -1), k)
+        latencies.append((time.perf_counter() - t0) * 1000)
+        found.append(ids[0])
+    lat = np.asarray(latencies)
+    return found, {
+        "latency_ms_mean": round(float(lat.mean()), 4),
+        "latency_ms_p50": round(float(np.percentile(lat, 50)), 4),
+        "latency_ms_p95": round(float(np.percentile(lat, 95)), 4),
+    }
+
+
+def _recall(found, truth, k: int) -> float:
+    hits = sum(len(set(f[:k].tolist()) & set(t[:k].tolist()) - {-1}) for f, t in zip(found, truth))
+    return round(hits / float(k * len(truth)), 4) if truth else 0.0
+
+
+def recall_report(store: Any, k: int = 10, queries: int = 100, seed: int = 0) -> Dict[str, Any]:
+    """recall@k vs per-query latency of the store's index, with exact flat search as ground truth.
+
+    Queries are stored vectors with small gaussian noise. The vectors are copied out
+    under the store lock; the indexes are rebuilt from that copy and swept (efSearch /
+    nprobe for HNSW/IVF) outside it, so searches and adds on the store are not held up.
+    """
+    with store.lock:
+        index = store.index
+        vectors = index_vectors(index)
+        kind = index_kind(index)
+        dim = int(index.d)
+        original = nlist = None
+        if kind == "hnsw":
+            original = index.hnsw.efSearch
+        elif kind == "ivf":
+            original, nlist = index.nprobe, index.nlist
+        fallback = type(index) if getattr(index, "is_fallback", False) else None
+    n = len(vectors)
+    report: Dict[str, Any] = {"kind": kind, "ntotal": n, "dim": dim, "k": k, "queries": 0, "flat": None, "points": []}
+    if n == 0:
+        return report
+    k = min(k, n)
+    rng = np.random.default_rng(seed)
+    picks = rng.choice(n, size=min(queries, n), replace=False)
+    scale = float(vectors.std()) * 0.05 or 1e-3
+    qs = (vectors[picks] + rng.normal(0, scale, size=(len(picks), vectors.shape[1]))).astype(np.float32)
+    # Without faiss the store runs the numpy fallback, which is exact; time a copy of it.
+    flat = fallback(dim, vectors) if fallback is not None else build_index(vectors, "flat")
+    truth, flat_lat = _timed_search(flat, qs, k)
+    report.update(k=k, queries=len(qs), flat={"recall": 1.0, **flat_lat})
+    if kind == "hnsw":
+        param, values = "efSearch", HNSW_EF_SWEEP
+        copy = build_index(vectors, kind)
+    elif kind == "ivf":
+        param, values = "nprobe", [v for v in IVF_NPROBE_SWEEP if v <= nlist]
+        copy = build_index(vectors, kind, dict(build_params(n), ivf_nlist=nlist))
+    else:
+        found, lat = _timed_search(flat, qs, k)
+        report["points"].append({"param": None, "value": None, "recall": _recall(found, truth, k), **lat})
+        return report
+    for value in values:
+        if param == "efSearch":
+            copy.hnsw.efSearch = max(value, k)
+        else:
+            copy.nprobe = value
+        found, lat = _timed_search(copy, qs, k)
+        report["points"].append({"param": param, "value": value, "recall": _recall(found, truth, k), **lat})
+    report["current"] = {"param": param, "value": original}
+    return report
@@ -0,0 +1,366 @@
+"""
+In-process metrics registry (counters and histograms) with Prometheus text export.
+
+Metrics live in memory for the lifetime of the worker; `/metrics` renders them in the
+Prometheus text exposition format so any scraper can collect them without an
+external agent. Observations are a dict lookup, a bisect and a locked increment.
+"""
+
+from __future__ import annotations
+
+import bisect
+import math
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Tuple
+
+# Latency buckets in seconds: 1ms .. 2min covers DB calls up to LLM generations.
+DEFAULT_BUCKETS: Tuple[float, ...] = (
+    0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5,
+    1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0,
+)
+
+# Hard cap on label combinations per metric so a bad label can't grow memory unbounded.
+MAX_SERIES_PER_METRIC = 2000
+
+
+def _escape_label(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Tuple[str, ...], values: Tuple[str, ...], extra: str = "") -> str:
+    parts = [f'{n}="{_escape_label(v)}"' for n, v in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class _Metric:
+    kind = "untyped"
+
+    def __init__(self, name: str, help_text: str, labelnames: Tuple[str, ...] = ()) -> None:
+        self.name = name
+        self.help = help_text
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, str]) -> Tuple[str, ...]:
+        return tuple(str(labels.get(n, "")) for n in self.labelnames)
+
+    def render(self) -> List[str]:  # pragma: no cover - implemented by subclasses
+        raise NotImplementedError
+
+    def reset(self) -> None:  # pragma: no cover - implemented by subclasses
+        raise NotImplementedError
+
+
+class Counter(_Metric):
+    """Monotonic counter, optionally labelled."""
+
+    kind = "counter"
+
+    def __init__(self, name: str, help_text: str, labelnames: Tuple[str, ...] = ()) -> None:
+        super().__init__(name, help_text, labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, amount: float = 1.0, **labels: str) -> None:
+        key = self._key(labels)
+        with self._lock:
+            if key not in self._values and len(self._values) >= MAX_SERIES_PER_METRIC:
+                return
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, **labels: str) -> float:
+        with self._lock:
+            return self._values.get(self._key(labels), 0.0)
+
+    def render(self) -> List[str]:
+        with self._lock:
+            items = sorted(self._values.items())
+        return [f"{self.name}{_format_labels(self.labelnames, k)} {_format_value(v)}" for k, v in items]
+
+    def reset(self) -> None:
+        with self._lock:
+            self._values.clear()
+
+
+class _HistogramSeries:
+    __slots__ = ("counts", "sum", "count")
+
+    def __init__(self, nbuckets: int) -> None:
+        self.counts = [0] * (nbuckets + 1)  # last slot is +Inf
+        self.sum = 0.0
+        self.count = 0
+
+
+class Histogram(_Metric):
+    """Fixed-bucket histogram; quantiles are estimated by interpolating within a bucket."""
+
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        help_text: str,
+        labelnames: Tuple[str, ...] = (),
+        buckets: Tuple[float, ...] = DEFAULT_BUCKETS,
+    ) -> None:
+        super().__init__(name, help_text, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        self._series: Dict[Tuple[str, ...], _HistogramSeries] = {}
+
+    def observe(self, value: float, **labels: str) -> None:
+        key = self._key(labels)
+        idx = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                if len(self._series) >= MAX_SERIES_PER_METRIC:
+                    return
+                series = self._series[key] = _HistogramSeries(len(self.buckets))
+            series.counts[idx] += 1
+            series.sum += value
+            series.count += 1
+
+    @contextmanager
+    def time(self, **labels: str) -> Iterator[None]:
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def count(self, **labels: str) -> int:
+        with self._lock:
+            series = self._series.get(self._key(labels))
+            return series.count if series else 0
+
+    def quantile(self, q: float, **labels: str) -> float | None:
+        """Estimate the q-quantile (0..1) for one label set; None when empty."""
+        with self._lock:
+            series = self._series.get(self._key(labels))
+            if not series or not series.count:
+                return None
+            counts = list(series.counts)
+            total = series.count
+        rank = q * total
+        cumulative = 0
+        for i, c in enumerate(counts):
+            if cumulative + c >= rank and c:
+                lower = self.buckets[i - 1] if i > 0 else 0.0
+                if i >= len(self.buckets):
+                    return lower  # +Inf bucket: best we can say is "above the last bound"
+                upper = self.buckets[i]
+                return lower + (upper - lower) * ((rank - cumulative) / c)
+            cumulative += c
+        return self.buckets[-1]
+
+    def snapshot(self) -> List[Dict[str, object]]:
+        """Per-series count/sum/p50/p95/p99, handy for JSON admin views."""
+        with self._lock:
+            keys = sorted(self._series.keys())
+        out = []
+        for key in keys:
+            labels = dict(zip(self.labelnames, key))
+            with self._lock:
+                series = self._series[key]
+                count, total = series.count, series.sum
+            out.append({
+                "labels": labels,
+                "count": count,
+                "sum": total,
+                "p50": self.quantile(0.5, **labels),
+                "p95": self.quantile(0.95, **labels),
+                "p99": self.quantile(0.99, **labels),
+            })
+        return out
+
+    def render(self) -> List[str]:
+        with self._lock:
+            items = [(k, list(s.counts), s.sum, s.count) for k, s in sorted(self._series.items())]
+        lines: List[str] = []
+        for key, counts, total, count in items:
+            cumulative = 0
+            for bound, c in zip(self.buckets, counts):
+                cumulative += c
+                le = f'le="{_format_value(bound)}"'
+                lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, key, le)} {cumulative}")
+            inf = _format_labels(self.labelnames, key, 'le="+Inf"')
+            lines.append(f"{self.name}_bucket{inf} {count}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labelnames, key)} {_format_value(total)}")
+            lines.append(f"{self.name}_count{_format_labels(self.labelnames, key)} {count}")
+        return lines
+
+    def reset(self) -> None:
+        with self._lock:
+            self._series.clear()
+
+
+class MetricsRegistry:
+    """Holds named metrics; re-registering a name returns the existing metric."""
+
+    def __init__(self) -> None:
+        self._metrics: Dict[str, _Metric] = {}
+        self._lock = threading.Lock()
+
+    def _get_or_create(self, cls, name: str, help_text: str, labelnames: Tuple[str, ...], **kwargs) -> _Metric:
+        with self._lock:
+            existing = self._metrics.get(name)
+            if existing is not None:
+                if not isinstance(existing, cls):
+                    raise ValueError(f"metric {name} already registered as {existing.kind}")
+                return existing
+            metric = cls(name, help_text, tuple(labelnames), **kwargs)
+            self._metrics[name] = metric
+            return metric
+
+    def counter(self, name: str, help_text: str, labelnames: Tuple[str, ...] = ()) -> Counter:
+        return self._get_or_create(Counter, name, help_text, labelnames)  # type: ignore[return-value]
+
+    def histogram(
+        self,
+        name: str,
+        help_text: str,
+        labelnames: Tuple[str, ...] = (),
+        buckets: Tuple[float, ...] = DEFAULT_BUCKETS,
+    ) -> Histogram:
+        return self._get_or_create(Histogram, name, help_text, labelnames, buckets=buckets)  # type: ignore[return-value]
+
+    def get(self, name: str) -> _Metric | None:
+        with self._lock:
+            return self._metrics.get(name)
+
+    def render_prometheus(self) -> str:
+        with self._lock:
+            metrics = sorted(self._metrics.values(), key=lambda m: m.name)
+        lines: List[str] = []
+        for metric in metrics:
+            lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+    def reset(self) -> None:
+        """Zero all series but keep registrations (tests only)."""
+        with self._lock:
+            metrics = list(self._metrics.values())
+        for metric in metrics:
+            metric.reset()
+
+
+REGISTRY = MetricsRegistry()
+
+# ---- Jarvis metrics ------------------------------------------------------------
+
+STAGE_SECONDS = REGISTRY.histogram(
+    "jarvis_stage_duration_seconds",
+    "Latency of chat pipeline stages (memory_search, memory_retrieve, code_rag, llm, tts, turn_total, ...).",
+    ("stage",),
+)
+STAGE_ERRORS = REGISTRY.counter(
+    "jarvis_stage_errors_total",
+    "Failures per chat pipeline stage.",
+    ("stage",),
+)
+TOOL_SECONDS = REGISTRY.histogram(
+    "jarvis_tool_duration_seconds",
+    "Tool execution latency including retries.",
+    ("tool", "outcome"),
+)
+TOOL_CALLS = REGISTRY.counter(
+    "jarvis_tool_calls_total",
+    "Tool invocations by outcome (ok, error, timeout, cache_hit, denied).",
+    ("tool", "outcome"),
+)
+EMBEDDING_SECONDS = REGISTRY.histogram(
+    "jarvis_embedding_duration_seconds",
+    "Embedding latency by backend (ollama, local, disabled).",
+    ("backend",),
+)
+EVENT_PUBLISH_SECONDS = REGISTRY.histogram(
+    "jarvis_event_publish_duration_seconds",
+    "Time spent fanning an event out to subscribers.",
+    ("event_type",),
+    buckets=(0.00001, 0.00005, 0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5),
+)
+EVENTS_PUBLISHED = REGISTRY.counter(
+    "jarvis_events_published_total",
+    "Events delivered to subscribers.",
+    ("event_type",),
+)
+DB_SECONDS = REGISTRY.histogram(
+    "jarvis_db_connection_seconds",
+    "Time a SQLite connection is held (open, queries, close).",
+)
+HTTP_SECONDS = REGISTRY.histogram(
+    "jarvis_http_request_duration_seconds",
+    "HTTP handler latency by route template (streams are measured until headers are sent).",
+    ("method", "route", "status"),
+)
+STREAM_TTFT_SECONDS = REGISTRY.histogram(
+    "jarvis_stream_first_token_seconds",
+    "Time from stream start to the first token delivered to the client.",
+)
+STREAM_TOKENS_PER_SECOND = REGISTRY.histogram(
+    "jarvis_stream_tokens_per_second",
+    "Sustained token rate per finished stream (first to last token delivered).",
+    buckets=(1, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000, 50000),
+)
+STREAM_TOKENS = REGISTRY.counter(
+    "jarvis_stream_tokens_total",
+    "Token frames delivered to streaming clients.",
+)
+STREAM_BYTES = REGISTRY.counter(
+    "jarvis_stream_bytes_total",
+    "NDJSON bytes written to streaming clients.",
+)
+
+MAINTENANCE_SECONDS = REGISTRY.histogram(
+    "jarvis_maintenance_job_seconds",
+    "Background maintenance job run time.",
+    ("job", "outcome"),
+    buckets=(0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1, 5, 10, 30, 60, 300),
+)
+MAINTENANCE_RUNS = REGISTRY.counter(
+    "jarvis_maintenance_runs_total",
+    "Background maintenance job runs by outcome (ok, error, skipped = lease held elsewhere).",
+    ("job", "outcome"),
+)
+
+
+def observe_stage(stage: str, seconds: float) -> None:
+    """Record a pipeline stage duration; never raises."""
+    try:
+        STAGE_SECONDS.observe(seconds, stage=stage)
+    except Exception:
+        pass
+
+
+@contextmanager
+def time_stage(stage: str) -> Iterator[None]:
+    """Time a block as a pipeline stage and count exceptions escaping it."""
+    start = time.perf_counter()
+    try:
+        yield
+    except BaseException:
+        STAGE_ERRORS.inc(stage=stage)
+        raise
+    finally:
+        observe_stage(stage, time.perf_counter() - start)
+
+
+def render_prometheus() -> str:
+    return REGISTRY.render_prometheus()
+
+
+def reset_for_tests() -> None:
+    REGISTRY.reset()
@@ -1,5 +1,6 @@
 from datetime import datetime, timedelta, timezone
 
+from jarvis import reminder_scheduler
 from jarvis.db import get_conn
 
 EXPIRY_DAYS = 30
@@ -48,11 +49,13 @@ def add_note(
             (user_id, clean_title, content, expires_at, remind_at, None, now, now),
         )
         conn.execute(
-            "UPDATE notes SET remind_enabled = ?, remind_stage = 0 WHERE id = last_insert_rowid()",
+            "UPDATE notes SET remind_enabled = ?, remind_stage = 0, shown_stage = 0 WHERE id = last_insert_rowid()",
             (remind_enabled_val,),
         )
         conn.commit()
         row = conn.execute("SELECT last_insert_rowid() as id").fetchone()
+    if remind_enabled:
+        reminder_scheduler.note_changed(row["id"])
     return {
         "id": row["id"],
         "title": clean_title,
@@ -105,7 +108,9 @@ def delete_note(user_id: int, note_id: int) -> bool:
             (note_id, user_id),
         )
         conn.commit()
-        return cur.rowcount > 0
+    if cur.rowcount > 0:
+        reminder_scheduler.note_changed(note_id)
+    return cur.rowcount > 0
 
 
 def keep_note(user_id: int, note_id: int) -> bool:
@@ -113,12 +118,14 @@ def keep_note(user_id: int, note_id: int) -> bool:
     expires_at, remind_at = _compute_expiry_from_created(now)
     with get_conn() as conn:
         cur = conn.execute(
-            "UPDATE notes SET expires_at = ?, remind_at = ?, warned_at = NULL, updated_at = ?, remind_stage = 0 "
+            "UPDATE notes SET expires_at = ?, remind_at = ?, warned_at = NULL, updated_at = ?, remind_stage = 0, shown_stage = 0 "
             "WHERE id = ? AND user_id = ?",
             (expires_at, remind_at, now.isoformat(), note_id, user_id),
         )
         conn.commit()
-        return cur.rowcount > 0
+    if cur.rowcount > 0:
+        reminder_scheduler.note_changed(note_id)
+    return cur.rowcount > 0
 
 
 def get_note(user_id: int, note_id: int) -> dict | None:
@@ -157,65 +164,33 @@ def update_note_due(user_id: int, note_id: int, expires_at: str, remind_enabled:
     with get_conn() as conn:
         if remind_enabled is None:
             cur = conn.execute(
-                "UPDATE notes SET expires_at = ?, remind_at = ?, warned_at = NULL, updated_at = ?, remind_stage = 0 "
+                "UPDATE notes SET expires_at = ?, remind_at = ?, warned_at = NULL, updated_at = ?, remind_stage = 0, shown_stage = 0 "
                 "WHERE id = ? AND user_id = ?",
                 (new_expires, new_remind_at, now.isoformat(), note_id, user_id),
             )
         else:
             cur = conn.execute(
-                "UPDATE notes SET expires_at = ?, remind_at = ?, warned_at = NULL, updated_at = ?, remind_stage = 0, remind_enabled = ? "
+                "UPDATE notes SET expires_at = ?, remind_at = ?, warned_at = NULL, updated_at = ?, remind_stage = 0, shown_stage = 0, remind_enabled = ? "
                 "WHERE id = ? AND user_id = ?",
                 (new_expires, new_remind_at, now.isoformat(), 1 if remind_enabled else 0, note_id, user_id),
             )
         conn.commit()
-        return cur.rowcount > 0
+    if cur.rowcount > 0:
+        reminder_scheduler.note_changed(note_id)
+    return cur.rowcount > 0
 
 
 def set_note_remind(user_id: int, note_id: int, enabled: bool) -> bool:
     now = datetime.now(timezone.utc)
     with get_conn() as conn:
         cur = conn.execute(
-            "UPDATE notes SET remind_enabled = ?, updated_at = ?, remind_stage = 0 WHERE id = ? AND user_id = ?",
+            "UPDATE notes SET remind_enabled = ?, updated_at = ?, remind_stage = 0, shown_stage = 0 WHERE id = ? AND user_id = ?",
             (1 if enabled else 0, now.isoformat(), note_id, user_id),
         )
         conn.commit()
-        return cur.rowcount > 0
-
-
-def list_due_note_reminders(user_id: int) -> list[dict]:
-    now = datetime.now(timezone.utc)
-    with get_conn() as conn:
-        rows = conn.execute(
-            "SELECT id, title, content, expires_at, remind_stage FROM notes "
-            "WHERE user_id = ? AND remind_enabled = 1 AND expires_at IS NOT NULL",
-            (user_id,),
-        ).fetchall()
-    due = []
-    for r in rows:
-        try:
-            expires_dt = datetime.fromisoformat(r["expires_at"])
-        except Exception:
-            continue
-        hours_left = (expires_dt - now).total_seconds() / 3600
-        stage = r["remind_stage"] or 0
-        new_stage = stage
-        if hours_left <= 2 and stage < 3:
-            new_stage = 3
-        elif hours_left <= 12 and stage < 2:
-            new_stage = 2
-        elif hours_left <= 24 and stage < 1:
-            new_stage = 1
-        if new_stage > stage:
-            due.append(dict(r) | {"stage": new_stage})
-    if due:
-        with get_conn() as conn:
-            for d in due:
-                conn.execute(
-                    "UPDATE notes SET remind_stage = ?, updated_at = ? WHERE id = ? AND user_id = ?",
-                    (d["stage"], now.isoformat(), d["id"], user_id),
-                )
-            conn.commit()
-    return due
+    if cur.rowcount > 0:
+        reminder_scheduler.note_changed(note_id)
+    return cur.rowcount > 0
 
 
 def list_expiring_notes(user_id: int) -> list[dict]:
@@ -263,6 +238,7 @@ def add_reminder(user_id: int, content: str, remind_at: str) -> dict:
         )
         conn.commit()
         row = conn.execute("SELECT last_insert_rowid() as id").fetchone()
+    reminder_scheduler.reminder_changed(row["id"])
     return {"id": row["id"], "content": content, "remind_at": remind_at}
 
 
@@ -281,23 +257,14 @@ def list_reminders(user_id: int, include_done: bool = False, limit: int = 20) ->
     return [dict(r) for r in rows]
 
 
-def get_due_reminders(user_id: int) -> list[dict]:
-    now = datetime.now(timezone.utc).isoformat()
-    with get_conn() as conn:
-        rows = conn.execute(
-            "SELECT id, content, remind_at FROM reminders WHERE user_id = ? AND reminded_at IS NULL AND remind_at <= ? ORDER BY remind_at ASC",
-            (user_id, now),
-        ).fetchall()
-    return [dict(r) for r in rows]
-
-
 def mark_reminded(user_id: int, reminder_ids: list[int]) -> None:
     if not reminder_ids:
         return
     now = datetime.now(timezone.utc).isoformat()
     with get_conn() as conn:
         conn.executemany(
-            "UPDATE reminders SET reminded_at = ? WHERE user_id = ? AND id = ?",
+            "UPDATE reminders SET reminded_at = ? WHERE user_id = ? AND id = ? AND reminded_at IS NULL",
             [(now, user_id, rid) for rid in reminder_ids],
         )
         conn.commit()
+    reminder_scheduler.acknowledge(user_id, reminder_ids)
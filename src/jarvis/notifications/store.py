@@ -1,17 +1,31 @@
-"""SQLite-backed notification/event store."""
+"""SQLite-backed notification/event store.
+
+New notifications are published on the event bus as `notification.created`
+(and read-state changes as `notification.read`) with the owner's `user_id` and
+current `unread_count`, so clients get them from /v1/events/stream instead of
+polling. Unread counts live in `event_unread_counts`, kept up to date by
+triggers on `events`, so reading one is a primary-key lookup.
+"""
 
 from __future__ import annotations
 
 import json
 import os
 import time
+import threading
 import uuid
 from datetime import datetime, timezone
 from typing import Any, Dict, List
 
 import jarvis.db as db
+from jarvis import events as event_bus
 from jarvis.db import get_conn
 
+NOTIFICATION_EVENT_TYPES = ("notification.created", "notification.read")
+
+_schema_lock = threading.Lock()
+_event_columns: Dict[tuple, set] = {}  # (db path, inode) -> columns of `events`, once the schema is ensured
+
 
 def _truncate_body(body: str, limit: int = 8000) -> str:
     return (body or "").strip()[:limit]
@@ -27,13 +41,12 @@ def add_event(
 ) -> int | str:
     """Insert a new event for a user and return its id."""
     _sync_db_path_from_env()
-    _ensure_table()
+    cols = _ensure_table()
     meta_json = json.dumps(meta or {}, ensure_ascii=False)
     created = datetime.now(timezone.utc).isoformat()
     body = _truncate_body(body)
     event_id = str(int(time.time() * 1000)) + "-" + uuid.uuid4().hex
     with get_conn() as conn:
-        cols = {row[1] for row in conn.execute("PRAGMA table_info(events)").fetchall()}
         data = {
             "id": event_id,
             "user_id": user_id,
@@ -56,15 +69,35 @@ def add_event(
             payload,
         )
         conn.commit()
-        return event_id
+        unread = _unread_count(conn, user_id)
+    event_bus.publish(
+        "notification.created",
+        {
+            "user_id": user_id,
+            "id": event_id,
+            "type": data["type"],
+            "created_at": created,
+            "level": data["severity"],
+            "title": data["title"],
+            "body": body,
+            "meta": meta or {},
+            "unread_count": unread,
+        },
+    )
+    return event_id
 
 
-def list_events(user_id: int, since_id: int | None = None, limit: int = 50) -> List[Dict[str, Any]]:
-    """List events for a user in ascending id order."""
+def list_events(
+    user_id: int, since_id: int | None = None, limit: int = 50, event_type: str | None = None
+) -> List[Dict[str, Any]]:
+    """List events for a user in ascending id order, optionally only of one type."""
     _sync_db_path_from_env()
     _ensure_table()
     query = "SELECT id, created_utc, type, severity, title, body, meta_json, read FROM events WHERE user_id = ?"
     params: list[Any] = [user_id]
+    if event_type is not None:
+        query += " AND type = ?"
+        params.append(event_type)
     if since_id is not None:
         query += " AND id > ?"
         params.append(since_id)
@@ -103,9 +136,13 @@ def mark_read(user_id: int, event_id: int) -> bool:
     _sync_db_path_from_env()
     _ensure_table()
     with get_conn() as conn:
+        before = _unread_count(conn, user_id)
         cur = conn.execute("UPDATE events SET read = 1 WHERE id = ? AND user_id = ?", (event_id, user_id))
         conn.commit()
-        return cur.rowcount > 0
+        unread = _unread_count(conn, user_id)
+    if unread != before:  # re-marking an already read event changes nothing: no push
+        event_bus.publish("notification.read", {"user_id": user_id, "id": event_id, "unread_count": unread})
+    return cur.rowcount > 0
 
 
 # Notification aliases for the event functions
@@ -116,20 +153,18 @@ def add_notification(user_id: int, level: str, title: str, body: str, meta: Dict
 
 def list_notifications(user_id: int, limit: int = 50, since_id: int | None = None) -> List[Dict[str, Any]]:
     """List notifications for a user (alias for list_events, filtered to notifications)."""
-    events = list_events(user_id, since_id, limit)
-    notifications = []
-    for e in events:
-        if e.get("type") == "notification":
-            notifications.append({
-                "id": e["id"],
-                "created_at": e["created_utc"],
-                "level": e["severity"],
-                "title": e["title"],
-                "body": e["body"],
-                "meta": e["meta"],
-                "read": e["read"],
-            })
-    return notifications
+    return [
+        {
+            "id": e["id"],
+            "created_at": e["created_utc"],
+            "level": e["severity"],
+            "title": e["title"],
+            "body": e["body"],
+            "meta": e["meta"],
+            "read": e["read"],
+        }
+        for e in list_events(user_id, since_id, limit, event_type="notification")
+    ]
 
 
 def mark_notification_read(user_id: int, notification_id: int) -> bool:
@@ -142,11 +177,7 @@ def get_unread_notifications_count(user_id: int) -> int:
     _sync_db_path_from_env()
     _ensure_table()
     with get_conn() as conn:
-        row = conn.execute(
-            "SELECT COUNT(*) FROM events WHERE user_id = ? AND read = 0",
-            (user_id,),
-        ).fetchone()
-        return row[0] if row else 0
+        return _unread_count(conn, user_id)
 
 
 def mark_all_notifications_read(user_id: int) -> None:
@@ -154,16 +185,59 @@ def mark_all_notifications_read(user_id: int) -> None:
     _sync_db_path_from_env()
     _ensure_table()
     with get_conn() as conn:
+        before = _unread_count(conn, user_id)
         conn.execute(
             "UPDATE events SET read = 1 WHERE user_id = ? AND read = 0",
             (user_id,),
         )
         conn.commit()
+        unread = _unread_count(conn, user_id)
+    if unread != before:
+        event_bus.publish("notification.read", {"user_id": user_id, "id": None, "unread_count": unread})
 
 
-def _ensure_table() -> None:
-    """Create events table if it does not exist (idempotent)."""
-    with get_conn() as conn:
+def _unread_count(conn, user_id: int) -> int:
+    row = conn.execute("SELECT unread FROM event_unread_counts WHERE user_id = ?", (user_id,)).fetchone()
+    return max(0, row[0]) if row else 0
+
+
+_UNREAD_TRIGGERS = (
+    """
+    CREATE TRIGGER IF NOT EXISTS events_unread_insert AFTER INSERT ON events WHEN NEW.read = 0
+    BEGIN
+        INSERT INTO event_unread_counts (user_id, unread) VALUES (NEW.user_id, 1)
+        ON CONFLICT(user_id) DO UPDATE SET unread = unread + 1;
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS events_unread_update AFTER UPDATE OF read, user_id ON events
+    WHEN (OLD.read = 0) OR (NEW.read = 0)
+    BEGIN
+        UPDATE event_unread_counts SET unread = unread - 1 WHERE OLD.read = 0 AND user_id = OLD.user_id;
+        INSERT INTO event_unread_counts (user_id, unread) SELECT NEW.user_id, 1 WHERE NEW.read = 0
+        ON CONFLICT(user_id) DO UPDATE SET unread = unread + 1;
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS events_unread_delete AFTER DELETE ON events WHEN OLD.read = 0
+    BEGIN
+        UPDATE event_unread_counts SET unread = unread - 1 WHERE user_id = OLD.user_id;
+    END
+    """,
+)
+
+
+def _ensure_table() -> set:
+    """Create the events table, its indexes and unread counters once per DB; returns its columns."""
+    path = db.get_db_path()
+    try:
+        key = (path, os.stat(path).st_ino)
+    except OSError:
+        key = None
+    cols = _event_columns.get(key)
+    if cols is not None:
+        return cols
+    with _schema_lock, get_conn() as conn:
         conn.execute(
             """
             CREATE TABLE IF NOT EXISTS events (
@@ -179,7 +253,33 @@ def _ensure_table() -> None:
             )
             """
         )
-        conn.commit()
+        cols = {row[1] for row in conn.execute("PRAGMA table_info(events)").fetchall()}
+        if "created_at" in cols:
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_events_user_read_created_type ON events(user_id, read, created_at, type)"
+            )
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_events_user_type_id ON events(user_id, type, id)")
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            exists = conn.execute(
+                "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'event_unread_counts'"
+            ).fetchone()
+            if not exists:
+                conn.execute(
+                    "CREATE TABLE event_unread_counts (user_id INTEGER PRIMARY KEY, unread INTEGER NOT NULL DEFAULT 0)"
+                )
+                conn.execute(
+                    "INSERT INTO event_unread_counts (user_id, unread) "
+                    "SELECT user_id, COUNT(*) FROM events WHERE read = 0 GROUP BY user_id"
+                )
+            for trigger in _UNREAD_TRIGGERS:
+                conn.execute(trigger)
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+    _event_columns[(path, os.stat(path).st_ino)] = cols
+    return cols
 
 
 def _sync_db_path_from_env() -> None:
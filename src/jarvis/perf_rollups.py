@@ -0,0 +1,333 @@
+"""
+Rollups and retention for `performance_metrics` and `tool_audit`.
+
+Raw rows are folded into per-minute and per-hour buckets in `metric_rollups`
+(count, sum, errors and a mergeable latency sketch). Progress is tracked by the
+highest raw row id already folded in (`rollup_state`), so each run only reads new
+rows. Raw rows older than the retention window are deleted once rolled up, and old
+minute buckets are dropped in favour of the hourly ones. Admin views query the
+rollups instead of scanning the raw tables.
+"""
+
+from __future__ import annotations
+
+import json
+import math
+import os
+import sqlite3
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from jarvis.db import get_conn
+
+PERF_SERIES = ("total_request_ms", "llm_call_ms", "memory_retrieval_ms", "tool_calls_total_ms")
+RESOLUTIONS = {"minute": 60, "hour": 3600}
+SOURCES = ("perf", "tool")
+
+# Relative accuracy of quantile estimates (1% => p95 of 2000ms is within ~20ms).
+SKETCH_ALPHA = 0.01
+
+
+def _env_float(name: str, default: float) -> float:
+    try:
+        return float(os.getenv(name, str(default)))
+    except ValueError:
+        return default
+
+
+class LatencySketch:
+    """Log-bucketed quantile sketch (DDSketch-style); merging is adding bucket counts."""
+
+    def __init__(self, alpha: float = SKETCH_ALPHA) -> None:
+        self.alpha = alpha
+        self._gamma_log = math.log((1 + alpha) / (1 - alpha))
+        self.bins: Dict[int, int] = {}
+        self.zeros = 0
+
+    def add(self, value: float, count: int = 1) -> None:
+        if value is None or value != value:  # None / NaN
+            return
+        if value <= 0:
+            self.zeros += count
+            return
+        idx = int(math.ceil(math.log(value) / self._gamma_log))
+        self.bins[idx] = self.bins.get(idx, 0) + count
+
+    def merge(self, other: "LatencySketch") -> None:
+        self.zeros += other.zeros
+        for idx, c in other.bins.items():
+            self.bins[idx] = self.bins.get(idx, 0) + c
+
+    @property
+    def count(self) -> int:
+        return self.zeros + sum(self.bins.values())
+
+    def quantile(self, q: float) -> Optional[float]:
+        total = self.count
+        if not total:
+            return None
+        rank = q * (total - 1)
+        if rank < self.zeros:
+            return 0.0
+        seen = self.zeros
+        gamma = math.exp(self._gamma_log)
+        for idx in sorted(self.bins):
+            seen += self.bins[idx]
+            if seen > rank:
+                # Midpoint of the bucket (gamma^(i-1), gamma^i] in the relative sense.
+                return 2 * gamma ** idx / (gamma + 1)
+        return 2 * gamma ** max(self.bins) / (gamma + 1)
+
+    def to_json(self) -> str:
+        return json.dumps({"a": self.alpha, "z": self.zeros, "b": {str(k): v for k, v in self.bins.items()}},
+                          separators=(",", ":"))
+
+    @classmethod
+    def from_json(cls, raw: str | None) -> "LatencySketch":
+        data = json.loads(raw) if raw else {}
+        sketch = cls(float(data.get("a", SKETCH_ALPHA)))
+        sketch.zeros = int(data.get("z", 0))
+        sketch.bins = {int(k): int(v) for k, v in (data.get("b") or {}).items()}
+        return sketch
+
+
+class _Bucket:
+    __slots__ = ("count", "sum", "errors", "sketch")
+
+    def __init__(self) -> None:
+        self.count = 0
+        self.sum = 0.0
+        self.errors = 0
+        self.sketch = LatencySketch()
+
+    def add(self, value: float, error: bool = False) -> None:
+        self.count += 1
+        self.sum += value
+        self.errors += 1 if error else 0
+        self.sketch.add(value)
+
+
+def _parse_ts(raw: Any) -> Optional[int]:
+    if not raw:
+        return None
+    try:
+        dt = datetime.fromisoformat(str(raw).replace("Z", "+00:00"))
+    except ValueError:
+        return None
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=timezone.utc)
+    return int(dt.timestamp())
+
+
+def _iso(ts: float) -> str:
+    return datetime.fromtimestamp(ts, tz=timezone.utc).isoformat()
+
+
+def _read_new_rows(conn: sqlite3.Connection, source: str, last_id: int, limit: int) -> List[sqlite3.Row]:
+    if source == "perf":
+        cols = ", ".join(PERF_SERIES)
+        sql = f"SELECT id, timestamp, {cols} FROM performance_metrics WHERE id > ? ORDER BY id LIMIT ?"
+    else:
+        sql = "SELECT id, timestamp, tool_name, success, latency_ms FROM tool_audit WHERE id > ? ORDER BY id LIMIT ?"
+    return conn.execute(sql, (last_id, limit)).fetchall()
+
+
+def _observations(source: str, row: sqlite3.Row) -> Iterable[Tuple[str, float, bool]]:
+    if source == "perf":
+        for series in PERF_SERIES:
+            value = row[series]
+            if value is not None:
+                yield series, float(value), False
+    else:
+        if row["latency_ms"] is not None:
+            yield row["tool_name"], float(row["latency_ms"]), not row["success"]
+
+
+def _merge_buckets(conn: sqlite3.Connection, source: str, buckets: Dict[Tuple[str, str, int], _Bucket]) -> None:
+    for (resolution, series, start), bucket in buckets.items():
+        existing = conn.execute(
+            "SELECT count, sum, errors, sketch FROM metric_rollups "
+            "WHERE resolution = ? AND source = ? AND series = ? AND bucket_start = ?",
+            (resolution, source, series, start),
+        ).fetchone()
+        if existing:
+            bucket.count += existing["count"]
+            bucket.sum += existing["sum"]
+            bucket.errors += existing["errors"]
+            bucket.sketch.merge(LatencySketch.from_json(existing["sketch"]))
+        conn.execute(
+            "INSERT OR REPLACE INTO metric_rollups "
+            "(resolution, source, series, bucket_start, count, sum, errors, sketch) VALUES (?,?,?,?,?,?,?,?)",
+            (resolution, source, series, start, bucket.count, bucket.sum, bucket.errors, bucket.sketch.to_json()),
+        )
+
+
+def rollup_source(source: str, batch_size: int = 5000) -> int:
+    """Fold raw rows newer than the watermark into minute/hour buckets; returns rows read."""
+    total = 0
+    while True:
+        with get_conn() as conn:
+            # Connections are autocommit; take the write lock up front so buckets and the
+            # watermark move together and concurrent workers can't fold the same rows twice.
+            conn.execute("BEGIN IMMEDIATE")
+            state = conn.execute("SELECT last_id FROM rollup_state WHERE source = ?", (source,)).fetchone()
+            last_id = state["last_id"] if state else 0
+            rows = _read_new_rows(conn, source, last_id, batch_size)
+            if not rows:
+                conn.execute("ROLLBACK")
+                return total
+            buckets: Dict[Tuple[str, str, int], _Bucket] = {}
+            for row in rows:
+                ts = _parse_ts(row["timestamp"])
+                if ts is None:
+                    continue
+                for series, value, error in _observations(source, row):
+                    for resolution, width in RESOLUTIONS.items():
+                        key = (resolution, series, ts - ts % width)
+                        bucket = buckets.get(key)
+                        if bucket is None:
+                            bucket = buckets[key] = _Bucket()
+                        bucket.add(value, error)
+            _merge_buckets(conn, source, buckets)
+            conn.execute(
+                "INSERT INTO rollup_state (source, last_id) VALUES (?, ?) "
+                "ON CONFLICT(source) DO UPDATE SET last_id = excluded.last_id",
+                (source, rows[-1]["id"]),
+            )
+            conn.execute("COMMIT")
+        total += len(rows)
+        if len(rows) < batch_size:
+            return total
+
+
+def prune(now: Optional[float] = None) -> Dict[str, int]:
+    """Delete rolled-up raw rows and minute buckets past their retention windows."""
+    now = now if now is not None else datetime.now(timezone.utc).timestamp()
+    raw_cutoff = _iso(now - _env_float("JARVIS_METRICS_RAW_RETENTION_DAYS", 7) * 86400)
+    minute_cutoff = int(now - _env_float("JARVIS_METRICS_MINUTE_RETENTION_DAYS", 14) * 86400)
+    hour_cutoff = int(now - _env_float("JARVIS_METRICS_HOUR_RETENTION_DAYS", 365) * 86400)
+    deleted: Dict[str, int] = {}
+    with get_conn() as conn:
+        marks = {r["source"]: r["last_id"] for r in conn.execute("SELECT source, last_id FROM rollup_state")}
+        for source, table in (("perf", "performance_metrics"), ("tool", "tool_audit")):
+            # Only drop rows the rollup has already consumed.
+            cur = conn.execute(
+                f"DELETE FROM {table} WHERE id <= ? AND timestamp < ?",
+                (marks.get(source, 0), raw_cutoff),
+            )
+            deleted[table] = cur.rowcount
+        cur = conn.execute(
+            "DELETE FROM metric_rollups WHERE resolution = 'minute' AND bucket_start < ?", (minute_cutoff,)
+        )
+        deleted["minute_rollups"] = cur.rowcount
+        cur = conn.execute(
+            "DELETE FROM metric_rollups WHERE resolution = 'hour' AND bucket_start < ?", (hour_cutoff,)
+        )
+        deleted["hour_rollups"] = cur.rowcount
+        conn.commit()
+    return deleted
+
+
+def run_maintenance(now: Optional[float] = None) -> Dict[str, Any]:
+    """Roll up every source, then prune. Safe to call repeatedly."""
+    rolled = {source: rollup_source(source) for source in SOURCES}
+    return {"rolled_up": rolled, "pruned": prune(now)}
+
+
+def _pick_resolution(since_s: float) -> str:
+    # Minute buckets only exist for the minute retention window and get costly past a day.
+    return "minute" if since_s <= 6 * 3600 else "hour"
+
+
+def _load_rollups(
+    source: str, resolution: str, since_ts: int, series: Optional[str]
+) -> List[sqlite3.Row]:
+    sql = (
+        "SELECT series, bucket_start, count, sum, errors, sketch FROM metric_rollups "
+        "WHERE resolution = ? AND source = ? AND bucket_start >= ?"
+    )
+    params: List[Any] = [resolution, source, since_ts]
+    if series:
+        sql += " AND series = ?"
+        params.append(series)
+    sql += " ORDER BY series, bucket_start"
+    with get_conn() as conn:
+        return conn.execute(sql, params).fetchall()
+
+
+def _describe(count: int, total: float, errors: int, sketch: LatencySketch) -> Dict[str, Any]:
+    def _q(q: float) -> Optional[float]:
+        v = sketch.quantile(q)
+        return round(v, 3) if v is not None else None
+
+    return {
+        "count": count,
+        "avg_ms": round(total / count, 3) if count else None,
+        "p50_ms": _q(0.5),
+        "p95_ms": _q(0.95),
+        "p99_ms": _q(0.99),
+        "errors": errors,
+        "error_rate": round(errors / count, 4) if count else 0.0,
+    }
+
+
+def summary(
+    source: str = "perf",
+    since_hours: float = 24,
+    series: Optional[str] = None,
+    resolution: Optional[str] = None,
+    now: Optional[float] = None,
+) -> Dict[str, Any]:
+    """Per-series totals and percentiles over the window, merged from rollup buckets."""
+    if source not in SOURCES:
+        raise ValueError(f"unknown source {source!r}")
+    now = now if now is not None else datetime.now(timezone.utc).timestamp()
+    since_s = max(60.0, since_hours * 3600)
+    resolution = resolution or _pick_resolution(since_s)
+    if resolution not in RESOLUTIONS:
+        raise ValueError(f"unknown resolution {resolution!r}")
+    width = RESOLUTIONS[resolution]
+    since_ts = int(now - since_s)
+    since_ts -= since_ts % width
+    merged: Dict[str, _Bucket] = {}
+    for row in _load_rollups(source, resolution, since_ts, series):
+        bucket = merged.get(row["series"])
+        if bucket is None:
+            bucket = merged[row["series"]] = _Bucket()
+        bucket.count += row["count"]
+        bucket.sum += row["sum"]
+        bucket.errors += row["errors"]
+        bucket.sketch.merge(LatencySketch.from_json(row["sketch"]))
+    return {
+        "source": source,
+        "resolution": resolution,
+        "since": _iso(since_ts),
+        "series": {
+            name: _describe(b.count, b.sum, b.errors, b.sketch) for name, b in sorted(merged.items())
+        },
+    }
+
+
+def timeseries(
+    source: str,
+    series: str,
+    since_hours: float = 24,
+    resolution: Optional[str] = None,
+    now: Optional[float] = None,
+) -> Dict[str, Any]:
+    """One point per bucket (count, avg, p50/p95/p99) for charting a single series."""
+    if source not in SOURCES:
+        raise ValueError(f"unknown source {source!r}")
+    now = now if now is not None else datetime.now(timezone.utc).timestamp()
+    since_s = max(60.0, since_hours * 3600)
+    resolution = resolution or _pick_resolution(since_s)
+    if resolution not in RESOLUTIONS:
+        raise ValueError(f"unknown resolution {resolution!r}")
+    since_ts = int(now - since_s)
+    points = []
+    for row in _load_rollups(source, resolution, since_ts - since_ts % RESOLUTIONS[resolution], series):
+        sketch = LatencySketch.from_json(row["sketch"])
+        point = _describe(row["count"], row["sum"], row["errors"], sketch)
+        point["bucket_start"] = _iso(row["bucket_start"])
+        points.append(point)
+    return {"source": source, "series": series, "resolution": resolution, "points": points}
@@ -0,0 +1,150 @@
+"""
+In-process sampling profiler for live servers.
+
+A sampling thread snapshots every Python thread's stack with `sys._current_frames()`
+at a fixed interval and aggregates them into collapsed stacks
+(`frame;frame;frame count`), the input format of flamegraph.pl and speedscope.
+Samples taken while a thread is inside a tracing span are prefixed with
+`trace:<trace_id>` so hot spots can be tied back to a chat turn.
+
+No signals are used, so it works from any thread and alongside uvicorn's handlers.
+Only one profile runs at a time.
+"""
+
+from __future__ import annotations
+
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from typing import Any, Dict, List
+
+from jarvis.tracing import thread_trace_ids
+
+MAX_DURATION_S = 60.0
+MIN_INTERVAL_S = 0.001
+MAX_STACK_DEPTH = 128
+
+# Leaf frames in these stdlib modules mean the thread is parked, not burning CPU.
+_IDLE_FILES = ("threading.py", "queue.py", "selectors.py", "socket.py", "ssl.py")
+
+_run_lock = threading.Lock()
+
+
+class ProfilerBusy(RuntimeError):
+    """Raised when a profile is requested while another one is running."""
+
+
+def _frame_label(frame) -> str:
+    code = frame.f_code
+    module = frame.f_globals.get("__name__") or os.path.basename(code.co_filename)
+    return f"{module}:{code.co_name}"
+
+
+def _is_idle(frame) -> bool:
+    return os.path.basename(frame.f_code.co_filename) in _IDLE_FILES
+
+
+def _collapse(frame) -> str:
+    parts: List[str] = []
+    while frame is not None and len(parts) < MAX_STACK_DEPTH:
+        parts.append(_frame_label(frame))
+        frame = frame.f_back
+    parts.reverse()
+    return ";".join(parts)
+
+
+class StackSampler:
+    """Samples all thread stacks for `duration` seconds every `interval` seconds."""
+
+    def __init__(self, duration: float, interval: float = 0.01, include_idle: bool = False) -> None:
+        self.duration = min(max(duration, 0.0), MAX_DURATION_S)
+        self.interval = max(interval, MIN_INTERVAL_S)
+        self.include_idle = include_idle
+        self.stacks: Counter[str] = Counter()
+        self.samples = 0
+        self.idle_skipped = 0
+        self.elapsed = 0.0
+
+    def _sample_once(self, own_ident: int, names: Dict[int, str]) -> None:
+        traces = thread_trace_ids()
+        for ident, frame in sys._current_frames().items():
+            if ident == own_ident:
+                continue
+            if not self.include_idle and _is_idle(frame):
+                self.idle_skipped += 1
+                continue
+            prefix = [names.get(ident, f"thread-{ident}")]
+            trace_id = traces.get(ident)
+            if trace_id:
+                prefix.append(f"trace:{trace_id}")
+            self.stacks[";".join(prefix) + ";" + _collapse(frame)] += 1
+        self.samples += 1
+
+    def run(self) -> "StackSampler":
+        if not _run_lock.acquire(blocking=False):
+            raise ProfilerBusy("a profile is already running")
+        try:
+            own_ident = threading.get_ident()
+            started = time.perf_counter()
+            deadline = started + self.duration
+            next_tick = started
+            while True:
+                names = {t.ident: t.name for t in threading.enumerate() if t.ident is not None}
+                self._sample_once(own_ident, names)
+                next_tick += self.interval
+                now = time.perf_counter()
+                if now >= deadline:
+                    break
+                # Sleep to the next tick; if we fell behind, skip ahead instead of bursting.
+                if next_tick < now:
+                    next_tick = now
+                time.sleep(min(next_tick - now, deadline - now))
+            self.elapsed = time.perf_counter() - started
+        finally:
+            _run_lock.release()
+        return self
+
+    def collapsed(self) -> str:
+        lines = [f"{stack} {count}" for stack, count in self.stacks.most_common()]
+        return "\n".join(lines) + ("\n" if lines else "")
+
+    def by_trace(self) -> Dict[str, int]:
+        totals: Counter[str] = Counter()
+        for stack, count in self.stacks.items():
+            for part in stack.split(";", 2)[1:2]:
+                if part.startswith("trace:"):
+                    totals[part[len("trace:"):]] += count
+        return dict(totals.most_common())
+
+    def top_functions(self, limit: int = 20) -> List[Dict[str, Any]]:
+        """Leaf-frame (self time) totals, the quickest read of where CPU goes."""
+        totals: Counter[str] = Counter()
+        for stack, count in self.stacks.items():
+            totals[stack.rsplit(";", 1)[-1]] += count
+        return [{"function": fn, "samples": n} for fn, n in totals.most_common(limit)]
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            "duration_s": round(self.elapsed, 3),
+            "interval_ms": round(self.interval * 1000, 3),
+            "samples": self.samples,
+            "idle_skipped": self.idle_skipped,
+            "stacks": len(self.stacks),
+            "by_trace": self.by_trace(),
+            "top": self.top_functions(),
+        }
+
+
+def profile(duration: float, interval: float = 0.01, include_idle: bool = False) -> StackSampler:
+    """Run a blocking profile in the calling thread and return the sampler."""
+    return StackSampler(duration, interval=interval, include_idle=include_idle).run()
+
+
+def is_running() -> bool:
+    return _run_lock.locked()
+
+
+__all__ = ["ProfilerBusy", "StackSampler", "profile", "is_running", "MAX_DURATION_S"]
+
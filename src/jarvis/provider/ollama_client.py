@@ -12,6 +12,9 @@ from typing import Any, Dict, Generator, Tuple
 
 import requests
 
+from jarvis import cancellation
+from jarvis.tracing import span
+
 logger = logging.getLogger(__name__)
 
 
@@ -39,8 +42,13 @@ def ollama_request(
     
     # Use provided trace_id if any to correlate with stream cancellation
     tid = trace_id or uuid.uuid4().hex[:8]
+    # Token for this trace (or the caller's context, e.g. a tool thread); cancelling it
+    # shuts down the socket so the blocking post below returns immediately.
+    token = cancellation.token_for(trace_id)
 
     def _is_cancelled() -> bool:
+        if token is not None and token.cancelled:
+            return True
         if not trace_id:
             return False
         try:
@@ -66,16 +74,32 @@ def ollama_request(
             started = time.time()
             # For streaming, pass None for read timeout; for non-streaming, use timeout tuple
             timeout_val = (connect_timeout, actual_read_timeout) if actual_read_timeout is not None else connect_timeout
-            resp = requests.post(url, json=payload, timeout=timeout_val)
-            latency_ms = (time.time() - started) * 1000
-            resp.raise_for_status()
-            data = resp.json()
+            with span("ollama.request", "ollama", model=payload.get("model"), attempt=attempt + 1):
+                if token is not None:
+                    with cancellation.use_token(token), cancellation.cancellable_session() as session:
+                        resp = session.post(url, json=payload, timeout=timeout_val)
+                else:
+                    resp = requests.post(url, json=payload, timeout=timeout_val)
+                latency_ms = (time.time() - started) * 1000
+                resp.raise_for_status()
+                data = resp.json()
             if is_streaming:
                 logger.info(f"ollama_request streaming completed (trace_id={tid}, latency_ms={latency_ms:.0f})")
             return {"ok": True, "data": data, "error": None, "trace_id": tid, "latency_ms": latency_ms}
         except Exception as exc:  # broad catch to prevent crash
             last_err = exc
             latency_ms = None
+            if token is not None and token.cancelled:
+                # The socket was shut down by the stop request; report it and never retry.
+                token.mark_released("ollama")
+                error_obj = {
+                    "type": "ClientCancelled",
+                    "message": "Request cancelled",
+                    "trace_id": tid,
+                    "where": url,
+                }
+                logger.info("ollama_request aborted by cancellation (trace_id=%s)", tid)
+                return {"ok": False, "data": None, "error": error_obj, "trace_id": tid, "latency_ms": None}
             logger.warning("ollama_request failed (attempt %s/%s, trace_id=%s): %s", attempt + 1, retries + 1, tid, exc)
             if attempt < retries:
                 sleep_for = backoff[attempt] if attempt < len(backoff) else backoff[-1]
@@ -138,8 +162,11 @@ def ollama_stream(
     Returns an envelope: {"ok": bool, "stream": Generator|None, "error": {...}|None, "trace_id": str}
     """
     tid = trace_id or uuid.uuid4().hex[:8]
+    token = cancellation.token_for(trace_id)
 
     def _is_cancelled() -> bool:
+        if token is not None and token.cancelled:
+            return True
         if not trace_id:
             return False
         try:
@@ -150,14 +177,17 @@ def ollama_stream(
 
     def _stream_generator() -> Generator[dict, None, None]:
         """Yield JSON objects line-by-line from the streaming response."""
+        session = cancellation.cancellable_session() if token is not None else requests
         try:
-            # Connect with timeout, but allow indefinite read time for streaming
-            resp = requests.post(
-                url,
-                json=payload,
-                stream=True,
-                timeout=(connect_timeout, None),  # Connect timeout only, no read timeout
-            )
+            # Connect with timeout, but allow indefinite read time for streaming.
+            # The token is only needed while connecting: that is when the socket is tracked.
+            with cancellation.use_token(token):
+                resp = session.post(
+                    url,
+                    json=payload,
+                    stream=True,
+                    timeout=(connect_timeout, None),  # Connect timeout only, no read timeout
+                )
             resp.raise_for_status()
             
             for line in resp.iter_lines():
@@ -165,6 +195,8 @@ def ollama_stream(
                 if _is_cancelled():
                     logger.info(f"ollama_stream cancelled (trace_id={tid})")
                     resp.close()
+                    if token is not None:
+                        token.mark_released("ollama")
                     return
                 
                 if not line:
@@ -179,12 +211,20 @@ def ollama_stream(
             
             logger.info(f"ollama_stream completed successfully (trace_id={tid})")
         
-        except requests.exceptions.Timeout as e:
-            logger.error(f"ollama_stream timeout (trace_id={tid}): {e}")
-            yield {"error": f"Request timeout: {str(e)}", "trace_id": tid}
         except Exception as e:
-            logger.error(f"ollama_stream failed (trace_id={tid}): {e}")
-            yield {"error": f"Stream error: {str(e)}", "trace_id": tid}
+            if token is not None and token.cancelled:
+                token.mark_released("ollama")
+                logger.info(f"ollama_stream aborted by cancellation (trace_id={tid})")
+                return
+            if isinstance(e, requests.exceptions.Timeout):
+                logger.error(f"ollama_stream timeout (trace_id={tid}): {e}")
+                yield {"error": f"Request timeout: {str(e)}", "trace_id": tid}
+            else:
+                logger.error(f"ollama_stream failed (trace_id={tid}): {e}")
+                yield {"error": f"Stream error: {str(e)}", "trace_id": tid}
+        finally:
+            if session is not requests:
+                session.close()
 
     last_err: Exception | None = None
     for attempt in range(retries + 1):
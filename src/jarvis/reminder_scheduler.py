@@ -0,0 +1,419 @@
+"""
+Timer-driven delivery of reminders and note due-date reminders.
+
+Upcoming reminders are kept in an in-memory min-heap keyed by due time. The heap is
+rebuilt from the DB when the server starts (and resynced periodically), and the
+write paths in `jarvis.notes` keep it current through `reminder_changed` /
+`note_changed`. A single asyncio task sleeps until the earliest entry is due, then
+fires it: a conditional UPDATE claims the row (so only one worker delivers it), a
+notification is stored and a `reminder.due` event is published.
+
+Whether a fired reminder has been shown in chat is kept in the DB (`reminders.shown_at`,
+`notes.shown_stage`), so it survives restarts and is shared between workers. Chat
+turns only read it when the running scheduler's per-user "may have unseen" flag is
+set: `_deliver` sets it, a read that comes back empty clears it, and a user not seen
+since startup gets one check. `resync()` drops the flags so reminders fired by
+other workers are picked up within the resync interval. Without a running
+scheduler (CLI, agent use) every read fires the user's due entries first and then
+queries. Superseded heap entries are dropped lazily when they reach the top.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import heapq
+import itertools
+import logging
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional, Tuple
+
+from jarvis.db import get_conn
+from jarvis.events import publish
+from jarvis.notifications.store import add_notification
+
+logger = logging.getLogger(__name__)
+
+NOTE_REMINDER_HOURS = (24, 12, 2)  # hours before expiry for note reminder stages 1, 2, 3
+MAX_SLEEP_S = 3600.0
+INBOX_LIMIT = 20  # fired reminders shown per chat turn
+
+Key = Tuple[str, int]  # ("reminder" | "note", row id)
+
+
+def _parse(value: Optional[str]) -> Optional[datetime]:
+    try:
+        dt = datetime.fromisoformat(value)  # type: ignore[arg-type]
+    except (TypeError, ValueError):
+        return None
+    return dt if dt.tzinfo else dt.replace(tzinfo=timezone.utc)
+
+
+def note_stage(expires_at: datetime, now: datetime) -> int:
+    """Reminder stage a note has reached at `now` (0 = none yet)."""
+    hours_left = (expires_at - now).total_seconds() / 3600
+    return sum(1 for hours in NOTE_REMINDER_HOURS if hours_left <= hours)
+
+
+def next_note_due(expires_at: datetime, stage: int) -> Optional[datetime]:
+    """When the note reminder after `stage` is due; None once every stage has fired."""
+    if stage >= len(NOTE_REMINDER_HOURS):
+        return None
+    return expires_at - timedelta(hours=NOTE_REMINDER_HOURS[stage])
+
+
+def _note_next(row) -> Optional[datetime]:
+    if row is None or not row["remind_enabled"]:
+        return None
+    expires = _parse(row["expires_at"])
+    return next_note_due(expires, row["remind_stage"] or 0) if expires else None
+
+
+class ReminderScheduler:
+    def __init__(self) -> None:
+        self._heap: List[Tuple[float, int, Key]] = []
+        self._live: Dict[Key, int] = {}  # key -> seq of its current heap entry
+        self._seq = itertools.count()
+        self._lock = threading.Lock()
+        self._unseen: Dict[Tuple[str, int], bool] = {}  # (kind, user_id) -> fired entries may be unshown
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._wake: Optional[asyncio.Event] = None
+
+    def __len__(self) -> int:
+        return len(self._live)
+
+    # --- heap -------------------------------------------------------------------
+
+    def schedule(self, key: Key, due: datetime) -> None:
+        with self._lock:
+            self._push(key, due)
+        self._notify()
+
+    def _push(self, key: Key, due: datetime) -> None:
+        seq = next(self._seq)
+        self._live[key] = seq
+        heapq.heappush(self._heap, (due.timestamp(), seq, key))
+
+    def cancel(self, key: Key) -> None:
+        with self._lock:
+            self._live.pop(key, None)
+
+    def _notify(self) -> None:
+        loop, wake = self._loop, self._wake
+        if loop is None or wake is None:
+            return
+        try:
+            loop.call_soon_threadsafe(wake.set)
+        except RuntimeError:
+            pass  # loop already closed
+
+    def next_due(self) -> Optional[float]:
+        with self._lock:
+            while self._heap and self._live.get(self._heap[0][2]) != self._heap[0][1]:
+                heapq.heappop(self._heap)
+            return self._heap[0][0] if self._heap else None
+
+    def pop_due(self, now: float) -> List[Key]:
+        keys = []
+        with self._lock:
+            while self._heap and self._heap[0][0] <= now:
+                _, seq, key = heapq.heappop(self._heap)
+                if self._live.get(key) == seq:
+                    del self._live[key]
+                    keys.append(key)
+        return keys
+
+    def rebuild(self) -> int:
+        """Load every pending reminder from the DB; keys already scheduled by a hook are kept."""
+        with get_conn() as conn:
+            reminders = conn.execute("SELECT id, remind_at FROM reminders WHERE reminded_at IS NULL").fetchall()
+            notes = conn.execute(
+                "SELECT id, expires_at, remind_enabled, remind_stage FROM notes "
+                "WHERE remind_enabled = 1 AND expires_at IS NOT NULL AND COALESCE(remind_stage, 0) < ?",
+                (len(NOTE_REMINDER_HOURS),),
+            ).fetchall()
+        entries = [(("reminder", r["id"]), _parse(r["remind_at"])) for r in reminders]
+        entries += [(("note", r["id"]), _note_next(r)) for r in notes]
+        with self._lock:
+            for key, due in entries:
+                if due is not None and key not in self._live:
+                    self._push(key, due)
+        self._notify()
+        return len(self)
+
+    # --- change hooks -----------------------------------------------------------
+
+    def reminder_changed(self, reminder_id: int) -> None:
+        with get_conn() as conn:
+            row = conn.execute("SELECT remind_at, reminded_at FROM reminders WHERE id = ?", (reminder_id,)).fetchone()
+        due = _parse(row["remind_at"]) if row and row["reminded_at"] is None else None
+        if due is None:
+            self.cancel(("reminder", reminder_id))
+        else:
+            self.schedule(("reminder", reminder_id), due)
+
+    def note_changed(self, note_id: int) -> None:
+        with get_conn() as conn:
+            row = conn.execute(
+                "SELECT expires_at, remind_enabled, remind_stage FROM notes WHERE id = ?", (note_id,)
+            ).fetchone()
+        due = _note_next(row)
+        if due is None:
+            self.cancel(("note", note_id))
+        else:
+            self.schedule(("note", note_id), due)
+
+    # --- firing -----------------------------------------------------------------
+
+    def fire(self, key: Key, now: Optional[datetime] = None) -> bool:
+        """Deliver one due entry; False when it was gone, not due yet or fired by another worker."""
+        now = now or datetime.now(timezone.utc)
+        kind, item_id = key
+        if kind == "reminder":
+            return self._fire_reminder(item_id, now)
+        return self._fire_note(item_id, now)
+
+    def _fire_reminder(self, reminder_id: int, now: datetime) -> bool:
+        with get_conn() as conn:
+            row = conn.execute(
+                "SELECT id, user_id, content, remind_at FROM reminders WHERE id = ? AND reminded_at IS NULL",
+                (reminder_id,),
+            ).fetchone()
+            if row is None:
+                return False
+            due = _parse(row["remind_at"])
+            if due is None:
+                return False
+            if due > now:  # moved later by another worker
+                self.schedule(("reminder", reminder_id), due)
+                return False
+            cur = conn.execute(
+                "UPDATE reminders SET reminded_at = ? WHERE id = ? AND reminded_at IS NULL",
+                (now.isoformat(), reminder_id),
+            )
+        if cur.rowcount == 0:
+            return False
+        item = {"id": row["id"], "content": row["content"], "remind_at": row["remind_at"]}
+        self._deliver(row["user_id"], "reminder", item, "Påmindelse", row["content"])
+        return True
+
+    def _fire_note(self, note_id: int, now: datetime) -> bool:
+        with get_conn() as conn:
+            row = conn.execute(
+                "SELECT id, user_id, title, content, expires_at, remind_enabled, remind_stage FROM notes WHERE id = ?",
+                (note_id,),
+            ).fetchone()
+            expires = _parse(row["expires_at"]) if row is not None and row["remind_enabled"] else None
+            if expires is None:
+                return False
+            stage = row["remind_stage"] or 0
+            new_stage = note_stage(expires, now)
+            claimed = False
+            if new_stage > stage:
+                cur = conn.execute(
+                    "UPDATE notes SET remind_stage = ?, updated_at = ? WHERE id = ? AND COALESCE(remind_stage, 0) = ?",
+                    (new_stage, now.isoformat(), note_id, stage),
+                )
+                claimed = cur.rowcount > 0
+        if not claimed:
+            self.note_changed(note_id)
+            return False
+        following = next_note_due(expires, new_stage)
+        if following is not None:
+            self.schedule(("note", note_id), following)
+        item = {
+            "id": row["id"],
+            "title": row["title"],
+            "content": row["content"],
+            "expires_at": row["expires_at"],
+            "stage": new_stage,
+        }
+        self._deliver(row["user_id"], "note", item, "Påmindelse om note", f"{row['title'] or 'Note'}: {row['content']}")
+        return True
+
+    def _deliver(self, user_id: int, kind: str, item: dict, title: str, body: str) -> None:
+        try:
+            add_notification(user_id, "info", title, body, {"kind": kind, "id": item["id"]})
+        except Exception as exc:
+            logger.warning("reminder notification failed for %s %s: %s", kind, item["id"], exc)
+        self.mark_unseen(kind, user_id)
+        publish("reminder.due", {"user_id": user_id, "kind": kind, **item})
+
+    # --- unseen flags -------------------------------------------------------------
+
+    def mark_unseen(self, kind: str, user_id: int, unseen: bool = True) -> None:
+        with self._lock:
+            self._unseen[(kind, user_id)] = unseen
+
+    def claim_unseen(self, kind: str, user_id: int) -> bool:
+        """Whether a turn must read the DB; the flag is cleared first so a delivery during the read re-sets it."""
+        with self._lock:
+            unseen = self._unseen.get((kind, user_id), True)  # unknown user (e.g. after a restart): check once
+            self._unseen[(kind, user_id)] = False
+        return unseen
+
+    def forget_unseen(self) -> None:
+        with self._lock:
+            self._unseen.clear()
+
+    def fire_due_for(self, user_id: int, now: Optional[datetime] = None) -> int:
+        """One DB pass over the user's pending entries, firing those already due."""
+        now = now or datetime.now(timezone.utc)
+        with get_conn() as conn:
+            reminders = conn.execute(
+                "SELECT id, remind_at FROM reminders WHERE user_id = ? AND reminded_at IS NULL", (user_id,)
+            ).fetchall()
+            notes = conn.execute(
+                "SELECT id, expires_at, remind_enabled, remind_stage FROM notes "
+                "WHERE user_id = ? AND remind_enabled = 1 AND expires_at IS NOT NULL AND COALESCE(remind_stage, 0) < ?",
+                (user_id, len(NOTE_REMINDER_HOURS)),
+            ).fetchall()
+        entries = [(("reminder", r["id"]), _parse(r["remind_at"])) for r in reminders]
+        entries += [(("note", r["id"]), _note_next(r)) for r in notes]
+        return sum(1 for key, due in entries if due is not None and due <= now and self.fire(key, now))
+
+    # --- loop -------------------------------------------------------------------
+
+    async def run(self) -> None:
+        """Fire entries as they come due until cancelled."""
+        self._loop = asyncio.get_running_loop()
+        self._wake = asyncio.Event()
+        await asyncio.to_thread(self.rebuild)
+        while True:
+            self._wake.clear()
+            for key in self.pop_due(time.time()):
+                try:
+                    await asyncio.to_thread(self.fire, key)
+                except Exception as exc:
+                    logger.warning("reminder %s failed to fire: %s", key, exc)
+            nxt = self.next_due()
+            timeout = MAX_SLEEP_S if nxt is None else min(MAX_SLEEP_S, max(0.0, nxt - time.time()))
+            try:
+                await asyncio.wait_for(self._wake.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+
+
+_scheduler: Optional[ReminderScheduler] = None
+_task: Optional[asyncio.Task] = None
+
+
+def start() -> asyncio.Task:
+    global _scheduler, _task
+    if _task is None or _task.done():
+        _scheduler = ReminderScheduler()
+        _task = asyncio.create_task(_scheduler.run())
+    return _task
+
+
+def stop() -> None:
+    global _scheduler, _task
+    if _task is not None:
+        _task.cancel()
+    _scheduler = None
+    _task = None
+
+
+def resync() -> dict:
+    """Pick up reminders written by other workers (maintenance job)."""
+    scheduler = _scheduler
+    if scheduler is None:
+        return {"scheduled": 0}
+    scheduler.forget_unseen()
+    return {"scheduled": scheduler.rebuild()}
+
+
+# Hooks below are no-ops while the scheduler is not running (tests, CLI).
+
+
+def reminder_changed(reminder_id: int) -> None:
+    if _scheduler is not None:
+        _scheduler.reminder_changed(reminder_id)
+
+
+def note_changed(note_id: int) -> None:
+    if _scheduler is not None:
+        _scheduler.note_changed(note_id)
+
+
+# Per-turn reads: skipped while the scheduler knows nothing unseen is pending; without a
+# running scheduler they fire due entries first.
+
+
+def _needs_read(kind: str, user_id: int) -> bool:
+    scheduler = _scheduler
+    if scheduler is not None:
+        return scheduler.claim_unseen(kind, user_id)
+    try:
+        ReminderScheduler().fire_due_for(user_id)
+    except Exception as exc:
+        logger.warning("reminder due-check failed for user %s: %s", user_id, exc)
+    return True
+
+
+def _still_unseen(kind: str, user_id: int) -> None:
+    scheduler = _scheduler
+    if scheduler is not None:
+        scheduler.mark_unseen(kind, user_id)
+
+
+def due_reminders(user_id: int) -> List[dict]:
+    """Fired reminders not yet shown to the user in chat."""
+    if not _needs_read("reminder", user_id):
+        return []
+    with get_conn() as conn:
+        rows = conn.execute(
+            "SELECT id, content, remind_at FROM reminders "
+            "WHERE user_id = ? AND reminded_at IS NOT NULL AND shown_at IS NULL ORDER BY remind_at ASC LIMIT ?",
+            (user_id, INBOX_LIMIT),
+        ).fetchall()
+    if rows:  # shown rows stay unseen until acknowledged
+        _still_unseen("reminder", user_id)
+    return [dict(r) for r in rows]
+
+
+def acknowledge(user_id: int, reminder_ids: List[int]) -> None:
+    """Mark reminders as shown in chat."""
+    if not reminder_ids:
+        return
+    now = datetime.now(timezone.utc).isoformat()
+    with get_conn() as conn:
+        conn.executemany(
+            "UPDATE reminders SET shown_at = ? WHERE user_id = ? AND id = ? AND shown_at IS NULL",
+            [(now, user_id, rid) for rid in reminder_ids],
+        )
+        conn.commit()
+
+
+def take_note_reminders(user_id: int) -> List[dict]:
+    """Fired note reminders for the user, marked shown once read."""
+    if not _needs_read("note", user_id):
+        return []
+    taken = []
+    with get_conn() as conn:
+        rows = conn.execute(
+            "SELECT id, title, content, expires_at, remind_stage, shown_stage FROM notes "
+            "WHERE user_id = ? AND remind_enabled = 1 AND remind_stage > COALESCE(shown_stage, 0) "
+            "ORDER BY expires_at ASC LIMIT ?",
+            (user_id, INBOX_LIMIT),
+        ).fetchall()
+        for row in rows:
+            cur = conn.execute(
+                "UPDATE notes SET shown_stage = ? WHERE id = ? AND COALESCE(shown_stage, 0) = ?",
+                (row["remind_stage"], row["id"], row["shown_stage"] or 0),
+            )
+            if cur.rowcount:  # another worker's turn may have taken it
+                taken.append(
+                    {
+                        "id": row["id"],
+                        "title": row["title"],
+                        "content": row["content"],
+                        "expires_at": row["expires_at"],
+                        "stage": row["remind_stage"],
+                    }
+                )
+        conn.commit()
+    if len(rows) >= INBOX_LIMIT:  # more may be waiting beyond the limit
+        _still_unseen("note", user_id)
+    return taken
@@ -21,7 +21,7 @@ from starlette.exceptions import HTTPException as StarletteHTTPException
 from pydantic import BaseModel
 from contextlib import asynccontextmanager
 from dataclasses import dataclass
-from typing import Optional, TypedDict
+from typing import Any, Optional, TypedDict
 
 import logging
 logger = logging.getLogger(__name__)
@@ -50,12 +50,16 @@ from jarvis.auth import (
     build_auth_context,
     ensure_demo_user,
     get_or_create_default_user,
+    PasswordHashBusy,
     get_user_by_token,
-    login_user,
+    hash_password_async,
+    login_user_async,
     logout_user,
-    register_user,
-    verify_user_password,
+    register_user_async,
+    shutdown_hash_pool,
+    verify_user_password_async,
 )
+from jarvis import cancellation, log_reader, maintenance, reminder_scheduler
 from jarvis.db import get_conn, log_login_session
 from jarvis.personality import SYSTEM_PROMPT
 from jarvis.prompts.system_prompts import SYSTEM_PROMPT_USER, SYSTEM_PROMPT_ADMIN
@@ -63,27 +67,35 @@ from jarvis.prompt_manager import get_prompt_manager
 from jarvis.event_store import get_event_store, wire_event_store_to_bus
 from jarvis.events import subscribe_all
 from jarvis.config import load_config
-from jarvis.memory import purge_user_memory
+from jarvis.memory import preload_store, purge_user_memory
+from jarvis.metrics import HTTP_SECONDS, STREAM_TTFT_SECONDS, render_prometheus
+from jarvis.profiler import MAX_DURATION_S as MAX_PROFILE_SECONDS, ProfilerBusy, StackSampler
+from jarvis.stream_frames import NdjsonFrames, StreamThroughput, ndjson_event
+from jarvis.startup import log_startup_report, register_startup_step, run_startup, startup_report
+from jarvis.tracing import export_chrome_trace, list_traces
+from jarvis.session_state import get_session_state_manager
 from jarvis.settings_store import get_setting as settings_get, set_setting as settings_set, list_settings as settings_list, reset_for_tests as settings_reset_for_tests
 from jarvis.files import (
     safe_path,
-    save_upload,
+    store_upload,
+    UploadTooLarge,
+    UploadWriter,
+    UPLOAD_CHUNK_SIZE,
     list_uploads,
     delete_upload,
     keep_upload,
-    list_expiring_uploads,
     purge_expired_uploads,
     get_download_token,
     finalize_download,
+    purge_expired_download_tokens,
+    purge_orphan_blobs,
     UPLOAD_DIR_NAME,
 )
 from jarvis.notes import (
-    list_expiring_notes,
     purge_expired_notes,
     add_note,
     keep_note,
     delete_note,
-    list_due_note_reminders,
 )
 from jarvis.code_rag.index import get_index_dim  # type: ignore
 from jarvis.code_rag.index import _probe_embedding_dim  # type: ignore
@@ -119,22 +131,30 @@ from jarvis.notifications.store import (
     mark_notification_read,
     get_unread_notifications_count,
     mark_all_notifications_read,
+    NOTIFICATION_EVENT_TYPES,
 )
 from jarvis.watchers.repo_watcher import start_repo_watcher_if_enabled
 from jarvis.watchers.test_watcher import run_pytest_and_notify
 from jarvis.event_store import get_event_store
-from jarvis.events import subscribe, publish, subscribe_all
+from jarvis.events import EventQueue, subscribe, publish, subscribe_all
 
 ROOT = Path(__file__).resolve().parents[2]
 UI_DIR = ROOT / "ui"
 APP_HTML = UI_DIR / "app.html"
 
-# Generate BUILD_ID for cache busting
-try:
-    import subprocess
-    BUILD_ID = subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT).decode().strip()
-except Exception:
-    BUILD_ID = str(int(time.time()))
+_build_id: str | None = None
+
+
+def get_build_id() -> str:
+    """Short git revision for cache busting; resolved on first use, not at import."""
+    global _build_id
+    if _build_id is None:
+        try:
+            import subprocess
+            _build_id = subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT).decode().strip()
+        except Exception:
+            _build_id = str(int(time.time()))
+    return _build_id
 
 
 DATA_DIR = Path(__file__).resolve().parents[2] / "data"
@@ -158,7 +178,6 @@ if not _req_logger.handlers:
     file_handler.setFormatter(logging.Formatter("%(asctime)s %(levelname)s %(message)s"))
     _req_logger.addHandler(file_handler)
 _req_logger.setLevel(logging.INFO)
-_last_log_cleanup = 0.0
 
 # Stream cancellation tracking - maps trace_id to cancellation flag
 _stream_cancellations: dict[str, bool] = {}
@@ -191,6 +210,7 @@ class StreamRegistry:
                     prev = self._by_trace[prev_trace]
                     try:
                         prev["cancel_event"].set()
+                        cancellation.cancel(prev_trace, reason="superseded")
                         prev["task"].cancel()
                         prev_task = prev["task"]
                     except Exception:
@@ -267,6 +287,8 @@ async def set_stream_cancelled(trace_id: str):
     """Mark a stream as cancelled."""
     async with _stream_cancellations_lock:
         _stream_cancellations[trace_id] = True
+    # Shuts down in-flight Ollama sockets and wakes ToolRunner waits for this trace.
+    cancellation.cancel(trace_id, reason="stream_cancelled")
     _req_logger.debug(f"Stream marked as cancelled: {trace_id}")
 
 async def is_stream_cancelled(trace_id: str) -> bool:
@@ -278,10 +300,11 @@ async def clear_stream_cancelled(trace_id: str):
     """Clear cancellation flag for a stream."""
     async with _stream_cancellations_lock:
         _stream_cancellations.pop(trace_id, None)
+    cancellation.release(trace_id)
 
 def check_stream_cancelled_sync(trace_id: str) -> bool:
     """Check if a stream has been marked as cancelled (synchronous version for threads)."""
-    return _stream_cancellations.get(trace_id, False)
+    return _stream_cancellations.get(trace_id, False) or cancellation.is_cancelled(trace_id)
 
 async def _stream_simple_response(
     request: Request,
@@ -329,11 +352,7 @@ def is_test_mode():
 # TEMP: stream_id guard to prevent stale streams (remove after debugging)
 def _ndjson_event(event_type: str, content: str | None = None, stream_id: str | None = None, **kwargs) -> str:
     """Emit one NDJSON event: single JSON object per line with stream_id guard"""
-    payload = {"type": event_type, "content": content}
-    if stream_id:
-        payload["stream_id"] = stream_id  # TEMP: For debugging stale streams
-    payload.update(kwargs)
-    return json.dumps(payload) + "\n"
+    return ndjson_event(event_type, content, stream_id=stream_id, **kwargs)
 
 def _ndjson_status(status: str, stream_id: str | None = None, **kwargs) -> str:
     """Emit status event"""
@@ -382,6 +401,7 @@ def _log_startup_paths():
 # Global watcher instance for shutdown
 _repo_watcher = None
 
+
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     # Startup logic
@@ -396,6 +416,9 @@ async def lifespan(app: FastAPI):
     import logging    
     logging.getLogger(__name__).info("Faulthandler enabled: send SIGUSR1 to dump stack traces") 
 
+    # Deferred module-level work (allowlist, log retention, build id) runs here, timed.
+    run_startup()
+
     app_state.demo_user_ensured = True
     ensure_demo_user()
     
@@ -403,6 +426,9 @@ async def lifespan(app: FastAPI):
     global _repo_watcher
     if not is_test_mode():
         _repo_watcher = start_repo_watcher_if_enabled()
+    # Housekeeping (expiry purges, sweeps, metric rollups) runs here, never on request paths.
+    maintenance_task = maintenance.start() if not is_test_mode() else None
+    reminder_task = reminder_scheduler.start() if not is_test_mode() else None
     
     # Reset event bus state between test runs to ensure subscriptions can be re-established
     try:
@@ -429,6 +455,9 @@ async def lifespan(app: FastAPI):
         app.mount("/static", StaticFiles(directory=os.path.join(UI_DIR, "static")), name="static")
     except Exception:
         pass
+
+    if not is_test_mode():
+        log_startup_report()
     
     try:
         yield
@@ -451,10 +480,21 @@ async def lifespan(app: FastAPI):
                 _repo_watcher.stop()
         except Exception:
             pass
+        if maintenance_task:
+            maintenance.stop()
+        if reminder_task:
+            reminder_scheduler.stop()
+        shutdown_hash_pool()
 
 
 app = FastAPI(lifespan=lifespan)
 
+
+@app.exception_handler(PasswordHashBusy)
+async def _password_hash_busy_handler(request: Request, exc: PasswordHashBusy):
+    # Shed login/registration load instead of queueing unbounded CPU work.
+    return JSONResponse({"detail": "Server busy, try again"}, status_code=503, headers={"Retry-After": "1"})
+
 # UI routing: Legacy index.html redirects to modern app.html for deterministic UX
 # Users should always land on /app (ui/app.html), not legacy /ui/index.html
 
@@ -480,17 +520,31 @@ async def security_headers(request, call_next):
     return response
 
 
+def _route_label(request: Request) -> str:
+    """Route template for metrics labels (keeps path params out of label cardinality)."""
+    route = request.scope.get("route")
+    path = getattr(route, "path", None)
+    return path or "unmatched"
+
+
 @app.middleware("http")
 async def request_logger(request: Request, call_next):
     start = time.time()
-    response = await call_next(request)
+    started = time.perf_counter()
+    try:
+        response = await call_next(request)
+    except Exception:
+        HTTP_SECONDS.observe(time.perf_counter() - started, method=request.method, route=_route_label(request), status="500")
+        raise
+    HTTP_SECONDS.observe(
+        time.perf_counter() - started,
+        method=request.method,
+        route=_route_label(request),
+        status=str(response.status_code),
+    )
     if not is_test_mode():
         elapsed_ms = int((time.time() - start) * 1000)
         _req_logger.info("%s %s %s %dms", request.method, request.url.path, response.status_code, elapsed_ms)
-        global _last_log_cleanup
-        if time.time() - _last_log_cleanup > 3600:
-            _enforce_log_limits()
-            _last_log_cleanup = time.time()
     return response
 
 
@@ -881,12 +935,26 @@ def _cleanup_user_assets(user: dict) -> None:
     purge_expired_uploads(uid, user["username"])
 
 
-def _expiry_warning_text(user: dict) -> str | None:
-    uid = user.get("id")
-    if not uid:
-        return None
-    notes = list_expiring_notes(uid)
-    files = list_expiring_uploads(uid)
+def _purge_expired_assets() -> dict:
+    """Maintenance job: purge expired notes and uploads for every user that has some."""
+    now = datetime.now(timezone.utc).isoformat()
+    with get_conn() as conn:
+        rows = conn.execute(
+            "SELECT id, username FROM users WHERE id IN ("
+            "SELECT user_id FROM notes WHERE expires_at IS NULL OR expires_at = '' OR expires_at <= ? "
+            "UNION SELECT user_id FROM user_files WHERE expires_at IS NULL OR expires_at = '' OR expires_at <= ?)",
+            (now, now),
+        ).fetchall()
+    for row in rows:
+        _cleanup_user_assets(dict(row))
+    return {"users": len(rows)}
+
+
+# user_id -> expiry warning text, rebuilt by the expiry_warnings maintenance job.
+_expiry_warnings: dict[int, str] = {}
+
+
+def _format_expiry_warning(notes: list[dict], files: list[dict]) -> str | None:
     if not notes and not files:
         return None
     parts = []
@@ -899,11 +967,39 @@ def _expiry_warning_text(user: dict) -> str | None:
     return "⚠ " + " ".join(parts) + " Skriv 'behold note X' eller 'behold fil X' for at forny."
 
 
+def _refresh_expiry_warnings() -> dict:
+    """Maintenance job: one pass over expiring notes/uploads for all users."""
+    global _expiry_warnings
+    now = datetime.now(timezone.utc).isoformat()
+    with get_conn() as conn:
+        notes = conn.execute(
+            "SELECT id, user_id, title FROM notes WHERE remind_at <= ? AND expires_at > ? ORDER BY id", (now, now)
+        ).fetchall()
+        files = conn.execute(
+            "SELECT id, user_id, original_name FROM user_files WHERE remind_at <= ? AND expires_at > ? ORDER BY id",
+            (now, now),
+        ).fetchall()
+    by_user: dict[int, tuple[list, list]] = {}
+    for n in notes:
+        by_user.setdefault(n["user_id"], ([], []))[0].append(dict(n))
+    for f in files:
+        by_user.setdefault(f["user_id"], ([], []))[1].append(dict(f))
+    _expiry_warnings = {uid: _format_expiry_warning(*items) for uid, items in by_user.items()}
+    return {"users": len(_expiry_warnings)}
+
+
+def _expiry_warning_text(user: dict) -> str | None:
+    uid = user.get("id")
+    if not uid:
+        return None
+    return _expiry_warnings.get(uid)
+
+
 def _note_reminder_text(user: dict) -> str | None:
     uid = user.get("id")
     if not uid:
         return None
-    due = list_due_note_reminders(uid)
+    due = reminder_scheduler.take_note_reminders(uid)
     if not due:
         return None
     parts = []
@@ -917,6 +1013,9 @@ def _note_reminder_text(user: dict) -> str | None:
 
 
 MAX_STREAM_SECONDS = int(os.getenv("JARVIS_MAX_STREAM_SECONDS", "120"))
+# Stream loop housekeeping (disconnect/inactivity/deadline checks) and registry activity cadence.
+_STREAM_HOUSEKEEPING_S = 0.25
+_STREAM_ACTIVITY_MARK_S = 1.0
 
 
 def _stream_error_event(message: str, error_type: str, trace_id: str | None = None, session_id: str | None = None):
@@ -1384,25 +1483,24 @@ def _enforce_log_limits(max_bytes: int = 1024 * 1024 * 1024, max_days: int = 30)
                 pass
     files = [p for p in LOG_DIR.iterdir() if p.is_file()]
     total = sum(p.stat().st_size for p in files)
-    if total <= max_bytes:
-        return
-    files.sort(key=lambda p: p.stat().st_mtime)
-    for p in files:
-        if total <= max_bytes:
-            break
-        try:
-            size = p.stat().st_size
-            p.unlink()
-            total -= size
-        except Exception:
-            pass
+    if total > max_bytes:
+        files.sort(key=lambda p: p.stat().st_mtime)
+        for p in files:
+            if total <= max_bytes:
+                break
+            try:
+                size = p.stat().st_size
+                p.unlink()
+                total -= size
+            except Exception:
+                pass
+    log_reader.prune_indexes(LOG_DIR)
 
 
 def _gzip_rotator(source: str, dest: str) -> None:
     with open(source, "rb") as src, gzip.open(dest + ".gz", "wb") as out:
         out.writelines(src)
     os.remove(source)
-    _enforce_log_limits()
 
 
 def _gzip_namer(name: str) -> str:
@@ -1413,7 +1511,29 @@ for handler in list(_req_logger.handlers):
     if isinstance(handler, TimedRotatingFileHandler):
         handler.rotator = _gzip_rotator
         handler.namer = _gzip_namer
-_enforce_log_limits()
+
+
+def _run_metrics_rollup() -> dict:
+    """Roll up perf/tool audit rows and prune raw data past retention."""
+    from jarvis.perf_rollups import run_maintenance
+
+    return run_maintenance()
+
+
+register_startup_step(_enforce_log_limits)
+register_startup_step(get_build_id)
+
+maintenance.register_job("expired_assets", _purge_expired_assets, 900)
+maintenance.register_job("expiry_warnings", _refresh_expiry_warnings, 60, shared=False)
+maintenance.register_job("orphan_blobs", purge_orphan_blobs, 3600)
+maintenance.register_job("download_tokens", purge_expired_download_tokens, 3600)
+maintenance.register_job("log_limits", _enforce_log_limits, 3600)
+maintenance.register_job("captcha", _clean_expired_captcha, 300, shared=False)
+maintenance.register_job("session_state", lambda: get_session_state_manager().cleanup_expired(), 300, shared=False)
+maintenance.register_job("reminders_resync", reminder_scheduler.resync, 900, shared=False)
+maintenance.register_job(
+    "metrics_rollup", _run_metrics_rollup, max(10.0, float(os.getenv("JARVIS_METRICS_ROLLUP_INTERVAL", "60")))
+)
 
 
 def _extract_system_prompt_from_file() -> str:
@@ -1547,7 +1667,7 @@ async def register(req: RegisterRequest, authorization: str | None = Header(None
     if not req.password or len(req.password) < 6:
         raise HTTPException(400, detail="Password er for kort")
     try:
-        user = register_user(
+        user = await register_user_async(
             req.username,
             req.password,
             email=req.email.strip(),
@@ -1567,7 +1687,7 @@ async def login(request: Request, req: LoginRequest, authorization: str | None =
     if not is_test_mode() and _get_setting("captcha_enabled", "1") == "1":
         if not _verify_captcha(req.captcha_token, req.captcha_answer):
             raise HTTPException(400, detail="Captcha er forkert")
-    result = login_user(req.username, req.password)
+    result = await login_user_async(req.username, req.password)
     if not result:
         raise HTTPException(401, detail="Invalid credentials")
     if result.get("disabled"):
@@ -1580,6 +1700,8 @@ async def login(request: Request, req: LoginRequest, authorization: str | None =
         ua = request.headers.get("user-agent") if request else None
         now_iso = datetime.now(timezone.utc).isoformat()
         log_login_session(user["id"], token, now_iso, expires_at, ip, ua, now_iso)
+    if user:
+        preload_store(user["username"])
     response = JSONResponse({"token": token, "expires_at": expires_at})
     if expires_at:
         secure = os.getenv("JARVIS_COOKIE_SECURE", "0") == "1"
@@ -1599,7 +1721,7 @@ async def login(request: Request, req: LoginRequest, authorization: str | None =
 
 @app.post("/auth/admin/login")
 async def admin_login(request: Request, req: LoginRequest, authorization: str | None = Header(None)):
-    result = login_user(req.username, req.password)
+    result = await login_user_async(req.username, req.password)
     if not result:
         raise HTTPException(401, detail="Invalid credentials")
     if result.get("disabled"):
@@ -1662,7 +1784,6 @@ async def get_sessions(
         raise HTTPException(403, detail="User is disabled")
     _enforce_maintenance(user)
     _enforce_maintenance(user)
-    _cleanup_user_assets(user)
     _rename_empty_sessions(user["id"])
     return {"sessions": list_sessions(user["id"])}
 
@@ -1700,7 +1821,6 @@ async def notifications(
         raise HTTPException(403, detail="User is disabled")
     _enforce_maintenance(user)
     _enforce_maintenance(user)
-    _cleanup_user_assets(user)
     warning = _expiry_warning_text(user)
     note_warning = _note_reminder_text(user)
     warnings = []
@@ -1730,9 +1850,17 @@ async def list_events_endpoint(
     # Use EventStore for EventBus events
     event_store = get_event_store()
     result = event_store.get_events_snapshot(after=after, limit=limit)
+    result["events"] = [ev for ev in result["events"] if _event_visible_to(ev, user["id"])]
     return result
 
 
+def _event_visible_to(ev: dict, user_id: int) -> bool:
+    """Events carrying a user_id (e.g. notification.*) are only shown to that user."""
+    payload = ev.get("payload")
+    owner = payload.get("user_id") if isinstance(payload, dict) else None
+    return owner is None or owner == user_id
+
+
 @app.get("/v1/events/stream")
 async def stream_events_endpoint(
     request: Request,
@@ -1770,6 +1898,8 @@ async def stream_events_endpoint(
                 continue
             if session_id and ev.get("session_id") and ev.get("session_id") != session_id:
                 continue
+            if not _event_visible_to(ev, user["id"]):
+                continue
             lines.append(f"event: {ev['type']}\n")
             lines.append(f"data: {json.dumps(ev)}\n")
             lines.append(f"id: {ev['id']}\n\n")
@@ -1785,7 +1915,8 @@ async def stream_events_endpoint(
         )
 
     async def event_generator():
-        nonlocal last_id
+        nonlocal last_id, max_events
+        wake_unsubscribers: list = []
         events_sent = 0
         deadline = None
         if max_ms is not None:
@@ -1809,6 +1940,8 @@ async def stream_events_endpoint(
                     continue
                 if session_id and ev.get("session_id") and ev.get("session_id") != session_id:
                     continue
+                if not _event_visible_to(ev, user["id"]):
+                    continue
                 filtered_snapshot.append(ev)
             last_id = seen_max_id
             # If a deadline is provided (typical in tests), stream the filtered snapshot and exit deterministically
@@ -1830,6 +1963,19 @@ async def stream_events_endpoint(
             if max_ms is not None or is_test_mode():
                 # In tests, a single snapshot delivery is enough; exit to avoid hangs
                 return
+            # Wake as soon as one of this user's notifications changes instead of polling the store;
+            # other event types are picked up on the regular sleep_interval pass.
+            wake = EventQueue(asyncio.get_running_loop())
+            stream_user_id = user["id"]
+
+            def _wake_on_notification(event_type: str, payload: Any) -> None:
+                if not isinstance(payload, dict) or payload.get("user_id") != stream_user_id:
+                    return
+                if type_prefixes and not any(event_type.startswith(prefix) for prefix in type_prefixes):
+                    return
+                wake.put_nowait(None)
+
+            wake_unsubscribers.extend(subscribe(t, _wake_on_notification) for t in NOTIFICATION_EVENT_TYPES)
             while True:
                 if await request.is_disconnected():
                     break
@@ -1851,6 +1997,8 @@ async def stream_events_endpoint(
                             continue
                     if session_id and ev.get("session_id") and ev.get("session_id") != session_id:
                         continue
+                    if not _event_visible_to(ev, user["id"]):
+                        continue
                     last_id = max(last_id, ev["id"])
                     yield f"event: {ev['type']}\ndata: {json.dumps(ev)}\nid: {ev['id']}\n\n"
                     events_sent += 1
@@ -1860,11 +2008,13 @@ async def stream_events_endpoint(
                 last_id = seen_max_id
                 if is_test_mode():
                     break
-                await asyncio.sleep(sleep_interval)
+                await wake.drain(timeout=sleep_interval)
         except asyncio.CancelledError:
             # Handle client disconnect gracefully
             pass
         finally:
+            for unsubscribe_wake in wake_unsubscribers:
+                unsubscribe_wake()
             return
 
     return StreamingResponse(
@@ -1924,7 +2074,7 @@ async def prompts_endpoint(
     _enforce_maintenance(user)
     admin_flag = is_admin_user(user)
     info = _active_prompt_info(admin_flag)
-    return {"build_id": BUILD_ID, "prompt": info, "is_admin": admin_flag}
+    return {"build_id": get_build_id(), "prompt": info, "is_admin": admin_flag}
 
 
 @app.get("/v1/prompts/admin")
@@ -1943,7 +2093,7 @@ async def prompts_admin_endpoint(
         raise HTTPException(403, detail="User is disabled")
     _enforce_maintenance(user)
     info = _active_prompt_info(True)
-    return {"prompt": info, "is_admin": True, "build_id": BUILD_ID}
+    return {"prompt": info, "is_admin": True, "build_id": get_build_id()}
 
 
 @app.get("/v1/prompt/active")
@@ -1961,7 +2111,7 @@ async def prompt_active_endpoint(
     _enforce_maintenance(user)
     admin_flag = is_admin_user(user)
     info = _active_prompt_info(admin_flag)
-    return {"prompt": info, "is_admin": admin_flag, "build_id": BUILD_ID}
+    return {"prompt": info, "is_admin": admin_flag, "build_id": get_build_id()}
 
 
 @app.post("/v1/events/{event_id}/dismiss")
@@ -2365,12 +2515,17 @@ async def upload_file(
         raise HTTPException(401, detail="Missing or invalid user token")
     if user.get("is_disabled"):
         raise HTTPException(403, detail="User is disabled")
-    data = await file.read()
-    if not is_admin_user(user):
-        max_bytes = 10 * 1024 * 1024
-        if len(data) > max_bytes:
-            raise HTTPException(413, detail="Filen er for stor. Maks 10 MB for almindelige brugere.")
-    info = save_upload(user["id"], user["username"], file.filename, file.content_type, data)
+    max_bytes = None if is_admin_user(user) else 10 * 1024 * 1024
+    writer = UploadWriter(max_bytes)
+    try:
+        while chunk := await file.read(UPLOAD_CHUNK_SIZE):
+            writer.write(chunk)
+    except UploadTooLarge:
+        raise HTTPException(413, detail="Filen er for stor. Maks 10 MB for almindelige brugere.")
+    except BaseException:
+        writer.abort()
+        raise
+    info = store_upload(user["id"], user["username"], file.filename, file.content_type, writer)
     url = f"/files/{UPLOAD_DIR_NAME}/{info['stored_name']}"
     return {"file": info, "url": url}
 
@@ -2388,7 +2543,6 @@ async def list_user_files(
     if user.get("is_disabled"):
         raise HTTPException(403, detail="User is disabled")
     _enforce_maintenance(user)
-    _cleanup_user_assets(user)
     return {"files": list_uploads(user["id"])}
 
 
@@ -2462,6 +2616,7 @@ async def admin_update_user(
     new_password = payload.get("new_password")
     monthly_limit_mb = payload.get("monthly_limit_mb")
     credits_mb = payload.get("credits_mb")
+    new_password_hash = await hash_password_async(new_password) if new_password else None
     with get_conn() as conn:
         if disabled is not None:
             conn.execute("UPDATE users SET is_disabled = ? WHERE username = ?", (1 if disabled else 0, username))
@@ -2479,11 +2634,10 @@ async def admin_update_user(
             conn.execute("UPDATE users SET phone = ? WHERE username = ?", (phone, username))
         if note is not None:
             conn.execute("UPDATE users SET note = ? WHERE username = ?", (note, username))
-        if new_password:
-            from jarvis.auth import _hash_password
+        if new_password_hash:
             conn.execute(
                 "UPDATE users SET password_hash = ? WHERE username = ?",
-                (_hash_password(new_password), username),
+                (new_password_hash, username),
             )
         conn.commit()
     if monthly_limit_mb is not None or credits_mb is not None:
@@ -2609,7 +2763,7 @@ async def admin_create_user(
 ):
     _check_admin_auth(request, authorization, token)
     try:
-        created = register_user(
+        created = await register_user_async(
             payload.username,
             payload.password,
             1 if payload.is_admin else 0,
@@ -2880,7 +3034,6 @@ async def chat(
     expiry_warning = None
     note_reminder = None
     if user:
-        _cleanup_user_assets(user)
         expiry_warning = _expiry_warning_text(user)
         note_reminder = _note_reminder_text(user)
     if user and not is_admin_user(user):
@@ -2987,6 +3140,7 @@ async def chat(
             _req_logger.info(f"stream_start trace={trace_id} stream_id={stream_id} session={session_id} user={user['username']}")
             emit_chat_start(session_id, stream_id, model, trace_id=trace_id)
             cancel_event = asyncio.Event()
+            throughput = StreamThroughput()
             
             # Subscribe to agent.stream events for this trace_id
             event_queue = await subscribe_async(
@@ -3132,16 +3286,106 @@ async def chat(
                 
                 agent_task = asyncio.create_task(run_agent_task())
                 
-                # Process streaming events
+                # Process streaming events.
+                # Event-driven: the loop sleeps until the queue has events and drains them in
+                # batches, writing one pre-encoded chunk per batch. Disconnect, inactivity and
+                # deadline checks run on a housekeeping tick, not per event.
                 tokens_emitted = False
+                ttft_recorded = False
                 chunks_sent = 0
                 first_chunk_sent = False
-                bytes_sent = 0
+                frames = NdjsonFrames(stream_id, trace_id=trace_id, session_id=session_id)
+                inactivity_s = int(os.getenv("JARVIS_STREAM_INACTIVITY_SECONDS", "120"))
+                next_housekeeping = time.monotonic() + _STREAM_HOUSEKEEPING_S
+                activity_marked_at = 0.0
+                agent_idle_since: float | None = None
                 while True:
-                    # Check for disconnect/cancel before processing events
                     if cancel_event.is_set():
                         _req_logger.info(f"stream_cancelled trace={trace_id} session={session_id} reason=external_cancel")
                         raise asyncio.CancelledError()
+
+                    batch = await event_queue.drain(timeout=max(0.0, next_housekeeping - time.monotonic()))
+                    now = time.monotonic()
+                    if batch:
+                        inactivity_deadline = now + inactivity_s
+                        agent_idle_since = None
+                        if now - activity_marked_at >= _STREAM_ACTIVITY_MARK_S:
+                            activity_marked_at = now
+                            try:
+                                await _stream_registry.mark_activity(trace_id)
+                            except Exception:
+                                pass
+                        out: list[str] = []
+                        batch_tokens = 0
+                        finished = False
+                        failed_payload = None
+                        for event_type, payload in batch:
+                            if event_type == "agent.stream.start":
+                                # Emit NDJSON: one JSON per line, no SSE prefix
+                                if not first_chunk_sent:
+                                    out.append(frames.status("thinking"))
+                                    _req_logger.info(f"first_chunk trace={trace_id} session={session_id}")
+                                    first_chunk_sent = True
+                                chunks_sent += 1
+
+                            elif event_type == "agent.stream.delta":
+                                out.append(frames.token(payload.get("token", "")))
+                                batch_tokens += 1
+                                chunks_sent += 1
+
+                            elif event_type == "agent.stream.status":
+                                status = payload.get("status")
+                                out.append(frames.status(status))
+                                if not first_chunk_sent:
+                                    _req_logger.info(f"first_event (status) trace={trace_id} session={session_id} status={status}")
+                                    first_chunk_sent = True
+                                chunks_sent += 1
+                                _req_logger.debug(f"stream_status trace={trace_id} status={status}")
+
+                            elif event_type == "agent.stream.final":
+                                if not tokens_emitted:
+                                    # Ensure at least one token for streaming
+                                    emit_chat_token(session_id, stream_id, payload.get("text") or "", sequence=payload.get("parts"), trace_id=trace_id)
+                                out.append(frames.done(reason="success"))
+                                chunks_sent += 1
+                                finished = True
+                                break
+
+                            elif event_type == "agent.stream.error":
+                                error_msg = payload.get("error_message", "Stream error")
+                                out.append(frames.error(error_msg, error_type=payload.get("error_type", "Error")))
+                                out.append(frames.done(reason="error"))
+                                chunks_sent += 1
+                                failed_payload = payload
+                                break
+
+                        if out:
+                            chunk = "".join(out)
+                            throughput.record(batch_tokens, len(chunk), now)
+                            yield chunk
+                            if batch_tokens and not ttft_recorded:
+                                STREAM_TTFT_SECONDS.observe(time.time() - chat_start_time)
+                                ttft_recorded = True
+                        if finished:
+                            done_sent = True
+                            _req_logger.info(f"stream_done trace={trace_id} chunks_sent={chunks_sent}")
+                            emit_chat_end(session_id, stream_id, ok=True, trace_id=trace_id)
+                            break
+                        if failed_payload is not None:
+                            done_sent = True
+                            _req_logger.info(f"stream_error trace={trace_id} stream_id={stream_id} error_type={failed_payload.get('error_type')}")
+                            emit_chat_end(
+                                session_id,
+                                stream_id,
+                                ok=False,
+                                trace_id=trace_id,
+                                error=failed_payload,
+                            )
+                            return
+                    if now < next_housekeeping:
+                        continue
+                    next_housekeeping = now + _STREAM_HOUSEKEEPING_S
+
                     if await req.is_disconnected():
                         _req_logger.info(f"stream_disconnected trace={trace_id} session={session_id}")
                         await set_stream_cancelled(trace_id)
@@ -3152,7 +3396,16 @@ async def chat(
                                 await asyncio.wait_for(agent_task, timeout=0.5)
                             except (asyncio.TimeoutError, asyncio.CancelledError):
                                 _req_logger.info(f"agent_task cancelled/timed_out (trace={trace_id})")
-                                pass
+                        try:
+                            publish("agent.stream.error", {
+                                "message_id": stream_id,
+                                "session_id": session_id,
+                                "trace_id": trace_id,
+                                "error_type": "ClientDisconnected",
+                                "error_message": "Client disconnected during streaming",
+                            })
+                        except Exception:
+                            pass
                         try:
                             # Ensure stream terminated cleanly with [DONE]
                             if not done_sent:
@@ -3162,198 +3415,42 @@ async def chat(
                             pass
                         _req_logger.info(f"stream_cleanup (disconnect) trace={trace_id} session={session_id}")
                         return
-                    
-                    try:
-                        event_type, payload = await asyncio.wait_for(event_queue.get(), timeout=0.1)
-                        inactivity_deadline = time.monotonic() + int(os.getenv("JARVIS_STREAM_INACTIVITY_SECONDS", "120"))
+                    # inactivity watchdog
+                    if now > inactivity_deadline:
+                        _req_logger.info(f"stream_cancelled trace={trace_id} session={session_id} reason=inactivity")
+                        if agent_task and not agent_task.done():
+                            agent_task.cancel()
+                        cancel_event.set()
+                        break
+                    # Agent finished without a final/error event: give stragglers a short grace period
+                    if agent_task and agent_task.done() and event_queue.empty():
+                        if agent_idle_since is None:
+                            agent_idle_since = now
+                        elif now - agent_idle_since >= 0.5:
+                            break
+                    if now > deadline:
+                        _req_logger.info(f"Stream timeout: trace={trace_id}")
+                        await set_stream_cancelled(trace_id)
+                        if agent_task and not agent_task.done():
+                            agent_task.cancel()
                         try:
-                            await _stream_registry.mark_activity(trace_id)
+                            publish("agent.stream.error", {
+                                "message_id": stream_id,
+                                "session_id": session_id,
+                                "trace_id": trace_id,
+                                "error_type": "Timeout",
+                                "error_message": "Streaming timeout",
+                            })
                         except Exception:
                             pass
-                        
-                        if event_type == "agent.stream.start":
-                            # Emit NDJSON: one JSON per line, no SSE prefix
-                            if not first_chunk_sent:
-                                chunk = _ndjson_status("thinking", stream_id=stream_id, trace_id=trace_id, session_id=session_id)
-                                yield chunk
-                                _req_logger.info(f"first_chunk trace={trace_id} session={session_id}")
-                                first_chunk_sent = True
-                            chunks_sent += 1
-                        
-                        elif event_type == "agent.stream.delta":
-                            # Emit NDJSON token event
-                            token = payload.get("token", "")
-                            chunk = _ndjson_token(token, stream_id=stream_id, trace_id=trace_id, session_id=session_id)
-                            yield chunk
-                            chunks_sent += 1
-                        
-                        elif event_type == "agent.stream.status":
-                            # Emit NDJSON status event
-                            status = payload.get("status")
-                            chunk = _ndjson_status(status, stream_id=stream_id, trace_id=trace_id, session_id=session_id)
-                            yield chunk
-                            if not first_chunk_sent:
-                                _req_logger.info(f"first_event (status) trace={trace_id} session={session_id} status={status}")
-                                first_chunk_sent = True
-                            chunks_sent += 1
-                            _req_logger.debug(f"stream_status trace={trace_id} status={status}")
-                            continue
-                        
-                        elif event_type == "agent.stream.final":
-                            if not tokens_emitted:
-                                # Ensure at least one token for streaming
-                                emit_chat_token(session_id, stream_id, payload.get("text") or "", sequence=payload.get("parts"), trace_id=trace_id)
-                            # Emit NDJSON done event
-                            chunk = _ndjson_done(reason="success", stream_id=stream_id, trace_id=trace_id, session_id=session_id)
-                            yield chunk
-                            chunks_sent += 1
-                            done_sent = True
-                            _req_logger.info(f"stream_done trace={trace_id} chunks_sent={chunks_sent}")
-                            emit_chat_end(session_id, stream_id, ok=True, trace_id=trace_id)
-                            break
-                        
-                        elif event_type == "agent.stream.error":
-                            error_msg = payload.get("error_message", "Stream error")
-                            chunk = _ndjson_error(error_msg, stream_id=stream_id, error_type=payload.get("error_type", "Error"), trace_id=trace_id, session_id=session_id)
-                            yield chunk
-                            chunks_sent += 1
-                            yield _ndjson_done(reason="error", stream_id=stream_id, trace_id=trace_id, session_id=session_id)
-                            done_sent = True
-                            _req_logger.info(f"stream_error trace={trace_id} stream_id={stream_id} error_type={payload.get('error_type')}")
-                            emit_chat_end(
-                                session_id,
-                                stream_id,
-                                ok=False,
-                                trace_id=trace_id,
-                                error=payload,
-                            )
-                            return
-                            
-                    except asyncio.TimeoutError:
-                        # inactivity watchdog
-                        if time.monotonic() > inactivity_deadline:
-                            _req_logger.info(f"stream_cancelled trace={trace_id} session={session_id} reason=inactivity")
-                            if agent_task and not agent_task.done():
-                                agent_task.cancel()
-                            cancel_event.set()
-                            break
-                        # Check if agent task is done - if so, wait a bit more for any remaining events
-                        if agent_task and agent_task.done():
-                            # Wait a short time for any remaining events
-                            try:
-                                event_type, payload = await asyncio.wait_for(event_queue.get(), timeout=0.5)
-                                # Process the event (same logic as above)
-                                if event_type == "agent.stream.start":
-                                    created = int(time.time())
-                                    head = {
-                                        "id": stream_id,
-                                        "object": "chat.completion.chunk",
-                                        "created": created,
-                                        "model": model,
-                                        "trace_id": trace_id,
-                                        "session_id": session_id,
-                                        "choices": [{"index": 0, "delta": {"role": "assistant"}, "finish_reason": None}],
-                                    }
-                                    yield f"data: {json.dumps(head)}\n\n"
-                                
-                                elif event_type == "agent.stream.delta":
-                                    created = int(time.time())
-                                    data = {
-                                        "id": stream_id,
-                                        "object": "chat.completion.chunk",
-                                        "created": created,
-                                        "model": model,
-                                        "trace_id": trace_id,
-                                        "session_id": session_id,
-                                        "choices": [{"index": 0, "delta": {"content": payload["token"]}, "finish_reason": None}],
-                                    }
-                                    yield f"data: {json.dumps(data)}\n\n"
-                                
-                                elif event_type == "agent.stream.final":
-                                    created = int(time.time())
-                                    tail = {
-                                        "id": stream_id,
-                                        "object": "chat.completion.chunk",
-                                        "created": created,
-                                        "model": model,
-                                        "trace_id": trace_id,
-                                        "session_id": session_id,
-                                        "choices": [{"index": 0, "delta": {}, "finish_reason": "stop"}],
-                                    }
-                                    yield f"data: {json.dumps(tail)}\n\n"
-                                    yield "data: [DONE]\n\n"
-                                    done_sent = True
-                                    break
-                                
-                                elif event_type == "agent.stream.status":
-                                    yield _status_event(
-                                        payload["status"],
-                                        payload.get("tool"),
-                                        trace_id=trace_id,
-                                        session_id=session_id,
-                                    )
-                                
-                                elif event_type == "agent.stream.error":
-                                    yield _stream_error_event(
-                                        payload.get("error_message", "Stream error"),
-                                        payload.get("error_type", "Error"),
-                                        trace_id,
-                                        session_id,
-                                    )
-                                    yield "data: [DONE]\n\n"
-                                    return
-                            except asyncio.TimeoutError:
-                                # No more events, break
-                                break
-                        
-                        # Check for disconnect/timeout
-                        if cancel_event.is_set():
-                            _req_logger.info(f"stream_cancelled trace={trace_id} session={session_id} reason=external_cancel_timeout_loop")
-                            break
-                        if await req.is_disconnected():
-                            _req_logger.info(f"Client disconnected: trace={trace_id}")
-                            await set_stream_cancelled(trace_id)
-                            if agent_task and not agent_task.done():
-                                agent_task.cancel()
-                            try:
-                                publish("agent.stream.error", {
-                                    "message_id": stream_id,
-                                    "session_id": session_id,
-                                    "trace_id": trace_id,
-                                    "error_type": "ClientDisconnected",
-                                    "error_message": "Client disconnected during streaming",
-                                })
-                            except Exception:
-                                pass
-                            try:
-                                yield "data: [DONE]\n\n"
-                            except Exception:
-                                pass
-                            _req_logger.info(f"stream_cleanup trace={trace_id} session={session_id}")
-                            return
-                        if time.monotonic() > deadline:
-                            _req_logger.info(f"Stream timeout: trace={trace_id}")
-                            await set_stream_cancelled(trace_id)
-                            if agent_task and not agent_task.done():
-                                agent_task.cancel()
-                            try:
-                                publish("agent.stream.error", {
-                                    "message_id": stream_id,
-                                    "session_id": session_id,
-                                    "trace_id": trace_id,
-                                    "error_type": "Timeout",
-                                    "error_message": "Streaming timeout",
-                                })
-                            except Exception:
-                                pass
-                            yield _stream_error_event(
-                                "Streaming timeout. Please retry.",
-                                "Timeout",
-                                trace_id,
-                                session_id,
-                            )
-                            yield "data: [DONE]\n\n"
-                            return
+                        yield _stream_error_event(
+                            "Streaming timeout. Please retry.",
+                            "Timeout",
+                            trace_id,
+                            session_id,
+                        )
+                        yield "data: [DONE]\n\n"
+                        return
                 
                 # Wait for agent task to complete
                 if agent_task:
@@ -3485,7 +3582,11 @@ async def chat(
                     await _stream_registry.pop(trace_id)
                 except Exception:
                     pass
-                _req_logger.info(f"stream_end trace={trace_id} stream_id={stream_id} session={session_id} duration_ms={int((time.time()-chat_start_time)*1000)} cleanup_done=True")
+                try:
+                    stream_stats = throughput.finish()
+                except Exception:
+                    stream_stats = {}
+                _req_logger.info(f"stream_end trace={trace_id} stream_id={stream_id} session={session_id} duration_ms={int((time.time()-chat_start_time)*1000)} tokens={stream_stats.get('tokens')} tok_s={stream_stats.get('tok_s')} cleanup_done=True")
 
         return StreamingResponse(
             generator(),
@@ -3698,7 +3799,7 @@ async def footer_settings():
         ]
     )
     return {
-        "text": settings.get("footer_text", f"Jarvis v.1.0.0 (build {BUILD_ID})"),
+        "text": settings.get("footer_text", f"Jarvis v.1.0.0 (build {get_build_id()})"),
         "support_url": settings.get("footer_support_url", "#"),
         "contact_url": settings.get("footer_contact_url", "#"),
         "license_text": settings.get("footer_license_text", "Open‑source licens"),
@@ -3720,7 +3821,7 @@ async def brand_settings():
 @app.get("/v1/build")
 async def build_info():
     """Return build information for cache busting"""
-    return {"build_id": BUILD_ID}
+    return {"build_id": get_build_id()}
 
 
 @app.get("/account/profile")
@@ -3736,6 +3837,8 @@ async def account_profile(
     if user.get("is_disabled"):
         raise HTTPException(403, detail="User is disabled")
     _enforce_maintenance(user)
+    # The UI fetches the profile on page load; warm the memory store for sessions that outlived a restart.
+    preload_store(user["username"])
     with get_conn() as conn:
         row = conn.execute(
             "SELECT id, username, email, full_name, last_name, city, phone, note, created_at, last_seen, is_admin FROM users WHERE id = ?",
@@ -3788,6 +3891,11 @@ async def update_account_profile(
         raise HTTPException(401, detail="Missing or invalid user token")
     if user.get("is_disabled"):
         raise HTTPException(403, detail="User is disabled")
+    new_password_hash = None
+    if payload.new_password:
+        if not payload.current_password or not await verify_user_password_async(user["id"], payload.current_password):
+            raise HTTPException(400, detail="Nuværende password er forkert")
+        new_password_hash = await hash_password_async(payload.new_password)
     with get_conn() as conn:
         if payload.email is not None:
             conn.execute("UPDATE users SET email = ? WHERE id = ?", (payload.email, user["id"]))
@@ -3801,13 +3909,10 @@ async def update_account_profile(
             conn.execute("UPDATE users SET phone = ? WHERE id = ?", (payload.phone, user["id"]))
         if payload.note is not None:
             conn.execute("UPDATE users SET note = ? WHERE id = ?", (payload.note, user["id"]))
-        if payload.new_password:
-            if not payload.current_password or not verify_user_password(user["id"], payload.current_password):
-                raise HTTPException(400, detail="Nuværende password er forkert")
-            from jarvis.auth import _hash_password
+        if new_password_hash:
             conn.execute(
                 "UPDATE users SET password_hash = ? WHERE id = ?",
-                (_hash_password(payload.new_password), user["id"]),
+                (new_password_hash, user["id"]),
             )
         conn.commit()
     return {"ok": True}
@@ -3887,6 +3992,206 @@ async def status():
     }
 
 
+@app.get("/metrics")
+async def metrics_endpoint(
+    request: Request,
+    authorization: str | None = Header(None),
+    token: str | None = Depends(_resolve_token),
+):
+    """Prometheus text-format metrics. Admin-only unless JARVIS_METRICS_PUBLIC=1."""
+    if os.getenv("JARVIS_METRICS_PUBLIC", "0") != "1":
+        _check_admin_auth(request, authorization, token)
+    return Response(content=render_prometheus(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
+
+@app.post("/admin/profile")
+async def admin_profile(
+    request: Request,
+    seconds: float = Query(5.0, gt=0, le=MAX_PROFILE_SECONDS),
+    interval_ms: float = Query(10.0, ge=1, le=1000),
+    format: str = "collapsed",
+    include_idle: bool = False,
+    authorization: str | None = Header(None),
+    token: str | None = Depends(_resolve_token),
+):
+    """Sample all thread stacks for `seconds`; returns collapsed stacks for flame graphs.
+
+    Samples from threads inside a tracing span carry a `trace:<id>` frame.
+    """
+    _check_admin_auth(request, authorization, token)
+    if format not in ("collapsed", "json"):
+        raise HTTPException(status_code=400, detail="format must be 'collapsed' or 'json'")
+    sampler = StackSampler(seconds, interval=interval_ms / 1000.0, include_idle=include_idle)
+    try:
+        # Sample from a worker thread so the event loop keeps serving (and gets sampled).
+        await asyncio.to_thread(sampler.run)
+    except ProfilerBusy:
+        raise HTTPException(status_code=409, detail="A profile is already running")
+    if format == "json":
+        return {**sampler.summary(), "collapsed": sampler.collapsed()}
+    return Response(content=sampler.collapsed(), media_type="text/plain; charset=utf-8")
+
+
+@app.get("/admin/perf/summary")
+async def admin_perf_summary(
+    request: Request,
+    source: str = "perf",
+    since_hours: float = 24,
+    series: str | None = None,
+    resolution: str | None = None,
+    authorization: str | None = Header(None),
+    token: str | None = Depends(_resolve_token),
+):
+    """Count/avg/p50/p95/p99 per series (perf timings or tool names), served from rollups."""
+    _check_admin_auth(request, authorization, token)
+    from jarvis.perf_rollups import summary
+
+    try:
+        return await asyncio.to_thread(summary, source, since_hours, series, resolution)
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+
+
+@app.get("/admin/perf/timeseries")
+async def admin_perf_timeseries(
+    request: Request,
+    series: str,
+    source: str = "perf",
+    since_hours: float = 24,
+    resolution: str | None = None,
+    authorization: str | None = Header(None),
+    token: str | None = Depends(_resolve_token),
+):
+    """Per-bucket latency points for one series, served from rollups."""
+    _check_admin_auth(request, authorization, token)
+    from jarvis.perf_rollups import timeseries
+
+    try:
+        return await asyncio.to_thread(timeseries, source, series, since_hours, resolution)
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+
+
+@app.get("/admin/startup")
+async def admin_startup_report(
+    request: Request,
+    authorization: str | None = Header(None),
+    token: str | None = Depends(_resolve_token),
+):
+    """Startup phases, slowest module imports (time + RSS delta) and heavy modules loaded so far."""
+    _check_admin_auth(request, authorization, token)
+    return startup_report()
+
+
+@app.get("/admin/traces")
+async def admin_traces(
+    request: Request,
+    limit: int = 50,
+    authorization: str | None = Header(None),
+    token: str | None = Depends(_resolve_token),
+):
+    """Recent traces kept in the in-memory span buffer (newest first)."""
+    _check_admin_auth(request, authorization, token)
+    return {"traces": list_traces(limit=max(1, min(limit, 500)))}
+
+
+@app.get("/admin/cancellations")
+async def admin_cancellations(
+    request: Request,
+    authorization: str | None = Header(None),
+    token: str | None = Depends(_resolve_token),
+):
+    """Live cancellation tokens and stop -> released latency per resource for recent stops."""
+    _check_admin_auth(request, authorization, token)
+    return cancellation.stats()
+
+
+@app.get("/admin/traces/{trace_id}")
+async def admin_trace_export(
+    trace_id: str,
+    request: Request,
+    authorization: str | None = Header(None),
+    token: str | None = Depends(_resolve_token),
+):
+    """One trace as Chrome Trace Event JSON (open in chrome://tracing or Perfetto)."""
+    _check_admin_auth(request, authorization, token)
+    trace = export_chrome_trace(trace_id)
+    if trace is None:
+        raise HTTPException(status_code=404, detail="Trace not found")
+    return JSONResponse(
+        trace,
+        headers={"Content-Disposition": f'attachment; filename="trace-{trace_id}.json"'},
+    )
+
+
+@app.get("/admin/memory/index")
+async def admin_memory_index(
+    request: Request,
+    user_id: str = "default",
+    authorization: str | None = Header(None),
+    token: str | None = Depends(_resolve_token),
+):
+    """Active memory index kind, size, build params and last background build for a user."""
+    _check_admin_auth(request, authorization, token)
+    from jarvis import memory, memory_index
+
+    return await asyncio.to_thread(memory.with_store, user_id, memory_index.status)
+
+
+@app.get("/admin/memory/stores")
+async def admin_memory_stores(
+    request: Request,
+    authorization: str | None = Header(None),
+    token: str | None = Depends(_resolve_token),
+):
+    """Loaded per-user memory stores (LRU order, estimated bytes), budget, hits/misses and evictions."""
+    _check_admin_auth(request, authorization, token)
+    from jarvis.memory import store_registry_stats
+
+    return store_registry_stats()
+
+
+@app.post("/admin/memory/index/rebuild")
+async def admin_memory_index_rebuild(
+    request: Request,
+    user_id: str = "default",
+    kind: str | None = None,
+    authorization: str | None = Header(None),
+    token: str | None = Depends(_resolve_token),
+):
+    """Start a background rebuild of a user's memory index (kind: flat, hnsw or ivf)."""
+    _check_admin_auth(request, authorization, token)
+    from jarvis import memory, memory_index
+
+    kind = kind or memory_index.configured_kind()
+    if kind not in memory_index.KINDS:
+        raise HTTPException(status_code=400, detail=f"kind must be one of {', '.join(memory_index.KINDS)}")
+
+    def _rebuild(store):
+        memory_index.maybe_promote(store, force=kind)
+        return memory_index.status(store)
+
+    return await asyncio.to_thread(memory.with_store, user_id, _rebuild)
+
+
+@app.get("/admin/memory/index/report")
+async def admin_memory_index_report(
+    request: Request,
+    user_id: str = "default",
+    k: int = 10,
+    queries: int = 100,
+    authorization: str | None = Header(None),
+    token: str | None = Depends(_resolve_token),
+):
+    """recall@k vs latency of a user's memory index, using exact flat search as ground truth."""
+    _check_admin_auth(request, authorization, token)
+    from jarvis import memory, memory_index
+
+    k = max(1, min(k, 100))
+    queries = max(1, min(queries, 1000))
+    return await asyncio.to_thread(memory.with_store, user_id, memory_index.recall_report, k, queries)
+
+
 @app.get("/health/embeddings")
 async def health_embeddings():
     """Lightweight embedding/FAISS status probe.
@@ -3926,13 +4231,13 @@ async def v1_info():
     """
     try:
         return {
-            "build_id": BUILD_ID,
+            "build_id": get_build_id(),
             "server_file": __file__,
             "project_root": str(ROOT),
             "app_html_exists": APP_HTML.exists(),
         }
     except Exception:
-        return {"build_id": BUILD_ID, "server_file": str(__file__), "project_root": str(ROOT), "app_html_exists": False}
+        return {"build_id": get_build_id(), "server_file": str(__file__), "project_root": str(ROOT), "app_html_exists": False}
 
 
 @app.post("/api/tickets")
@@ -4061,7 +4366,6 @@ async def admin_reply_ticket(
 
 @app.get("/auth/captcha")
 async def captcha():
-    _clean_expired_captcha()
     a = int(time.time()) % 9 + 1
     b = int(time.time() * 3) % 9 + 1
     token = uuid.uuid4().hex
@@ -4132,7 +4436,6 @@ async def list_notes_endpoint(
         raise HTTPException(401, detail="Missing or invalid user token")
     if user.get("is_disabled"):
         raise HTTPException(403, detail="User is disabled")
-    _cleanup_user_assets(user)
     with get_conn() as conn:
         rows = conn.execute(
             "SELECT id, title, content, created_at, expires_at FROM notes WHERE user_id = ? ORDER BY id DESC LIMIT 20",
@@ -4391,6 +4694,30 @@ def _safe_log_path(name: str) -> Path:
     return path
 
 
+@app.get("/admin/maintenance")
+async def admin_maintenance(
+    request: Request,
+    job: Optional[str] = Query(None, description="Only runs of this job"),
+    limit: int = Query(50, ge=1, le=500),
+    authorization: str | None = Header(None),
+    token: str | None = Depends(_resolve_token),
+):
+    _check_admin_auth(request, authorization, token)
+    now = time.monotonic()
+    jobs = [
+        {
+            "name": j.name,
+            "interval_s": j.interval_s,
+            "shared": j.shared,
+            "next_run_in_s": round(max(0.0, j.next_due - now), 1) if j.next_due else None,
+            "last": j.last or None,
+        }
+        for j in maintenance.jobs()
+    ]
+    runs = await asyncio.to_thread(maintenance.history, job, limit)
+    return {"jobs": jobs, "runs": runs}
+
+
 @app.get("/admin/logs")
 async def admin_logs(
     request: Request,
@@ -4398,7 +4725,6 @@ async def admin_logs(
     token: str | None = Depends(_resolve_token),
 ):
     _check_admin_auth(request, authorization, token)
-    _enforce_log_limits()
     return {"files": _list_log_files()}
 
 
@@ -4406,21 +4732,32 @@ async def admin_logs(
 async def admin_log_read(
     name: str,
     request: Request,
+    lines: int = Query(500, ge=1, le=5000, description="Number of lines to return"),
+    before: Optional[int] = Query(None, ge=0, description="Cursor from a previous page; returns the lines before it"),
+    level: Optional[str] = Query(None, description="Only lines with this level (INFO, WARNING, ...)"),
+    trace_id: Optional[str] = Query(None, description="Only lines for this trace id"),
+    q: Optional[str] = Query(None, description="Only lines containing this text"),
     authorization: str | None = Header(None),
     token: str | None = Depends(_resolve_token),
 ):
     _check_admin_auth(request, authorization, token)
     path = _safe_log_path(name)
     try:
-        with open(path, "rb") as f:
-            data = f.read()
-        if path.suffix == ".gz":
-            data = gzip.decompress(data)
-        text = data.decode("utf-8", errors="ignore")
-    except Exception:
-        text = ""
-    lines = text.splitlines()[-500:]
-    return {"name": path.name, "content": "\n".join(lines)}
+        if level or trace_id or q:
+            page = await asyncio.to_thread(log_reader.search, path, level, trace_id, q, lines, before)
+        else:
+            page = await asyncio.to_thread(log_reader.tail, path, lines, before)
+    except ValueError as exc:
+        raise HTTPException(400, detail=str(exc))
+    except OSError:
+        page = log_reader.Page([], None)
+    return {
+        "name": path.name,
+        "content": "\n".join(page.lines),
+        "lines": len(page.lines),
+        "cursor": page.cursor,
+        "has_more": page.cursor is not None,
+    }
 
 
 @app.delete("/admin/logs/{name}")
@@ -4433,6 +4770,7 @@ async def admin_log_delete(
     _check_admin_auth(request, authorization, token)
     path = _safe_log_path(name)
     path.unlink(missing_ok=True)
+    log_reader.index_path(path).unlink(missing_ok=True)
     return {"ok": True}
 
 
@@ -4472,7 +4810,7 @@ async def app_page(request: Request):
     if not token or not get_user_by_token(token):
         return RedirectResponse(url="/login")
     try:
-        html_content = APP_HTML.read_text(encoding="utf-8").replace("{{BUILD_ID}}", BUILD_ID)
+        html_content = APP_HTML.read_text(encoding="utf-8").replace("{{BUILD_ID}}", get_build_id())
         return HTMLResponse(content=html_content)
     except FileNotFoundError:
         _req_logger.error(f"App HTML file not found: {APP_HTML}")
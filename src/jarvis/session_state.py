@@ -112,9 +112,6 @@ class SessionStateManager:
             return SessionState()
 
         with self._lock:
-            # Clean up expired states periodically
-            self._cleanup_expired()
-
             if session_id not in self._states:
                 state = SessionState()
                 state._session_id = session_id  # Store session_id for events
@@ -177,11 +174,13 @@ class SessionStateManager:
         self._last_session_id = to_session
         return self.get_or_create(to_session)
 
-    def _cleanup_expired(self) -> None:
-        """Clean up expired session states."""
-        expired = [sid for sid, state in self._states.items() if state.is_expired(self._max_age_seconds)]
+    def cleanup_expired(self) -> int:
+        """Drop session states idle for longer than the max age (run by the maintenance scheduler)."""
+        with self._lock:
+            expired = [sid for sid, state in self._states.items() if state.is_expired(self._max_age_seconds)]
         for sid in expired:
             self.delete(sid)
+        return len(expired)
 
     def _reset_for_tests(self) -> None:
         """Testing helper to clear all session state."""
@@ -0,0 +1,135 @@
+"""
+Explicit startup phase and startup-time budget report.
+
+Work that used to run as an import side effect (allowlist load, log retention,
+data directories) is done once here from the server lifespan, so importing a module
+stays cheap and side-effect free. Each step is timed; `startup_report()` combines
+these phases with per-module import timings from `jarvis.lazy`.
+"""
+
+from __future__ import annotations
+
+import logging
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List
+
+from jarvis.lazy import import_stats, is_installed, rss_bytes
+
+logger = logging.getLogger(__name__)
+
+# Heavy third-party packages worth reporting as loaded / not yet loaded.
+HEAVY_MODULES = (
+    "numpy",
+    "faiss",
+    "sentence_transformers",
+    "feedparser",
+    "ddgs",
+    "bs4",
+    "readability",
+    "gtts",
+    "reportlab",
+    "docx",
+    "PIL",
+    "whisper",
+)
+
+_phases: List[Dict[str, Any]] = []
+_steps: List[Callable[[], None]] = []
+_lock = threading.Lock()
+_started = False
+_process_started = time.time()
+
+
+@contextmanager
+def phase(name: str) -> Iterator[None]:
+    """Time one startup step (wall clock and RSS delta); failures are logged, not raised."""
+    started, rss_before = time.perf_counter(), rss_bytes()
+    ok = True
+    try:
+        yield
+    except Exception as exc:
+        ok = False
+        logger.warning("startup phase %s failed: %s", name, exc)
+    finally:
+        _phases.append({
+            "phase": name,
+            "seconds": round(time.perf_counter() - started, 6),
+            "rss_delta_bytes": rss_bytes() - rss_before,
+            "ok": ok,
+        })
+
+
+def register_startup_step(fn: Callable[[], None]) -> Callable[[], None]:
+    """Register a function to run once during `run_startup` (usable as a decorator)."""
+    with _lock:
+        if fn not in _steps:
+            _steps.append(fn)
+    return fn
+
+
+def run_startup() -> None:
+    """Run registered startup steps once per process."""
+    global _started
+    with _lock:
+        if _started:
+            return
+        _started = True
+        steps = list(_steps)
+    for fn in steps:
+        with phase(f"{fn.__module__}.{fn.__name__}"):
+            fn()
+
+
+def startup_report(top: int = 25) -> Dict[str, Any]:
+    imports = import_stats()
+    slowest = sorted(imports, key=lambda r: r["seconds"], reverse=True)[:top]
+    server_import = next((r["seconds"] for r in imports if r["module"] == "jarvis.server"), 0.0)
+    return {
+        "uptime_s": round(time.time() - _process_started, 3),
+        "rss_bytes": rss_bytes(),
+        "total_ms": round((server_import + sum(p["seconds"] for p in _phases)) * 1000, 1),
+        "budget_ms": startup_budget_ms(),
+        "phases": list(_phases),
+        "imports": slowest,
+        "imports_total": len(imports),
+        "heavy_modules": {
+            name: ("loaded" if name in sys.modules else "installed" if is_installed(name) else "missing")
+            for name in HEAVY_MODULES
+        },
+    }
+
+
+def log_startup_report() -> None:
+    report = startup_report(top=10)
+    mb = 1024 * 1024
+    lines = [f"startup total={report['total_ms']:.1f}ms rss={report['rss_bytes'] / mb:.1f}MB"]
+    for p in report["phases"]:
+        lines.append(f"  phase {p['phase']}: {p['seconds'] * 1000:.1f}ms rss{p['rss_delta_bytes'] / mb:+.1f}MB")
+    for r in report["imports"]:
+        lines.append(f"  import {r['module']} ({r['kind']}): {r['seconds'] * 1000:.1f}ms rss{r['rss_delta_bytes'] / mb:+.1f}MB")
+    loaded = [n for n, state in report["heavy_modules"].items() if state == "loaded"]
+    lines.append(f"  heavy modules loaded: {', '.join(loaded) or 'none'}")
+    logger.info("\n".join(lines))
+    budget = report["budget_ms"]
+    if budget is not None and report["total_ms"] > budget:
+        logger.warning("startup took %.1fms, over the %.0fms budget", report["total_ms"], budget)
+
+
+def _reset_for_tests() -> None:
+    global _started
+    with _lock:
+        _started = False
+    _phases.clear()
+
+
+def startup_budget_ms() -> float | None:
+    """Optional budget from JARVIS_STARTUP_BUDGET_MS; exceeded budgets are logged as warnings."""
+    raw = os.getenv("JARVIS_STARTUP_BUDGET_MS")
+    try:
+        return float(raw) if raw else None
+    except ValueError:
+        return None
@@ -0,0 +1,94 @@
+"""
+Per-stream NDJSON frame encoding and throughput accounting for the chat stream loop.
+"""
+
+from __future__ import annotations
+
+import json
+import time
+
+from jarvis.metrics import STREAM_BYTES, STREAM_TOKENS, STREAM_TOKENS_PER_SECOND
+
+
+def ndjson_event(event_type: str, content: str | None = None, stream_id: str | None = None, **kwargs) -> str:
+    """One NDJSON event: a single JSON object per line."""
+    payload = {"type": event_type, "content": content}
+    if stream_id:
+        payload["stream_id"] = stream_id
+    payload.update(kwargs)
+    return json.dumps(payload) + "\n"
+
+
+class NdjsonFrames:
+    """Frames for one stream with the constant stream_id/trace_id/session_id tail encoded once.
+
+    `token()` is byte-identical to `ndjson_event("token", ...)` but only JSON-encodes
+    the token text, which is what runs per token in the hot loop.
+    """
+
+    _TOKEN_HEAD = '{"type": "token", "content": '
+
+    def __init__(self, stream_id: str | None = None, **kwargs) -> None:
+        self.stream_id = stream_id
+        self.kwargs = kwargs
+        tail: dict = {"stream_id": stream_id} if stream_id else {}
+        tail.update(kwargs)
+        self._tail = (", " + json.dumps(tail)[1:-1] if tail else "") + "}\n"
+
+    def token(self, token: str) -> str:
+        return self._TOKEN_HEAD + json.dumps(token) + self._tail
+
+    def status(self, status: str | None) -> str:
+        return ndjson_event("status", None, stream_id=self.stream_id, status=status, **self.kwargs)
+
+    def done(self, reason: str | None = None) -> str:
+        return ndjson_event("done", None, stream_id=self.stream_id, reason=reason, **self.kwargs)
+
+    def error(self, message: str, **extra) -> str:
+        return ndjson_event("error", message, stream_id=self.stream_id, **extra, **self.kwargs)
+
+
+class StreamThroughput:
+    """Token/byte counts for one stream, updated per written batch and reported once at the end."""
+
+    __slots__ = ("started", "first_token_at", "last_token_at", "tokens", "writes", "bytes")
+
+    def __init__(self) -> None:
+        self.started = time.monotonic()
+        self.first_token_at: float | None = None
+        self.last_token_at: float | None = None
+        self.tokens = 0
+        self.writes = 0
+        self.bytes = 0
+
+    def record(self, tokens: int, nbytes: int, now: float | None = None) -> None:
+        self.writes += 1
+        self.bytes += nbytes
+        if tokens:
+            now = time.monotonic() if now is None else now
+            if self.first_token_at is None:
+                self.first_token_at = now
+            self.last_token_at = now
+            self.tokens += tokens
+
+    def tokens_per_second(self) -> float | None:
+        if self.tokens < 2 or self.first_token_at is None or self.last_token_at is None:
+            return None
+        span = self.last_token_at - self.first_token_at
+        return self.tokens / span if span > 0 else None
+
+    def finish(self) -> dict:
+        """Export to metrics; returns a summary for the stream_end log line."""
+        rate = self.tokens_per_second()
+        if rate is not None:
+            STREAM_TOKENS_PER_SECOND.observe(rate)
+        if self.tokens:
+            STREAM_TOKENS.inc(self.tokens)
+        if self.bytes:
+            STREAM_BYTES.inc(self.bytes)
+        return {
+            "tokens": self.tokens,
+            "writes": self.writes,
+            "bytes": self.bytes,
+            "tok_s": round(rate, 1) if rate is not None else None,
+        }
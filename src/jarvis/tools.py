@@ -8,9 +8,13 @@ import json
 import urllib.parse
 from zoneinfo import ZoneInfo
 
-import feedparser
 import requests
-from ddgs import DDGS
+
+from jarvis.lazy import lazy_import
+
+# Imported on first use; they add noticeable start-up time and memory.
+feedparser = lazy_import("feedparser")
+_ddgs = lazy_import("ddgs")
 
 # --- WEB SEARCH --------------------------------------------------------
 
@@ -24,7 +28,7 @@ def _request_json(url, params=None, timeout=8):
 
 def websearch_ddg(query):
     try:
-        with DDGS() as ddgs:
+        with _ddgs.DDGS() as ddgs:
             return list(ddgs.text(query, max_results=5))
     except Exception:
         return [{"error": "ddg_failed"}]
@@ -0,0 +1,249 @@
+"""
+Trace-scoped span recording with Chrome Trace Event export.
+
+A trace is opened with `start_trace(trace_id)` (the orchestrator does this per agent
+turn); nested `span(...)` blocks record wall-clock timings and form a hierarchy via
+contextvars. Context does not follow work onto plain threads or executors, so submit
+work through `bind_context(fn)` to keep spans attached to the caller's trace
+(`asyncio.to_thread` already copies context).
+
+Finished spans go to a bounded in-memory buffer of recent traces; `export_chrome_trace`
+renders one trace as JSON loadable in chrome://tracing or Perfetto.
+Outside an active trace `span()` does nothing, so instrumented hot paths stay cheap.
+"""
+
+from __future__ import annotations
+
+import contextvars
+import os
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+_current_trace: contextvars.ContextVar[Optional[str]] = contextvars.ContextVar("jarvis_trace_id", default=None)
+_current_span: contextvars.ContextVar[Optional["Span"]] = contextvars.ContextVar("jarvis_span", default=None)
+
+
+def _max_traces() -> int:
+    try:
+        return max(1, int(os.getenv("JARVIS_TRACE_BUFFER_SIZE", "200")))
+    except ValueError:
+        return 200
+
+
+def _max_spans_per_trace() -> int:
+    try:
+        return max(1, int(os.getenv("JARVIS_TRACE_MAX_SPANS", "5000")))
+    except ValueError:
+        return 5000
+
+
+def tracing_enabled() -> bool:
+    return os.getenv("JARVIS_TRACING", "1") != "0"
+
+
+@dataclass
+class Span:
+    name: str
+    category: str
+    trace_id: str
+    span_id: str
+    parent_id: Optional[str]
+    start_us: int
+    thread_id: int
+    thread_name: str
+    attrs: Dict[str, Any] = field(default_factory=dict)
+    duration_us: int = 0
+    error: Optional[str] = None
+
+    def set(self, **attrs: Any) -> None:
+        self.attrs.update(attrs)
+
+
+class TraceBuffer:
+    """Keeps finished spans for the most recent traces, evicting the oldest trace first."""
+
+    def __init__(self) -> None:
+        self._traces: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def add(self, span: Span) -> None:
+        with self._lock:
+            entry = self._traces.get(span.trace_id)
+            if entry is None:
+                entry = {"spans": [], "dropped": 0}
+                self._traces[span.trace_id] = entry
+                while len(self._traces) > _max_traces():
+                    self._traces.popitem(last=False)
+            else:
+                self._traces.move_to_end(span.trace_id)
+            if len(entry["spans"]) >= _max_spans_per_trace():
+                entry["dropped"] += 1
+                return
+            entry["spans"].append(span)
+
+    def get(self, trace_id: str) -> List[Span]:
+        with self._lock:
+            entry = self._traces.get(trace_id)
+            return list(entry["spans"]) if entry else []
+
+    def summaries(self) -> List[Dict[str, Any]]:
+        """Most recent first: trace_id, root span name, span count and total duration."""
+        with self._lock:
+            items = [(tid, list(e["spans"]), e["dropped"]) for tid, e in self._traces.items()]
+        out = []
+        for trace_id, spans, dropped in reversed(items):
+            if not spans:
+                continue
+            start = min(s.start_us for s in spans)
+            end = max(s.start_us + s.duration_us for s in spans)
+            roots = [s for s in spans if s.parent_id is None]
+            root = min(roots or spans, key=lambda s: s.start_us)
+            out.append({
+                "trace_id": trace_id,
+                "root": root.name,
+                "spans": len(spans),
+                "dropped": dropped,
+                "started_at": start / 1_000_000,
+                "duration_ms": round((end - start) / 1000.0, 3),
+            })
+        return out
+
+    def clear(self) -> None:
+        with self._lock:
+            self._traces.clear()
+
+
+_buffer = TraceBuffer()
+
+# Innermost active trace per OS thread, so out-of-band observers (the stack sampler)
+# can attribute a thread's work; contextvars are not readable from other threads.
+_thread_traces: Dict[int, str] = {}
+
+
+def current_trace_id() -> Optional[str]:
+    return _current_trace.get()
+
+
+def current_span() -> Optional[Span]:
+    return _current_span.get()
+
+
+@contextmanager
+def start_trace(trace_id: Optional[str] = None) -> Iterator[str]:
+    """Make `trace_id` the active trace for the block; reuses the active one when omitted."""
+    tid = trace_id or _current_trace.get() or uuid.uuid4().hex
+    token = _current_trace.set(tid)
+    try:
+        yield tid
+    finally:
+        _current_trace.reset(token)
+
+
+@contextmanager
+def span(name: str, category: str = "app", **attrs: Any) -> Iterator[Optional[Span]]:
+    """Record a timed span under the active trace; yields None when no trace is active."""
+    trace_id = _current_trace.get()
+    if trace_id is None or not tracing_enabled():
+        yield None
+        return
+    parent = _current_span.get()
+    thread = threading.current_thread()
+    current = Span(
+        name=name,
+        category=category,
+        trace_id=trace_id,
+        span_id=uuid.uuid4().hex[:16],
+        parent_id=parent.span_id if parent is not None and parent.trace_id == trace_id else None,
+        start_us=time.time_ns() // 1000,
+        thread_id=threading.get_ident(),
+        thread_name=thread.name,
+        attrs={k: v for k, v in attrs.items() if v is not None},
+    )
+    started = time.perf_counter_ns()
+    token = _current_span.set(current)
+    previous_thread_trace = _thread_traces.get(current.thread_id)
+    _thread_traces[current.thread_id] = trace_id
+    try:
+        yield current
+    except BaseException as exc:
+        current.error = exc.__class__.__name__
+        raise
+    finally:
+        try:
+            _current_span.reset(token)
+        except ValueError:
+            # Generator-based context managers can be finalized from another context.
+            pass
+        if previous_thread_trace is None:
+            _thread_traces.pop(current.thread_id, None)
+        else:
+            _thread_traces[current.thread_id] = previous_thread_trace
+        current.duration_us = max(0, (time.perf_counter_ns() - started) // 1000)
+        _buffer.add(current)
+
+
+def bind_context(fn: Callable[..., Any]) -> Callable[..., Any]:
+    """Wrap `fn` so it runs in a copy of the caller's context (trace + parent span)."""
+    ctx = contextvars.copy_context()
+
+    def _bound(*args: Any, **kwargs: Any) -> Any:
+        return ctx.run(fn, *args, **kwargs)
+
+    return _bound
+
+
+def thread_trace_ids() -> Dict[int, str]:
+    """Snapshot of thread ident -> trace_id for threads currently inside a span."""
+    return dict(_thread_traces)
+
+
+def get_trace(trace_id: str) -> List[Span]:
+    return _buffer.get(trace_id)
+
+
+def list_traces(limit: int = 50) -> List[Dict[str, Any]]:
+    return _buffer.summaries()[: max(0, limit)]
+
+
+def export_chrome_trace(trace_id: str) -> Dict[str, Any] | None:
+    """Chrome Trace Event JSON ("X" complete events plus thread names); None if unknown."""
+    spans = get_trace(trace_id)
+    if not spans:
+        return None
+    pid = os.getpid()
+    events: List[Dict[str, Any]] = []
+    threads: Dict[int, str] = {}
+    for s in sorted(spans, key=lambda s: s.start_us):
+        threads.setdefault(s.thread_id, s.thread_name)
+        args = {str(k): v if isinstance(v, (int, float, bool, str)) else str(v) for k, v in s.attrs.items()}
+        args["span_id"] = s.span_id
+        if s.parent_id:
+            args["parent_id"] = s.parent_id
+        if s.error:
+            args["error"] = s.error
+        events.append({
+            "name": s.name,
+            "cat": s.category,
+            "ph": "X",
+            "ts": s.start_us,
+            "dur": s.duration_us,
+            "pid": pid,
+            "tid": s.thread_id,
+            "args": args,
+        })
+    for tid, tname in threads.items():
+        events.append({"name": "thread_name", "ph": "M", "pid": pid, "tid": tid, "args": {"name": tname}})
+    return {
+        "traceEvents": events,
+        "displayTimeUnit": "ms",
+        "otherData": {"trace_id": trace_id},
+    }
+
+
+def clear_traces() -> None:
+    _buffer.clear()
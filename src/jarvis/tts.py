@@ -2,14 +2,23 @@ import hashlib
 import os
 import subprocess
 import uuid
-from gtts import gTTS
+
+from jarvis.lazy import lazy_import
+from jarvis.metrics import time_stage
+
+gtts = lazy_import("gtts")
 
 CACHE = "tts_cache"
-os.makedirs(CACHE, exist_ok=True)
 
 def speak(text, lang=None):
     if not text or not text.strip():
         return None
+    with time_stage("tts"):
+        return _speak(text, lang)
+
+
+def _speak(text, lang=None):
+    os.makedirs(CACHE, exist_ok=True)
     engine = os.getenv("TTS_ENGINE", "gtts").lower()
     if not lang:
         lang = os.getenv("TTS_LANG", "da")
@@ -31,6 +40,6 @@ def speak(text, lang=None):
             except Exception:
                 pass
     fname = f"{CACHE}/{uuid.uuid4()}.mp3"
-    tts = gTTS(text=text, lang=lang)
+    tts = gtts.gTTS(text=text, lang=lang)
     tts.save(fname)
     return fname
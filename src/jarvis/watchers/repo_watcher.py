@@ -1,16 +1,31 @@
-"""Polling repository watcher that emits notification events on changes."""
+"""
+Repository watchers that emit notification events on changes.
+
+`InotifyRepoWatcher` (Linux) is notified by the kernel: it watches every directory
+recursively, debounces bursts into one change set and passes the exact changed
+paths on. `PollingRepoWatcher` walks and stats the tree every interval and is used
+where inotify is unavailable (other platforms, watch limit exhausted).
+"""
 
 from __future__ import annotations
 
+import ctypes
+import errno
+import logging
 import os
+import select
+import struct
+import sys
 import threading
 import time
 from pathlib import Path
-from typing import Dict, Iterable, Set
+from typing import Dict, Iterable, List, Set, Tuple
 
+from jarvis.index_excludes import should_exclude
 from jarvis.notifications.store import add_event
 from jarvis.agent_core.cache import mark_code_index_stale
 from jarvis.code_rag.index import build_index, DEFAULT_INDEX_DIR, DEFAULT_REPO_ROOT
+from jarvis.code_rag.symbols import load_symbol_index, update_symbol_index
 
 RELEVANT_EXT = {".py", ".md", ".txt", ".sh", ".toml", ".yml", ".yaml", ".ini"}
 EXCLUDE_DIRS = {".venv", "__pycache__", ".pytest_cache", "src/data", "data", "tts_cache", "ui/static"}
@@ -18,6 +33,10 @@ EXCLUDE_EXT = {".pyc"}
 MAX_SIZE_BYTES = 2 * 1024 * 1024
 _recent_events: Dict[str, float] = {}
 RATE_WINDOW_SEC = 300  # 5 minutes
+DEBOUNCE_SEC = 0.5  # quiet period before a change set is flushed
+MAX_BATCH_SEC = 5.0  # flush at least this often during a continuous burst
+
+logger = logging.getLogger(__name__)
 
 
 def _should_emit(fingerprint: str, now_ts: float | None = None, window: int = RATE_WINDOW_SEC) -> bool:
@@ -43,21 +62,26 @@ class PollingRepoWatcher:
         self._stop = threading.Event()
         self._reindex_lock = threading.Lock()
 
-    def _iter_files(self) -> Iterable[Path]:
-        exclude_set = set(EXCLUDE_DIRS)
-        for root, dirs, files in os.walk(self.repo_root):
+    def _excluded(self, path: Path) -> bool:
+        rel = path.relative_to(self.repo_root)
+        return str(rel) in EXCLUDE_DIRS or str(rel.parent) in EXCLUDE_DIRS or should_exclude(rel.as_posix())
+
+    def _is_relevant(self, path: Path) -> bool:
+        suffix = path.suffix.lower()
+        return suffix in RELEVANT_EXT and suffix not in EXCLUDE_EXT and not self._excluded(path)
+
+    def _walk(self, top: Path | None = None) -> Iterable[Tuple[Path, List[str]]]:
+        """(directory, file names) for every non-excluded directory under `top` (default: the root)."""
+        for root, dirs, files in os.walk(top or self.repo_root):
             root_path = Path(root)
-            rel_root = root_path.relative_to(self.repo_root)
-            # Exclude dirs if their relative path is in exclude
-            dirs[:] = [d for d in dirs if str(rel_root / d) not in exclude_set]
+            dirs[:] = [d for d in dirs if not self._excluded(root_path / d)]
+            yield root_path, files
+
+    def _iter_files(self) -> Iterable[Path]:
+        for root_path, files in self._walk():
             for name in files:
                 p = root_path / name
-                rel_p = p.relative_to(self.repo_root)
-                if str(rel_p.parent) in exclude_set:
-                    continue
-                if p.suffix.lower() not in RELEVANT_EXT:
-                    continue
-                if p.suffix.lower() in EXCLUDE_EXT:
+                if not self._is_relevant(p):
                     continue
                 try:
                     if p.stat().st_size > MAX_SIZE_BYTES:
@@ -90,12 +114,14 @@ class PollingRepoWatcher:
         paths_preview = ", ".join(sorted(p.as_posix() for p in list(changed)[:3]))
         count = len(changed)
         mark_code_index_stale()
+        self._update_symbols(changed)
         add_event(
             self.user_id,
             type="code_changed",
             severity="info",
             title="Code changed",
             body=f"{count} file(s) changed: {paths_preview}",
+            meta={"paths": sorted(p.as_posix() for p in changed)[:500]},
         )
         add_event(
             self.user_id,
@@ -107,6 +133,15 @@ class PollingRepoWatcher:
         if self.auto_reindex:
             self._trigger_reindex()
 
+    def _update_symbols(self, changed: Set[Path]) -> None:
+        """Re-parse only the changed .py files in this repo's symbol index, if one was built."""
+        try:
+            index = load_symbol_index(DEFAULT_INDEX_DIR)
+            if index is not None and index.repo_root == str(Path(self.repo_root).resolve()):
+                update_symbol_index(self.repo_root, DEFAULT_INDEX_DIR, paths=changed)
+        except Exception:  # pragma: no cover - defensive
+            pass
+
     def _trigger_reindex(self) -> None:
         if not self._reindex_lock.acquire(blocking=False):
             return
@@ -134,25 +169,264 @@ class PollingRepoWatcher:
 
         threading.Thread(target=_worker, daemon=True).start()
 
+    def prime(self) -> None:
+        """Record the current state without reporting anything."""
+        self._detect_changes()
+
+    def collect_changes(self) -> Set[Path]:
+        """Files changed since the last call, without emitting events."""
+        return self._detect_changes()
+
     def scan_once(self) -> Set[Path]:
         """Run a single scan and emit events if changes detected."""
         changed = self._detect_changes()
         self._emit_change_events(changed)
         return changed
 
+    def _poll_loop(self) -> None:
+        while not self._stop.is_set():
+            self.scan_once()
+            self._stop.wait(self.interval_sec)
+
     def start(self) -> None:
         """Start background polling."""
-
-        def _loop():
-            while not self._stop.is_set():
-                self.scan_once()
-                self._stop.wait(self.interval_sec)
-
-        threading.Thread(target=_loop, daemon=True).start()
+        threading.Thread(target=self._poll_loop, daemon=True).start()
 
     def stop(self) -> None:
         self._stop.set()
 
+    def close(self) -> None:
+        """Release resources held outside the background thread (none for polling)."""
+
+
+# --- inotify ---------------------------------------------------------------------
+
+IN_ATTRIB = 0x00000004
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_MOVE_SELF = 0x00000800
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ONLYDIR = 0x01000000
+IN_ISDIR = 0x40000000
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+WATCH_MASK = (
+    IN_ATTRIB | IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE | IN_DELETE_SELF | IN_MOVE_SELF
+)
+_EVENT = struct.Struct("iIII")  # struct inotify_event without the trailing name
+_READ_SIZE = 64 * 1024
+
+
+def _load_libc():
+    if not sys.platform.startswith("linux"):
+        return None
+    try:
+        libc = ctypes.CDLL(None, use_errno=True)
+        libc.inotify_init1, libc.inotify_add_watch, libc.inotify_rm_watch
+    except (OSError, AttributeError):
+        return None
+    return libc
+
+
+_libc = _load_libc()
+
+
+def inotify_available() -> bool:
+    return _libc is not None
+
+
+class _Inotify:
+    """Thin ctypes wrapper over an inotify file descriptor."""
+
+    def __init__(self) -> None:
+        if _libc is None:
+            raise OSError(errno.ENOSYS, "inotify is not available")
+        self.fd = _libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self.fd < 0:
+            err = ctypes.get_errno()
+            raise OSError(err, os.strerror(err))
+
+    def add_watch(self, path: Path) -> int:
+        wd = _libc.inotify_add_watch(self.fd, os.fsencode(path), WATCH_MASK | IN_ONLYDIR)
+        if wd < 0:
+            err = ctypes.get_errno()
+            raise OSError(err, os.strerror(err), str(path))
+        return wd
+
+    def read(self, timeout: float) -> List[Tuple[int, int, bytes]]:
+        """(wd, mask, name) events, waiting up to `timeout` seconds for the first one."""
+        ready, _, _ = select.select([self.fd], [], [], timeout)
+        if not ready:
+            return []
+        events = []
+        while True:
+            try:
+                data = os.read(self.fd, _READ_SIZE)
+            except BlockingIOError:
+                return events
+            offset = 0
+            while offset < len(data):
+                wd, mask, _cookie, length = _EVENT.unpack_from(data, offset)
+                offset += _EVENT.size
+                events.append((wd, mask, data[offset : offset + length].rstrip(b"\0")))
+                offset += length
+
+    def close(self) -> None:
+        os.close(self.fd)
+
+
+class InotifyRepoWatcher(PollingRepoWatcher):
+    """Kernel-notified watcher: no periodic walk, changes are reported within DEBOUNCE_SEC.
+
+    Every non-excluded directory gets a watch; new directories are added as they appear.
+    Events are collected until the tree has been quiet for DEBOUNCE_SEC (or MAX_BATCH_SEC
+    has passed) and then flushed as one change set. A kernel queue overflow triggers a
+    single full rescan against the last known mtimes; if watches cannot be placed then
+    (e.g. ENOSPC, the watch limit) the watcher carries on as a polling watcher.
+    """
+
+    def __init__(
+        self,
+        repo_root: Path,
+        user_id: int,
+        interval_sec: int = 5,
+        auto_reindex: bool = False,
+        debounce_sec: float = DEBOUNCE_SEC,
+    ):
+        super().__init__(repo_root, user_id, interval_sec=interval_sec, auto_reindex=auto_reindex)
+        self.debounce_sec = debounce_sec
+        self._inotify = _Inotify()
+        self._dirs: Dict[int, Path] = {}
+        self._pending: Set[Path] = set()
+        self._rescan = False
+
+    def _watch_tree(self, top: Path) -> None:
+        """Watch `top` and every directory below it; files already inside are queued as changes."""
+        for root_path, files in self._walk(top):
+            try:
+                self._dirs[self._inotify.add_watch(root_path)] = root_path
+            except FileNotFoundError:
+                continue
+            except PermissionError as exc:  # unreadable directory: skip it, keep watching the rest
+                logger.warning("cannot watch %s: %s", root_path, exc)
+                continue
+            self._pending.update(root_path / name for name in files)
+
+    def prime(self) -> None:
+        """Place the watches and record the current mtimes without reporting anything."""
+        self._watch_tree(Path(self.repo_root))
+        self._pending.clear()
+        self._detect_changes()
+        self._rescan = False
+
+    def _handle(self, wd: int, mask: int, name: bytes) -> None:
+        if mask & IN_Q_OVERFLOW:
+            self._rescan = True
+            return
+        if mask & IN_IGNORED:
+            self._dirs.pop(wd, None)
+            return
+        parent = self._dirs.get(wd)
+        if parent is None or not name:
+            return
+        path = parent / os.fsdecode(name)
+        if mask & IN_ISDIR:
+            if mask & (IN_CREATE | IN_MOVED_TO) and not self._excluded(path):
+                try:
+                    self._watch_tree(path)
+                except OSError as exc:  # e.g. ENOSPC: max_user_watches reached
+                    logger.warning("cannot watch %s: %s", path, exc)
+            elif mask & (IN_DELETE | IN_MOVED_FROM):
+                self._pending.update(p for p in self._mtimes if path in p.parents)
+            return
+        self._pending.add(path)
+
+    def _collect(self) -> Set[Path]:
+        """Turn the queued paths into the set of relevant files that actually changed."""
+        changed: Set[Path] = set()
+        if self._rescan:
+            self._rescan = False
+            self._pending.clear()
+            self._watch_tree(Path(self.repo_root))
+            self._pending.clear()
+            return self._detect_changes()
+        for path in self._pending:
+            if not self._is_relevant(path):
+                continue
+            try:
+                st = path.stat()
+            except OSError:
+                st = None
+            if st is None or st.st_size > MAX_SIZE_BYTES:
+                if self._mtimes.pop(path, None) is not None:
+                    changed.add(path)
+                continue
+            if self._mtimes.get(path) != st.st_mtime:
+                self._mtimes[path] = st.st_mtime
+                changed.add(path)
+        self._pending.clear()
+        return changed
+
+    def collect_changes(self, timeout: float = 0.0) -> Set[Path]:
+        """Read queued kernel events (waiting up to `timeout`) and return them as one change set."""
+        for wd, mask, name in self._inotify.read(timeout):
+            self._handle(wd, mask, name)
+        return self._collect()
+
+    def poll_once(self, timeout: float = 0.0) -> Set[Path]:
+        changed = self.collect_changes(timeout)
+        self._emit_change_events(changed)
+        return changed
+
+    def _run(self) -> None:
+        try:
+            self.prime()
+        except OSError as exc:
+            logger.warning("inotify setup failed (%s); polling every %ss instead", exc, self.interval_sec)
+            self._inotify.close()
+            self._detect_changes()
+            self._poll_loop()
+            return
+        try:
+            self._watch_events()
+            return
+        except OSError as exc:  # e.g. ENOSPC while re-placing watches after a queue overflow
+            logger.warning("inotify watching failed (%s); polling every %ss instead", exc, self.interval_sec)
+        except Exception as exc:  # pragma: no cover - defensive
+            logger.warning("inotify repo watcher stopped: %s", exc)
+            return
+        finally:
+            self._inotify.close()
+        # Changes since the last flush are reported by the first scan against the known mtimes.
+        self._poll_loop()
+
+    def _watch_events(self) -> None:
+        first = last = None
+        while not self._stop.is_set():
+            timeout = 1.0 if last is None else max(0.0, last + self.debounce_sec - time.monotonic())
+            events = self._inotify.read(timeout)
+            for wd, mask, name in events:
+                self._handle(wd, mask, name)
+            now = time.monotonic()
+            if events:
+                first = first or now
+                last = now
+            if last is not None and (now - last >= self.debounce_sec or now - first >= MAX_BATCH_SEC):
+                first = last = None
+                self._emit_change_events(self._collect())
+
+    def start(self) -> None:
+        threading.Thread(target=self._run, name="repo-watcher", daemon=True).start()
+
+    def close(self) -> None:
+        """Close the inotify descriptor when the watcher is driven without `start()`."""
+        self._inotify.close()
+
 
 def _is_test_mode():
     try:
@@ -163,6 +437,20 @@ def _is_test_mode():
         return os.getenv("JARVIS_TEST_MODE") == "1"
 
 
+def create_repo_watcher(
+    repo_root: Path, user_id: int, interval_sec: int = 5, auto_reindex: bool = False, backend: str = "auto"
+) -> PollingRepoWatcher:
+    """inotify watcher when available (backend "auto" or "inotify"), polling otherwise."""
+    if backend != "polling" and inotify_available():
+        try:
+            return InotifyRepoWatcher(
+                repo_root=repo_root, user_id=user_id, interval_sec=interval_sec, auto_reindex=auto_reindex
+            )
+        except OSError as exc:
+            logger.warning("inotify unavailable (%s); falling back to polling", exc)
+    return PollingRepoWatcher(repo_root=repo_root, user_id=user_id, interval_sec=interval_sec, auto_reindex=auto_reindex)
+
+
 def start_repo_watcher_if_enabled() -> PollingRepoWatcher | None:
     """Start watcher if env flag is enabled."""
     if _is_test_mode():
@@ -173,6 +461,7 @@ def start_repo_watcher_if_enabled() -> PollingRepoWatcher | None:
     interval = int(os.getenv("JARVIS_WATCHER_INTERVAL_SEC", "5") or 5)
     auto_reindex = os.getenv("JARVIS_AUTO_REINDEX") == "1"
     user_id = int(os.getenv("JARVIS_WATCHER_USER_ID", "1"))
-    watcher = PollingRepoWatcher(repo_root=repo_root, user_id=user_id, interval_sec=interval, auto_reindex=auto_reindex)
+    backend = (os.getenv("JARVIS_WATCHER_BACKEND") or "auto").lower()
+    watcher = create_repo_watcher(repo_root, user_id, interval, auto_reindex, backend)
     watcher.start()
     return watcher
@@ -0,0 +1,169 @@
+"""
+Source-file -> test-file mapping from the static import graph.
+
+Every .py file under the repo root (minus index excludes) is parsed with `ast` for
+its imports, including ones inside functions. Module names are resolved to files
+under the root and its `src/` directory; importing `a.b.c` also depends on the
+`a` and `a.b` package `__init__` files. A test file is affected by a change when
+the changed file is reachable from it through imports.
+
+Changes the graph cannot attribute (conftest.py, pytest/packaging config) mean
+"run everything" and are reported as None.
+"""
+
+from __future__ import annotations
+
+import ast
+import os
+from collections import deque
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Set
+
+from jarvis.index_excludes import should_exclude
+
+FULL_RUN_FILES = {"conftest.py", "pytest.ini", "pyproject.toml", "setup.cfg", "setup.py", "tox.ini", "requirements.txt"}
+SOURCE_DIRS = ("", "src")
+
+
+class ImpactMap:
+    def __init__(self, repo_root: Path, test_dirs: Iterable[str] = ("tests",)):
+        self.repo_root = Path(repo_root)
+        self.test_dirs = [self.repo_root / d for d in test_dirs]
+        self._imports: Dict[Path, Set[Path]] = {}
+        self._modules: Dict[str, Path] = {}
+        self._importers: Optional[Dict[Path, Set[Path]]] = None
+
+    def is_test_file(self, path: Path) -> bool:
+        name = path.name
+        return (
+            path.suffix == ".py"
+            and (name.startswith("test_") or name.endswith("_test.py"))
+            and any(d in path.parents for d in self.test_dirs)
+        )
+
+    # --- graph --------------------------------------------------------------------
+
+    def _module_names(self, path: Path) -> List[str]:
+        names = []
+        for base in SOURCE_DIRS:
+            try:
+                rel = path.relative_to(self.repo_root / base if base else self.repo_root)
+            except ValueError:
+                continue
+            parts = list(rel.with_suffix("").parts)
+            if parts and parts[-1] == "__init__":
+                parts.pop()
+            if parts:
+                names.append(".".join(parts))
+        return names
+
+    def _iter_sources(self) -> Iterable[Path]:
+        for root, dirs, files in os.walk(self.repo_root):
+            root_path = Path(root)
+            dirs[:] = [d for d in dirs if not should_exclude((root_path / d).relative_to(self.repo_root).as_posix())]
+            for name in files:
+                if name.endswith(".py"):
+                    yield root_path / name
+
+    def _resolve(self, module: str) -> Set[Path]:
+        """Files executed by importing `module`: the module itself and its parent packages."""
+        found = set()
+        parts = module.split(".")
+        for i in range(1, len(parts) + 1):
+            path = self._modules.get(".".join(parts[:i]))
+            if path is not None:
+                found.add(path)
+        return found
+
+    def _parse(self, path: Path) -> Set[str]:
+        try:
+            tree = ast.parse(path.read_bytes(), filename=str(path))
+        except (OSError, SyntaxError, ValueError):
+            return set()
+        package = self._module_names(path)
+        package_parts = package[-1].split(".") if package else []
+        if path.name != "__init__.py":
+            package_parts = package_parts[:-1]
+        modules: Set[str] = set()
+        for node in ast.walk(tree):
+            if isinstance(node, ast.Import):
+                modules.update(alias.name for alias in node.names)
+            elif isinstance(node, ast.ImportFrom):
+                if node.level:
+                    base = package_parts[: len(package_parts) - node.level + 1]
+                    prefix = ".".join(base + ([node.module] if node.module else []))
+                else:
+                    prefix = node.module or ""
+                if not prefix:
+                    continue
+                modules.add(prefix)
+                # `from pkg import mod` may name a submodule.
+                modules.update(f"{prefix}.{alias.name}" for alias in node.names if alias.name != "*")
+        return modules
+
+    def build(self) -> None:
+        """Parse every source file and rebuild the graph."""
+        files = list(self._iter_sources())
+        self._modules = {}
+        for path in files:
+            for name in self._module_names(path):
+                self._modules.setdefault(name, path)
+        raw = {path: self._parse(path) for path in files}
+        self._imports = {path: self._link(path, names) for path, names in raw.items()}
+        self._importers = None
+
+    def _link(self, path: Path, names: Set[str]) -> Set[Path]:
+        deps: Set[Path] = set()
+        for name in names:
+            deps |= self._resolve(name)
+        deps.discard(path)
+        return deps
+
+    def update(self, changed: Iterable[Path]) -> None:
+        """Re-parse changed files; deleted files leave the graph."""
+        changed = [Path(p) for p in changed if Path(p).suffix == ".py"]
+        present = [p for p in changed if p.exists()]
+        for path in present:  # register new modules before linking anything against them
+            for name in self._module_names(path):
+                self._modules.setdefault(name, path)
+        for path in changed:
+            if path in present:
+                self._imports[path] = self._link(path, self._parse(path))
+            else:
+                self._imports.pop(path, None)
+                for name in self._module_names(path):
+                    if self._modules.get(name) == path:
+                        del self._modules[name]
+        self._importers = None
+
+    def _reverse(self) -> Dict[Path, Set[Path]]:
+        if self._importers is None:
+            importers: Dict[Path, Set[Path]] = {}
+            for path, deps in self._imports.items():
+                for dep in deps:
+                    importers.setdefault(dep, set()).add(path)
+            self._importers = importers
+        return self._importers
+
+    # --- queries ------------------------------------------------------------------
+
+    def affected_tests(self, changed: Iterable[Path]) -> Optional[List[Path]]:
+        """Test files that import any changed file, closest importers first; None when all tests must run."""
+        changed = [Path(p) for p in changed]
+        if any(p.name in FULL_RUN_FILES for p in changed):
+            return None
+        self.update(changed)
+        importers = self._reverse()
+        depth: Dict[Path, int] = {}
+        queue = deque((p, 0) for p in changed if p.suffix == ".py")
+        while queue:
+            path, d = queue.popleft()
+            if path in depth:
+                continue
+            depth[path] = d
+            queue.extend((p, d + 1) for p in importers.get(path, ()))
+        tests = [p for p in depth if self.is_test_file(p) and p.exists()]
+        return sorted(tests, key=lambda p: (depth[p], p))
+
+    def __len__(self) -> int:
+        return len(self._imports)
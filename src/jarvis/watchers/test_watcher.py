@@ -1,18 +1,32 @@
-"""Run pytest on demand and emit notification events."""
+"""
+Run pytest on demand or in the background and emit notification events.
+
+`ChangeAwareTestWatcher` runs only the test files affected by changed sources
+(per `test_impact.ImpactMap`) and a full run every `full_interval_sec`, which also
+rebuilds the map. Each failing test is reported as soon as pytest prints it; a
+summary event follows when the run ends. `PollingTestWatcher` runs the whole suite
+every interval.
+"""
 
 from __future__ import annotations
 
+import logging
 import os
+import re
 import subprocess
 import threading
 import time
 from pathlib import Path
-from typing import Optional
+from typing import Callable, List, Optional, Set
 
 from jarvis.code_rag import search_code
 from jarvis.notifications.store import add_event
 from jarvis.triage.pytest_triage import triage_pytest_output
 from jarvis.code_rag.index import DEFAULT_REPO_ROOT
+from jarvis.watchers.repo_watcher import create_repo_watcher
+from jarvis.watchers.test_impact import ImpactMap
+
+logger = logging.getLogger(__name__)
 
 
 def _truncate(text: str, limit: int = 8000) -> str:
@@ -31,6 +45,9 @@ def _format_body(stdout: str, stderr: str) -> str:
 
 _recent_events: dict[str, float] = {}
 RATE_WINDOW_SEC = 300  # 5 minutes
+TEST_TIMEOUT_SEC = 300
+# Per-test result lines printed at verbosity 1, e.g. "tests/test_x.py::test_y FAILED [ 40%]".
+_RESULT_RE = re.compile(r"^(\S+::\S+)\s+(FAILED|ERROR)\b")
 
 
 def _fingerprint_from_triage(triage: dict) -> str:
@@ -124,22 +141,56 @@ class PollingTestWatcher:
         self.user_id = user_id
         self._stop = threading.Event()
 
-    def _run_tests(self) -> tuple[int, str]:
-        """Run pytest -q and return (returncode, output)."""
+    def _run_tests(
+        self, targets: Optional[List[Path]] = None, on_line: Optional[Callable[[str], None]] = None
+    ) -> tuple[int, str]:
+        """Run pytest (all tests, or just `targets`) streaming its output; return (returncode, output)."""
+        cmd = ["python", "-m", "pytest", "--verbosity=1", "-rfE"]
+        cmd += [os.path.relpath(t, self.repo_root) for t in targets or []]
         try:
-            result = subprocess.run(
-                ["python", "-m", "pytest", "-q"],
-                cwd=self.repo_root,
-                capture_output=True,
-                text=True,
-                timeout=300,  # 5 min timeout
+            proc = subprocess.Popen(
+                cmd, cwd=self.repo_root, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True
             )
-            output = result.stdout + result.stderr
-            return result.returncode, output
-        except subprocess.TimeoutExpired:
-            return -1, "Test run timed out after 5 minutes"
         except Exception as exc:
             return -1, f"Failed to run tests: {exc}"
+        timed_out = threading.Event()
+
+        def _kill():
+            timed_out.set()
+            proc.kill()
+
+        timer = threading.Timer(TEST_TIMEOUT_SEC, _kill)
+        timer.start()
+        lines = []
+        try:
+            for line in proc.stdout:
+                lines.append(line)
+                if on_line is not None:
+                    on_line(line)
+            returncode = proc.wait()
+        finally:
+            timer.cancel()
+        if timed_out.is_set():
+            return -1, "Test run timed out after 5 minutes"
+        return returncode, "".join(lines)
+
+    def _report_result_line(self, line: str) -> None:
+        """Emit a failing test as soon as pytest reports it."""
+        match = _RESULT_RE.match(line)
+        if not match:
+            return
+        triage = triage_pytest_output(line, "da")
+        fingerprint = _fingerprint_from_triage(triage)
+        if not _should_emit(fingerprint):
+            return
+        add_event(
+            self.user_id,
+            type="test_failed",
+            severity="error",
+            title=triage["title"],
+            body=triage["body"],
+            meta={"nodeid": match.group(1), "outcome": match.group(2), "fingerprint": fingerprint},
+        )
 
     def _extract_summary(self, returncode: int, output: str) -> str:
         """Extract short summary from output."""
@@ -148,10 +199,11 @@ class PollingTestWatcher:
         triage = triage_pytest_output(output)
         return triage["summary"]
 
-    def scan_once(self) -> None:
-        """Run tests once and emit event."""
-        returncode, output = self._run_tests()
+    def scan_once(self, targets: Optional[List[Path]] = None) -> None:
+        """Run tests once (all, or just `targets`) and emit events."""
+        returncode, output = self._run_tests(targets, on_line=self._report_result_line)
         triage = triage_pytest_output(output, "da")  # Assume da for watcher
+        scope = {"scope": "full"} if targets is None else {"scope": "affected", "tests": [str(t) for t in targets]}
         fingerprint = _fingerprint_from_triage(triage)
         if returncode == 0:
             add_event(
@@ -160,6 +212,7 @@ class PollingTestWatcher:
                 severity="info",
                 title="Tests passed",
                 body=triage["body"],
+                meta=scope,
             )
         else:
             # Rate limit identical failures
@@ -180,7 +233,7 @@ class PollingTestWatcher:
             body = f"{triage['body']}\n\nSuggestions:\n" + "\n".join(f"- {s}" for s in suggestions[:3])
             if top_refs:
                 body += "\n\nRefs:\n" + "\n".join(f"- {r['path']}:{r['start_line']}-{r['end_line']}" for r in top_refs)
-            meta = {"refs": refs, "fingerprint": fingerprint}  # Full refs in meta
+            meta = {"refs": refs, "fingerprint": fingerprint, **scope}  # Full refs in meta
             add_event(
                 self.user_id,
                 type="test_run_failed",
@@ -190,20 +243,89 @@ class PollingTestWatcher:
                 meta=meta,
             )
 
+    def _loop(self) -> None:
+        while not self._stop.is_set():
+            self.scan_once()
+            self._stop.wait(self.interval_sec)
+
     def start(self) -> None:
         """Start background polling."""
-
-        def _loop():
-            while not self._stop.is_set():
-                self.scan_once()
-                self._stop.wait(self.interval_sec)
-
-        threading.Thread(target=_loop, daemon=True).start()
+        threading.Thread(target=self._loop, daemon=True).start()
 
     def stop(self) -> None:
         self._stop.set()
 
 
+class ChangeAwareTestWatcher(PollingTestWatcher):
+    """Runs only the tests affected by changed files; periodic full runs refresh the import map."""
+
+    def __init__(
+        self,
+        repo_root: Path,
+        user_id: int,
+        interval_sec: int = 5,
+        full_interval_sec: int = 3600,
+        backend: str = "auto",
+    ):
+        super().__init__(repo_root, user_id, interval_sec)
+        self.interval_sec = max(1, interval_sec)
+        self.full_interval_sec = max(self.interval_sec, full_interval_sec)
+        self.impact = ImpactMap(repo_root)
+        self._changes = create_repo_watcher(repo_root, user_id, interval_sec=self.interval_sec, backend=backend)
+        self._last_full: float | None = None
+
+    def full_run(self) -> None:
+        self.impact.build()
+        self.scan_once()
+        self._last_full = time.monotonic()
+
+    def check_once(self) -> Optional[List[Path]]:
+        """Run what the changes since the last check require.
+
+        Returns the affected test files that ran ([] when nothing did), or None after a full run.
+        """
+        changed = self._collect_changes()
+        if self._last_full is None or time.monotonic() - self._last_full >= self.full_interval_sec:
+            self.full_run()
+            return None
+        if not changed:
+            return []
+        targets = self.impact.affected_tests(changed)
+        if targets is None:
+            self.full_run()
+        elif targets:
+            self.scan_once(targets)
+        return targets
+
+    def _collect_changes(self) -> Set[Path]:
+        try:
+            return self._changes.collect_changes()
+        except OSError as exc:  # e.g. ENOSPC re-placing inotify watches after a queue overflow
+            self._use_polling(exc)
+            self._last_full = None  # changes since the last check are unknown: run everything
+            return set()
+
+    def _use_polling(self, exc: OSError) -> None:
+        logger.warning("repo change watcher failed (%s); polling every %ss instead", exc, self.interval_sec)
+        self._changes.close()
+        self._changes = create_repo_watcher(
+            self.repo_root, self.user_id, interval_sec=self.interval_sec, backend="polling"
+        )
+        self._changes.prime()
+
+    def _loop(self) -> None:
+        try:
+            try:
+                self._changes.prime()
+            except OSError as exc:
+                self._use_polling(exc)
+            while not self._stop.is_set():
+                self.check_once()
+                self._stop.wait(self.interval_sec)
+        finally:
+            self._changes.close()
+
+
 def _is_test_mode():
     try:
         from jarvis.config import is_test_mode as cfg_test
@@ -213,15 +335,24 @@ def _is_test_mode():
         return os.getenv("JARVIS_TEST_MODE") == "1"
 
 
-def start_test_watcher_if_enabled() -> None:
+def start_test_watcher_if_enabled() -> PollingTestWatcher | None:
     """Start test watcher if env flag is enabled."""
     if _is_test_mode():
         return None
     if os.getenv("JARVIS_ENABLE_TEST_WATCHER") != "1":
         return None
     repo_root = Path(os.getenv("JARVIS_REPO_ROOT") or DEFAULT_REPO_ROOT)
-    interval = int(os.getenv("JARVIS_TEST_WATCHER_INTERVAL_SEC", "60") or 60)
     user_id = int(os.getenv("JARVIS_WATCHER_USER_ID", "1"))
-    watcher = PollingTestWatcher(repo_root=repo_root, user_id=user_id, interval_sec=interval)
+    if os.getenv("JARVIS_TEST_WATCHER_MODE") == "full":
+        interval = int(os.getenv("JARVIS_TEST_WATCHER_INTERVAL_SEC", "60") or 60)
+        watcher = PollingTestWatcher(repo_root=repo_root, user_id=user_id, interval_sec=interval)
+    else:
+        watcher = ChangeAwareTestWatcher(
+            repo_root=repo_root,
+            user_id=user_id,
+            interval_sec=int(os.getenv("JARVIS_TEST_WATCHER_INTERVAL_SEC", "5") or 5),
+            full_interval_sec=int(os.getenv("JARVIS_TEST_WATCHER_FULL_INTERVAL_SEC", "3600") or 3600),
+            backend=(os.getenv("JARVIS_WATCHER_BACKEND") or "auto").lower(),
+        )
     watcher.start()
     return watcher
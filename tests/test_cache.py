@@ -22,3 +22,15 @@ def test_ttlcache_deepcopy_and_clear():
     assert cache.get("k2") == {"a": {"b": 2}}
     cache.clear()
     assert cache.get("k2") is None
+
+
+def test_ttlcache_bounded_lru():
+    cache = TTLCache(default_ttl=60, max_entries=2, max_bytes=10)
+    cache.set("a", "xxxx")
+    cache.set("b", "xxxx")
+    assert cache.get("a") == "xxxx"  # a is now most recently used
+    cache.set("c", "xxxx")  # 12 bytes > 10: b goes
+    assert cache.get("b") is None
+    assert cache.get("a") == "xxxx" and cache.get("c") == "xxxx"
+    cache.set("big", "x" * 11)  # larger than the whole budget: nothing is kept
+    assert len(cache) == 0
@@ -0,0 +1,107 @@
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import jarvis.agent_core.tool_registry as tr
+from jarvis import cancellation
+from jarvis.provider.ollama_client import ollama_request
+
+
+class _SlowHandler(BaseHTTPRequestHandler):
+    received = threading.Event()
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get("Content-Length") or 0))
+        _SlowHandler.received.set()
+        time.sleep(3)
+        body = b'{"response": "late"}'
+        self.send_response(200)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+def _slow_server():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _SlowHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def test_cancel_runs_callbacks_once_and_late_callbacks_immediately():
+    token = cancellation.CancellationToken("t-cb")
+    seen = []
+    token.on_cancel(lambda: seen.append("early"))
+    assert token.cancel("stop") is True
+    assert token.cancel("again") is False
+    token.on_cancel(lambda: seen.append("late"))
+    assert seen == ["early", "late"]
+    assert token.as_future().result(timeout=0) == "stop"
+    assert token.mark_released("ollama") is not None
+    assert token.mark_released("ollama") is None  # first release wins
+
+
+def test_cancel_aborts_blocking_ollama_request():
+    server = _slow_server()
+    url = f"http://127.0.0.1:{server.server_address[1]}/api/generate"
+    result = {}
+
+    def call():
+        result["resp"] = ollama_request(url, {"model": "m"}, trace_id="t-http", retries=2)
+
+    worker = threading.Thread(target=call)
+    worker.start()
+    assert _SlowHandler.received.wait(timeout=10)
+    started = time.monotonic()
+    cancellation.cancel("t-http", reason="test")
+    worker.join(timeout=2)
+    elapsed = time.monotonic() - started
+    server.shutdown()
+    token = cancellation.get_token("t-http")
+    cancellation.release("t-http")
+
+    assert not worker.is_alive()
+    assert elapsed < 1.0  # the server would answer after 3s
+    assert result["resp"]["error"]["type"] == "ClientCancelled"
+    assert token.released["ollama"] < 1.0
+
+
+def test_tool_runner_returns_promptly_on_cancel():
+    tr._reset_registry_for_tests()
+    finish = threading.Event()
+    tr.register_tool(tr.ToolSpec("sleepy", "sleepy", {}, "low"), lambda: finish.wait(5) and "done")
+    tr._allowlist.add("sleepy")
+    runner = tr.ToolRunner()  # own executor, so the abandoned worker can be joined below
+    token = cancellation.CancellationToken("t-tool")
+    threading.Timer(0.1, token.cancel).start()
+
+    started = time.monotonic()
+    with cancellation.use_token(token):
+        res = runner.run("sleepy", {}, user_id=1, session_id="s1", retries=2)
+    elapsed = time.monotonic() - started
+    finish.set()
+    runner._executor.shutdown(wait=True)
+
+    assert elapsed < 1.0
+    assert res.ok is False
+    assert res.error["type"] == "ClientCancelled"
+    assert "tool" in token.released
+
+
+def test_cancelled_token_short_circuits_embeddings(monkeypatch):
+    from jarvis import memory
+
+    monkeypatch.delenv("JARVIS_DISABLE_EMBEDDINGS", raising=False)
+    monkeypatch.delenv("DISABLE_EMBEDDINGS", raising=False)
+    token = cancellation.CancellationToken("t-embed")
+    token.cancel()
+    with cancellation.use_token(token):
+        try:
+            memory._encode("hello", best_effort=True)
+        except cancellation.OperationCancelled:
+            pass
+        else:
+            raise AssertionError("best_effort must not fall back to hash embeddings after a stop")
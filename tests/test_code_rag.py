@@ -2,6 +2,8 @@ import json
 import os
 from pathlib import Path
 
+import numpy as np
+
 from jarvis.code_rag.index import build_index
 from jarvis.code_rag.search import search_code
 
@@ -60,4 +62,112 @@ def test_search_no_hits(tmp_path, monkeypatch):
     build_index(repo_root=repo, index_dir=index_dir, chunk_size=50, overlap=10)
 
     hits = search_code("NON_EXISTENT_TOKEN_456", repo_root=repo, index_dir=index_dir)
-    assert not hits
\ No newline at end of file
+    assert not hits
+
+def test_tokenize_splits_identifiers():
+    from jarvis.code_rag.lexical import tokenize
+
+    tokens = tokenize("def getUserById(user_id): return HTTPServer")
+    for expected in ("getuserbyid", "get", "user", "by", "id", "user_id", "httpserver", "http", "server"):
+        assert expected in tokens
+
+
+def test_bm25_prefers_rare_identifier():
+    from jarvis.code_rag.lexical import LexicalIndex
+
+    lex = LexicalIndex.build([
+        "def helper(): return value value value",
+        "def resolve_token(header): return header",
+        "value = helper()",
+    ])
+    assert lex.search("resolve_token", k=3)[0][0] == 1
+    assert lex.search("nothing_here") == []
+
+
+def test_identifier_query_skips_embedding(tmp_path, monkeypatch):
+    from jarvis.code_rag import index as code_index
+    from jarvis.code_rag import search as code_search
+
+    monkeypatch.delenv("DISABLE_EMBEDDINGS", raising=False)
+    monkeypatch.delenv("JARVIS_DISABLE_EMBEDDINGS", raising=False)
+    monkeypatch.setattr(code_index, "_current_embed_dim", lambda: 8)
+    monkeypatch.setattr(code_index, "_encode", lambda text, **kw: np.ones(8, dtype=np.float32))
+    repo = tmp_path / "repo"
+    src_dir = repo / "src" / "jarvis"
+    src_dir.mkdir(parents=True)
+    (src_dir / "a.py").write_text("def unrelated():\n    return 1\n", encoding="utf-8")
+    (src_dir / "b.py").write_text("def resolve_session_token(req):\n    return req\n", encoding="utf-8")
+    index_dir = tmp_path / "index"
+    build_index(repo_root=repo, index_dir=index_dir, chunk_size=50, overlap=10)
+    assert (code_index._index_dir_for_model(index_dir) / "lexical.json").exists()
+
+    calls = []
+
+    def fake_encode(text, **kw):
+        calls.append(text)
+        return np.ones(8, dtype=np.float32)
+
+    monkeypatch.setattr(code_search, "_encode", fake_encode)
+    hits = search_code("resolve_session_token", repo_root=repo, index_dir=index_dir, k=2)
+    assert hits[0].path.endswith("b.py")
+    assert calls == []
+
+    # Free-text queries still embed and fuse both rankings
+    hits = search_code("where is the session token resolved", repo_root=repo, index_dir=index_dir, k=2)
+    assert calls and hits[0].path.endswith("b.py")
+
+
+def test_rrf_fuse_rewards_agreement():
+    from jarvis.code_rag.search import _rrf_fuse
+
+    fused = _rrf_fuse([[3, 1, 2], [1, 4]], k=3)
+    assert [chunk_id for chunk_id, _ in fused][:1] == [1]
+
+
+def _symbol_repo(tmp_path):
+    repo = tmp_path / "repo"
+    pkg = repo / "src" / "jarvis"
+    pkg.mkdir(parents=True)
+    (pkg / "a.py").write_text(
+        "class Store:\n"
+        "    def save(self):\n"
+        "        return 1\n"
+        "\n"
+        "\n"
+        "def helper():\n"
+        "    return Store().save()\n",
+        encoding="utf-8",
+    )
+    (pkg / "b.py").write_text("from jarvis.a import helper\n\n\ndef run():\n    helper()\n", encoding="utf-8")
+    return repo, pkg
+
+
+def test_symbol_index_definitions_callers_and_incremental_update(tmp_path, monkeypatch):
+    from jarvis.code_rag import symbols
+
+    repo, pkg = _symbol_repo(tmp_path)
+    index_dir = tmp_path / "index"
+    idx = symbols.update_symbol_index(repo, index_dir)
+
+    [save] = idx.definitions("Store.save")
+    assert (save.path, save.kind, save.start_line, save.end_line) == ("src/jarvis/a.py", "method", 2, 3)
+    assert [d.path for d in idx.definitions("jarvis.a.helper")] == ["src/jarvis/a.py"]
+    assert [(c.path, c.line, c.scope) for c in idx.callers("helper")] == [("src/jarvis/b.py", 5, "run")]
+    assert [(i.path, i.line) for i in idx.imports("helper")] == [("src/jarvis/b.py", 1)]
+
+    parsed = []
+    real_parse = symbols._parse_file
+    monkeypatch.setattr(symbols, "_parse_file", lambda p: parsed.append(p.name) or real_parse(p))
+    (pkg / "b.py").write_text("from jarvis.a import helper\n\n\ndef run():\n    helper()\n    helper()\n", encoding="utf-8")
+    (pkg / "a.py").unlink()
+    idx = symbols.update_symbol_index(repo, index_dir, paths=[pkg / "b.py", pkg / "a.py"])
+    assert parsed == ["b.py"]
+    assert len(idx.callers("helper")) == 2
+    assert idx.definitions("helper") == []
+    assert symbols.load_symbol_index(index_dir) is idx  # cached until the file changes
+
+    # A re-check that finds nothing changed leaves symbols.json alone.
+    stamp = (index_dir / symbols.SYMBOLS_FILE).stat().st_mtime_ns
+    assert symbols.ensure_symbol_index(repo, index_dir, max_age=0) is idx
+    assert (index_dir / symbols.SYMBOLS_FILE).stat().st_mtime_ns == stamp
+    assert parsed == ["b.py"]
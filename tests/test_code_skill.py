@@ -29,3 +29,22 @@ def test_intent_detection_danish_and_english():
     assert code_skill._function_intent("what does function handler do?") == "handler"
     assert code_skill._symbol_usage_intent("find hvor symbol foo bruges") == "foo"
     assert code_skill._symbol_usage_intent("where bar is used") == "bar"
+
+
+def test_symbol_questions_answered_from_symbol_index(tmp_path: Path):
+    repo = tmp_path / "repo"
+    pkg = repo / "src" / "jarvis"
+    pkg.mkdir(parents=True)
+    (pkg / "a.py").write_text("def helper():\n    return 1\n", encoding="utf-8")
+    (pkg / "b.py").write_text("from jarvis.a import helper\n\n\ndef run():\n    return helper()\n", encoding="utf-8")
+    kwargs = dict(state=None, user_id="u", session_id=None, ui_lang="en", allowed_tools=None, repo_root=repo, index_dir=tmp_path / "index")
+
+    assert code_skill._definition_intent("where is helper defined?") == "helper"
+    assert code_skill._callers_intent("hvem kalder helper") == "helper"
+
+    res = code_skill.handle_code_question("where is helper defined?", **kwargs)
+    assert res["meta"]["tool"] == "code_symbols"
+    assert "src/jarvis/a.py:1-2" in res["text"]
+
+    res = code_skill.handle_code_question("who calls helper?", **kwargs)
+    assert "src/jarvis/b.py:5 in run" in res["text"]
@@ -0,0 +1,84 @@
+import json
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+from fastapi.testclient import TestClient
+
+from jarvis import lazy, startup
+
+SRC = Path(__file__).resolve().parents[1] / "src"
+
+
+def test_lazy_import_defers_until_first_use(tmp_path, monkeypatch):
+    (tmp_path / "lazy_probe_mod.py").write_text("LOADED = True\nVALUE = 42\n")
+    monkeypatch.syspath_prepend(str(tmp_path))
+    sys.modules.pop("lazy_probe_mod", None)
+
+    mod = lazy.lazy_import("lazy_probe_mod")
+    assert "lazy_probe_mod" not in sys.modules
+    assert not lazy.is_loaded(mod)
+    assert not hasattr(mod, "__wrapped__")  # introspection must not import
+    assert "lazy_probe_mod" not in sys.modules
+
+    assert mod.VALUE == 42
+    assert lazy.is_loaded(mod)
+    stats = {r["module"]: r for r in lazy.import_stats()}
+    assert stats["lazy_probe_mod"]["kind"] == "lazy"
+    assert stats["lazy_probe_mod"]["ok"]
+
+
+def test_lazy_import_fallback_for_missing_module():
+    class Stub:
+        answer = "stub"
+
+    mod = lazy.lazy_import("jarvis_definitely_missing_mod", fallback=Stub)
+    assert mod.answer == "stub"
+    assert lazy.uses_fallback(mod)
+
+
+def test_run_startup_runs_steps_once_and_reports():
+    startup._reset_for_tests()
+    calls = []
+
+    def warm_cache():
+        calls.append(1)
+
+    startup.register_startup_step(warm_cache)
+    try:
+        startup.run_startup()
+        startup.run_startup()
+        assert calls == [1]
+        report = startup.startup_report()
+        phase_names = [p["phase"] for p in report["phases"]]
+        assert any(name.endswith("warm_cache") for name in phase_names)
+        assert report["rss_bytes"] > 0
+        assert "numpy" in report["heavy_modules"]
+    finally:
+        startup._steps.remove(warm_cache)
+        startup._reset_for_tests()
+
+
+def test_server_import_does_not_load_heavy_dependencies():
+    code = (
+        "import json, sys\n"
+        "import jarvis.server\n"
+        "heavy = ['numpy', 'faiss', 'feedparser', 'ddgs', 'gtts', 'PIL']\n"
+        "print(json.dumps([m for m in heavy if m in sys.modules]))\n"
+    )
+    env = dict(os.environ, PYTHONPATH=str(SRC), JARVIS_TEST_MODE="1")
+    out = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, env=env, timeout=120)
+    assert out.returncode == 0, out.stderr
+    assert json.loads(out.stdout.strip().splitlines()[-1]) == []
+
+
+def test_admin_startup_endpoint():
+    from jarvis.server import app
+
+    client = TestClient(app)
+    assert client.get("/admin/startup").status_code in (401, 403)
+    resp = client.get("/admin/startup", headers={"Authorization": "Bearer devkey"})
+    assert resp.status_code == 200
+    modules = [r["module"] for r in resp.json()["imports"]]
+    assert "jarvis.server" in modules
@@ -0,0 +1,101 @@
+import os
+
+import httpx
+
+from jarvis import files, memory
+from jarvis.loadtest import FakeOllama, FakeOllamaConfig, LoadConfig, percentile, run_load
+
+
+def test_fake_ollama_is_deterministic():
+    cfg = FakeOllamaConfig(latency_ms=0, tokens_per_sec=0, reply_tokens=5, embed_dim=16, embed_latency_ms=0)
+    with FakeOllama(cfg) as fake:
+        chat = {"model": "m", "messages": [{"role": "user", "content": "hi"}], "stream": False}
+        first = httpx.post(f"{fake.url}/api/chat", json=chat).json()
+        second = httpx.post(f"{fake.url}/api/chat", json=chat).json()
+        lines = httpx.post(f"{fake.url}/api/chat", json={**chat, "stream": True}).text.splitlines()
+        emb = httpx.post(f"{fake.url}/api/embeddings", json={"prompt": "hi"}).json()["embedding"]
+        stats = fake.stats.snapshot()
+    assert first["message"]["content"] == second["message"]["content"]
+    assert len(lines) == 6 and '"done": true' in lines[-1]
+    assert len(emb) == 16 and abs(sum(v * v for v in emb) - 1.0) < 1e-9
+    assert stats["requests"]["/api/chat"] == 3 and stats["tokens"] == 15
+
+
+def test_percentile_nearest_rank():
+    values = [float(v) for v in range(1, 101)]
+    assert percentile(values, 50) == 50.0
+    assert percentile(values, 99) == 99.0
+    assert percentile([3.0], 95) == 3.0
+    assert percentile([], 50) is None
+
+
+def test_run_load_reports_per_endpoint(monkeypatch, tmp_path):
+    for key in ("JARVIS_DATA_DIR", "JARVIS_DB_PATH", "OLLAMA_URL", "OLLAMA_EMBED_URL", "OLLAMA_MODEL", "JARVIS_ENABLE_RAG", "TTS"):
+        monkeypatch.setenv(key, "")
+    monkeypatch.setattr(files, "WORKSPACE_ROOT", files.WORKSPACE_ROOT)
+    monkeypatch.setattr(memory, "DATA_DIR", memory.DATA_DIR)
+
+    report = run_load(
+        LoadConfig(users=2, duration_s=1.0, mix={"chat_stream": 1, "sessions": 1, "notifications": 1}),
+        FakeOllamaConfig(latency_ms=5, tokens_per_sec=0, reply_tokens=8, embed_dim=32),
+        workdir=str(tmp_path),
+        transport="asgi",
+    )
+
+    assert report["requests"] > 0
+    chat = report["endpoints"]["chat_stream"]
+    assert chat["errors"] == 0 and chat["ttft_p50_ms"] is not None
+    for name in ("sessions", "notifications"):
+        entry = report["endpoints"].get(name)
+        if entry:
+            assert entry["error_rate"] == 0.0 and entry["p50_ms"] <= entry["p95_ms"] <= entry["p99_ms"]
+    assert report["ollama"]["requests"].get("/v1/chat/completions", 0) >= chat["count"]
+
+
+def test_microbench_runs_offline_and_flags_regressions():
+    from jarvis.loadtest import microbench
+
+    results = microbench.run(["_dedupe_repeated_words", "TTLCache"], min_time=0.001, repeats=1)
+    assert set(results) == {"agent._dedupe_repeated_words", "cache.TTLCache.get_set"}
+    assert all(r["ns_per_op"] > 0 and r["alloc_bytes"] >= 0 for r in results.values())
+
+    baseline = {name: {"ns_per_op": r["ns_per_op"] * 10} for name, r in results.items()}
+    assert microbench.compare(results, baseline, 0.25) == []
+    baseline["agent._dedupe_repeated_words"]["ns_per_op"] = results["agent._dedupe_repeated_words"]["ns_per_op"] / 2
+    assert microbench.compare(results, baseline, 0.25) == ["agent._dedupe_repeated_words"]
+
+
+def test_storagebench_flags_scans_through_aliases():
+    from jarvis.loadtest.storagebench import normalize, plan_flags, table_aliases
+
+    sql = "SELECT s.id FROM messages m JOIN sessions s ON m.session_id = s.id WHERE s.user_id = 7 AND m.content LIKE '%it''s%'"
+    aliases = table_aliases(sql)
+    assert aliases["m"] == "messages" and aliases["s"] == "sessions"
+    assert normalize(sql).endswith("s.user_id = ? AND m.content LIKE ?")
+    flags = plan_flags(["SCAN m", "SEARCH s USING INDEX sqlite_autoindex_sessions_1 (id=?)", "USE TEMP B-TREE FOR ORDER BY"],
+                       {"messages": 5000, "sessions": 10}, 1000, aliases)
+    assert flags == ["full scan messages (5,000 rows)", "use temp b-tree for order by"]
+    assert plan_flags(["SCAN m"], {"messages": 50}, 1000, aliases) == []
+
+
+def test_dbgen_and_storagebench_on_small_database(monkeypatch, tmp_path):
+    from jarvis import db
+    from jarvis.loadtest import dbgen, storagebench
+
+    monkeypatch.setenv("JARVIS_DB_PATH", str(tmp_path / "unused.db"))
+    monkeypatch.setattr(db, "DB_PATH", db.DB_PATH)
+    monkeypatch.setattr(files, "WORKSPACE_ROOT", files.WORKSPACE_ROOT)
+    scale = dbgen.Scale(users=4, sessions_per_user=2, messages_per_session=4, notes_per_user=2, files_per_user=1,
+                        events_per_user=3, tool_calls_per_user=3)
+    path = str(tmp_path / "big.db")
+    first = dbgen.generate(path, scale, seed=3)
+    assert first["rows"]["users"] == 4 and first["rows"]["messages"] > 0
+    assert dbgen.generate(path, scale, seed=3)["rows"]["users"] == 0  # same seed: nothing new
+
+    workspace = files.WORKSPACE_ROOT
+    report = storagebench.run(path, repeat=1, min_scan_rows=1)
+    assert os.environ["JARVIS_DB_PATH"] == str(tmp_path / "unused.db")
+    assert files.WORKSPACE_ROOT == workspace
+    assert set(report["calls"]) >= {name for name, _ in storagebench.ENDPOINTS}
+    assert any(f.startswith("full scan") for row in report["statements"] for f in row["flags"])
+    assert all(row["plan"] for row in report["statements"])
@@ -0,0 +1,102 @@
+import gzip
+
+from jarvis import log_reader
+
+
+def _write_log(path, count):
+    levels = ["INFO", "WARNING", "ERROR"]
+    lines = [
+        f"2026-10-19 11:{i // 60:02d}:{i % 60:02d},000 {levels[i % 3]} event n={i} trace=tr{i % 7:04d}"
+        for i in range(count)
+    ]
+    path.write_text("\n".join(lines) + "\n", encoding="utf-8")
+    return lines
+
+
+def _page_all(fetch):
+    pages, cursor = [], None
+    while True:
+        page = fetch(cursor)
+        pages = page.lines + pages
+        if page.cursor is None:
+            return pages
+        assert cursor is None or page.cursor < cursor
+        cursor = page.cursor
+
+
+def test_tail_returns_last_lines_and_pages_backwards(tmp_path, monkeypatch):
+    monkeypatch.setattr(log_reader, "BLOCK_SIZE", 128)
+    path = tmp_path / "system.log"
+    lines = _write_log(path, 300)
+
+    page = log_reader.tail(path, 25)
+    assert page.lines == lines[-25:]
+    assert page.cursor is not None
+    assert log_reader.tail(path, 1000).lines == lines
+    assert log_reader.tail(path, 1000).cursor is None
+    assert _page_all(lambda before: log_reader.tail(path, 40, before)) == lines
+
+
+def test_tail_gzip_rotation(tmp_path):
+    plain = tmp_path / "plain.log"
+    lines = _write_log(plain, 120)
+    path = tmp_path / "system.log.2026-10-18.gz"
+    path.write_bytes(gzip.compress(plain.read_bytes()))
+
+    assert log_reader.tail(path, 10).lines == lines[-10:]
+    assert _page_all(lambda before: log_reader.tail(path, 33, before)) == lines
+
+
+def test_search_filters_by_level_and_trace(tmp_path, monkeypatch):
+    monkeypatch.setattr(log_reader, "INDEX_BLOCK_SIZE", 512)
+    path = tmp_path / "system.log"
+    lines = _write_log(path, 400)
+
+    errors = [l for l in lines if " ERROR " in l]
+    assert log_reader.search(path, level="error", limit=1000).lines == errors
+    assert _page_all(lambda before: log_reader.search(path, level="ERROR", limit=17, before=before)) == errors
+
+    traced = [l for l in lines if l.endswith("trace=tr0003") and " WARNING " in l]
+    assert log_reader.search(path, level="WARNING", trace_id="TR0003", limit=1000).lines == traced
+    assert log_reader.search(path, trace_id="missing-trace").lines == []
+    assert log_reader.search(path, contains="n=399 ").lines == [lines[399]]
+    assert log_reader.index_path(path).exists()
+
+    gz = tmp_path / "system.log.1.gz"
+    gz.write_bytes(gzip.compress(path.read_bytes()))
+    assert log_reader.search(gz, level="ERROR", limit=5).lines == errors[-5:]
+
+
+def test_search_index_follows_appends(tmp_path, monkeypatch):
+    monkeypatch.setattr(log_reader, "INDEX_BLOCK_SIZE", 512)
+    path = tmp_path / "system.log"
+    _write_log(path, 50)
+    assert log_reader.search(path, trace_id="late0001").lines == []
+
+    with open(path, "a", encoding="utf-8") as fh:
+        fh.write("2026-10-19 12:00:00,000 CRITICAL agent_task_error trace=late0001\n")
+        fh.write("2026-10-19 12:00:01,000 INFO partial line trace=late0001")
+    found = log_reader.search(path, trace_id="late0001")
+    assert found.lines == ["2026-10-19 12:00:00,000 CRITICAL agent_task_error trace=late0001"]
+    assert log_reader.search(path, level="CRITICAL").lines == found.lines
+
+    # Only a partial line appended: nothing new indexed, the sidecar is not rewritten.
+    stamp = log_reader.index_path(path).stat().st_mtime_ns
+    with open(path, "a", encoding="utf-8") as fh:
+        fh.write(" still partial")
+    assert log_reader.search(path, level="CRITICAL").lines == found.lines
+    assert log_reader.index_path(path).stat().st_mtime_ns == stamp
+
+
+def test_prune_indexes_drops_sidecars_of_removed_logs(tmp_path):
+    kept, gone = tmp_path / "system.log", tmp_path / "system.log.1.gz"
+    _write_log(kept, 10)
+    gone.write_bytes(gzip.compress(kept.read_bytes()))
+    log_reader.search(kept, level="ERROR")
+    log_reader.search(gone, level="ERROR")
+    gone.unlink()
+
+    assert log_reader.prune_indexes(tmp_path) == 1
+    assert log_reader.index_path(kept).exists()
+    assert not log_reader.index_path(gone).exists()
+    assert log_reader.prune_indexes(tmp_path / "missing") == 0
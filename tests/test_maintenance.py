@@ -0,0 +1,69 @@
+import asyncio
+
+from jarvis import maintenance
+
+
+def test_lease_is_exclusive_until_it_expires(tmp_path, monkeypatch):
+    monkeypatch.setenv("JARVIS_DB_PATH", str(tmp_path / "m.db"))
+    assert maintenance.acquire_lease("sweep", 60, now=1000.0)
+    monkeypatch.setattr(maintenance, "HOLDER", "other-worker")
+    assert not maintenance.acquire_lease("sweep", 60, now=1030.0)
+    assert maintenance.acquire_lease("sweep", 60, now=1060.0)
+
+
+def test_holder_renews_its_lease_across_jittered_runs(tmp_path, monkeypatch):
+    monkeypatch.setenv("JARVIS_DB_PATH", str(tmp_path / "m.db"))
+    clock = [1000.0]
+    monkeypatch.setattr(maintenance.time, "time", lambda: clock[0])
+    monkeypatch.setattr(maintenance.random, "uniform", lambda low, high: low)  # earliest jittered start
+    calls = []
+    job = maintenance.Job("sweep", lambda: calls.append(clock[0]), interval_s=60, jitter=0.1)
+
+    for _ in range(3):  # first run plus two jittered cycles
+        assert maintenance.run_job(job)["ok"]
+        job.schedule_next(0.0)
+        clock[0] += job.next_due  # 54s later, before the 60s lease expires
+    assert calls == [1000.0, 1054.0, 1108.0]
+
+    monkeypatch.setattr(maintenance, "HOLDER", "other-worker")
+    assert maintenance.run_job(job) is None
+
+
+def test_run_job_records_history_and_skips_when_leased(tmp_path, monkeypatch):
+    monkeypatch.setenv("JARVIS_DB_PATH", str(tmp_path / "m.db"))
+    monkeypatch.setattr(maintenance, "HISTORY_PER_JOB", 3)
+    calls = []
+    job = maintenance.Job("count", lambda: calls.append(1) or {"removed": len(calls)}, interval_s=3600)
+    local = maintenance.Job("local", lambda: 1 / 0, interval_s=3600, shared=False)
+
+    assert maintenance.run_job(job)["ok"]
+    holder = maintenance.HOLDER
+    monkeypatch.setattr(maintenance, "HOLDER", "other-worker")
+    assert maintenance.run_job(job) is None  # lease held for the interval
+    monkeypatch.setattr(maintenance, "HOLDER", holder)
+    for _ in range(5):
+        maintenance.run_job(local)
+    assert calls == [1]
+
+    runs = maintenance.history()
+    assert [r["job"] for r in runs].count("local") == 3
+    assert not runs[0]["ok"] and "ZeroDivisionError" in runs[0]["error"]
+    assert maintenance.history("count")[0]["result"] == '{"removed": 1}'
+
+
+def test_scheduler_runs_due_jobs_in_background(tmp_path, monkeypatch):
+    monkeypatch.setenv("JARVIS_DB_PATH", str(tmp_path / "m.db"))
+    monkeypatch.setattr(maintenance, "_jobs", {})
+    monkeypatch.setattr(maintenance, "START_DELAY_S", 0.0)
+    ran = []
+    maintenance.register_job("tick", lambda: ran.append(1), 1.0, shared=False, jitter=0.0)
+
+    async def drive():
+        task = maintenance.start()
+        await asyncio.sleep(0.3)
+        maintenance.stop()
+        await asyncio.gather(task, return_exceptions=True)
+
+    asyncio.run(drive())
+    assert ran == [1]
+    assert maintenance.jobs()[0].last["ok"]
@@ -0,0 +1,54 @@
+import numpy as np
+
+from jarvis import memory
+
+
+def _brute_force(data, queries, k):
+    dists = ((data[None, :, :] - queries[:, None, :]) ** 2).sum(axis=2)
+    return np.argsort(dists, axis=1, kind="stable")[:, :k]
+
+
+def test_fallback_index_matches_brute_force_and_grows():
+    rng = np.random.default_rng(0)
+    data = rng.random((1000, 16), dtype=np.float32)
+    index = memory._DummyIndex(16)
+    for chunk in np.array_split(data, 7):  # several growths of the backing buffer
+        index.add(chunk)
+    assert index.ntotal == 1000
+    assert index.vectors.flags["C_CONTIGUOUS"]
+
+    queries = rng.random((300, 16), dtype=np.float32)  # more than one query chunk
+    dists, ids = index.search(queries, 5)
+    assert ids.shape == (300, 5) and ids.dtype == np.int64
+    assert (ids == _brute_force(data, queries, 5)).all()
+    assert (np.diff(dists, axis=1) >= 0).all()
+
+
+def test_fallback_index_pads_like_faiss_when_k_exceeds_ntotal():
+    index = memory._DummyIndex(4)
+    _, ids = index.search(np.zeros((1, 4), dtype=np.float32), 3)
+    assert ids.tolist() == [[-1, -1, -1]]
+    index.add(np.eye(4, dtype=np.float32)[:2])
+    dists, ids = index.search(np.eye(4, dtype=np.float32)[:1], 3)
+    assert ids.tolist() == [[0, 1, -1]]
+    assert np.isinf(dists[0, 2])
+
+
+def test_fallback_index_roundtrip_memory_mapped(tmp_path, monkeypatch):
+    monkeypatch.setenv("JARVIS_MEMORY_FALLBACK_MMAP", "1")
+    path = str(tmp_path / "u.faiss")
+    data = np.random.default_rng(1).random((50, 8), dtype=np.float32)
+    index = memory._DummyIndex(8)
+    index.add(data)
+    memory._DummyFaiss.write_index(index, path)
+
+    loaded = memory._DummyFaiss.read_index(path)
+    assert isinstance(loaded._data, np.memmap)
+    assert loaded.ntotal == 50
+    assert loaded.search(data[3:4], 1)[1][0][0] == 3
+
+    loaded.add(data[:1])  # first add copies out of the read-only mapping
+    assert not isinstance(loaded._data, np.memmap)
+    assert loaded.ntotal == 51
+    memory._DummyFaiss.write_index(loaded, path)
+    assert memory._DummyFaiss.read_index(path).ntotal == 51
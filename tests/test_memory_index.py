@@ -0,0 +1,94 @@
+import numpy as np
+import pytest
+from fastapi.testclient import TestClient
+
+from jarvis import memory, memory_index
+
+faiss = pytest.importorskip("faiss")
+
+
+def _store(tmp_path, n=600, dim=32):
+    rng = np.random.default_rng(1)
+    vectors = rng.random((n, dim), dtype=np.float32)
+    index = faiss.IndexFlatL2(dim)
+    index.add(vectors)
+    store = memory.MemoryStore(
+        index=index,
+        memories=[f"user: memory {i}" for i in range(n)],
+        index_file=str(tmp_path / "u.faiss"),
+        data_file=str(tmp_path / "u.json"),
+    )
+    return store, vectors
+
+
+def test_store_promoted_to_hnsw_past_threshold(tmp_path, monkeypatch):
+    monkeypatch.setattr(memory, "DATA_DIR", str(tmp_path))
+    monkeypatch.setenv("JARVIS_MEMORY_ANN_THRESHOLD", "500")
+    store, vectors = _store(tmp_path)
+
+    thread = memory_index.maybe_promote(store)
+    assert thread is not None
+    assert memory_index.wait_for_build(store, timeout=60)
+
+    assert memory_index.index_kind(store.index) == "hnsw"
+    assert store.index.ntotal == len(vectors)
+    assert store.build_status["state"] == "ready"
+    _, ids = store.index.search(vectors[:1], 1)
+    assert ids[0][0] == 0
+    # persisted and reloaded as HNSW with search params applied
+    monkeypatch.setenv("JARVIS_MEMORY_HNSW_EF_SEARCH", "40")
+    reloaded = memory_index.configure_search(faiss.read_index(store.index_file))
+    assert memory_index.index_kind(reloaded) == "hnsw"
+    assert reloaded.hnsw.efSearch == 40
+
+
+def test_below_threshold_or_flat_strategy_stays_flat(tmp_path, monkeypatch):
+    store, _ = _store(tmp_path, n=100)
+    monkeypatch.setenv("JARVIS_MEMORY_ANN_THRESHOLD", "500")
+    assert memory_index.maybe_promote(store) is None
+    monkeypatch.setenv("JARVIS_MEMORY_ANN_THRESHOLD", "10")
+    monkeypatch.setenv("JARVIS_MEMORY_INDEX", "flat")
+    assert memory_index.maybe_promote(store) is None
+
+
+def test_ivf_recall_report_against_flat(tmp_path, monkeypatch):
+    monkeypatch.setattr(memory, "DATA_DIR", str(tmp_path))
+    store, _ = _store(tmp_path, n=2000)
+    memory_index.maybe_promote(store, force="ivf")
+    assert memory_index.wait_for_build(store, timeout=60)
+    assert memory_index.index_kind(store.index) == "ivf"
+    nprobe = store.index.nprobe
+
+    report = memory_index.recall_report(store, k=5, queries=50)
+    assert report["kind"] == "ivf"
+    assert report["flat"]["recall"] == 1.0
+    points = report["points"]
+    assert [p["param"] for p in points] == ["nprobe"] * len(points)
+    assert points[-1]["recall"] >= points[0]["recall"]
+    assert points[-1]["recall"] > 0.9
+    assert store.index.nprobe == nprobe  # the sweep runs on a copy
+    assert report["current"] == {"param": "nprobe", "value": nprobe}
+
+
+def test_admin_memory_index_endpoints(tmp_path, monkeypatch):
+    from jarvis.server import app
+
+    store, _ = _store(tmp_path, n=300)
+    monkeypatch.setattr(memory, "_stores", {"idx-user": store})
+    monkeypatch.setattr(memory, "DATA_DIR", str(tmp_path))
+    client = TestClient(app)
+    headers = {"Authorization": "Bearer devkey"}
+
+    assert client.get("/admin/memory/index", params={"user_id": "idx-user"}).status_code in (401, 403)
+    status = client.get("/admin/memory/index", params={"user_id": "idx-user"}, headers=headers).json()
+    assert status["kind"] == "flat" and status["ntotal"] == 300
+
+    resp = client.post("/admin/memory/index/rebuild", params={"user_id": "idx-user", "kind": "bogus"}, headers=headers)
+    assert resp.status_code == 400
+    resp = client.post("/admin/memory/index/rebuild", params={"user_id": "idx-user", "kind": "hnsw"}, headers=headers)
+    assert resp.status_code == 200
+    assert memory_index.wait_for_build(store, timeout=60)
+
+    report = client.get("/admin/memory/index/report", params={"user_id": "idx-user", "k": 5, "queries": 20}, headers=headers).json()
+    assert report["kind"] == "hnsw"
+    assert [p["value"] for p in report["points"]] == list(memory_index.HNSW_EF_SWEEP)
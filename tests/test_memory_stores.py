@@ -0,0 +1,99 @@
+import threading
+import time
+
+import numpy as np
+
+from jarvis import memory
+
+
+def _store(name, n, dim=256):
+    index = memory.faiss.IndexFlatL2(dim)
+    if n:
+        index.add(np.zeros((n, dim), dtype=np.float32))
+    return memory.MemoryStore(index=index, memories=["x" * 100] * n, index_file=f"{name}.faiss", data_file=f"{name}.json")
+
+
+def test_registry_evicts_least_recently_used_past_budget(monkeypatch):
+    monkeypatch.setenv("JARVIS_MEMORY_STORE_BUDGET_MB", "1")
+    reg = memory.StoreRegistry()
+    # ~1KB per vector + text, so 400 vectors is ~0.45MB
+    reg["a"] = _store("a", 400)
+    reg["b"] = _store("b", 400)
+    assert reg.get("a") is not None  # a is now most recently used
+    reg["c"] = _store("c", 400)
+
+    assert "b" not in reg
+    assert set(reg) == {"a", "c"}
+    stats = reg.stats()
+    assert stats["evictions"] == 1
+    assert stats["bytes"] <= stats["budget_bytes"]
+
+
+def test_registry_skips_stores_in_use(monkeypatch):
+    monkeypatch.setenv("JARVIS_MEMORY_STORE_MAX", "1")
+    reg = memory.StoreRegistry()
+    busy = _store("busy", 1)
+    reg["busy"] = busy
+    held = threading.Event()
+    release = threading.Event()
+
+    def hold():
+        with busy.lock:
+            held.set()
+            release.wait(5)
+
+    t = threading.Thread(target=hold)
+    t.start()
+    held.wait(5)
+    reg["other"] = _store("other", 1)
+    assert "busy" in reg  # locked by another thread, not evicted
+    release.set()
+    t.join()
+    reg.get("other")
+    assert "busy" not in reg
+
+
+def test_concurrent_first_access_loads_store_once(monkeypatch):
+    monkeypatch.setattr(memory, "_stores", memory.StoreRegistry())
+    loads = []
+
+    def slow_load(user_id):
+        loads.append(user_id)
+        time.sleep(0.05)
+        return _store(user_id, 0)
+
+    monkeypatch.setattr(memory, "_load_store", slow_load)
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(memory._get_store("u1"))) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert loads == ["u1"]
+    assert len({id(s) for s in results}) == 1
+
+
+def test_preload_store_warms_registry_in_background(monkeypatch):
+    monkeypatch.setattr(memory, "_stores", memory.StoreRegistry())
+    monkeypatch.setattr(memory, "_load_store", lambda user_id: _store(user_id, 0))
+    monkeypatch.delenv("JARVIS_ENABLE_RAG", raising=False)
+    assert memory.preload_store("u2") is None  # memory unused without RAG
+
+    monkeypatch.setenv("JARVIS_ENABLE_RAG", "1")
+    future = memory.preload_store("u2")
+    assert future is not None
+    future.result(timeout=5)
+    assert "u2" in memory._stores
+    assert memory.preload_store("u2") is None
+
+
+def test_pinned_store_is_not_evicted_until_released(monkeypatch):
+    monkeypatch.setenv("JARVIS_MEMORY_STORE_MAX", "1")
+    monkeypatch.setattr(memory, "_stores", memory.StoreRegistry())
+    monkeypatch.setattr(memory, "_load_store", lambda user_id: _store(user_id, 1))
+
+    with memory.pinned_store("held") as held:
+        memory._get_store("other")  # would evict "held" if it were not pinned
+        assert memory._get_store("held") is held
+    memory._get_store("third")
+    assert "held" not in memory._stores
@@ -0,0 +1,70 @@
+from fastapi.testclient import TestClient
+
+from jarvis import metrics
+from jarvis.metrics import MetricsRegistry
+
+
+def test_histogram_renders_cumulative_buckets():
+    reg = MetricsRegistry()
+    hist = reg.histogram("demo_seconds", "Demo latency.", ("stage",), buckets=(0.1, 1.0))
+    hist.observe(0.05, stage="a")
+    hist.observe(0.5, stage="a")
+    hist.observe(5.0, stage="a")
+    text = reg.render_prometheus()
+    assert "# TYPE demo_seconds histogram" in text
+    assert 'demo_seconds_bucket{stage="a",le="0.1"} 1' in text
+    assert 'demo_seconds_bucket{stage="a",le="1"} 2' in text
+    assert 'demo_seconds_bucket{stage="a",le="+Inf"} 3' in text
+    assert 'demo_seconds_count{stage="a"} 3' in text
+
+
+def test_histogram_quantile_estimate():
+    reg = MetricsRegistry()
+    hist = reg.histogram("q_seconds", "Quantiles.", buckets=(0.01, 0.1, 1.0))
+    for _ in range(90):
+        hist.observe(0.005)
+    for _ in range(10):
+        hist.observe(0.5)
+    assert hist.quantile(0.5) <= 0.01
+    assert 0.1 < hist.quantile(0.99) <= 1.0
+
+
+def test_counter_and_label_escaping():
+    reg = MetricsRegistry()
+    counter = reg.counter("demo_total", "Demo counter.", ("tool",))
+    counter.inc(tool='we"ird')
+    counter.inc(2, tool='we"ird')
+    assert counter.value(tool='we"ird') == 3
+    assert 'demo_total{tool="we\\"ird"} 3' in reg.render_prometheus()
+
+
+def test_reregister_returns_same_metric():
+    reg = MetricsRegistry()
+    assert reg.counter("x_total", "x") is reg.counter("x_total", "x")
+
+
+def test_metrics_endpoint_requires_admin_and_reports_http_latency():
+    from jarvis.server import app
+
+    client = TestClient(app)
+    assert client.get("/metrics").status_code in (401, 403)
+    client.get("/status")
+    resp = client.get("/metrics", headers={"Authorization": "Bearer devkey"})
+    assert resp.status_code == 200
+    assert resp.headers["content-type"].startswith("text/plain")
+    assert 'jarvis_http_request_duration_seconds_count{method="GET",route="/status",status="200"}' in resp.text
+
+
+def test_turn_metrics_are_tracked_per_user(monkeypatch):
+    from jarvis.agent_core import orchestrator
+
+    def fake_turn(user_id, *args):
+        orchestrator.set_last_metric("llm_ms", 12.0 if user_id == "alice" else 99.0)
+        return {"text": "ok"}
+
+    monkeypatch.setattr(orchestrator, "_handle_turn", fake_turn)
+    orchestrator.handle_turn("alice", "hej")
+    orchestrator.handle_turn("bob", "hej")
+    assert orchestrator.get_last_metrics("alice")["llm_ms"] == 12.0
+    assert orchestrator.get_last_metrics("bob")["llm_ms"] == 99.0
+    assert metrics.STAGE_SECONDS.count(stage="turn_total") >= 2
@@ -39,3 +39,65 @@ def test_mark_notification_read(tmp_path, monkeypatch):
     # Check it's marked as read
     notifications = list_notifications(1)
     assert notifications[0]["read"]
+
+
+def test_unread_count_is_maintained_incrementally(tmp_path, monkeypatch):
+    from jarvis.db import get_conn
+    from jarvis.notifications.store import get_unread_notifications_count, mark_all_notifications_read
+
+    monkeypatch.setenv("JARVIS_DB_PATH", str(tmp_path / "test.db"))
+    with get_conn() as conn:
+        conn.execute("INSERT INTO events (id, user_id, message, created_at) VALUES ('legacy', 2, 'old', '2026-01-01')")
+        conn.commit()
+    first = add_notification(2, "info", "One", "body")
+    add_notification(2, "info", "Two", "body")
+    add_notification(3, "info", "Other user", "body")
+    assert get_unread_notifications_count(2) == 3  # the legacy row is counted on first use
+    assert get_unread_notifications_count(3) == 1
+
+    assert mark_notification_read(2, first)
+    assert mark_notification_read(2, first)
+    assert get_unread_notifications_count(2) == 2
+    mark_all_notifications_read(2)
+    assert get_unread_notifications_count(2) == 0
+    assert get_unread_notifications_count(3) == 1
+    with get_conn() as conn:
+        plan = " ".join(r[3] for r in conn.execute("EXPLAIN QUERY PLAN SELECT COUNT(*) FROM events WHERE user_id = 2 AND read = 0"))
+    assert "idx_events_user_read_created_type" in plan
+
+
+def test_new_notifications_are_published_to_their_owner(tmp_path, monkeypatch):
+    from jarvis import events
+    from jarvis.server import _event_visible_to
+
+    monkeypatch.setenv("JARVIS_DB_PATH", str(tmp_path / "test.db"))
+    events.reset_for_tests()
+    seen = []
+    events.subscribe("notification.created", lambda _t, payload: seen.append(payload))
+    notif_id = add_notification(4, "warning", "Disk", "almost full")
+
+    assert seen and seen[-1]["id"] == notif_id
+    assert seen[-1]["user_id"] == 4 and seen[-1]["unread_count"] == 1
+    ev = {"type": "notification.created", "payload": seen[-1]}
+    assert _event_visible_to(ev, 4)
+    assert not _event_visible_to(ev, 5)
+    assert _event_visible_to({"type": "chat.end", "payload": {"session_id": "s"}}, 5)
+
+
+def test_read_is_published_only_when_the_unread_count_changes(tmp_path, monkeypatch):
+    from jarvis import events
+    from jarvis.notifications.store import mark_all_notifications_read
+
+    monkeypatch.setenv("JARVIS_DB_PATH", str(tmp_path / "test.db"))
+    events.reset_for_tests()
+    seen = []
+    events.subscribe("notification.read", lambda _t, payload: seen.append(payload))
+    first = add_notification(6, "info", "One", "body")
+    add_notification(6, "info", "Two", "body")
+
+    assert mark_notification_read(6, first)
+    assert mark_notification_read(6, first)  # already read: still True, but no second push
+    assert [(p["id"], p["unread_count"]) for p in seen] == [(first, 1)]
+    mark_all_notifications_read(6)
+    mark_all_notifications_read(6)
+    assert [(p["id"], p["unread_count"]) for p in seen] == [(first, 1), (None, 0)]
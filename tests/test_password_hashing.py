@@ -0,0 +1,74 @@
+import asyncio
+import hashlib
+import os
+
+import pytest
+
+from jarvis import auth
+from jarvis.db import get_conn
+
+
+@pytest.fixture
+def db(tmp_path, monkeypatch):
+    monkeypatch.setenv("JARVIS_DB_PATH", str(tmp_path / "db.sqlite"))
+    monkeypatch.setenv("JARVIS_PASSWORD_ITERATIONS", "20000")
+    return tmp_path
+
+
+def _stored_hash(username: str) -> str:
+    with get_conn() as conn:
+        return conn.execute("SELECT password_hash FROM users WHERE username = ?", (username,)).fetchone()[0]
+
+
+def test_hash_format_and_legacy_verification(monkeypatch):
+    monkeypatch.setenv("JARVIS_PASSWORD_ITERATIONS", "20000")
+    stored = auth._hash_password("secret")
+    assert stored.startswith("pbkdf2_sha256$20000$")
+    assert auth._verify_password("secret", stored)
+    assert not auth._verify_password("wrong", stored)
+    assert not auth._needs_rehash(stored)
+
+    salt = os.urandom(16)
+    legacy = salt.hex() + ":" + hashlib.pbkdf2_hmac("sha256", b"secret", salt, 120_000).hex()
+    assert auth._verify_password("secret", legacy)
+    assert auth._needs_rehash(legacy)
+
+
+def test_login_rehashes_when_cost_changes(db, monkeypatch):
+    auth.register_user("erin", "secret", email="erin@example.com")
+    assert _stored_hash("erin").startswith("pbkdf2_sha256$20000$")
+
+    monkeypatch.setenv("JARVIS_PASSWORD_ITERATIONS", "30000")
+    result = asyncio.run(auth.login_user_async("erin", "secret"))
+    assert result and result["token"]
+    assert _stored_hash("erin").startswith("pbkdf2_sha256$30000$")
+    assert asyncio.run(auth.login_user_async("erin", "nope")) is None
+    assert auth.login_user("erin", "secret")["token"]
+
+
+def test_hashing_runs_off_the_event_loop_thread(db, monkeypatch):
+    import threading
+
+    seen = []
+    real = auth._hash_password
+
+    def spy(*args, **kwargs):
+        seen.append(threading.current_thread().name)
+        return real(*args, **kwargs)
+
+    monkeypatch.setattr(auth, "_hash_password", spy)
+    asyncio.run(auth.register_user_async("frank", "secret", email="f@example.com"))
+    assert seen and seen[0].startswith("password-hash")
+
+
+def test_queue_limit_sheds_load(monkeypatch):
+    monkeypatch.setenv("JARVIS_PASSWORD_QUEUE_MAX", "2")
+    monkeypatch.setenv("JARVIS_PASSWORD_ITERATIONS", "200000")
+
+    async def storm():
+        return await asyncio.gather(*(auth.hash_password_async("x") for _ in range(5)), return_exceptions=True)
+
+    results = asyncio.run(storm())
+    busy = [r for r in results if isinstance(r, auth.PasswordHashBusy)]
+    assert len(busy) == 3
+    assert auth._hash_pending == 0
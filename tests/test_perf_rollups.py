@@ -0,0 +1,113 @@
+import random
+from datetime import datetime, timezone
+
+import pytest
+from fastapi.testclient import TestClient
+
+from jarvis import perf_rollups
+from jarvis.db import get_conn
+from jarvis.perf_rollups import LatencySketch
+
+
+@pytest.fixture
+def db(tmp_path, monkeypatch):
+    monkeypatch.setenv("JARVIS_DB_PATH", str(tmp_path / "db.sqlite"))
+    return tmp_path
+
+
+def _iso(ts: float) -> str:
+    return datetime.fromtimestamp(ts, tz=timezone.utc).isoformat()
+
+
+def _insert_tool(ts: float, name: str, latency: float, success: bool = True) -> None:
+    with get_conn() as conn:
+        conn.execute(
+            "INSERT INTO tool_audit (timestamp, user_id, session_id, tool_name, args_redacted, success, latency_ms) "
+            "VALUES (?, 1, 's', ?, '{}', ?, ?)",
+            (_iso(ts), name, 1 if success else 0, latency),
+        )
+
+
+def _insert_perf(ts: float, total: float) -> None:
+    with get_conn() as conn:
+        conn.execute(
+            "INSERT INTO performance_metrics (timestamp, user_id, total_request_ms, llm_call_ms) VALUES (?, 'u', ?, ?)",
+            (_iso(ts), total, total / 2),
+        )
+
+
+def test_sketch_quantiles_are_within_relative_error_and_mergeable():
+    rng = random.Random(7)
+    values = [rng.lognormvariate(6, 1) for _ in range(5000)]
+    left, right = LatencySketch(), LatencySketch()
+    for i, v in enumerate(values):
+        (left if i % 2 else right).add(v)
+    left.merge(LatencySketch.from_json(right.to_json()))
+    values.sort()
+    for q in (0.5, 0.95, 0.99):
+        exact = values[int(q * (len(values) - 1))]
+        assert abs(left.quantile(q) - exact) / exact < 0.03
+    assert left.count == 5000
+
+
+def test_rollup_is_incremental_and_summary_uses_buckets(db):
+    now = 1_800_000_000.0
+    for i in range(50):
+        _insert_tool(now - 120 + i, "weather_now", 100.0 + i, success=i % 10 != 0)
+    assert perf_rollups.rollup_source("tool") == 50
+    assert perf_rollups.rollup_source("tool") == 0
+
+    _insert_tool(now - 30, "weather_now", 1000.0)
+    assert perf_rollups.rollup_source("tool") == 1
+
+    out = perf_rollups.summary("tool", since_hours=1, now=now)
+    stats = out["series"]["weather_now"]
+    assert out["resolution"] == "minute"
+    assert stats["count"] == 51
+    assert stats["errors"] == 5
+    assert 110 < stats["p50_ms"] < 140
+    assert stats["p99_ms"] > 140
+
+    hourly = perf_rollups.summary("tool", since_hours=24, now=now)
+    assert hourly["resolution"] == "hour"
+    assert hourly["series"]["weather_now"]["count"] == 51
+
+
+def test_prune_only_drops_rolled_up_raw_rows(db, monkeypatch):
+    now = datetime.now(timezone.utc).timestamp()
+    old = now - 10 * 86400
+    _insert_perf(old, 500.0)
+    perf_rollups.rollup_source("perf")
+    _insert_perf(old, 700.0)  # arrived after the rollup ran
+
+    monkeypatch.setenv("JARVIS_METRICS_RAW_RETENTION_DAYS", "7")
+    deleted = perf_rollups.prune(now)
+    assert deleted["performance_metrics"] == 1
+    with get_conn() as conn:
+        assert conn.execute("SELECT COUNT(*) FROM performance_metrics").fetchone()[0] == 1
+
+    result = perf_rollups.run_maintenance(now)
+    assert result["rolled_up"]["perf"] == 1
+    with get_conn() as conn:
+        assert conn.execute("SELECT COUNT(*) FROM performance_metrics").fetchone()[0] == 0
+    series = perf_rollups.summary("perf", since_hours=24 * 30, now=now)["series"]
+    assert series["total_request_ms"]["count"] == 2
+
+
+def test_admin_perf_endpoints(db):
+    from jarvis.server import app
+
+    now = datetime.now(timezone.utc).timestamp()
+    _insert_tool(now - 5, "news_search", 250.0)
+    perf_rollups.run_maintenance()
+    client = TestClient(app)
+    assert client.get("/admin/perf/summary?source=tool").status_code in (401, 403)
+    headers = {"Authorization": "Bearer devkey"}
+    resp = client.get("/admin/perf/summary?source=tool&since_hours=1", headers=headers)
+    assert resp.status_code == 200
+    assert resp.json()["series"]["news_search"]["count"] == 1
+    points = client.get(
+        "/admin/perf/timeseries?source=tool&series=news_search&since_hours=1", headers=headers
+    ).json()["points"]
+    assert len(points) == 1 and points[0]["count"] == 1
+    assert client.get("/admin/perf/summary?source=nope", headers=headers).status_code == 400
@@ -0,0 +1,71 @@
+import threading
+import time
+
+import pytest
+from fastapi.testclient import TestClient
+
+from jarvis import profiler
+from jarvis.tracing import span, start_trace
+
+
+def _busy_loop(stop: threading.Event) -> None:
+    while not stop.is_set():
+        sum(i * i for i in range(500))
+
+
+def _traced_worker(stop: threading.Event) -> None:
+    with start_trace("hot-trace"), span("agent.turn", "agent"):
+        _busy_loop(stop)
+
+
+def test_sampler_collapses_stacks_and_attributes_traces():
+    stop = threading.Event()
+    worker = threading.Thread(target=_traced_worker, args=(stop,), name="busy-worker")
+    worker.start()
+    try:
+        time.sleep(0.05)
+        sampler = profiler.profile(0.3, interval=0.005)
+    finally:
+        stop.set()
+        worker.join()
+
+    assert sampler.samples > 10
+    lines = sampler.collapsed().splitlines()
+    hot = [line for line in lines if line.startswith("busy-worker;trace:hot-trace;")]
+    assert hot, lines[:5]
+    assert any("test_profiler:_busy_loop" in line for line in hot)
+    stack, count = hot[0].rsplit(" ", 1)
+    assert int(count) > 0
+    assert sampler.by_trace()["hot-trace"] > 0
+
+
+def test_only_one_profile_at_a_time():
+    started = threading.Event()
+    result = {}
+
+    def run():
+        started.set()
+        result["sampler"] = profiler.profile(0.3, interval=0.01)
+
+    t = threading.Thread(target=run)
+    t.start()
+    started.wait()
+    time.sleep(0.05)
+    with pytest.raises(profiler.ProfilerBusy):
+        profiler.profile(0.01)
+    t.join()
+    assert result["sampler"].samples > 0
+
+
+def test_profile_endpoint():
+    from jarvis.server import app
+
+    client = TestClient(app)
+    assert client.post("/admin/profile?seconds=0.1").status_code in (401, 403)
+    headers = {"Authorization": "Bearer devkey"}
+    resp = client.post("/admin/profile?seconds=0.1&interval_ms=5&format=json&include_idle=true", headers=headers)
+    assert resp.status_code == 200
+    body = resp.json()
+    assert body["samples"] > 0
+    assert body["collapsed"].strip()
+    assert client.post("/admin/profile?seconds=0.1&format=svg", headers=headers).status_code == 400
@@ -0,0 +1,66 @@
+import asyncio
+import threading
+import time
+
+from jarvis.agent_core import rag_async
+from jarvis.code_rag import search as code_search
+
+
+def _setup(monkeypatch, delay=0.05):
+    monkeypatch.setenv("JARVIS_ENABLE_RAG", "1")
+    monkeypatch.setattr(rag_async, "_rag_futures", rag_async.RAGFutures())
+    calls = []
+
+    def fake_search(prompt, **kwargs):
+        calls.append(threading.current_thread().name)
+        time.sleep(delay)
+        return [f"hit:{prompt}"]
+
+    monkeypatch.setattr(code_search, "search_code", fake_search)
+    return calls
+
+
+def test_identical_requests_share_one_pooled_execution(monkeypatch):
+    calls = _setup(monkeypatch)
+    first = rag_async.retrieve_code_rag_async("q", "hash-1")
+    second = rag_async.retrieve_code_rag_async("q", "hash-1")
+    assert first is second
+    assert rag_async.get_code_rag_results("hash-1", max_wait=2) == ["hit:q"]
+    assert rag_async.wait_for_code_rag_results("hash-1", timeout=0) == ["hit:q"]  # kept for late readers
+    assert len(calls) == 1
+    assert calls[0].startswith("code-rag")
+
+
+def test_sync_wait_times_out_and_cancellation_returns_empty(monkeypatch):
+    _setup(monkeypatch, delay=0.3)
+    rag_async.retrieve_code_rag_async("slow", "hash-2")
+    started = time.monotonic()
+    assert rag_async.get_code_rag_results("hash-2", max_wait=0.05) == []
+    assert time.monotonic() - started < 0.25
+    assert rag_async.get_code_rag_results("unknown", max_wait=1) == []
+
+    import jarvis.server as server
+
+    monkeypatch.setattr(server, "check_stream_cancelled_sync", lambda trace_id: trace_id == "t-cancel")
+    assert rag_async.get_code_rag_results("hash-2", max_wait=1, trace_id="t-cancel") == []
+
+
+def test_await_results_from_async_code(monkeypatch):
+    _setup(monkeypatch)
+    rag_async.retrieve_code_rag_async("async", "hash-3")
+
+    async def main():
+        timed_out = await rag_async.await_code_rag_results("hash-3", timeout=0.001)
+        result = await rag_async.await_code_rag_results("hash-3", timeout=2)
+        return timed_out, result
+
+    timed_out, result = asyncio.run(main())
+    assert timed_out == []
+    assert result == ["hit:async"]  # the early timeout did not cancel the shared retrieval
+
+
+def test_disabled_rag_resolves_immediately(monkeypatch):
+    monkeypatch.delenv("JARVIS_ENABLE_RAG", raising=False)
+    monkeypatch.setattr(rag_async, "_rag_futures", rag_async.RAGFutures())
+    future = rag_async.retrieve_code_rag_async("q", "hash-4")
+    assert future.done() and future.result() == []
@@ -0,0 +1,130 @@
+import asyncio
+import uuid
+from datetime import datetime, timedelta, timezone
+
+from jarvis import events, notes, reminder_scheduler
+from jarvis.auth import register_user
+from jarvis.db import get_conn
+from jarvis.notifications.store import list_notifications
+
+
+def _user(tmp_path, monkeypatch):
+    monkeypatch.setenv("JARVIS_DB_PATH", str(tmp_path / "r.db"))
+    name = f"rem-{uuid.uuid4().hex[:8]}"
+    register_user(name, "password123", email=f"{name}@example.com")
+    with get_conn() as conn:
+        return conn.execute("SELECT id FROM users WHERE username = ?", (name,)).fetchone()["id"]
+
+
+def test_note_stages():
+    expires = datetime(2026, 10, 20, 12, tzinfo=timezone.utc)
+    assert reminder_scheduler.note_stage(expires, expires - timedelta(hours=30)) == 0
+    assert reminder_scheduler.note_stage(expires, expires - timedelta(hours=20)) == 1
+    assert reminder_scheduler.note_stage(expires, expires - timedelta(hours=1)) == 3
+    assert reminder_scheduler.next_note_due(expires, 1) == expires - timedelta(hours=12)
+    assert reminder_scheduler.next_note_due(expires, 3) is None
+
+
+def test_rebuild_and_fire_claims_once(tmp_path, monkeypatch):
+    user_id = _user(tmp_path, monkeypatch)
+    now = datetime.now(timezone.utc)
+    due = notes.add_reminder(user_id, "ring mor", (now - timedelta(minutes=1)).isoformat())
+    later = notes.add_reminder(user_id, "senere", (now + timedelta(days=1)).isoformat())
+    note = notes.add_note(user_id, "betal regning", expires_at=(now + timedelta(hours=5)).isoformat(), remind_enabled=True)
+
+    first, second = reminder_scheduler.ReminderScheduler(), reminder_scheduler.ReminderScheduler()
+    assert first.rebuild() == second.rebuild() == 3
+    keys = first.pop_due(now.timestamp())
+    assert set(keys) == {("reminder", due["id"]), ("note", note["id"])}
+    assert ("reminder", later["id"]) not in keys
+
+    for key in keys:
+        assert first.fire(key)
+        assert not second.fire(key)  # the other worker lost the claim
+
+    # The unshown state lives in the DB, so any worker's chat turn sees it.
+    assert [r["content"] for r in reminder_scheduler.due_reminders(user_id)] == ["ring mor"]
+    assert [n["stage"] for n in reminder_scheduler.take_note_reminders(user_id)] == [2]
+    assert reminder_scheduler.take_note_reminders(user_id) == []
+    assert {n["title"] for n in list_notifications(user_id)} == {"Påmindelse", "Påmindelse om note"}
+    # The 2h stage of the note is queued next.
+    assert first.next_due() == (datetime.fromisoformat(note["expires_at"]) - timedelta(hours=2)).timestamp()
+
+    reminder_scheduler.acknowledge(user_id, [due["id"]])
+    assert reminder_scheduler.due_reminders(user_id) == []
+
+
+def test_reads_fire_due_entries_without_scheduler(tmp_path, monkeypatch):
+    user_id = _user(tmp_path, monkeypatch)
+    now = datetime.now(timezone.utc)
+    notes.add_reminder(user_id, "tag medicin", (now - timedelta(minutes=5)).isoformat())
+    notes.add_reminder(user_id, "i morgen", (now + timedelta(days=1)).isoformat())
+    notes.add_note(user_id, "aflever bog", expires_at=(now + timedelta(hours=1)).isoformat(), remind_enabled=True)
+
+    assert [r["content"] for r in reminder_scheduler.due_reminders(user_id)] == ["tag medicin"]
+    assert [n["stage"] for n in reminder_scheduler.take_note_reminders(user_id)] == [3]
+    assert [r["content"] for r in notes.list_reminders(user_id)] == ["i morgen"]
+
+
+def test_running_scheduler_follows_writes(tmp_path, monkeypatch):
+    user_id = _user(tmp_path, monkeypatch)
+    seen = []
+    unsubscribe = events.subscribe("reminder.due", lambda _type, payload: seen.append(payload))
+
+    async def drive():
+        task = reminder_scheduler.start()
+        await asyncio.sleep(0.1)
+        soon = (datetime.now(timezone.utc) + timedelta(milliseconds=200)).isoformat()
+        notes.add_reminder(user_id, "strækøvelser", soon)
+        gone = notes.add_note(user_id, "slettes", expires_at=soon, remind_enabled=True)
+        notes.delete_note(user_id, gone["id"])
+        await asyncio.sleep(0.6)
+        due = reminder_scheduler.due_reminders(user_id)
+        reminder_scheduler.stop()
+        await asyncio.gather(task, return_exceptions=True)
+        return due
+
+    try:
+        due = asyncio.run(drive())
+    finally:
+        unsubscribe()
+    assert [r["content"] for r in due] == ["strækøvelser"]
+    assert [p["kind"] for p in seen] == ["reminder"]
+    assert notes.list_reminders(user_id) == []
+
+
+def test_turn_reads_skip_the_db_until_something_is_delivered(tmp_path, monkeypatch):
+    user_id = _user(tmp_path, monkeypatch)
+    scheduler = reminder_scheduler.ReminderScheduler()
+    monkeypatch.setattr(reminder_scheduler, "_scheduler", scheduler)
+    assert reminder_scheduler.due_reminders(user_id) == []  # first turn after startup checks once
+    assert reminder_scheduler.take_note_reminders(user_id) == []
+
+    reads = []
+    real_get_conn = reminder_scheduler.get_conn
+
+    def counting_get_conn():
+        reads.append(1)
+        return real_get_conn()
+
+    monkeypatch.setattr(reminder_scheduler, "get_conn", counting_get_conn)
+    assert reminder_scheduler.due_reminders(user_id) == []
+    assert reminder_scheduler.take_note_reminders(user_id) == []
+    assert reads == []
+
+    now = datetime.now(timezone.utc)
+    due = notes.add_reminder(user_id, "vand blomster", (now - timedelta(minutes=1)).isoformat())
+    assert scheduler.fire(("reminder", due["id"]))
+    reads.clear()
+    assert [r["content"] for r in reminder_scheduler.due_reminders(user_id)] == ["vand blomster"]
+    assert reminder_scheduler.take_note_reminders(user_id) == []
+    assert len(reads) == 1  # only the kind that was delivered is read
+
+    reminder_scheduler.acknowledge(user_id, [due["id"]])
+    assert reminder_scheduler.due_reminders(user_id) == []
+    reads.clear()
+    assert reminder_scheduler.due_reminders(user_id) == []
+    assert reads == []
+    scheduler.forget_unseen()  # resync: reminders fired by other workers are looked up again
+    assert reminder_scheduler.due_reminders(user_id) == []
+    assert len(reads) == 1
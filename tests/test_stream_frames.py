@@ -0,0 +1,85 @@
+import asyncio
+import json
+import threading
+import time
+
+from jarvis import events
+from jarvis.stream_frames import NdjsonFrames, StreamThroughput
+import jarvis.server as server
+
+
+def test_pre_encoded_token_frames_match_ndjson_helper():
+    frames = NdjsonFrames("chatcmpl-1", trace_id="t1", session_id="s1")
+    for token in ["hello", 'quote " and \\ slash', "æøå ✓\n", ""]:
+        expected = server._ndjson_token(token, stream_id="chatcmpl-1", trace_id="t1", session_id="s1")
+        assert frames.token(token) == expected
+        assert json.loads(frames.token(token))["content"] == token
+    assert NdjsonFrames(None).token("x") == server._ndjson_token("x")
+    assert frames.done("success") == server._ndjson_done(reason="success", stream_id="chatcmpl-1", trace_id="t1", session_id="s1")
+
+
+def test_event_queue_wakes_on_publish_from_another_thread():
+    events.reset_for_tests()
+
+    async def main():
+        queue = await events.subscribe_async(["agent.stream.delta"], session_filter="s-q")
+        other = await events.subscribe_async(["agent.stream.delta"], session_filter="s-other")
+
+        def produce():
+            time.sleep(0.05)
+            for i in range(100):
+                events.publish("agent.stream.delta", {"session_id": "s-q", "token": str(i)})
+
+        started = time.monotonic()
+        threading.Thread(target=produce).start()
+        received = []
+        while len(received) < 100:
+            batch = await queue.drain(timeout=2)
+            assert batch, "drain timed out"
+            received.extend(payload["token"] for _, payload in batch)
+        waited = time.monotonic() - started
+        queue.cleanup()
+        other.cleanup()
+        return received, other.empty(), waited
+
+    received, other_empty, waited = asyncio.run(main())
+    assert received == [str(i) for i in range(100)]
+    assert other_empty  # routed by session, not fanned out
+    assert waited < 1.0
+    assert not events._session_subs.get("agent.stream.delta")
+
+
+def test_chat_tokens_use_one_long_lived_flusher():
+    events.reset_for_tests()
+    flushed = []
+    events.subscribe("chat.token", lambda _t, payload: flushed.append(payload["token"]))
+
+    async def main():
+        tasks = set()
+        for i in range(20):
+            events.publish("chat.token", {"request_id": "r1", "session_id": "s1", "token": f"t{i} "})
+            tasks.add(events._flush_tasks["r1"])
+            await asyncio.sleep(0.001)
+        await asyncio.sleep(events._MAX_BATCH_TIME_MS / 1000.0 * 2)
+        still_running = not events._flush_tasks["r1"].done()
+        events.publish("chat.end", {"request_id": "r1", "session_id": "s1"})
+        await asyncio.sleep(0)
+        return tasks, still_running
+
+    tasks, still_running = asyncio.run(main())
+    events.reset_for_tests()
+    assert len(tasks) == 1
+    assert still_running  # parked, waiting for the next token
+    assert "".join(flushed) == "".join(f"t{i} " for i in range(20))
+    assert len(flushed) < 20
+    assert "r1" not in events._chat_token_buffers and "r1" not in events._flush_tasks
+
+
+def test_stream_throughput_rate():
+    stats = StreamThroughput()
+    stats.record(0, 100, now=1.0)
+    stats.record(10, 500, now=2.0)
+    stats.record(10, 500, now=3.0)
+    assert stats.tokens == 20 and stats.bytes == 1100 and stats.writes == 3
+    assert stats.tokens_per_second() == 20.0
+    assert stats.finish()["tok_s"] == 20.0
@@ -1,6 +1,8 @@
 import subprocess
 
 from jarvis.watchers import test_watcher
+from jarvis.watchers.repo_watcher import PollingRepoWatcher
+from jarvis.watchers.test_impact import ImpactMap
 
 
 class DummyResult:
@@ -44,3 +46,101 @@ def test_run_pytest_failure(monkeypatch):
     assert events
     assert events[0][0] == "tests_failed"
     assert "Fejlede tests" in events[0][3]
+
+
+def _write(path, text):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(text, encoding="utf-8")
+    return path
+
+
+def _impact_repo(root):
+    _write(root / "src" / "pkg" / "__init__.py", "")
+    _write(root / "src" / "pkg" / "core.py", "VALUE = 1\n")
+    _write(root / "src" / "pkg" / "api.py", "from .core import VALUE\n")
+    _write(root / "src" / "pkg" / "other.py", "OTHER = 2\n")
+    return {
+        "api": _write(root / "tests" / "test_api.py", "from pkg.api import VALUE\n\ndef test_api():\n    assert VALUE == 1\n"),
+        "core": _write(root / "tests" / "test_core.py", "from pkg import core\n\ndef test_core():\n    assert core.VALUE == 1\n"),
+        "other": _write(root / "tests" / "test_other.py", "import pkg.other\n\ndef test_other():\n    assert pkg.other.OTHER == 2\n"),
+    }
+
+
+def test_impact_map_follows_imports(tmp_path):
+    tests = _impact_repo(tmp_path)
+    impact = ImpactMap(tmp_path)
+    impact.build()
+
+    core = tmp_path / "src" / "pkg" / "core.py"
+    assert impact.affected_tests([core]) == [tests["core"], tests["api"]]  # direct importer first
+    assert impact.affected_tests([tmp_path / "src" / "pkg" / "other.py"]) == [tests["other"]]
+    assert len(impact.affected_tests([tmp_path / "src" / "pkg" / "__init__.py"])) == 3
+    assert impact.affected_tests([tmp_path / "tests" / "conftest.py"]) is None
+
+    # A new module and the test that imports it are linked on update.
+    new = _write(tmp_path / "src" / "pkg" / "extra.py", "X = 3\n")
+    new_test = _write(tmp_path / "tests" / "test_extra.py", "from pkg.extra import X\n")
+    assert impact.affected_tests([new, new_test]) == [new_test]
+
+
+def test_change_aware_watcher_runs_affected_then_full(tmp_path, monkeypatch):
+    tests = _impact_repo(tmp_path)
+    runs = []
+    watcher = test_watcher.ChangeAwareTestWatcher(tmp_path, user_id=1, full_interval_sec=3600, backend="polling")
+    monkeypatch.setattr(watcher, "scan_once", lambda targets=None: runs.append(targets))
+    watcher._changes.prime()
+
+    assert watcher.check_once() is None  # first check is a full run
+    assert watcher.check_once() == []
+    _write(tmp_path / "src" / "pkg" / "other.py", "OTHER = 3\n")
+    assert watcher.check_once() == [tests["other"]]
+    _write(tmp_path / "README.md", "docs only\n")
+    assert watcher.check_once() == []
+    assert runs == [None, [tests["other"]]]
+
+    watcher._last_full -= 3600
+    assert watcher.check_once() is None
+    assert runs[-1] is None
+
+
+def test_change_aware_watcher_switches_to_polling_on_watch_errors(tmp_path, monkeypatch):
+    import errno
+
+    _impact_repo(tmp_path)
+    runs = []
+    watcher = test_watcher.ChangeAwareTestWatcher(tmp_path, user_id=1, full_interval_sec=3600, backend="polling")
+    monkeypatch.setattr(watcher, "scan_once", lambda targets=None: runs.append(targets))
+    watcher._changes.prime()
+    assert watcher.check_once() is None
+
+    def broken():
+        raise OSError(errno.ENOSPC, "No space left on device")
+
+    failing = watcher._changes
+    monkeypatch.setattr(failing, "collect_changes", broken)
+    assert watcher.check_once() is None  # unknown changes: full run on the new watcher
+    assert watcher._changes is not failing
+    assert type(watcher._changes) is PollingRepoWatcher
+    assert watcher.check_once() == []
+    assert runs == [None, None]
+
+
+def test_failures_are_reported_while_the_run_is_in_progress(tmp_path, monkeypatch):
+    tests = _impact_repo(tmp_path)
+    _write(tmp_path / "tests" / "test_broken.py", "def test_broken():\n    assert 1 == 2\n")
+    _write(tmp_path / "pytest.ini", "[pytest]\npythonpath = src\n")
+    events = []
+
+    def fake_add_event(user_id, type, severity, title, body, meta=None):
+        events.append((type, meta))
+
+    monkeypatch.setattr(test_watcher, "add_event", fake_add_event)
+    monkeypatch.setattr(test_watcher, "search_code", lambda *args, **kwargs: [])
+    test_watcher._recent_events.clear()
+    watcher = test_watcher.PollingTestWatcher(tmp_path, user_id=1)
+    watcher.scan_once([tests["api"], tmp_path / "tests" / "test_broken.py"])
+
+    kinds = [kind for kind, _ in events]
+    assert kinds == ["test_failed", "test_run_failed"]
+    assert events[0][1]["nodeid"] == "tests/test_broken.py::test_broken"
+    assert events[1][1]["scope"] == "affected"
@@ -0,0 +1,76 @@
+import concurrent.futures
+
+from fastapi.testclient import TestClient
+
+from jarvis import tracing
+from jarvis.tracing import bind_context, export_chrome_trace, get_trace, span, start_trace
+
+
+def setup_function():
+    tracing.clear_traces()
+
+
+def test_span_is_noop_without_trace():
+    with span("orphan") as s:
+        assert s is None
+    assert tracing.list_traces() == []
+
+
+def test_nested_spans_follow_executor_hops():
+    pool = concurrent.futures.ThreadPoolExecutor(max_workers=1)
+
+    def work():
+        with span("inner", "tool"):
+            return tracing.current_trace_id()
+
+    with start_trace("t1"):
+        with span("outer", "agent") as outer:
+            seen = pool.submit(bind_context(work)).result()
+    pool.shutdown()
+
+    assert seen == "t1"
+    spans = {s.name: s for s in get_trace("t1")}
+    assert spans["inner"].parent_id == outer.span_id
+    assert spans["inner"].thread_id != spans["outer"].thread_id
+    assert spans["outer"].duration_us >= spans["inner"].duration_us
+
+
+def test_buffer_evicts_oldest_trace(monkeypatch):
+    monkeypatch.setenv("JARVIS_TRACE_BUFFER_SIZE", "2")
+    for tid in ("a", "b", "c"):
+        with start_trace(tid), span("turn"):
+            pass
+    assert [t["trace_id"] for t in tracing.list_traces()] == ["c", "b"]
+
+
+def test_chrome_export_format():
+    with start_trace("t2"):
+        try:
+            with span("boom", "db", table="users"):
+                raise RuntimeError("x")
+        except RuntimeError:
+            pass
+    data = export_chrome_trace("t2")
+    complete = [e for e in data["traceEvents"] if e["ph"] == "X"]
+    assert complete[0]["name"] == "boom"
+    assert complete[0]["cat"] == "db"
+    assert complete[0]["args"]["table"] == "users"
+    assert complete[0]["args"]["error"] == "RuntimeError"
+    assert any(e["ph"] == "M" and e["name"] == "thread_name" for e in data["traceEvents"])
+    assert export_chrome_trace("missing") is None
+
+
+def test_admin_trace_endpoints():
+    from jarvis.server import app
+
+    with start_trace("t3"), span("agent.turn", "agent"):
+        pass
+    client = TestClient(app)
+    assert client.get("/admin/traces/t3").status_code in (401, 403)
+    headers = {"Authorization": "Bearer devkey"}
+    listing = client.get("/admin/traces", headers=headers).json()
+    assert listing["traces"][0]["trace_id"] == "t3"
+    resp = client.get("/admin/traces/t3", headers=headers)
+    assert resp.status_code == 200
+    assert resp.json()["traceEvents"][0]["name"] == "agent.turn"
+    assert client.get("/admin/traces/nope", headers=headers).status_code == 404
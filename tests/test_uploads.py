@@ -0,0 +1,92 @@
+import uuid
+
+import pytest
+from fastapi.testclient import TestClient
+
+from jarvis import files
+from jarvis.auth import login_user, register_user
+
+
+@pytest.fixture
+def workspace(tmp_path, monkeypatch):
+    monkeypatch.setattr(files, "WORKSPACE_ROOT", tmp_path)
+    return tmp_path
+
+
+def _blobs(root):
+    return [p for p in (root / files.BLOB_DIR_NAME).glob("*/*") if p.parent.name != "tmp"]
+
+
+def test_identical_uploads_share_one_blob(workspace):
+    data = b"same bytes " * 1000
+    first = files.save_upload(900001, "alice", "a.txt", "text/plain", data)
+    second = files.save_upload(900002, "bob", "b.txt", "text/plain", data)
+
+    assert first["sha256"] == second["sha256"]
+    assert not first["deduplicated"] and second["deduplicated"]
+    path_a = files.safe_path("alice", f"uploads/{first['stored_name']}")
+    path_b = files.safe_path("bob", f"uploads/{second['stored_name']}")
+    assert path_a.read_bytes() == path_b.read_bytes() == data
+    assert path_a.stat().st_ino == path_b.stat().st_ino
+    assert len(_blobs(workspace)) == 1
+
+    assert files.delete_upload(900001, "alice", first["id"])
+    assert path_b.read_bytes() == data
+    assert len(_blobs(workspace)) == 1
+    assert files.delete_upload(900002, "bob", second["id"])
+    assert _blobs(workspace) == []
+
+
+def test_new_blob_survives_a_concurrent_orphan_sweep(workspace, monkeypatch):
+    real_replace = files.os.replace
+
+    def replace_then_sweep(src, dst):
+        real_replace(src, dst)
+        assert files.purge_orphan_blobs() == 0  # the sweep runs as the blob appears
+
+    with monkeypatch.context() as m:
+        m.setattr(files.os, "replace", replace_then_sweep)
+        info = files.save_upload(900005, "erin", "e.txt", "text/plain", b"fresh bytes")
+
+    assert files.safe_path("erin", f"uploads/{info['stored_name']}").read_bytes() == b"fresh bytes"
+    assert [p.stat().st_nlink for p in _blobs(workspace)] == [2]
+
+
+def test_write_file_does_not_modify_shared_blob(workspace):
+    data = b"original"
+    files.save_upload(900003, "carol", "shared.txt", "text/plain", data)
+    info = files.save_upload(900004, "dave", "shared.txt", "text/plain", data)
+    files.write_file("dave", f"uploads/{info['stored_name']}", "edited")
+
+    assert files.safe_path("dave", f"uploads/{info['stored_name']}").read_text() == "edited"
+    assert _blobs(workspace)[0].read_bytes() == data
+
+
+def test_upload_writer_aborts_past_limit(workspace):
+    writer = files.UploadWriter(max_bytes=10)
+    writer.write(b"12345")
+    with pytest.raises(files.UploadTooLarge):
+        writer.write(b"678901")
+    assert list((workspace / files.BLOB_DIR_NAME / "tmp").iterdir()) == []
+
+
+def test_upload_endpoint_streams_and_enforces_limit(workspace):
+    from jarvis.server import app
+
+    username = f"up-{uuid.uuid4().hex[:8]}"
+    register_user(username, "password123", email=f"{username}@example.com")
+    token = login_user(username, "password123")["token"]
+    client = TestClient(app)
+    headers = {"X-User-Token": token}
+
+    body = b"x" * (3 * files.UPLOAD_CHUNK_SIZE + 17)
+    resp = client.post("/files/upload", files={"file": ("big.bin", body)}, headers=headers)
+    assert resp.status_code == 200
+    info = resp.json()["file"]
+    assert info["size_bytes"] == len(body)
+    assert files.safe_path(username, f"uploads/{info['stored_name']}").stat().st_size == len(body)
+
+    too_big = b"y" * (10 * 1024 * 1024 + 1)
+    resp = client.post("/files/upload", files={"file": ("huge.bin", too_big)}, headers=headers)
+    assert resp.status_code == 413
+    assert len(_blobs(workspace)) == 1
@@ -182,4 +182,66 @@ class TestTranslateToDanishIfNeeded:
 
         text = "Colors: blue"
         result = _translate_to_danish_if_needed(text)
-        assert result == "Farver: blå"
\ No newline at end of file
+        assert result == "Farver: blå"
+
+class TestVisionImageCaching:
+    def _png_b64(self, size=(2048, 1024)):
+        Image = pytest.importorskip("PIL.Image")
+        import base64
+        import io
+
+        buf = io.BytesIO()
+        Image.new("RGB", size, (10, 120, 200)).save(buf, format="PNG")
+        return base64.b64encode(buf.getvalue()).decode("ascii")
+
+    def test_prepare_downscales_large_image(self, monkeypatch):
+        import base64
+        import io
+        from PIL import Image
+        from jarvis.agent_policy import vision_guard
+
+        vision_guard.clear_vision_caches()
+        monkeypatch.setenv("OLLAMA_VISION_MAX_SIDE", "512")
+        prepared, image_hash = vision_guard._prepare_vision_image(self._png_b64())
+        with Image.open(io.BytesIO(base64.b64decode(prepared))) as img:
+            assert max(img.size) == 512
+            assert img.format == "JPEG"
+        assert len(image_hash) == 64
+
+    def test_prepare_passes_through_undecodable_payload(self):
+        import base64
+        from jarvis.agent_policy import vision_guard
+
+        vision_guard.clear_vision_caches()
+        svg = base64.b64encode(b"<svg xmlns='http://www.w3.org/2000/svg'/>").decode("ascii")
+        prepared, _ = vision_guard._prepare_vision_image(svg)
+        assert prepared == svg
+
+    def test_retries_reuse_payload_and_result_is_cached(self, monkeypatch):
+        from jarvis.agent_policy import vision_guard
+        from jarvis.provider import ollama_client
+
+        vision_guard.clear_vision_caches()
+        monkeypatch.setenv("OLLAMA_VISION_MODEL", "llava:test")
+        replies = iter([
+            "Farver: blå\nFormer: rektangel\nObjekter: hav\nAntal: 1\nPlacering: centrum",
+            "Farver: blå\nFormer: rektangel\nObjekter: båd\nAntal: 1\nPlacering: centrum",
+        ])
+        sent_images = []
+
+        def fake_request(url, payload, **kwargs):
+            sent_images.append(payload["images"][0])
+            return {"ok": True, "data": {"response": next(replies)}}
+
+        monkeypatch.setattr(ollama_client, "ollama_request", fake_request)
+        b64 = self._png_b64()
+        text, err = vision_guard._describe_image_ollama(b64, is_admin=False, ui_lang="da")
+        assert err is None
+        assert "båd" in text
+        assert len(sent_images) == 2
+        assert sent_images[0] is sent_images[1]
+        assert len(sent_images[0]) < len(b64)
+
+        again, err = vision_guard._describe_image_ollama(b64, is_admin=False, ui_lang="da")
+        assert again == text
+        assert len(sent_images) == 2
@@ -272,3 +272,70 @@ passed 0/2
     assert "test_func" in result["body"]
     assert "test_other" in result["body"]
     assert "AssertionError" in result["query_terms"]
+
+
+@pytest.mark.skipif(not repo_watcher.inotify_available(), reason="inotify is Linux-only")
+def test_inotify_watcher_reports_exact_paths(tmp_path, monkeypatch):
+    events = []
+
+    def fake_add_event(user_id, type, title, body, severity="info", meta=None):
+        events.append((type, meta))
+
+    monkeypatch.setattr(repo_watcher, "add_event", fake_add_event)
+    monkeypatch.setattr(repo_watcher.PollingRepoWatcher, "_update_symbols", lambda self, changed: None)
+    repo = tmp_path / "repo"
+    (repo / "pkg").mkdir(parents=True)
+    (repo / "build").mkdir()
+    existing = repo / "pkg" / "old.py"
+    existing.write_text("x = 1\n", encoding="utf-8")
+    watcher = repo_watcher.InotifyRepoWatcher(repo_root=repo, user_id=1)
+    try:
+        watcher.prime()
+        assert watcher.poll_once() == set()
+
+        existing.write_text("x = 2\n", encoding="utf-8")
+        (repo / "build" / "gen.py").write_text("skip\n", encoding="utf-8")  # index_excludes pattern
+        (repo / "pkg" / "notes.bin").write_text("skip\n", encoding="utf-8")
+        (repo / "pkg" / "sub").mkdir()
+        created = repo / "pkg" / "sub" / "new.py"
+        created.write_text("y = 1\n", encoding="utf-8")
+        assert watcher.poll_once(timeout=1.0) == {existing, created}
+        assert events[0] == ("code_changed", {"paths": sorted([existing.as_posix(), created.as_posix()])})
+
+        (repo / "pkg" / "sub" / "new.py").unlink()
+        assert watcher.poll_once(timeout=1.0) == {created}
+
+        # After a queue overflow the next flush is a full rescan.
+        existing.write_text("x = 3\n", encoding="utf-8")
+        watcher._handle(-1, repo_watcher.IN_Q_OVERFLOW, b"")
+        assert watcher._collect() == {existing}
+    finally:
+        watcher.close()
+
+
+@pytest.mark.skipif(not repo_watcher.inotify_available(), reason="inotify is Linux-only")
+def test_inotify_watcher_falls_back_to_polling_when_rescan_fails(tmp_path, monkeypatch):
+    import errno
+
+    monkeypatch.setattr(repo_watcher, "add_event", lambda *args, **kwargs: None)
+    monkeypatch.setattr(repo_watcher.PollingRepoWatcher, "_update_symbols", lambda self, changed: None)
+    (tmp_path / "mod.py").write_text("x = 1\n", encoding="utf-8")
+    watcher = repo_watcher.InotifyRepoWatcher(repo_root=tmp_path, user_id=1, debounce_sec=0.0)
+    watcher.prime()
+    polled = []
+    reads = iter([[(-1, repo_watcher.IN_Q_OVERFLOW, b"")]])
+
+    def no_watches(path):
+        raise OSError(errno.ENOSPC, "No space left on device", str(path))
+
+    monkeypatch.setattr(watcher, "prime", lambda: None)
+    monkeypatch.setattr(watcher._inotify, "read", lambda timeout: next(reads, []))
+    monkeypatch.setattr(watcher._inotify, "add_watch", no_watches)
+    monkeypatch.setattr(watcher, "_poll_loop", lambda: polled.append(True))
+    watcher._run()  # overflow -> rescan -> ENOSPC -> polling
+    assert polled == [True]
+
+
+def test_create_repo_watcher_polling_backend(tmp_path):
+    watcher = repo_watcher.create_repo_watcher(tmp_path, 1, backend="polling")
+    assert type(watcher) is repo_watcher.PollingRepoWatcher